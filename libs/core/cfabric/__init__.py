@@ -11,10 +11,53 @@ Basic usage:
     ...     print(api.T.text(node))
 """
 
-from cfabric.core.fabric import Fabric
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
 from cfabric.core.config import VERSION, NAME, BANNER
-from cfabric.downloader import download, list_corpora, get_cache_dir
-from cfabric.results import NodeInfo, NodeList, SearchResult, FeatureInfo, CorpusInfo
+
+if TYPE_CHECKING:
+    from cfabric.core.fabric import Fabric
+    from cfabric.downloader import download, list_corpora, get_cache_dir
+    from cfabric.results import (
+        NodeInfo,
+        NodeList,
+        SearchResult,
+        FeatureInfo,
+        CorpusInfo,
+    )
+
+# Public names and the modules that define them.
+# They are imported on first access, so that `import cfabric` stays cheap:
+# the engine pulls in numpy, search and the compiler, the downloader pulls in
+# the HTTP stack.
+_LAZY = {
+    "Fabric": "cfabric.core.fabric",
+    "download": "cfabric.downloader",
+    "list_corpora": "cfabric.downloader",
+    "get_cache_dir": "cfabric.downloader",
+    "NodeInfo": "cfabric.results",
+    "NodeList": "cfabric.results",
+    "SearchResult": "cfabric.results",
+    "FeatureInfo": "cfabric.results",
+    "CorpusInfo": "cfabric.results",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY))
+
 
 __version__ = VERSION
 __all__ = [
@@ -17,10 +17,37 @@ The core API consists of:
 Based on Text-Fabric by Dirk Roorda.
 """
 
-from cfabric.core.fabric import Fabric
-from cfabric.core.api import Api
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
 from cfabric.core.config import VERSION, NAME, BANNER, OTYPE, OSLOTS, OTEXT, WARP
 
+if TYPE_CHECKING:
+    from cfabric.core.fabric import Fabric
+    from cfabric.core.api import Api
+
+# Imported on first access, see `cfabric.__getattr__`.
+_LAZY = {
+    "Fabric": "cfabric.core.fabric",
+    "Api": "cfabric.core.api",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY))
+
+
 __version__ = VERSION
 __all__ = [
     "Fabric",
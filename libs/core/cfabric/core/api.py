@@ -24,7 +24,6 @@ from cfabric.features.edge import EdgeFeatures
 from cfabric.features.computed import Computeds
 from cfabric.navigation.text import Text
 from cfabric.core.config import OTYPE, OSLOTS
-from cfabric.search.search import Search
 from cfabric.utils.logging import SILENT_D, DEEP, silentConvert
 
 logger = logging.getLogger(__name__)
@@ -476,13 +475,15 @@ class Api:
 
         needToLoad = set()
         loadedFeatures = set()
+        # Features of a .cfm corpus need no .tf file
+        cfmFeatures = set().union(*CF._cfmFeatureNames())
 
         for fName in sorted(flattenToSet(features)):
             fObj = CF.features.get(fName, None)
-            if not fObj:
+            if not fObj and fName not in cfmFeatures:
                 logger.warning(f'Cannot load feature "{fName}": not in dataset')
                 continue
-            if fObj.dataLoaded and (hasattr(F, fName) or hasattr(E, fName)):
+            if fObj and fObj.dataLoaded and (hasattr(F, fName) or hasattr(E, fName)):
                 loadedFeatures.add(fName)
             else:
                 needToLoad.add(fName)
@@ -580,6 +581,8 @@ def addText(api: Api) -> None:
 
 
 def addSearch(api: Api, silent: str = SILENT_D) -> None:
+    from cfabric.search.search import Search
+
     silent = silentConvert(silent)
     api.S = Search(api, silent)
     api.Search = api.S
@@ -153,13 +153,21 @@ The .cfm format stores features as memory-mapped numpy arrays for:
 
 # Numpy dtypes for mmap format
 NODE_DTYPE = 'uint32'
-"""Dtype for node references."""
+"""Dtype for node references.
+
+Arrays whose node numbers do not fit are written as uint64 instead, see
+`cfabric.storage.csr.node_dtype`.
+"""
 
 RANK_DTYPE = 'uint32'
 """Dtype for rank/order arrays."""
 
 INDEX_DTYPE = 'uint32'
-"""Dtype for CSR indptr arrays."""
+"""Dtype for CSR indptr arrays.
+
+Arrays with more entries than it can count get uint64 row pointers, see
+`cfabric.storage.csr.index_dtype`.
+"""
 
 TYPE_DTYPE = 'uint8'
 """Dtype for node type indices (supports up to 255 types)."""
@@ -10,7 +10,9 @@ This module defines `Fabric`, which provides:
 """
 
 import collections
+import functools
 import logging
+import threading
 from itertools import chain
 from collections.abc import Iterable
 from typing import Any
@@ -49,7 +51,9 @@ from cfabric.precompute.prepare import (
     characters,
     sections,
     sectionsFromApi,
+    sectionsFromJson,
     structure,
+    structureFromJson,
 )
 from cfabric.features.computed import (
     Computed,
@@ -59,12 +63,13 @@ from cfabric.features.computed import (
     LevDownComputed,
 )
 from cfabric.storage.mmap_manager import MmapManager
-from cfabric.io.compiler import Compiler, compile_corpus
-from cfabric.storage.csr import CSRArray
+from cfabric.storage.pack import PACK_SUFFIX
 from cfabric.storage.string_pool import StringPool, IntFeatureArray
+from cfabric.features.lazy import LazyFeature
 from cfabric.features.node import NodeFeature
+from cfabric.features.stats import FeatureStats
 from cfabric.features.edge import EdgeFeature
-from cfabric.features.warp.otype import OtypeFeature
+from cfabric.features.warp.otype import OtypeFeature, otype_support
 from cfabric.features.warp.oslots import OslotsFeature
 from cfabric.core.api import (
     Api,
@@ -318,6 +323,8 @@ class Fabric:
             by the current API.
             Meant to be able to dynamically load features without reloading lots
             of features for nothing.
+            If the corpus has been loaded from .cfm format, the features are
+            memory-mapped from there as well.
         silent: string, optional "auto"
             Verbosity level: "verbose", "auto", "terse", or "deep"
 
@@ -333,6 +340,10 @@ class Fabric:
         set_logging_level(silent)
         featuresOnly = self.featuresOnly
 
+        # Features added to an API loaded from .cfm come from .cfm as well
+        if add and getattr(self, '_loaded_from_cfm', False):
+            return self._addFeaturesFromCfm(features)
+
         # Try to load from .cfm format first (if not adding to existing API)
         if not add:
             cfm_path = self._detect_cfm()
@@ -575,31 +586,106 @@ class Fabric:
             return api
 
         if getattr(self, '_loaded_from_cfm', False):
-            # Load all features from cfm
+            # Make all features from cfm available; each one is loaded
+            # on first use
             mmap_mgr = self._cfm_mmap_mgr
             meta = mmap_mgr.meta
             node_features = meta.get('features', {}).get('node', [])
-            logger.info(f"Loading {len(node_features)} node features from .cfm")
+            logger.info(f"Registering {len(node_features)} node features from .cfm")
             for fname in node_features:
-                self._loadNodeFeatureFromCfm(api, mmap_mgr, fname)
-                logger.info(f"  Loaded {fname}, hasattr={hasattr(api.F, fname)}")
+                self._addLazyFeatureFromCfm(api, mmap_mgr, fname)
             edge_features = meta.get('features', {}).get('edge', [])
-            logger.info(f"Loading {len(edge_features)} edge features from .cfm")
+            logger.info(f"Registering {len(edge_features)} edge features from .cfm")
             for fname in edge_features:
-                self._loadEdgeFeatureFromCfm(api, mmap_mgr, fname)
+                self._addLazyFeatureFromCfm(api, mmap_mgr, fname, is_edge=True)
         else:
             allFeatures = self.explore(silent=silent, show=True)
             loadableFeatures = allFeatures["nodes"] + allFeatures["edges"]
             self.load(loadableFeatures, add=True, silent=silent)
 
-        # Compute sections (requires section features to be loaded)
-        if getattr(self, 'sectionsOK', False) and hasattr(self, 'sectionTypes'):
+        # Compute sections (requires section features to be loaded),
+        # unless they have been loaded from .cfm
+        if (
+            getattr(self, 'sectionsOK', False)
+            and hasattr(self, 'sectionTypes')
+            and getattr(api.C, 'sections', None) is None
+        ):
             sections_data = sectionsFromApi(api, self.sectionTypes, self.sectionFeats)
             if sections_data:
                 setattr(api.C, 'sections', Computed(api, sections_data))
 
         return api
 
+    def warm(
+        self,
+        features: bool | str | Iterable[str] = True,
+        computed: bool | str | Iterable[str] = True,
+        wait: bool = False,
+    ) -> list[threading.Thread]:
+        """Prefetch memory-mapped corpus data in background threads.
+
+        After a (re)start, the first queries pay for reading the arrays
+        they touch from disk. Warming pulls chosen arrays into the page
+        cache ahead of time, so cold-start latency is paid up front and
+        in the background.
+
+        Only corpora loaded from .cfm are memory-mapped; for others this
+        does nothing.
+
+        Parameters
+        ----------
+        features: boolean | string | iterable, optional True
+            Loaded node and edge features to warm (including `otype` and
+            `oslots`): `True` for all, `False` for none, or names as an
+            iterable or a comma/space separated string.
+            `True` skips features that have not been used yet (see
+            `cfabric.features.lazy`); features named explicitly are loaded
+            first
+        computed: boolean | string | iterable, optional True
+            Computed data to warm (`rank`, `order`, `levUp`, `levDown`,
+            `boundary`), given in the same way as `features`
+        wait: boolean, optional False
+            Block until the warmup is complete
+
+        Returns
+        -------
+        list of threading.Thread
+            The background threads; join them to wait for completion
+        """
+        mmap_mgr = getattr(self, '_cfm_mmap_mgr', None)
+        api = getattr(self, 'api', None)
+        if mmap_mgr is None or api is None:
+            return []
+
+        def names(spec: bool | str | Iterable[str], available: list[str]) -> list[str]:
+            if spec is True:
+                return available
+            if spec is False:
+                return []
+            return [n for n in fitemize(spec) if n in available]
+
+        data: list[Any] = []
+        nodeFeatures = [n for n in dir(api.F) if not n.startswith('_')]
+        edgeFeatures = [n for n in dir(api.E) if not n.startswith('_')]
+        for fName in names(features, nodeFeatures + edgeFeatures):
+            fObj = getattr(api.F, fName, None) or getattr(api.E, fName)
+            if features is True and isinstance(fObj, LazyFeature):
+                continue
+            data.append(getattr(fObj, '_data', None))
+            data.append(getattr(fObj, '_dataInv', None))
+        for cName in names(
+            computed, ['rank', 'order', 'levUp', 'levDown', 'boundary']
+        ):
+            cObj = getattr(api.C, cName, None)
+            if cObj is not None:
+                data.append(cObj.data)
+
+        threads = mmap_mgr.warm(data)
+        if wait:
+            for thread in threads:
+                thread.join()
+        return threads
+
     def save(
         self,
         nodeFeatures: NodeFeatureDict | None = None,
@@ -1081,16 +1167,31 @@ class Fabric:
         Returns
         -------
         Path | None
-            Path to the .cfm/{CFM_VERSION}/ directory if it exists, else None.
+            Path to the .cfm/{CFM_VERSION}/ directory if it exists, else
+            to the packed .cfm/{CFM_VERSION}.cfmpack file if that exists,
+            else None.
         """
         for loc in self.locations:
             for mod in self.modules:
                 cfm_path = Path(loc) / mod / '.cfm' / CFM_VERSION
                 if (cfm_path / 'meta.json').exists():
                     return cfm_path
+                pack_path = cfm_path.with_suffix(PACK_SUFFIX)
+                if pack_path.exists():
+                    return pack_path
         return None
 
-    def compile(self, output_dir: str | None = None, silent: str = SILENT_D) -> bool:
+    def compile(
+        self,
+        output_dir: str | None = None,
+        silent: str = SILENT_D,
+        postings: bool = False,
+        compress: bool = False,
+        pack: bool = False,
+        incremental: bool = True,
+        workers: int = 1,
+        memory_budget: int | None = None,
+    ) -> bool:
         """Compile .tf files to .cfm mmap format.
 
         Compiles Text-Fabric source files into the Context Fabric memory-mapped
@@ -1106,6 +1207,36 @@ class Fabric:
             Output directory for .cfm files. Defaults to {source}/.cfm/{CFM_VERSION}/
         silent : str
             Silence level
+        postings : bool, optional
+            Also write inverted postings indexes (value -> nodes in canonical
+            order) for node features. They speed up `F.fff.s()` and feature
+            constraints in search at the cost of extra disk space.
+        compress : bool, optional
+            Store oslots, levUp, levDown and boundary in compressed CSR form
+            (interval runs / delta + bit-packing), which shrinks the largest
+            files of the corpus. Loading picks the format up transparently.
+        pack : bool, optional
+            Pack the compiled corpus into a single .cfm/{CFM_VERSION}.cfmpack
+            file instead of a directory of arrays. Loading opens one file
+            and maps it once, which speeds up startup on network and
+            overlay filesystems.
+        incremental : bool, optional
+            Reuse what is unchanged from the previous compilation: only
+            features whose .tf files changed are recompiled, and the
+            precomputed data only if otype, oslots or otext changed. The
+            compiled corpus is replaced as a whole when it is complete.
+        workers : int, optional
+            Number of processes that parse and compile features side by
+            side. Features are independent of each other once otype, oslots
+            and the precomputed data are in place; the output is the same
+            for any number of workers.
+        memory_budget : int, optional
+            Memory budget in bytes for compiling corpora that do not fit in
+            memory. The large sorts of the precomputation are then done
+            through temporary files next to the output, and oslots is read
+            back memory-mapped; the output is the same for any budget. It
+            applies when the .tf files are compiled without being loaded
+            first.
 
         Returns
         -------
@@ -1125,7 +1256,17 @@ class Fabric:
         # Gather precomputed data if available
         precomputed = self._gather_precomputed_data()
 
-        compiler = Compiler(source_dir)
+        from cfabric.io.compiler import Compiler
+
+        compiler = Compiler(
+            source_dir,
+            postings=postings,
+            compress=compress,
+            pack=pack,
+            incremental=incremental,
+            workers=workers,
+            memory_budget=memory_budget,
+        )
         result = compiler.compile(output_dir, precomputed=precomputed)
 
         return result
@@ -1289,7 +1430,10 @@ class Fabric:
         self._loadComputedFromCfm(api, mmap_mgr)
 
         # Setup otype support dict (needed for otype.s())
-        self._setupOtypeSupport(otype_feature, otype_arr, type_list_raw, max_slot, max_node)
+        self._setupOtypeSupport(
+            otype_feature, otype_arr, type_list_raw, max_slot,
+            mmap_mgr.meta.get('type_ranges'),
+        )
 
         # Setup otext-related attributes from meta.json
         meta = mmap_mgr.meta
@@ -1338,6 +1482,73 @@ class Fabric:
 
         return api
 
+    def _cfmFeatureNames(self) -> tuple[set[str], set[str]]:
+        """The node and edge features in the .cfm format the corpus is loaded from.
+
+        Both are empty if the corpus has not been loaded from .cfm format.
+        """
+        if not getattr(self, '_loaded_from_cfm', False):
+            return (set(), set())
+        features = self._cfm_mmap_mgr.meta.get('features', {})
+        return (set(features.get('node', [])), set(features.get('edge', [])))
+
+    def _addFeaturesFromCfm(self, features: str | Iterable[str]) -> bool:
+        """Load more features into the API of a corpus loaded from .cfm format.
+
+        Features that are loaded already are left as they are; features that
+        are only registered to be loaded on first use are loaded now.
+
+        Returns
+        -------
+        boolean
+            Whether all features are in the .cfm format.
+        """
+        api = self.api
+        mmap_mgr = self._cfm_mmap_mgr
+        (node_features, edge_features) = self._cfmFeatureNames()
+        good = True
+        for fname in sorted(fitemize(features)):
+            for owner in (api.F, api.E):
+                loaded = owner.__dict__.get(fname)
+                if loaded is not None and not isinstance(loaded, LazyFeature):
+                    break
+            else:
+                if fname in node_features:
+                    self._loadNodeFeatureFromCfm(api, mmap_mgr, fname)
+                elif fname in edge_features:
+                    self._loadEdgeFeatureFromCfm(api, mmap_mgr, fname)
+                else:
+                    logger.error(f'Feature "{fname}" not in {mmap_mgr.cfm_path}')
+                    good = False
+        return good
+
+    def _addLazyFeatureFromCfm(
+        self, api: Api, mmap_mgr: MmapManager, fname: str, is_edge: bool = False
+    ) -> None:
+        """Make a feature from .cfm format available, to be loaded on first use.
+
+        The metadata is registered right away, so that CF.features,
+        isLoaded and ensureLoaded see the feature as loaded.
+        """
+        owner = api.E if is_edge else api.F
+        if fname in owner.__dict__:
+            return
+        if is_edge:
+            try:
+                meta = mmap_mgr.get_json('edges', f'{fname}_meta')
+            except FileNotFoundError:
+                meta = {}
+            loader = self._loadEdgeFeatureFromCfm
+        else:
+            meta = self._feature_meta_from_cfm(mmap_mgr, fname)
+            loader = self._loadNodeFeatureFromCfm
+        self._register_feature_meta(fname, meta, is_edge=is_edge)
+        setattr(
+            owner,
+            fname,
+            LazyFeature(owner, fname, functools.partial(loader, api, mmap_mgr, fname)),
+        )
+
     def _feature_meta_from_cfm(self, mmap_mgr: MmapManager, fname: str) -> dict[str, str]:
         """Get feature metadata from .cfm directory."""
         try:
@@ -1345,6 +1556,10 @@ class Fabric:
         except FileNotFoundError:
             return {}
 
+    def _feature_stats_from_cfm(self, mmap_mgr: MmapManager, fname: str) -> FeatureStats:
+        """Get precompiled feature statistics from .cfm directory."""
+        return FeatureStats.from_dict(mmap_mgr.get_json('features', f'{fname}_stats'))
+
     def _register_feature_meta(
         self, fname: str, meta: dict[str, str], is_edge: bool = False
     ) -> None:
@@ -1390,9 +1605,13 @@ class Fabric:
 
         # Auto-preload embedding structures for fast queries
         # This trades ~100MB RAM for ~1.7x speedup on embedding queries
-        # Set CF_EMBEDDING_CACHE=off to disable
+        # Set CF_EMBEDDING_CACHE=off to disable, or CF_EMBEDDING_CACHE=shared
+        # to share one copy between all processes that load this corpus
         from cfabric.storage.csr import _EMBEDDING_CACHE_MODE
-        if _EMBEDDING_CACHE_MODE != 'off':
+        if _EMBEDDING_CACHE_MODE == 'shared':
+            api.C.levUp.preload(shared=mmap_mgr.shared_name('computed', 'levup'))
+            api.C.levDown.preload(shared=mmap_mgr.shared_name('computed', 'levdown'))
+        elif _EMBEDDING_CACHE_MODE != 'off':
             api.C.levUp.preload()
             api.C.levDown.preload()
 
@@ -1416,42 +1635,54 @@ class Fabric:
         except FileNotFoundError:
             pass
 
+        # Load section and structure indexes (memory-mapped arrays, or the
+        # JSON files of older compilations)
+        try:
+            sections_data = mmap_mgr.get_sections()
+        except FileNotFoundError:
+            try:
+                sections_data = sectionsFromJson(
+                    mmap_mgr.get_json('computed', 'sections')
+                )
+            except FileNotFoundError:
+                sections_data = None
+        if sections_data is not None:
+            setattr(api.C, 'sections', Computed(api, sections_data))
+
+        try:
+            structure_data = mmap_mgr.get_structure()
+        except FileNotFoundError:
+            try:
+                structure_data = structureFromJson(
+                    mmap_mgr.get_json('computed', 'structure')
+                )
+            except FileNotFoundError:
+                structure_data = None
+        if structure_data is not None:
+            setattr(api.C, 'structure', Computed(api, structure_data))
+
     def _setupOtypeSupport(
         self,
         otype_feature: OtypeFeature,
         otype_arr: np.ndarray,
         type_list: list[str],
         max_slot: int,
-        max_node: int,
+        type_ranges: dict[str, list[int]] | None = None,
     ) -> None:
-        """Setup the support dict for otype.s() method."""
-        import numpy as np
-
-        support = {}
-
-        # Slot type support
-        support[otype_feature.slotType] = (1, max_slot)
-
-        # Non-slot type supports
-        # Find min/max node for each type
-        type_mins = {}
-        type_maxs = {}
-
-        for i, type_idx in enumerate(otype_arr):
-            node = max_slot + 1 + i
-            type_name = type_list[type_idx]
-            if type_name not in type_mins:
-                type_mins[type_name] = node
-            type_maxs[type_name] = node
+        """Setup the support dict for otype.s() method.
 
-        for type_name in type_mins:
-            support[type_name] = (type_mins[type_name], type_maxs[type_name])
-
-        otype_feature.support = support
+        The ranges are recorded in meta.json by the compiler; corpora
+        compiled before that are scanned once with numpy.
+        """
+        if type_ranges:
+            otype_feature.support = {t: (b, e) for t, (b, e) in type_ranges.items()}
+        else:
+            otype_feature.support = otype_support(
+                otype_arr, type_list, otype_feature.slotType, max_slot
+            )
 
     def _loadNodeFeatureFromCfm(self, api: Api, mmap_mgr: MmapManager, fname: str) -> None:
         """Load a node feature from .cfm format."""
-        features_dir = mmap_mgr.cfm_path / 'features'
 
         # Get metadata
         try:
@@ -1461,14 +1692,29 @@ class Fabric:
 
         value_type = meta.get('value_type', 'str')
 
+        # Precompiled statistics are read on first use of F.fff.stats
+        stats_loader = None
+        if meta.get('stats'):
+            stats_loader = functools.partial(self._feature_stats_from_cfm, mmap_mgr, fname)
+
         if value_type == 'int':
             # Load integer feature
-            int_arr = IntFeatureArray.load(str(features_dir / f'{fname}.npy'), mmap_mode='r')
-            feature = NodeFeature(api, meta, int_arr)
+            # Narrowed arrays record their own missing sentinel, and
+            # range-layout arrays the number of leading nodes left out
+            int_arr = mmap_mgr.get_int_array(
+                fname,
+                missing=meta.get('missing', IntFeatureArray.MISSING),
+                offset=meta.get('offset', 0),
+            )
+            if meta.get('postings'):
+                int_arr.postings = mmap_mgr.get_postings(fname)
+            feature = NodeFeature(api, meta, int_arr, stats_loader)
         else:
             # Load string feature
-            str_pool = mmap_mgr.get_string_pool(fname)
-            feature = NodeFeature(api, meta, str_pool)
+            str_pool = mmap_mgr.get_string_pool(fname, offset=meta.get('offset', 0))
+            if meta.get('postings'):
+                str_pool.postings = mmap_mgr.get_postings(fname)
+            feature = NodeFeature(api, meta, str_pool, stats_loader)
 
         setattr(api.F, fname, feature)
 
@@ -1477,9 +1723,6 @@ class Fabric:
 
     def _loadEdgeFeatureFromCfm(self, api: Api, mmap_mgr: MmapManager, fname: str) -> None:
         """Load an edge feature from .cfm format."""
-        from cfabric.storage.csr import CSRArrayWithValues
-
-        edges_dir = mmap_mgr.cfm_path / 'edges'
 
         # Get metadata
         try:
@@ -1491,13 +1734,13 @@ class Fabric:
 
         if has_values:
             # Load edge with values (CSRArrayWithValues)
-            csr = CSRArrayWithValues.load(str(edges_dir / fname), mmap_mode='r')
-            inv_csr = CSRArrayWithValues.load(str(edges_dir / f'{fname}_inv'), mmap_mode='r')
+            csr = mmap_mgr.get_edge_csr(fname, values=True)
+            inv_csr = mmap_mgr.get_edge_csr(fname, inverse=True, values=True)
             feature = EdgeFeature(api, meta, csr, has_values, dataInv=inv_csr)
         else:
             # Load edge without values (CSRArray)
-            csr = CSRArray.load(str(edges_dir / fname), mmap_mode='r')
-            inv_csr = CSRArray.load(str(edges_dir / f'{fname}_inv'), mmap_mode='r')
+            csr = mmap_mgr.get_edge_csr(fname)
+            inv_csr = mmap_mgr.get_edge_csr(fname, inverse=True)
             feature = EdgeFeature(api, meta, csr, has_values, dataInv=inv_csr)
 
         setattr(api.E, fname, feature)
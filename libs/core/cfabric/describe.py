@@ -102,6 +102,7 @@ class FeatureDescription:
         node_types: List of node types this feature applies to
         unique_values: Number of unique values
         sample_values: Top values by frequency
+        value_range: For integer node features, the smallest and largest value
         has_values: For edge features, whether edges have values
         error: Error message if feature not found
     """
@@ -113,6 +114,7 @@ class FeatureDescription:
     node_types: list[str] = field(default_factory=list)
     unique_values: int = 0
     sample_values: list[dict[str, Any]] = field(default_factory=list)
+    value_range: list[int] | None = None
     has_values: bool | None = None
     error: str | None = None
 
@@ -129,6 +131,8 @@ class FeatureDescription:
         result["node_types"] = self.node_types
         result["unique_values"] = self.unique_values
         result["sample_values"] = self.sample_values
+        if self.value_range is not None:
+            result["value_range"] = self.value_range
         if self.has_values is not None:
             result["has_values"] = self.has_values
         return result
@@ -175,17 +179,20 @@ class FeatureDescription:
         # Try as node feature
         fobj = api.Fs(feature, warn=False)
         if fobj:
-            freq_list = fobj.freqList()
+            # Statistics hold the frequency list (precompiled for .cfm corpora)
+            stats = fobj.stats
             return cls(
                 name=feature,
                 kind="node",
                 value_type=value_type,
                 description=description,
                 node_types=node_types,
-                unique_values=len(freq_list),
+                unique_values=stats.distinct,
                 sample_values=[
-                    {"value": _convert(v), "count": int(c)} for v, c in freq_list[:sample_limit]
+                    {"value": _convert(v), "count": int(c)}
+                    for v, c in stats.histogram[:sample_limit]
                 ],
+                value_range=None if stats.min is None else [stats.min, stats.max],
             )
 
         # Try as edge feature
@@ -463,8 +470,9 @@ def _build_text_representations(api: Api) -> TextRepresentationInfo:
 def get_feature_otypes(api: Api, feature: str, samples_per_type: int = 100) -> list[str]:
     """Determine which node types a feature applies to.
 
-    Uses C.levels.data to efficiently sample each node type range
-    and check for non-null values.
+    Reads the per-type counts from the feature statistics when they are
+    precompiled; otherwise uses C.levels.data to efficiently sample each
+    node type range and check for non-null values.
 
     Parameters
     ----------
@@ -484,6 +492,10 @@ def get_feature_otypes(api: Api, feature: str, samples_per_type: int = 100) -> l
     if not f:
         return []
 
+    if f.hasStats:
+        counts = f.stats.types
+        return [ntype for ntype, *_ in api.C.levels.data if counts.get(ntype)]
+
     otypes = []
     # C.levels.data gives (type, avg_slots, min_node, max_node) for each type
     for ntype, _, min_node, max_node in api.C.levels.data:
@@ -601,7 +613,9 @@ def list_features(
     if node_types:
         for fname in api.Fall(warp=False):
             fobj = api.Fs(fname, warn=False)
-            if fobj:
+            if fobj and fobj.hasStats:
+                feature_node_types[fname] = set(fobj.stats.types)
+            elif fobj:
                 types_with_feature: set[str] = set()
                 for ntype, _, min_node, max_node in api.C.levels.data:
                     for node in range(int(min_node), min(int(min_node) + 10, int(max_node) + 1)):
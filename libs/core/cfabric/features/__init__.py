@@ -3,7 +3,9 @@
 This module provides access to node features, edge features, and computed data.
 """
 
+from cfabric.features.lazy import LazyFeature
 from cfabric.features.node import NodeFeature, NodeFeatures
+from cfabric.features.stats import FeatureStats
 from cfabric.features.edge import EdgeFeature, EdgeFeatures
 from cfabric.features.computed import (
     Computed,
@@ -19,6 +21,8 @@ from cfabric.features.warp.oslots import OslotsFeature
 __all__ = [
     "NodeFeature",
     "NodeFeatures",
+    "LazyFeature",
+    "FeatureStats",
     "EdgeFeature",
     "EdgeFeatures",
     "Computed",
@@ -24,10 +24,16 @@ so we have made it accessible in the `cfabric.computed.Computeds`-API.
 
 from __future__ import annotations
 
-from collections.abc import Iterator
+from collections.abc import Iterable, Iterator
 from typing import TYPE_CHECKING, Any
 
+import numpy as np
+
+from cfabric.storage.nodeset import as_node_array
+
 if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
     from cfabric.core.api import Api
     from cfabric.storage.csr import CSRArray
 
@@ -95,18 +101,50 @@ class LevUpComputed(Computed):
             return self.data.get_as_tuple(n - 1)
         return self.data[n - 1]
 
-    def preload(self) -> None:
+    def gather(
+        self, nodes: Iterable[int]
+    ) -> tuple[NDArray[np.int64], NDArray[np.int64], NDArray[np.int64]]:
+        """Embedders of many nodes in one vectorized operation.
+
+        Parameters
+        ----------
+        nodes : iterable of int
+            The nodes whose embedders are wanted
+
+        Returns
+        -------
+        tuple
+            `(embedders, offsets, node_ids)`: the embedders of the k-th node
+            are `embedders[offsets[k]:offsets[k + 1]]`, and `node_ids` tells
+            for every embedder which of the given nodes it embeds.
+        """
+        from cfabric.storage.csr import gather_rows
+
+        nodes = as_node_array(nodes)
+        embedders, offsets, rows = gather_rows(self.data, nodes - 1)
+        return embedders, offsets, rows + 1
+
+    def preload(self, shared: str | None = None) -> None:
         """Preload embedding data into RAM for faster queries.
 
         This caches the CSR data in memory, giving ~3x speedup on
         embedding queries (`]]` relation) at the cost of ~60MB RAM.
 
         Call `release()` to free the cached memory.
+
+        Parameters
+        ----------
+        shared : str, optional
+            Name of a shared-memory segment. If given, processes that
+            preload under the same name share one copy of the data.
         """
         from cfabric.storage.csr import CSRArray
 
         if isinstance(self.data, CSRArray):
-            self.data.preload_to_ram()
+            if shared is None:
+                self.data.preload_to_ram()
+            else:
+                self.data.preload_to_shared(shared)
 
     def release(self) -> None:
         """Release cached RAM, returning to memory-mapped access."""
@@ -147,18 +185,51 @@ class LevDownComputed(Computed):
             return self.data.get_as_tuple(idx)
         return self.data[idx]
 
-    def preload(self) -> None:
+    def gather(
+        self, nodes: Iterable[int]
+    ) -> tuple[NDArray[np.int64], NDArray[np.int64], NDArray[np.int64]]:
+        """Embeddees of many nodes in one vectorized operation.
+
+        Slots have no embeddees and contribute empty rows.
+
+        Parameters
+        ----------
+        nodes : iterable of int
+            The nodes whose embeddees are wanted
+
+        Returns
+        -------
+        tuple
+            `(embeddees, offsets, node_ids)`, as in `LevUpComputed.gather`.
+        """
+        from cfabric.storage.csr import gather_rows
+
+        shift = self.api.F.otype.maxSlot + 1
+        nodes = as_node_array(nodes)
+        embeddees, offsets, rows = gather_rows(self.data, nodes - shift)
+        return embeddees, offsets, rows + shift
+
+    def preload(self, shared: str | None = None) -> None:
         """Preload embedding data into RAM for faster queries.
 
         This caches the CSR data in memory, giving ~3x speedup on
         embedding queries (`[[` relation) at the cost of ~40MB RAM.
 
         Call `release()` to free the cached memory.
+
+        Parameters
+        ----------
+        shared : str, optional
+            Name of a shared-memory segment. If given, processes that
+            preload under the same name share one copy of the data.
         """
         from cfabric.storage.csr import CSRArray
 
         if isinstance(self.data, CSRArray):
-            self.data.preload_to_ram()
+            if shared is None:
+                self.data.preload_to_ram()
+            else:
+                self.data.preload_to_shared(shared)
 
     def release(self) -> None:
         """Release cached RAM, returning to memory-mapped access."""
@@ -138,12 +138,12 @@ class EdgeFeature:
             if isinstance(csr, CSRArrayWithValues):
                 indices, values = csr[i]
                 if len(indices) > 0:
-                    d = dict(zip(indices.tolist(), values.tolist()))
+                    d = dict(zip(indices, values))
                     result[n] = self._convert_dict_sentinels(d)
             else:
                 targets = csr[i]
                 if len(targets) > 0:
-                    result[n] = set(targets.tolist())
+                    result[n] = set(targets)
         return result
 
     def _materialize_inverse(self) -> dict[int, set[int] | dict[int, Any]]:
@@ -157,12 +157,12 @@ class EdgeFeature:
             if isinstance(csr, CSRArrayWithValues):
                 indices, values = csr[i]
                 if len(indices) > 0:
-                    d = dict(zip(indices.tolist(), values.tolist()))
+                    d = dict(zip(indices, values))
                     result[n] = self._convert_dict_sentinels(d)
             else:
                 sources = csr[i]
                 if len(sources) > 0:
-                    result[n] = set(sources.tolist())
+                    result[n] = set(sources)
         return result
 
     def _has_forward_edges(self, n: int) -> bool:
@@ -421,16 +421,10 @@ class EdgeFeature:
             result = set()
             inv_edges = self._get_inverse_edges(n)
             if inv_edges is not None:
-                if self._is_mmap:
-                    result |= set(inv_edges.tolist())
-                else:
-                    result |= inv_edges
+                result |= set(inv_edges)
             fwd_edges = self._get_forward_edges(n)
             if fwd_edges is not None:
-                if self._is_mmap:
-                    result |= set(fwd_edges.tolist())
-                else:
-                    result |= fwd_edges
+                result |= set(fwd_edges)
             return tuple(sorted(result, key=rank_key))
 
     def freqList(
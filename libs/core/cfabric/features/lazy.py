@@ -0,0 +1,54 @@
+"""
+# Features that load on first use
+
+`loadAll()` on a compiled corpus does not load every feature up front.
+It puts a `LazyFeature` on `F` or `E` for each feature instead. The
+placeholder is listed by `Fall()`/`Eall()` and returned by `Fs()`/`Es()`
+like a loaded feature; the first time any of its attributes is used, the
+feature is loaded and takes the place of the placeholder.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable
+from typing import Any
+
+_LOCK = threading.RLock()
+
+
+class LazyFeature:
+    """Placeholder for a feature that is loaded on first attribute access.
+
+    Parameters
+    ----------
+    owner : object
+        The `F` or `E` object the feature is an attribute of
+    name : str
+        Feature name
+    loader : callable
+        Loads the feature and sets it as attribute `name` of `owner`
+    """
+
+    __slots__ = ('_owner', '_name', '_loader')
+
+    def __init__(self, owner: Any, name: str, loader: Callable[[], None]) -> None:
+        self._owner = owner
+        self._name = name
+        self._loader = loader
+
+    def _resolve(self) -> Any:
+        """Load the feature if that has not happened yet, and return it."""
+        feature = self._owner.__dict__.get(self._name)
+        if feature is self:
+            with _LOCK:
+                if self._owner.__dict__.get(self._name) is self:
+                    self._loader()
+                feature = self._owner.__dict__[self._name]
+        return feature
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._resolve(), attr)
+
+    def __repr__(self) -> str:
+        return f"<feature {self._name} (not loaded yet)>"
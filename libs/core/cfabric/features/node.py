@@ -19,9 +19,10 @@ dictionary: `cfabric.nodefeature.NodeFeature.items`
 from __future__ import annotations
 
 import collections
-from collections.abc import Iterator
+from collections.abc import Callable, Iterator
 from typing import TYPE_CHECKING, Any
 
+from cfabric.features.stats import FeatureStats
 from cfabric.storage.string_pool import StringPool, IntFeatureArray
 from cfabric.utils.helpers import safe_rank_key
 
@@ -47,6 +48,7 @@ class NodeFeature:
         api: Api,
         metaData: dict[str, str],
         data: dict[int, str | int] | StringPool | IntFeatureArray,
+        stats_loader: Callable[[], FeatureStats] | None = None,
     ) -> None:
         self.api = api
         self.meta = metaData
@@ -59,6 +61,8 @@ class NodeFeature:
         self._data = data
         self._is_mmap = isinstance(data, (StringPool, IntFeatureArray))
         self._cached_data: dict[int, str | int] | None = None  # Cache for materialized dict
+        self._stats: FeatureStats | None = None
+        self._stats_loader = stats_loader  # Reads precompiled statistics
 
     @property
     def data(self) -> dict[int, str | int]:
@@ -108,6 +112,37 @@ class NodeFeature:
         # Both dict and mmap backends (StringPool/IntFeatureArray) have items()
         return self._data.items()
 
+    @property
+    def stats(self) -> FeatureStats:
+        """Summary statistics of this feature.
+
+        Value frequencies, number of distinct values, number of nodes with
+        a value per node type, and the value range of integer features.
+        See `cfabric.features.stats.FeatureStats`.
+
+        Compiled corpora store them; otherwise they are computed on first
+        access, which costs a pass over the feature.
+
+        Returns
+        -------
+        FeatureStats
+        """
+        if self._stats is None:
+            if self._stats_loader is not None:
+                self._stats = self._stats_loader()
+            else:
+                self._stats = FeatureStats.from_items(
+                    self.items(),
+                    self.api.F.otype.v,
+                    self.meta.get('valueType', self.meta.get('value_type', 'str')),
+                )
+        return self._stats
+
+    @property
+    def hasStats(self) -> bool:
+        """Whether `stats` is available without a pass over the feature."""
+        return self._stats is not None or self._stats_loader is not None
+
     def v(self, n: int) -> str | int | None:
         """Get the value of a feature for a node.
 
@@ -147,13 +182,17 @@ class NodeFeature:
             (`cfabric.nodes`)
         """
 
+        if self._is_mmap:
+            # Postings index: nodes are stored in canonical order already
+            matches = self._data.nodes_with_values((val,))
+            if matches is not None:
+                return tuple(matches.tolist())
+
         rank_key = safe_rank_key(self.api.C.rank.data)
 
         if self._is_mmap:
-            # Use vectorized filtering for mmap-backed features
-            max_node = len(self._data)
-            all_nodes = range(1, max_node + 1)
-            matches = self._data.filter_by_value(all_nodes, val)
+            # Use vectorized filtering over the nodes the feature stores
+            matches = self._data.filter_by_value(self._data.covered(), val)
             return tuple(sorted(matches, key=rank_key))
         else:
             return tuple(
@@ -189,8 +228,8 @@ class NodeFeature:
         elif self._is_mmap:
             # Mmap with type filtering - need per-node iteration
             fOtype = self.api.F.otype.v
-            max_node = len(self._data)
-            for n in range(1, max_node + 1):
+            for n in self._data.covered():
+                n = int(n)
                 val = self.v(n)
                 if val is not None and fOtype(n) in nodeTypes:
                     fql[val] += 1
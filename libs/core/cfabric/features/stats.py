@@ -0,0 +1,203 @@
+"""
+# Feature statistics
+
+Summary statistics of a node feature: how many nodes carry a value, per
+node type, how many distinct values there are and how often the most
+frequent ones occur.
+
+The compiler writes them next to each feature in the `.cfm` directory, so
+that feature descriptions and the search planner can read them without
+scanning the feature. For features loaded from `.tf` files they are
+computed on first access.
+
+Access them as `F.fff.stats` or `Fs('fff').stats`.
+"""
+
+from __future__ import annotations
+
+import collections
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+STATS_TOP_VALUES = 1000
+"""Maximum number of values kept in the frequency histogram."""
+
+
+@dataclass
+class FeatureStats:
+    """Summary statistics of a node feature.
+
+    Attributes
+    ----------
+    count : int
+        Number of nodes that have a value
+    distinct : int
+        Number of distinct values
+    histogram : list of 2-tuples
+        `(value, frequency)` pairs, most frequent first (ties by value),
+        limited to the STATS_TOP_VALUES most frequent values
+    types : dict
+        Node type -> number of nodes of that type that have a value;
+        types without values are left out
+    min, max : int | None
+        Smallest and largest value of integer features, else None
+    """
+
+    count: int = 0
+    distinct: int = 0
+    histogram: list[tuple[str | int, int]] = field(default_factory=list)
+    types: dict[str, int] = field(default_factory=dict)
+    min: int | None = None
+    max: int | None = None
+
+    def __post_init__(self) -> None:
+        self._freqs: dict[str | int, int] | None = None
+
+    @property
+    def complete(self) -> bool:
+        """Whether the histogram holds every value."""
+        return len(self.histogram) == self.distinct
+
+    def frequency(self, value: str | int) -> int:
+        """Number of nodes that have a value.
+
+        Parameters
+        ----------
+        value : string | integer
+            The value in question
+
+        Returns
+        -------
+        int
+            The exact frequency for values in the histogram. For other
+            values: 0 if the histogram is complete, else an upper bound
+            (the lowest frequency in the histogram).
+        """
+        if self._freqs is None:
+            self._freqs = dict(self.histogram)
+        freq = self._freqs.get(value)
+        if freq is not None:
+            return freq
+        return 0 if self.complete else self.histogram[-1][1]
+
+    def to_dict(self) -> dict[str, Any]:
+        result: dict[str, Any] = {
+            'count': self.count,
+            'distinct': self.distinct,
+            'histogram': [list(item) for item in self.histogram],
+            'types': self.types,
+        }
+        if self.min is not None:
+            result['min'] = self.min
+            result['max'] = self.max
+        return result
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> FeatureStats:
+        return cls(
+            count=data['count'],
+            distinct=data['distinct'],
+            histogram=[(v, c) for v, c in data['histogram']],
+            types=data['types'],
+            min=data.get('min'),
+            max=data.get('max'),
+        )
+
+    @classmethod
+    def build(
+        cls,
+        codes: NDArray[np.integer],
+        missing: int,
+        node_types: NDArray[np.integer],
+        type_names: Sequence[str],
+        decode: Callable[[int], str] | None = None,
+    ) -> FeatureStats:
+        """Compute the statistics of a dense per-node array.
+
+        Parameters
+        ----------
+        codes : np.ndarray
+            Values (integer features) or string indices (string features)
+            of nodes 1..len(codes); string indices must sort like the
+            strings they stand for
+        missing : int
+            Sentinel for nodes without a value
+        node_types : np.ndarray
+            Type index of every node, at least len(codes) long
+        type_names : sequence of str
+            Node type names by type index
+        decode : callable, optional
+            Turns a string index into its string; None for integer features
+
+        Returns
+        -------
+        FeatureStats
+        """
+        codes = np.asarray(codes)
+        present = codes != missing
+        per_type = np.bincount(
+            np.asarray(node_types[:len(codes)])[present], minlength=len(type_names)
+        )
+        values, counts = np.unique(codes[present], return_counts=True)
+        order = np.lexsort((values, -counts))[:STATS_TOP_VALUES]
+
+        def convert(v: Any) -> str | int:
+            return decode(int(v)) if decode is not None else int(v)
+
+        stats = cls(
+            count=int(present.sum()),
+            distinct=len(values),
+            histogram=[(convert(values[i]), int(counts[i])) for i in order],
+            types={
+                name: int(n) for name, n in zip(type_names, per_type.tolist()) if n
+            },
+        )
+        if decode is None and len(values):
+            stats.min, stats.max = int(values[0]), int(values[-1])
+        return stats
+
+    @classmethod
+    def from_items(
+        cls,
+        items: Iterable[tuple[int, str | int]],
+        otype: Callable[[int], str | None],
+        value_type: str = 'str',
+    ) -> FeatureStats:
+        """Compute the statistics by iterating over a feature.
+
+        Parameters
+        ----------
+        items : iterable of 2-tuples
+            `(node, value)` pairs of the nodes that have a value
+        otype : callable
+            Gives the node type of a node (`F.otype.v`)
+        value_type : str
+            'int' for integer features
+
+        Returns
+        -------
+        FeatureStats
+        """
+        freqs: collections.Counter[str | int] = collections.Counter()
+        types: collections.Counter[str] = collections.Counter()
+        for n, v in items:
+            freqs[v] += 1
+            types[otype(n) or ''] += 1
+
+        ranked = sorted(freqs.items(), key=lambda x: (-x[1], x[0]))
+        stats = cls(
+            count=sum(freqs.values()),
+            distinct=len(freqs),
+            histogram=ranked[:STATS_TOP_VALUES],
+            types=dict(types),
+        )
+        ints = [v for v in freqs if isinstance(v, int)] if value_type == 'int' else []
+        if ints:
+            stats.min, stats.max = min(ints), max(ints)
+        return stats
@@ -13,14 +13,22 @@ Supports two backends:
 
 from __future__ import annotations
 
-from collections.abc import Iterator
+from collections.abc import Iterable, Iterator
 from typing import TYPE_CHECKING
 
-from cfabric.storage.csr import CSRArray
+import numpy as np
+
+from cfabric.storage.csr import CSRArray, gather_rows
+from cfabric.storage.nodeset import as_node_array
 
 if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
     from cfabric.core.api import Api
 
+ITEMS_BLOCK = 65536
+"""Number of nodes fetched per vectorized gather when iterating over oslots."""
+
 
 class OslotsFeature:
     def __init__(
@@ -98,11 +106,20 @@ class OslotsFeature:
         shift = maxSlot + 1
 
         if self._is_mmap:
-            # CSR backend: use get_as_tuple for API compatibility
+            # CSR backend: gather a block of rows at a time and split the
+            # block in Python, instead of slicing the mmap once per node
             data = self._data
             assert isinstance(data, CSRArray)
-            for n in range(maxSlot + 1, maxNode + 1):
-                yield (n, data.get_as_tuple(n - shift))
+            for b in range(0, maxNode - maxSlot, ITEMS_BLOCK):
+                rows = np.arange(b, min(b + ITEMS_BLOCK, maxNode - maxSlot))
+                slots, offsets, _ = data.gather(rows)
+                slots = slots.tolist()
+                offsets = offsets.tolist()
+                for k in range(len(rows)):
+                    yield (
+                        shift + b + k,
+                        tuple(slots[offsets[k]:offsets[k + 1]]),
+                    )
         else:
             # Dict-based backend (.tf): direct tuple access
             data = self._data
@@ -142,3 +159,54 @@ class OslotsFeature:
             else:
                 return self._data[m - 1]
         return ()
+
+    def gather(
+        self, nodes: Iterable[int]
+    ) -> tuple[NDArray[np.int64], NDArray[np.int64], NDArray[np.int64]]:
+        """Get the slots of many nodes in one vectorized operation.
+
+        The bulk counterpart of `s()`: slot nodes yield themselves,
+        non-slot nodes yield their slots.
+
+        Parameters
+        ----------
+        nodes: iterable of integer
+            The nodes whose slots must be retrieved.
+
+        Returns
+        -------
+        tuple
+            `(slots, offsets, node_ids)`: the slots of the k-th node are
+            `slots[offsets[k]:offsets[k + 1]]`, and `node_ids` tells for
+            every slot which of the given nodes it belongs to.
+        """
+        maxSlot = self.maxSlot
+        assert maxSlot is not None
+
+        nodes = as_node_array(nodes)
+        shift = maxSlot + 1
+
+        slots, offsets, rows = gather_rows(self._data, nodes - shift)
+        node_ids = rows + shift
+
+        is_slot = (nodes >= 1) & (nodes <= maxSlot)
+        if not is_slot.any():
+            return slots, offsets, node_ids
+
+        # Slot nodes are their own (single) slot: make room for them
+        lengths = np.diff(offsets)
+        new_lengths = np.where(is_slot, 1, lengths)
+        new_offsets = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(new_lengths, out=new_offsets[1:])
+
+        positions = np.arange(len(slots), dtype=np.int64)
+        positions += np.repeat(new_offsets[:-1] - offsets[:-1], lengths)
+
+        new_slots = np.empty(new_offsets[-1], dtype=np.int64)
+        new_node_ids = np.empty(new_offsets[-1], dtype=np.int64)
+        new_slots[positions] = slots
+        new_node_ids[positions] = node_ids
+        slot_positions = new_offsets[:-1][is_slot]
+        new_slots[slot_positions] = nodes[is_slot]
+        new_node_ids[slot_positions] = nodes[is_slot]
+        return new_slots, new_offsets, new_node_ids
@@ -24,6 +24,41 @@ if TYPE_CHECKING:
     from cfabric.core.api import Api
 
 
+def otype_support(
+    otype_arr: np.ndarray,
+    type_list: list[str],
+    slot_type: str,
+    max_slot: int,
+) -> dict[str, tuple[int, int]]:
+    """Compute the first and last node of every node type.
+
+    Parameters
+    ----------
+    otype_arr : np.ndarray
+        Type index of every non-slot node (node maxSlot + 1 + i at i)
+    type_list : list
+        Type names by type index
+    slot_type : str
+        Name of the slot type
+    max_slot : int
+        Last slot node
+
+    Returns
+    -------
+    dict
+        Type name -> (first node, last node)
+    """
+    support = {slot_type: (1, max_slot)}
+    codes = np.asarray(otype_arr)
+    if len(codes):
+        types, first = np.unique(codes, return_index=True)
+        _, last_from_end = np.unique(codes[::-1], return_index=True)
+        last = len(codes) - 1 - last_from_end
+        for t, b, e in zip(types.tolist(), first.tolist(), last.tolist()):
+            support[type_list[t]] = (max_slot + 1 + b, max_slot + 1 + e)
+    return support
+
+
 class OtypeFeature:
     def __init__(
         self,
@@ -4,7 +4,35 @@ This module provides functionality to load .tf files and compile
 to/from the memory-mapped .cfm format.
 """
 
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
 from cfabric.io.loader import Data, MEM_MSG
-from cfabric.io.compiler import Compiler, compile_corpus
+
+if TYPE_CHECKING:
+    from cfabric.io.compiler import Compiler, compile_corpus
+
+# The compiler is only needed when a corpus is (re)compiled.
+# Imported on first access, see `cfabric.__getattr__`.
+_LAZY = {
+    "Compiler": "cfabric.io.compiler",
+    "compile_corpus": "cfabric.io.compiler",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY))
+
 
 __all__ = ["Data", "MEM_MSG", "Compiler", "compile_corpus"]
@@ -8,8 +8,13 @@ numpy arrays with memory mapping for efficient multi-process access.
 
 from __future__ import annotations
 
+import copy
+import hashlib
 import json
 import logging
+import os
+import shutil
+import tempfile
 import numpy as np
 from collections.abc import Iterable
 from pathlib import Path
@@ -23,21 +28,83 @@ from cfabric.core.config import (
     OTEXT,
     WARP,
     NODE_DTYPE,
+    MISSING_STR_INDEX,
     TYPE_DTYPE,
     INDEX_DTYPE,
-    MISSING_STR_INDEX,
 )
-from cfabric.storage.csr import CSRArray, CSRArrayWithValues
-from cfabric.storage.string_pool import StringPool, IntFeatureArray
+from cfabric.features.stats import FeatureStats
+from cfabric.features.warp.otype import otype_support
+from cfabric.io.tfstream import TfFeature, read_tf
+from cfabric.storage.csr import (
+    CSRArray,
+    CSRArrayWithValues,
+    CompressedCSRArray,
+    index_dtype,
+    node_dtype,
+)
+from cfabric.storage.mmap_manager import MmapManager
+from cfabric.storage.pack import PACK_SUFFIX, CfmPack, write_pack
+from cfabric.storage.postings import PostingsIndex
+from cfabric.storage.sections import save_sections, save_structure
+from cfabric.storage.string_pool import StringPool, StringTable, IntFeatureArray
 from cfabric.utils.files import dirMake, fileExists, fileOpen
-from cfabric.utils.helpers import setFromSpec, valueFromTf, makeInverse, makeInverseVal
+from cfabric.utils.helpers import (
+    itemize,
+    setFromSpec,
+    valueFromTf,
+)
 import cfabric.precompute.prepare as prepare
+from cfabric.precompute.canonical import canonical_order, sequence_arrays, type_ranks
+from cfabric.precompute.embedding import (
+    ENTRY_BYTES,
+    boundaries,
+    embeddees,
+    embedders,
+)
 
 if TYPE_CHECKING:
+    from concurrent.futures import Future
+
     from numpy.typing import NDArray
 
 logger = logging.getLogger(__name__)
 
+HASH_CHUNK = 1 << 20
+"""Number of bytes read at a time when hashing source files."""
+
+PARTS_DIR = '.parts'
+"""Scratch directory in which each feature is compiled before it is moved into place."""
+
+SECTION_INDEXES = ('sections', 'structure')
+"""Prefixes of the files in computed/ that hold the section and structure indexes
+(sections.json and structure.json in older compilations)."""
+
+FeatureTask = tuple[str, Any, bool, bool, bool, bool]
+"""A feature to compile: name, data (None: parse the .tf file), is_edge,
+has_values, compile (False: only parse), keep (return the parsed data)."""
+
+_WORKER: Compiler | None = None
+"""The compiler state of a worker process (see `Compiler.workers`)."""
+
+
+def _umask() -> int:
+    """The current umask of the process."""
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+def _init_worker(compiler: Compiler) -> None:
+    """Set up a worker process of a parallel compilation."""
+    global _WORKER
+    _WORKER = compiler
+
+
+def _run_feature_task(output_dir: Path, task: FeatureTask) -> tuple[Any, ...]:
+    """Run `Compiler._feature_task` in a worker process."""
+    assert _WORKER is not None
+    return _WORKER._feature_task(output_dir, *task)
+
 
 def _check_sentinel_collision(
     values: Iterable[Any],
@@ -90,10 +157,54 @@ class Compiler:
     ----------
     source_dir : str
         Path to directory containing .tf source files
+    postings : bool, optional
+        Also write an inverted postings index (value -> nodes in canonical
+        order) for every node feature (default: False)
+    compress : bool, optional
+        Write oslots, levUp, levDown and boundary as CompressedCSRArray
+        (default: False)
+    pack : bool, optional
+        Pack the compiled directory into a single .cfmpack file next to
+        it and remove the directory (default: False)
+    incremental : bool, optional
+        Reuse the parts of an existing compiled directory whose sources
+        have not changed (default: True). The size, modification time and
+        content hash of every .tf file are recorded in meta.json; features
+        are only recompiled if their own source changed, and the
+        precomputed data only if otype, oslots or otext changed.
+    workers : int, optional
+        Number of processes that parse and compile features side by side
+        (default: 1, no worker processes). At most this many features are
+        in flight at a time; the output does not depend on the number.
+    memory_budget : int, optional
+        Memory budget in bytes for the large sorts of the precomputation
+        (default: None, no budget). Beyond it, levUp and levDown are sorted
+        externally through temporary files in the output directory, the
+        slots of oslots are read memory-mapped from the compiled files (from
+        an uncompressed scratch copy if `compress`), and the canonical order
+        reads them in ranges of rows. The output does not depend on the
+        budget. Regardless of the budget, the
+        precomputed data is written through memory maps while it is built,
+        and every feature is dropped as soon as it is compiled.
     """
 
-    def __init__(self, source_dir: str) -> None:
+    def __init__(
+        self,
+        source_dir: str,
+        postings: bool = False,
+        compress: bool = False,
+        pack: bool = False,
+        incremental: bool = True,
+        workers: int = 1,
+        memory_budget: int | None = None,
+    ) -> None:
         self.source_dir: Path = Path(source_dir)
+        self.postings = postings
+        self.compress = compress
+        self.pack = pack
+        self.incremental = incremental
+        self.workers = max(workers, 1)
+        self.memory_budget = memory_budget
         self.info = logger.info
         self.error = logger.error
         self.warning = logger.warning
@@ -104,21 +215,37 @@ class Compiler:
         self.slot_type: str = ""
         self.node_types: list[str] = []
         self.type_order: list[str] = []  # Types in level order
+        self.type_ranges: dict[str, tuple[int, int]] = {}  # First and last node per type
 
         # Parsed feature data
         self._otype_data: tuple[tuple[str, ...], int, int, str] | None = None
-        self._oslots_data: tuple[tuple[tuple[int, ...], ...], int, int] | None = None
+        # Slots per non-slot node: read from .tf files as a CSR array, handed
+        # over by Fabric as tuples
+        self._oslots_data: (
+            tuple[CSRArray | tuple[tuple[int, ...], ...], int, int] | None
+        ) = None
         self._otext_meta: dict[str, str] = {}
         self._feature_meta: dict[str, dict[str, str]] = {}
-        self._node_features: dict[str, dict[int, str | int]] = {}
-        self._edge_features: dict[str, tuple[dict[int, Any], bool]] = {}  # (data, has_values)
-
-        # Computed data (populated by _precompute)
+        # Read from .tf files as TfFeature, handed over by Fabric as dicts
+        self._node_features: dict[str, TfFeature | dict[int, Any]] = {}
+        self._edge_features: dict[str, tuple[TfFeature | dict[int, Any], bool]] = {}
+        self._compiled: dict[str, list[str]] = {'node': [], 'edge': []}  # Per kind
+        self._type_codes: tuple[list[str], NDArray[np.uint8]] | None = None
+
+        # Computed data (populated by _precompute, or by _reuse_precomputed
+        # from the previous compilation)
         self._levels_data: list[tuple[str, float, int, int]] | None = None
-        self._order_data: list[int] | None = None
-        self._rank_data: list[int] | None = None
-        self._levup_data: list[tuple[int, ...]] | None = None
-        self._levdown_data: list[tuple[int, ...]] | None = None
+        self._order_data: NDArray[np.uint32] | None = None
+        self._rank_data: NDArray[np.uint32] | None = None
+        self._levup_data: list[tuple[int, ...]] | CSRArray | None = None
+        self._levdown_data: list[tuple[int, ...]] | CSRArray | None = None
+
+        # Incremental compilation
+        self._sources: dict[str, dict[str, Any]] = {}  # Per .tf file: size, mtime, hash
+        self._files: dict[str, list[str]] = {}  # Files written per feature
+        self._previous: dict[str, Any] | None = None  # meta.json of a reusable build
+        self._previous_dir: Path | None = None
+        self._previous_pack: CfmPack | None = None  # set if that build is packed
 
     def compile(
         self,
@@ -159,15 +286,232 @@ class Compiler:
 
         self.info(f"Compiling {self.source_dir} to {output_dir}")
 
-        # Create directory structure
-        self._create_directories(output_dir)
+        self._hash_sources(output_dir)
 
-        if precomputed:
-            # Use pre-computed data instead of re-parsing .tf files
-            return self._compile_from_precomputed(output_dir, precomputed)
-        else:
-            # Original flow: load from disk
-            return self._compile_from_disk(output_dir)
+        # Compile into a fresh directory next to the output, which replaces
+        # the output only when it is complete
+        dirMake(str(output_dir.parent))
+        work_dir = Path(
+            tempfile.mkdtemp(prefix=f'{output_dir.name}.', dir=output_dir.parent)
+        )
+        # mkdtemp creates the directory private (0700); the output gets the
+        # mode of a directory made with dirMake
+        os.chmod(work_dir, 0o777 & ~_umask())
+        try:
+            self._create_directories(work_dir)
+
+            if precomputed:
+                # Use pre-computed data instead of re-parsing .tf files
+                good = self._compile_from_precomputed(work_dir, precomputed)
+            else:
+                # Original flow: load from disk
+                good = self._compile_from_disk(work_dir)
+
+            # Drop the memory maps of the previous compilation
+            self._levup_data = self._levdown_data = self._rank_data = None
+            self._order_data = None
+            if self._previous_pack is not None:
+                self._previous_pack.close()
+
+            if good and self.pack:
+                pack_path = write_pack(work_dir, output_dir.with_suffix(PACK_SUFFIX))
+                if output_dir.exists():
+                    shutil.rmtree(output_dir)
+                self.info(f"Packed into {pack_path}")
+            elif good:
+                self._replace_dir(work_dir, output_dir)
+        finally:
+            if work_dir.exists():
+                shutil.rmtree(work_dir)
+        return good
+
+    def _replace_dir(self, new_dir: Path, output_dir: Path) -> None:
+        """Put a compiled directory in place of the output directory.
+
+        The old directory is renamed out of the way before the new one is
+        renamed into place, so the output is at no time partially written.
+        Processes that have the old files memory-mapped keep them.
+        """
+        if not output_dir.exists():
+            os.replace(new_dir, output_dir)
+            return
+        old_dir = Path(
+            tempfile.mkdtemp(prefix=f'{output_dir.name}.', dir=output_dir.parent)
+        )
+        os.replace(output_dir, old_dir / output_dir.name)
+        os.replace(new_dir, output_dir)
+        shutil.rmtree(old_dir)
+
+    def _hash_sources(self, output_dir: Path) -> None:
+        """Record size, modification time and content hash of the .tf files.
+
+        Files whose size and modification time are as recorded by the
+        previous compilation keep their recorded hash without being read.
+        If that compilation can be reused (same options, same otype, oslots
+        and otext), it is remembered in `_previous`.
+        """
+        previous = self._read_previous(output_dir) if self.incremental else None
+        old_sources = previous.get('sources', {}) if previous else {}
+        try:
+            for tf_file in sorted(self.source_dir.glob('*.tf')):
+                if not tf_file.is_file():
+                    continue
+                name = tf_file.stem
+                stat = tf_file.stat()
+                record: dict[str, Any] = {
+                    'size': stat.st_size, 'mtime': stat.st_mtime_ns
+                }
+                old = old_sources.get(name, {})
+                if (old.get('size'), old.get('mtime')) == (
+                    record['size'], record['mtime']
+                ):
+                    record['hash'] = old['hash']
+                else:
+                    digest = hashlib.sha256()
+                    with open(tf_file, 'rb') as f:
+                        while chunk := f.read(HASH_CHUNK):
+                            digest.update(chunk)
+                    record['hash'] = digest.hexdigest()
+                self._sources[name] = record
+
+            if (
+                previous is not None
+                and previous.get('cfm_version') == CFM_VERSION
+                and previous.get('options') == self._options()
+                and all(self._unchanged(name, old_sources) for name in WARP)
+            ):
+                self._previous = previous
+                self._previous_dir = output_dir
+                self.info("Reusing unchanged parts of the previous compilation")
+        finally:
+            # The pack of a previous compilation that is not reused is closed
+            if self._previous is None and self._previous_pack is not None:
+                self._previous_pack.close()
+                self._previous_pack = None
+
+    def _read_previous(self, output_dir: Path) -> dict[str, Any] | None:
+        """meta.json of the previous compilation, as directory or as pack.
+
+        If the previous compilation was packed, the pack is kept in
+        `_previous_pack`, to take files over from.
+        """
+        if (output_dir / 'meta.json').exists():
+            with open(output_dir / 'meta.json') as f:
+                return json.load(f)
+        pack_path = output_dir.with_suffix(PACK_SUFFIX)
+        if not pack_path.exists():
+            return None
+        try:
+            pack = CfmPack(pack_path)
+        except ValueError:
+            return None
+        try:
+            meta = pack.get_json('meta')
+        except FileNotFoundError:
+            pack.close()
+            return None
+        self._previous_pack = pack
+        return meta
+
+    def _previous_files(self, sub_dir: str) -> list[str]:
+        """Names of the files in a directory of the reused build."""
+        if self._previous_pack is not None:
+            prefix = f'{sub_dir}/'
+            return [
+                rel_path[len(prefix):]
+                for rel_path in self._previous_pack.files()
+                if rel_path.startswith(prefix) and '/' not in rel_path[len(prefix):]
+            ]
+        assert self._previous_dir is not None
+        return sorted(p.name for p in (self._previous_dir / sub_dir).iterdir())
+
+    def _options(self) -> dict[str, bool]:
+        """The compile options that affect the compiled files."""
+        return {'postings': self.postings, 'compress': self.compress}
+
+    def _unchanged(self, name: str, old_sources: dict[str, Any] | None = None) -> bool:
+        """Whether the source of a feature is the same as in the reused build."""
+        if old_sources is None:
+            if self._previous is None:
+                return False
+            old_sources = self._previous['sources']
+        old = old_sources.get(name)
+        new = self._sources.get(name)
+        if old is None or new is None:
+            return old is new
+        return old['hash'] == new['hash']
+
+    def _reusable(self, name: str) -> bool:
+        """Whether the compiled files of a feature can be taken over."""
+        return (
+            self._previous is not None
+            and 'files' in self._previous['sources'].get(name, {})
+            and self._unchanged(name)
+        )
+
+    def _link(self, rel_path: str, output_dir: Path) -> None:
+        """Take over a file of the reused build (hard link, else copy).
+
+        Files of a packed build are extracted from the pack.
+        """
+        if self._previous_pack is not None:
+            self._previous_pack.extract(rel_path, output_dir / rel_path)
+            return
+        assert self._previous_dir is not None
+        source = self._previous_dir / rel_path
+        target = output_dir / rel_path
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copy2(source, target)
+
+    def _reuse_features(self, output_dir: Path) -> tuple[list[str], list[str]]:
+        """Take over the unchanged features of the reused build.
+
+        Returns
+        -------
+        tuple
+            Names of the node features and of the edge features taken over
+        """
+        reused: tuple[list[str], list[str]] = ([], [])
+        if self._previous is None:
+            return reused
+        features = self._previous['features']
+        for kind, names in zip(('node', 'edge'), reused):
+            for name in features[kind]:
+                if not self._reusable(name):
+                    continue
+                files = self._previous['sources'][name]['files']
+                for rel_path in files:
+                    self._link(rel_path, output_dir)
+                self._files[name] = files
+                names.append(name)
+        return reused
+
+    def _reuse_precomputed(self, output_dir: Path) -> None:
+        """Take over the precomputed data of the reused build.
+
+        The data that later steps need (rank for postings, levels, levUp and
+        levDown for sections) is memory-mapped from the previous build.
+        """
+        assert self._previous_dir is not None
+        for name in self._previous_files('computed'):
+            if not name.startswith(SECTION_INDEXES):
+                self._link(f'computed/{name}', output_dir)
+
+        mmap_mgr = MmapManager(
+            self._previous_pack.path
+            if self._previous_pack is not None
+            else self._previous_dir
+        )
+        self._levels_data = [
+            (d['type'], d['avgSlots'], d['minNode'], d['maxNode'])
+            for d in mmap_mgr.get_json('computed', 'levels')
+        ]
+        self._order_data = mmap_mgr.get_array('computed', 'order')
+        self._rank_data = mmap_mgr.get_array('computed', 'rank')
+        self._levup_data = mmap_mgr.get_csr('computed', 'levup')
+        self._levdown_data = mmap_mgr.get_csr('computed', 'levdown')
 
     def _compile_from_disk(self, output_dir: Path) -> bool:
         """Compile by loading .tf files from disk (original flow)."""
@@ -185,28 +529,59 @@ class Compiler:
             return False
         if not self._compile_oslots(output_dir):
             return False
+        if self.memory_budget is not None:
+            self._map_oslots(output_dir)
 
-        # 2. Run precomputation
-        self.info("Running precomputation...")
-        if not self._precompute(output_dir):
-            return False
+        # 2. Run precomputation, unless the WARP features are unchanged
+        if self._previous is not None:
+            self.info("Reusing precomputed data...")
+            self._reuse_precomputed(output_dir)
+        else:
+            self.info("Running precomputation...")
+            if not self._precompute(output_dir):
+                return False
 
         # 3. Load and compile regular features
-        self.info("Loading regular features...")
-        self._load_features()
-
-        self.info("Compiling node features...")
-        self._compile_node_features(output_dir)
+        self.info("Loading and compiling features...")
+        self._compile_features(output_dir, parse=True)
 
-        self.info("Compiling edge features...")
-        self._compile_edge_features(output_dir)
+        self.info("Compiling sections...")
+        self._compile_sections(output_dir)
+        if self.memory_budget is not None:
+            self._unmap_oslots(output_dir)
 
         # 4. Write metadata
-        self._write_meta(output_dir)
+        self._write_meta(output_dir, self._reuse_features(output_dir))
 
         self.info("Compilation complete")
         return True
 
+    def _map_oslots(self, output_dir: Path) -> None:
+        """Read the slots back memory-mapped rather than keeping them in RAM.
+
+        Compressed slots cannot be read as arrays; they are then also
+        written uncompressed, to a scratch name that `_unmap_oslots` removes.
+        """
+        assert self._oslots_data is not None
+        (oslots, max_slot, max_node) = self._oslots_data
+        path = output_dir / 'warp' / ('oslots.raw' if self.compress else 'oslots')
+        if self.compress:
+            csr = (
+                oslots if isinstance(oslots, CSRArray)
+                else CSRArray.from_sequences(oslots)
+            )
+            csr.save(str(path))
+            del csr
+        del oslots
+        self._oslots_data = (CSRArray.load(str(path)), max_slot, max_node)
+
+    def _unmap_oslots(self, output_dir: Path) -> None:
+        """Drop the slots read by `_map_oslots`, and its scratch files."""
+        self._oslots_data = None
+        if self.compress:
+            for suffix in ('indptr', 'data'):
+                os.unlink(output_dir / 'warp' / f'oslots.raw_{suffix}.npy')
+
     def _compile_from_precomputed(self, output_dir: Path, precomputed: dict[str, Any]) -> bool:
         """Compile using pre-computed data from Fabric.load()."""
         self.info("Using pre-computed data (skipping .tf parsing)...")
@@ -245,14 +620,14 @@ class Compiler:
         self._node_features = precomputed.get('node_features', {})
         self._edge_features = precomputed.get('edge_features', {})
 
-        self.info("Compiling node features...")
-        self._compile_node_features(output_dir)
+        self.info("Compiling features...")
+        self._compile_features(output_dir, parse=False)
 
-        self.info("Compiling edge features...")
-        self._compile_edge_features(output_dir)
+        self.info("Compiling sections...")
+        self._compile_sections(output_dir)
 
         # 5. Write metadata
-        self._write_meta(output_dir)
+        self._write_meta(output_dir, self._reuse_features(output_dir))
 
         self.info("Compilation complete")
         return True
@@ -264,6 +639,7 @@ class Compiler:
         # 1. Write levels
         levels_data = precomputed.get('levels')
         if levels_data:
+            self._levels_data = levels_data
             levels_json: list[dict[str, Any]] = [
                 {'type': t, 'avgSlots': avg, 'minNode': mn, 'maxNode': mx}
                 for t, avg, mn, mx in levels_data
@@ -274,38 +650,52 @@ class Compiler:
         # 2. Write order
         order_data = precomputed.get('order')
         if order_data:
-            order_arr: NDArray[np.uint32] = np.array(order_data, dtype=NODE_DTYPE)
+            order_arr: NDArray[np.uint32] = np.array(
+                order_data, dtype=node_dtype(len(order_data))
+            )
             np.save(str(computed_dir / 'order.npy'), order_arr)
 
         # 3. Write rank
         rank_data = precomputed.get('rank')
         if rank_data:
-            rank_arr: NDArray[np.uint32] = np.array(rank_data, dtype=NODE_DTYPE)
+            rank_arr: NDArray[np.uint32] = np.array(
+                rank_data, dtype=node_dtype(len(rank_data))
+            )
             np.save(str(computed_dir / 'rank.npy'), rank_arr)
+            self._rank_data = rank_arr
 
         # 4. Write levUp
         levup_data = precomputed.get('levUp')
         if levup_data:
+            self._levup_data = levup_data
             levup_csr = CSRArray.from_sequences(levup_data)
-            levup_csr.save(str(computed_dir / 'levup'))
+            self._save_csr(levup_csr, computed_dir / 'levup')
 
         # 5. Write levDown
         levdown_data = precomputed.get('levDown')
         if levdown_data:
+            self._levdown_data = levdown_data
             levdown_csr = CSRArray.from_sequences(levdown_data)
-            levdown_csr.save(str(computed_dir / 'levdown'))
+            self._save_csr(levdown_csr, computed_dir / 'levdown')
 
         # 6. Write boundary
         boundary_data = precomputed.get('boundary')
         if boundary_data:
             (first_slots, last_slots) = boundary_data
             first_csr = CSRArray.from_sequences(first_slots)
-            first_csr.save(str(computed_dir / 'boundary_first'))
+            self._save_csr(first_csr, computed_dir / 'boundary_first')
             last_csr = CSRArray.from_sequences(last_slots)
-            last_csr.save(str(computed_dir / 'boundary_last'))
+            self._save_csr(last_csr, computed_dir / 'boundary_last')
 
         return True
 
+    def _save_csr(self, csr: CSRArray, path: Path) -> None:
+        """Save a warp/computed CSR array, compressed if requested."""
+        if self.compress:
+            CompressedCSRArray.from_csr(csr).save(str(path))
+        else:
+            csr.save(str(path))
+
     def _create_directories(self, output_dir: Path) -> None:
         """Create the .cfm directory structure."""
         dirMake(str(output_dir))
@@ -460,61 +850,62 @@ class Compiler:
         return metadata, data, is_edge, edge_values, is_config
 
     def _load_otype(self) -> bool:
-        """Load and parse the otype feature."""
+        """Load and parse the otype feature.
+
+        The feature is read into arrays (see `read_tf`); the slot type is the
+        type of node 1, the other types are listed per non-slot node.
+        """
         path = self.source_dir / f'{OTYPE}.tf'
-        metadata, data, is_edge, edge_values, is_config = self._parse_tf_file(path)
+        feature = read_tf(path)
 
-        if not data:
+        if not len(feature) or feature.nodes[0] != 1 or feature.strings is None:
             self.error(f"Failed to load {OTYPE}")
             return False
 
         # Transform to otype format (same as data.py)
-        slot_type = data[1]
-        otype_list: list[str] = []
-        max_slot = 1
-
-        for n in sorted(data):
-            if data[n] == slot_type:
-                max_slot = n
-                continue
-            otype_list.append(data[n])
-
-        max_node = len(data)
-
-        self._otype_data = (tuple(otype_list), max_slot, max_node, slot_type)
+        assert feature.values is not None
+        codes = feature.values
+        is_slot = codes == codes[0]
+        slot_type = feature.strings[codes[0]]
+        max_slot = int(feature.nodes[is_slot][-1])
+        strings = np.array(feature.strings, dtype=object)
+        otype_list: tuple[str, ...] = tuple(strings[codes[~is_slot]].tolist())
+        max_node = len(feature)
+
+        self._otype_data = (otype_list, max_slot, max_node, slot_type)
         self.max_slot = max_slot
         self.max_node = max_node
         self.slot_type = slot_type
 
         # Collect unique node types
-        type_set: set[str] = {slot_type}
-        for t in otype_list:
-            type_set.add(t)
-        self.node_types = sorted(type_set)
+        self.node_types = sorted(feature.strings)
 
-        self._feature_meta[OTYPE] = metadata
+        self._feature_meta[OTYPE] = feature.metadata
         return True
 
     def _load_oslots(self) -> bool:
-        """Load and parse the oslots feature."""
+        """Load and parse the oslots feature.
+
+        The feature is read into arrays (see `read_tf`) and kept as a CSR
+        array with a row per non-slot node.
+        """
         path = self.source_dir / f'{OSLOTS}.tf'
-        metadata, data, is_edge, edge_values, is_config = self._parse_tf_file(path)
+        feature = read_tf(path)
 
-        if not data:
+        if not len(feature):
             self.error(f"Failed to load {OSLOTS}")
             return False
 
         # Transform to oslots format (same as data.py)
-        node_list = sorted(data)
-        max_slot = node_list[0] - 1
-        max_node = node_list[-1]
-
-        oslots: list[tuple[int, ...]] = []
-        for n in node_list:
-            oslots.append(tuple(sorted(data[n])))
+        nodes = feature.nodes.astype(np.int64)
+        max_slot = int(nodes[0]) - 1
+        max_node = int(nodes[-1])
+        oslots = CSRArray.from_pairs(
+            nodes - max_slot - 1, feature.targets, max_node - max_slot
+        )
 
-        self._oslots_data = (tuple(oslots), max_slot, max_node)
-        self._feature_meta[OSLOTS] = metadata
+        self._oslots_data = (oslots, max_slot, max_node)
+        self._feature_meta[OSLOTS] = feature.metadata
         return True
 
     def _load_otext(self) -> None:
@@ -528,29 +919,6 @@ class Compiler:
         self._otext_meta = metadata
         self._feature_meta[OTEXT] = metadata
 
-    def _load_features(self) -> None:
-        """Load all non-WARP features from the source directory."""
-        for tf_file in self.source_dir.glob('*.tf'):
-            # Skip directories (e.g., .tf cache directory)
-            if tf_file.is_dir():
-                continue
-            feature_name = tf_file.stem
-            if feature_name in WARP:
-                continue
-
-            metadata, data, is_edge, edge_values, is_config = self._parse_tf_file(tf_file)
-
-            if is_config:
-                self._feature_meta[feature_name] = metadata
-                continue
-
-            self._feature_meta[feature_name] = metadata
-
-            if is_edge:
-                self._edge_features[feature_name] = (data, edge_values)
-            else:
-                self._node_features[feature_name] = data
-
     def _compile_otype(self, output_dir: Path) -> bool:
         """Compile otype to numpy format."""
         if self._otype_data is None:
@@ -578,6 +946,7 @@ class Compiler:
             json.dump(unique_types, f, indent=1)
 
         self.type_order = unique_types
+        self.type_ranges = otype_support(otype_arr, unique_types, slot_type, max_slot)
         return True
 
     def _compile_oslots(self, output_dir: Path) -> bool:
@@ -585,14 +954,16 @@ class Compiler:
         if self._oslots_data is None:
             return False
 
-        (oslots_list, max_slot, max_node) = self._oslots_data
+        (oslots, max_slot, max_node) = self._oslots_data
 
-        # Create CSR from sequences
-        csr = CSRArray.from_sequences(oslots_list)
+        # Create CSR from sequences, unless read as CSR
+        csr = (
+            oslots if isinstance(oslots, CSRArray) else CSRArray.from_sequences(oslots)
+        )
 
         # Save CSR arrays
         warp_dir = output_dir / 'warp'
-        csr.save(str(warp_dir / 'oslots'))
+        self._save_csr(csr, warp_dir / 'oslots')
 
         return True
 
@@ -626,108 +997,313 @@ class Compiler:
         with open(computed_dir / 'levels.json', 'w') as f:
             json.dump(levels_json, f, indent=1)
 
-        # 2. Compute order
-        self.info("  Computing order...")
-        order_data = prepare.order(
-            log_info, log_error,
-            self._otype_data,
-            self._oslots_data,
-            levels_data
+        # 2. Compute order and rank, sorting on arrays
+        self.info("  Computing order and rank...")
+        (otype_list, max_slot, max_node, slot_type) = self._otype_data
+        oslots = self._oslots_data[0]
+        oslots_arrays = (
+            (oslots.indptr, oslots.data)
+            if isinstance(oslots, CSRArray)
+            else sequence_arrays(oslots)
         )
-        order_arr: NDArray[np.uint32] = np.array(order_data, dtype=NODE_DTYPE)
-        np.save(str(computed_dir / 'order.npy'), order_arr)
-
-        # 3. Compute rank
-        self.info("  Computing rank...")
-        rank_data = prepare.rank(
-            log_info, log_error,
-            self._otype_data,
-            order_data
+        budget = self.memory_budget
+        order_arr, rank_arr = canonical_order(
+            max_slot,
+            *oslots_arrays,
+            type_ranks(otype_list, max_slot, slot_type, levels_data),
+            chunk=None if budget is None else max(budget // ENTRY_BYTES, 1),
         )
-        rank_arr: NDArray[np.uint32] = np.array(rank_data, dtype=NODE_DTYPE)
+        np.save(str(computed_dir / 'order.npy'), order_arr)
         np.save(str(computed_dir / 'rank.npy'), rank_arr)
 
-        # 4. Compute levUp
+        # 3. Compute levUp, levDown and boundary as CSR arrays; they are
+        # written while being built, to a scratch name if they have to be
+        # compressed afterwards
+        def target(name: str) -> str:
+            return str(computed_dir / (f'{name}.raw' if self.compress else name))
+
         self.info("  Computing levUp...")
-        levup_data = prepare.levUp(
-            log_info, log_error,
-            self._otype_data,
-            self._oslots_data,
-            rank_data
+        levup = embedders(
+            max_slot, *oslots_arrays, rank_arr, target('levup'), budget=budget
         )
-        levup_csr = CSRArray.from_sequences(levup_data)
-        levup_csr.save(str(computed_dir / 'levup'))
 
-        # 5. Compute levDown
         self.info("  Computing levDown...")
-        levdown_data = prepare.levDown(
-            log_info, log_error,
-            self._otype_data,
-            levup_data,
-            rank_data
+        levdown = embeddees(
+            max_slot, *levup, rank_arr, target('levdown'), budget=budget
         )
-        levdown_csr = CSRArray.from_sequences(levdown_data)
-        levdown_csr.save(str(computed_dir / 'levdown'))
 
-        # 6. Compute boundary
         self.info("  Computing boundary...")
-        boundary_data = prepare.boundary(
-            log_info, log_error,
-            self._otype_data,
-            self._oslots_data,
-            rank_data
+        (first, last) = boundaries(
+            max_slot, *oslots_arrays, rank_arr,
+            (target('boundary_first'), target('boundary_last')),
         )
-        (first_slots, last_slots) = boundary_data
-
-        # Save boundary as CSR arrays
-        first_csr = CSRArray.from_sequences(first_slots)
-        first_csr.save(str(computed_dir / 'boundary_first'))
-
-        last_csr = CSRArray.from_sequences(last_slots)
-        last_csr.save(str(computed_dir / 'boundary_last'))
+        del oslots_arrays, first, last
+        if self.compress:
+            del levup, levdown
+            for name in ('levup', 'levdown', 'boundary_first', 'boundary_last'):
+                raw = CSRArray.load(target(name))
+                self._save_csr(raw, computed_dir / name)
+                del raw
+                for suffix in ('indptr', 'data'):
+                    os.unlink(f'{target(name)}_{suffix}.npy')
+            levup = CompressedCSRArray.load(str(computed_dir / 'levup'))
+            levdown = CompressedCSRArray.load(str(computed_dir / 'levdown'))
+        else:
+            levup = CSRArray(*levup)
+            levdown = CSRArray(*levdown)
 
         # Store computed data for potential later use
         self._levels_data = levels_data
-        self._order_data = order_data
-        self._rank_data = rank_data
-        self._levup_data = levup_data
-        self._levdown_data = levdown_data
+        self._order_data = order_arr
+        self._rank_data = rank_arr
+        self._levup_data = levup
+        self._levdown_data = levdown
 
         return True
 
-    def _compile_node_features(self, output_dir: Path) -> None:
-        """Compile all node features."""
-        features_dir = output_dir / 'features'
+    def _node_type_codes(self) -> tuple[list[str], NDArray[np.uint8]]:
+        """Node type names, and the type index of every node (node n at n - 1)."""
+        assert self._otype_data is not None
+        (otype_list, max_slot, max_node, slot_type) = self._otype_data
+        type_names = sorted(set(otype_list) | {slot_type})
+        type_to_idx = {t: i for i, t in enumerate(type_names)}
+        codes = np.empty(max_node, dtype=TYPE_DTYPE)
+        codes[:max_slot] = type_to_idx[slot_type]
+        codes[max_slot:] = [type_to_idx[t] for t in otype_list]
+        return type_names, codes
+
+    def _write_stats(
+        self,
+        feature_name: str,
+        codes: NDArray[Any],
+        missing: int,
+        output_dir: Path,
+        decode: Any = None,
+    ) -> None:
+        """Write the statistics of a node feature (see `FeatureStats`)."""
+        if self._type_codes is None:
+            self._type_codes = self._node_type_codes()
+        type_names, node_types = self._type_codes
+        stats = FeatureStats.build(codes, missing, node_types, type_names, decode)
+        with open(output_dir / f'{feature_name}_stats.json', 'w') as f:
+            json.dump(stats.to_dict(), f, ensure_ascii=False)
+
+    def _compile_feature(
+        self,
+        output_dir: Path,
+        feature_name: str,
+        data: TfFeature | dict[int, Any],
+        is_edge: bool,
+        has_values: bool,
+    ) -> list[str]:
+        """Compile a node or edge feature.
 
-        for feature_name, data in self._node_features.items():
-            if not data:
-                continue
+        The feature is written to a scratch directory of its own and then
+        moved into place, so that features can be compiled side by side.
 
+        Returns
+        -------
+        list
+            The files written, relative to the output directory
+        """
+        sub_dir = 'edges' if is_edge else 'features'
+        part_dir = output_dir / PARTS_DIR / feature_name
+        dirMake(str(part_dir))
+
+        metadata = self._feature_meta.get(feature_name, {})
+        if isinstance(data, dict):
+            data = TfFeature.from_dict(data, metadata, is_edge, has_values)
+        if len(data):
+            if is_edge:
+                self.info(f"  Compiling {feature_name} (edge, values={has_values})...")
+                if has_values:
+                    self._compile_edge_with_values(
+                        feature_name, data, part_dir, metadata
+                    )
+                else:
+                    self._compile_edge_no_values(
+                        feature_name, data, part_dir, metadata
+                    )
+            else:
+                value_type = metadata.get('valueType', 'str')
+                self.info(f"  Compiling {feature_name} ({value_type})...")
+                if value_type == 'int':
+                    self._compile_int_feature(feature_name, data, part_dir, metadata)
+                else:
+                    self._compile_str_feature(feature_name, data, part_dir, metadata)
+
+        files = []
+        for path in sorted(part_dir.iterdir()):
+            os.replace(path, output_dir / sub_dir / path.name)
+            files.append(f'{sub_dir}/{path.name}')
+        part_dir.rmdir()
+        return files
+
+    def _feature_task(
+        self,
+        output_dir: Path,
+        feature_name: str,
+        data: TfFeature | dict[int, Any] | None,
+        is_edge: bool,
+        has_values: bool,
+        compile: bool,
+        keep: bool,
+    ) -> tuple[Any, ...]:
+        """Parse and/or compile a feature (see FeatureTask).
+
+        Returns
+        -------
+        tuple
+            (name, metadata, is_edge, has_values, is_config, files, data),
+            where files is None if the feature has not been compiled and
+            data is None unless asked for
+        """
+        if data is None:
+            data = read_tf(self.source_dir / f'{feature_name}.tf')
+            metadata = data.metadata
+            if data.is_config:
+                return (feature_name, metadata, False, False, True, None, None)
+            (is_edge, has_values) = (data.is_edge, data.edge_values)
+            self._feature_meta[feature_name] = metadata
+        else:
             metadata = self._feature_meta.get(feature_name, {})
-            value_type = metadata.get('valueType', 'str')
+        files = (
+            self._compile_feature(output_dir, feature_name, data, is_edge, has_values)
+            if compile
+            else None
+        )
+        return (
+            feature_name, metadata, is_edge, has_values, False, files,
+            data if keep else None,
+        )
 
-            self.info(f"  Compiling {feature_name} ({value_type})...")
+    def _worker_state(self) -> Compiler:
+        """A copy of the compiler with just what compiling a feature needs."""
+        if self._type_codes is None:
+            self._type_codes = self._node_type_codes()
+        state = copy.copy(self)
+        state._otype_data = None
+        state._oslots_data = None
+        state._node_features = {}
+        state._edge_features = {}
+        state._levels_data = state._order_data = None
+        state._levup_data = state._levdown_data = None
+        if self._rank_data is not None:
+            state._rank_data = np.array(self._rank_data)
+        return state
+
+    def _compile_features(self, output_dir: Path, parse: bool) -> None:
+        """Parse and compile the features, in a pool of `workers` processes.
 
-            if value_type == 'int':
-                self._compile_int_feature(feature_name, data, features_dir, metadata)
-            else:
-                self._compile_str_feature(feature_name, data, features_dir, metadata)
+        Parameters
+        ----------
+        output_dir : Path
+            The compiled directory
+        parse : bool
+            Whether the features are read from their .tf files;
+            otherwise their data is in `_node_features` and
+            `_edge_features`
+
+        Notes
+        -----
+        Every feature is read (see `read_tf`), compiled and dropped in one
+        go; only the features that the section indexes are computed from
+        are kept. Features that are taken over from a previous compilation
+        are not read, except when the section indexes need them.
+
+        With one worker the features are compiled in this process. With
+        more, no more than `workers` features are in flight at any time,
+        which bounds the memory in use. The results are gathered in the
+        order of the features, so the output does not depend on which
+        worker finishes first.
+        """
+        tasks: list[FeatureTask] = []
+        if parse:
+            section_inputs = (
+                set() if self._sections_reusable() else self._section_inputs()
+            )
+            for tf_file in sorted(self.source_dir.glob('*.tf')):
+                feature_name = tf_file.stem
+                if tf_file.is_dir() or feature_name in WARP:
+                    continue
+                reusable = self._reusable(feature_name)
+                keep = feature_name in section_inputs
+                if not reusable or keep:
+                    tasks.append((feature_name, None, False, False, not reusable, keep))
+        else:
+            for feature_name, data in self._node_features.items():
+                if not self._reusable(feature_name):
+                    tasks.append((feature_name, data, False, False, True, False))
+            for feature_name, (data, has_values) in self._edge_features.items():
+                if not self._reusable(feature_name):
+                    tasks.append((feature_name, data, True, has_values, True, False))
+
+        if self.workers == 1:
+            results: Iterable[tuple[Any, ...] | None] = (
+                self._feature_task(output_dir, *task) for task in tasks
+            )
+            self._collect_features(results)
+        else:
+            from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+            gathered: list[tuple[Any, ...] | None] = [None] * len(tasks)
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self._worker_state(),),
+            ) as pool:
+                pending: dict[Future[tuple[Any, ...]], int] = {}
+                for i, task in enumerate(tasks):
+                    if len(pending) >= self.workers:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            gathered[pending.pop(future)] = future.result()
+                    pending[pool.submit(_run_feature_task, output_dir, task)] = i
+                for future in pending:
+                    gathered[pending[future]] = future.result()
+            self._collect_features(gathered)
+
+        parts_dir = output_dir / PARTS_DIR
+        if parts_dir.exists():
+            shutil.rmtree(parts_dir)
+
+    def _collect_features(self, results: Iterable[tuple[Any, ...] | None]) -> None:
+        """Record the results of feature tasks (see `_feature_task`)."""
+        for result in results:
+            assert result is not None
+            (name, metadata, is_edge, has_values, is_config, files, data) = result
+            self._feature_meta[name] = metadata
+            if is_config:
+                continue
+            if files is not None:
+                self._files[name] = files
+                self._compiled['edge' if is_edge else 'node'].append(name)
+            if data is not None:
+                if is_edge:
+                    self._edge_features[name] = (data, has_values)
+                else:
+                    self._node_features[name] = data
 
     def _compile_int_feature(
         self,
         feature_name: str,
-        data: dict[int, int],
+        data: TfFeature,
         output_dir: Path,
         metadata: dict[str, str],
     ) -> None:
-        """Compile an integer-valued node feature."""
-        # Check for sentinel collision (-1 is used for missing values)
-        _check_sentinel_collision(
-            data.values(), IntFeatureArray.MISSING,
-            feature_name, 'node'
-        )
+        """Compile an integer-valued node feature.
 
-        int_arr = IntFeatureArray.from_dict(data, self.max_node)
+        The values are stored in the narrowest dtype that holds their
+        range, with a missing sentinel outside that range, over the nodes
+        that carry values (see `compact_layout`); dtype, sentinel and
+        layout are recorded in the feature metadata.
+        """
+        # The sentinel is chosen outside the value range, so values can
+        # no longer collide with it
+        dense = IntFeatureArray.from_arrays(
+            data.nodes, data.values, self.max_node, narrow=True
+        )
+        int_arr = dense.compact()
         int_arr.save(str(output_dir / f'{feature_name}.npy'))
 
         # Save metadata
@@ -735,20 +1311,38 @@ class Compiler:
             'name': feature_name,
             'kind': 'node',
             'value_type': 'int',
+            'dtype': str(int_arr.values.dtype),
+            'missing': int_arr.missing,
+            'layout': int_arr.layout,
+            'offset': int_arr.offset,
+            'stats': True,
             **{k: v for k, v in metadata.items() if k != 'valueType'}
         }
+        self._write_stats(feature_name, dense.values, dense.missing, output_dir)
+        if self._write_postings(
+            feature_name, dense.values, dense.missing, output_dir
+        ):
+            meta['postings'] = True
         with open(output_dir / f'{feature_name}_meta.json', 'w') as f:
             json.dump(meta, f, indent=1)
 
     def _compile_str_feature(
         self,
         feature_name: str,
-        data: dict[int, str],
+        data: TfFeature,
         output_dir: Path,
         metadata: dict[str, str],
     ) -> None:
-        """Compile a string-valued node feature."""
-        str_pool = StringPool.from_dict(data, self.max_node)
+        """Compile a string-valued node feature.
+
+        The per-node indices are stored in the narrowest unsigned dtype for
+        the number of distinct values, over the nodes that carry values.
+        """
+        assert data.values is not None and data.strings is not None
+        dense = StringPool.from_codes(
+            data.nodes, data.values, data.strings, self.max_node
+        ).narrow()
+        str_pool = dense.compact()
         str_pool.save(str(output_dir / feature_name))
 
         # Save metadata
@@ -757,62 +1351,191 @@ class Compiler:
             'kind': 'node',
             'value_type': 'str',
             'unique_values': len(str_pool.strings),
+            'dtype': str(str_pool.indices.dtype),
+            'missing': str_pool.missing,
+            'layout': str_pool.layout,
+            'offset': str_pool.offset,
+            'stats': True,
             **{k: v for k, v in metadata.items() if k != 'valueType'}
         }
+        # Indices follow the sorted string table, as the histogram requires
+        self._write_stats(
+            feature_name, dense.indices, dense.missing, output_dir,
+            decode=dense.strings.__getitem__,
+        )
+        if self._write_postings(
+            feature_name, dense.indices, dense.missing, output_dir
+        ):
+            meta['postings'] = True
         with open(output_dir / f'{feature_name}_meta.json', 'w') as f:
             json.dump(meta, f, indent=1)
 
-    def _compile_edge_features(self, output_dir: Path) -> None:
-        """Compile all edge features."""
-        edges_dir = output_dir / 'edges'
+    def _write_postings(
+        self,
+        feature_name: str,
+        codes: NDArray[Any],
+        missing: int,
+        output_dir: Path,
+    ) -> bool:
+        """Write the postings index of a node feature, if enabled.
 
-        for feature_name, (data, has_values) in self._edge_features.items():
-            if not data:
-                continue
+        Returns
+        -------
+        bool
+            True if a postings index was written
+        """
+        if not self.postings or self._rank_data is None:
+            return False
+        postings = PostingsIndex.build(codes, missing, self._rank_data)
+        postings.save(str(output_dir / f'{feature_name}_postings'))
+        return True
 
-            metadata = self._feature_meta.get(feature_name, {})
+    def _compile_sections(self, output_dir: Path) -> None:
+        """Precompute the section and structure indexes of the T-API.
+
+        Writes the arrays of computed/sections_* (including the names of the
+        top level sections in every language) and computed/structure_*, so
+        that loading maps them instead of walking the section nodes.
+        """
+        if self._sections_reusable():
+            for name in self._previous_files('computed'):
+                if name.startswith(SECTION_INDEXES):
+                    self._link(f'computed/{name}', output_dir)
+            return
 
-            self.info(f"  Compiling {feature_name} (edge, values={has_values})...")
+        if (
+            self._otype_data is None
+            or self._oslots_data is None
+            or self._levels_data is None
+            or self._levup_data is None
+            or self._levdown_data is None
+        ):
+            return
 
-            if has_values:
-                self._compile_edge_with_values(
-                    feature_name, data, edges_dir, metadata
-                )
-            else:
-                self._compile_edge_no_values(
-                    feature_name, data, edges_dir, metadata
-                )
+        def log_info(msg: str, tm: bool = True) -> None:
+            self.info(f"  {msg}")
+
+        def log_error(msg: str, tm: bool = True) -> None:
+            self.error(f"  {msg}")
+
+        computed_dir = output_dir / 'computed'
+        otext = self._otext_meta
+
+        section_types = itemize(otext.get('sectionTypes', ''), ',')
+        section_feats = itemize(otext.get('sectionFeatures', ''), ',')
+        if (
+            section_types
+            and section_feats
+            and all(f in self._node_features for f in section_feats)
+        ):
+            sections_data = prepare.sections(
+                log_info, log_error,
+                self._otype_data,
+                self._oslots_data,
+                otext,
+                self._levup_data,
+                self._levdown_data,
+                self._levels_data,
+                *(self._feature_dict(f) for f in section_feats),
+            )
+            save_sections(
+                sections_data,
+                str(computed_dir / 'sections'),
+                self._section_names(section_types[0], section_feats[0]),
+            )
+
+        structure_types = itemize(otext.get('structureTypes', ''), ',')
+        structure_feats = itemize(otext.get('structureFeatures', ''), ',')
+        if (
+            structure_types
+            and structure_feats
+            and self._rank_data is not None
+            and all(f in self._node_features for f in structure_feats)
+        ):
+            structure_data = prepare.structure(
+                log_info, log_error,
+                self._otype_data,
+                self._oslots_data,
+                otext,
+                self._rank_data,
+                self._levup_data,
+                *(self._feature_dict(f) for f in structure_feats),
+            )
+            if len(structure_data) == 6:
+                save_structure(structure_data, str(computed_dir / 'structure'))
+
+    def _feature_dict(self, feature_name: str) -> dict[int, Any]:
+        """The data of a node feature as a dict from node to value."""
+        data = self._node_features[feature_name]
+        return data.to_dict() if isinstance(data, TfFeature) else data
+
+    def _section_inputs(self) -> set[str]:
+        """The features the section and structure indexes are computed from."""
+        otext = self._otext_meta
+        section_feats = itemize(otext.get('sectionFeatures', ''), ',')
+        inputs = set(section_feats)
+        inputs |= set(itemize(otext.get('structureFeatures', ''), ','))
+        if section_feats:
+            names = set(self._sources)
+            if self._previous is not None:
+                names |= set(self._previous['sources'])
+            inputs |= {n for n in names if n.startswith(f'{section_feats[0]}@')}
+        return inputs
+
+    def _sections_reusable(self) -> bool:
+        """Whether the section indexes of the reused build are still valid."""
+        return self._previous is not None and all(
+            self._unchanged(name) for name in self._section_inputs()
+        )
+
+    def _section_names(
+        self, section_type: str, section_feat: str
+    ) -> dict[str, dict[str, Any]]:
+        """Names of the top level sections, per language.
+
+        The names come from the first section feature and its language
+        variants (`book@en`, `book@de`, ...), keyed by their `languageCode`.
+        """
+        assert self._otype_data is not None
+        (otype_list, max_slot, max_node, slot_type) = self._otype_data
+
+        names: dict[str, dict[str, Any]] = {}
+        for feature_name in self._node_features:
+            if feature_name != section_feat and not feature_name.startswith(
+                f'{section_feat}@'
+            ):
+                continue
+            data = self._feature_dict(feature_name)
+            metadata = self._feature_meta.get(feature_name, {})
+            entry: dict[str, Any] = {
+                k: metadata.get(k, 'default') for k in ('language', 'languageEnglish')
+            }
+            entry['type'] = section_type
+            entry['names'] = [
+                [n, name]
+                for (n, name) in data.items()
+                if (otype_list[n - max_slot - 1] if n > max_slot else slot_type)
+                == section_type
+            ]
+            names[metadata.get('languageCode', '')] = entry
+        return names
 
     def _compile_edge_no_values(
         self,
         feature_name: str,
-        data: dict[int, set[int]],
+        data: TfFeature,
         output_dir: Path,
         metadata: dict[str, str],
     ) -> None:
         """Compile an edge feature without values."""
-        # Convert to CSR format
-        # Create sequences for each node (sorted by target)
-        sequences: list[list[int]] = []
-        for n in range(1, self.max_node + 1):
-            if n in data:
-                sequences.append(sorted(data[n]))
-            else:
-                sequences.append([])
-
-        csr = CSRArray.from_sequences(sequences)
+        # Rows are source nodes (0-indexed), columns target nodes
+        sources = data.nodes.astype(np.int64)
+        targets = data.targets.astype(np.int64)
+        csr = CSRArray.from_pairs(sources - 1, targets, self.max_node)
         csr.save(str(output_dir / feature_name))
 
         # Compute and save inverse edges
-        inverse = makeInverse(data)
-        inv_sequences: list[list[int]] = []
-        for n in range(1, self.max_node + 1):
-            if n in inverse:
-                inv_sequences.append(sorted(inverse[n]))
-            else:
-                inv_sequences.append([])
-
-        inv_csr = CSRArray.from_sequences(inv_sequences)
+        inv_csr = CSRArray.from_pairs(targets - 1, sources, self.max_node)
         inv_csr.save(str(output_dir / f'{feature_name}_inv'))
 
         # Save metadata
@@ -828,66 +1551,50 @@ class Compiler:
     def _compile_edge_with_values(
         self,
         feature_name: str,
-        data: dict[int, dict[int, Any]],
+        data: TfFeature,
         output_dir: Path,
         metadata: dict[str, str],
     ) -> None:
         """Compile an edge feature with values."""
         value_type = metadata.get('valueType', 'str')
         is_int = value_type == 'int'
+        assert data.values is not None and data.missing is not None
 
         # Determine value dtype and sentinel for None values
         # TF allows edges with @edgeValues where some edges have no explicit
         # value - these parse as None. We use a sentinel to preserve the
         # distinction between None and actual values (like 0).
-        value_dtype: str
-        none_sentinel: int | None
+        none_sentinel: int | None = None
+        value_table: StringTable | None = None
         if is_int:
-            value_dtype = 'int32'
             # INT32_MIN as sentinel - extremely unlikely to be a real value
             none_sentinel = -2147483648
 
             # Check for sentinel collision
-            all_values = (v for row in data.values() for v in row.values())
             _check_sentinel_collision(
-                all_values, none_sentinel, feature_name, 'edge'
+                np.unique(data.values[~data.missing]).tolist(),
+                none_sentinel, feature_name, 'edge',
             )
+            values = data.values.astype('int32')
+            values[data.missing] = none_sentinel
         else:
-            value_dtype = 'object'
-            # For strings, we can store None directly in object arrays
-            none_sentinel = None
-
-        # Convert to CSRArrayWithValues format
-        # First, convert data to 0-indexed format expected by CSRArrayWithValues
-        data_0indexed: dict[int, dict[int, Any]] = {}
-        for n in range(1, self.max_node + 1):
-            if n in data:
-                row = data[n]
-                # Convert None values to sentinel for int types
-                data_0indexed[n - 1] = {
-                    m: (v if v is not None else none_sentinel)
-                    for m, v in row.items()
-                }
-
-        csr = CSRArrayWithValues.from_dict_of_dicts(
-            data_0indexed, self.max_node, value_dtype
+            # String values are ids into a table of the distinct strings
+            assert data.strings is not None
+            values = data.values.astype(NODE_DTYPE)
+            values[data.missing] = MISSING_STR_INDEX
+            value_table = StringTable.from_strings(data.strings)
+
+        # Rows are source nodes (0-indexed), columns target nodes
+        sources = data.nodes.astype(np.int64)
+        targets = data.targets.astype(np.int64)
+        csr = CSRArrayWithValues.from_pairs(
+            sources - 1, targets, values, self.max_node, value_table
         )
         csr.save(str(output_dir / feature_name))
 
         # Compute and save inverse edges
-        inverse = makeInverseVal(data)
-        inv_data_0indexed: dict[int, dict[int, Any]] = {}
-        for n in range(1, self.max_node + 1):
-            if n in inverse:
-                row = inverse[n]
-                # Convert None values to sentinel for int types
-                inv_data_0indexed[n - 1] = {
-                    m: (v if v is not None else none_sentinel)
-                    for m, v in row.items()
-                }
-
-        inv_csr = CSRArrayWithValues.from_dict_of_dicts(
-            inv_data_0indexed, self.max_node, value_dtype
+        inv_csr = CSRArrayWithValues.from_pairs(
+            targets - 1, sources, values, self.max_node, value_table
         )
         inv_csr.save(str(output_dir / f'{feature_name}_inv'))
 
@@ -904,11 +1611,48 @@ class Compiler:
         with open(output_dir / f'{feature_name}_meta.json', 'w') as f:
             json.dump(meta, f, indent=1)
 
-    def _write_meta(self, output_dir: Path) -> None:
-        """Write corpus metadata to meta.json."""
+    def _dtypes(self, output_dir: Path) -> dict[str, str]:
+        """The widths of node references and of CSR row pointers.
+
+        Both are 32 bits, unless the corpus has more nodes, or a CSR array
+        more entries, than 32 bits can count; the arrays that need it are
+        then written with 64 bits (see `node_dtype` and `index_dtype`).
+        """
+        index = np.dtype(index_dtype(0))
+        for path in output_dir.rglob('*_indptr.npy'):
+            with open(path, 'rb') as f:
+                version = np.lib.format.read_magic(f)
+                if version == (1, 0):
+                    header = np.lib.format.read_array_header_1_0(f)
+                else:
+                    header = np.lib.format.read_array_header_2_0(f)
+            index = max(index, header[2], key=lambda d: d.itemsize)
+        return {'node': node_dtype(self.max_node), 'index': str(index)}
+
+    def _write_meta(
+        self,
+        output_dir: Path,
+        reused: tuple[list[str], list[str]] = ([], []),
+    ) -> None:
+        """Write corpus metadata to meta.json.
+
+        Parameters
+        ----------
+        output_dir : Path
+            The compiled directory
+        reused : tuple
+            Node and edge features taken over from the previous compilation
+        """
         # Collect feature names
-        node_features = list(self._node_features.keys())
-        edge_features = list(self._edge_features.keys())
+        node_features = self._compiled['node'] + reused[0]
+        edge_features = self._compiled['edge'] + reused[1]
+
+        sources = {
+            name: {**record, 'files': self._files[name]}
+            if name in self._files
+            else record
+            for name, record in self._sources.items()
+        }
 
         meta: dict[str, Any] = {
             'cfm_version': CFM_VERSION,
@@ -918,10 +1662,14 @@ class Compiler:
             'slot_type': self.slot_type,
             'node_types': self.node_types,
             'type_order': self.type_order,
+            'type_ranges': self.type_ranges,
+            'dtypes': self._dtypes(output_dir),
             'features': {
                 'node': node_features,
                 'edge': edge_features
             },
+            'options': self._options(),
+            'sources': sources,
             'created': datetime.now(timezone.utc).isoformat()
         }
 
@@ -933,7 +1681,16 @@ class Compiler:
             json.dump(meta, f, indent=1, ensure_ascii=False)
 
 
-def compile_corpus(source_dir: str, output_dir: str | None = None) -> bool:
+def compile_corpus(
+    source_dir: str,
+    output_dir: str | None = None,
+    postings: bool = False,
+    compress: bool = False,
+    pack: bool = False,
+    incremental: bool = True,
+    workers: int = 1,
+    memory_budget: int | None = None,
+) -> bool:
     """
     Convenience function to compile a .tf corpus to CFM format.
 
@@ -943,11 +1700,31 @@ def compile_corpus(source_dir: str, output_dir: str | None = None) -> bool:
         Path to directory containing .tf source files
     output_dir : str, optional
         Output directory. Defaults to {source_dir}/.cfm/{CFM_VERSION}/
+    postings : bool, optional
+        Also write inverted postings indexes for node features
+    compress : bool, optional
+        Write oslots, levUp, levDown and boundary in compressed CSR form
+    pack : bool, optional
+        Pack the output into a single .cfmpack file
+    incremental : bool, optional
+        Only recompile what changed since the previous compilation
+    workers : int, optional
+        Number of processes that parse and compile features
+    memory_budget : int, optional
+        Memory budget in bytes; beyond it the large sorts spill to disk
 
     Returns
     -------
     bool
         True if compilation succeeded
     """
-    compiler = Compiler(source_dir)
+    compiler = Compiler(
+        source_dir,
+        postings=postings,
+        compress=compress,
+        pack=pack,
+        incremental=incremental,
+        workers=workers,
+        memory_budget=memory_budget,
+    )
     return compiler.compile(output_dir)
@@ -0,0 +1,437 @@
+"""
+Streaming reader for .tf feature files.
+
+Reading a feature into a dict from node to value (or to a set or dict of
+nodes, for edges) costs many times the size of the file. `read_tf` reads
+a file in chunks of lines and appends node numbers and values to typed
+buffers instead; string values are interned, so every distinct string is
+held once. The result, a `TfFeature`, is a handful of flat arrays that
+the storage classes turn into their own arrays directly:
+
+    IntFeatureArray.from_arrays   integer node features
+    StringPool.from_codes         string node features
+    CSRArray.from_pairs           edge features without values
+    CSRArrayWithValues.from_pairs edge features with values
+
+The reader follows the same rules as `Compiler._parse_tf_file`: implicit
+node numbers, node ranges (`1-3,7`), later lines overriding earlier ones.
+"""
+
+from __future__ import annotations
+
+import array
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TextIO
+
+import numpy as np
+
+from cfabric.core.config import MISSING_STR_INDEX, NODE_DTYPE
+from cfabric.utils.files import fileExists
+from cfabric.utils.helpers import setFromSpec, valueFromTf
+
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK = 1 << 22
+"""Approximate number of bytes of lines read at a time."""
+
+
+def _empty(dtype: str) -> NDArray[Any]:
+    return np.zeros(0, dtype=dtype)
+
+
+@dataclass
+class TfFeature:
+    """
+    The contents of a .tf feature file as flat arrays.
+
+    Node features have an entry per node with a value, in node order.
+    Edge features have an entry per edge, ordered by source and then
+    target node.
+
+    Attributes
+    ----------
+    metadata : dict
+        The metadata lines of the file
+    is_edge : bool
+        Whether the feature is an edge feature
+    edge_values : bool
+        Whether the edges have values
+    is_config : bool
+        Whether the file is a configuration file without data
+    nodes : np.ndarray
+        Nodes with a value, or edge sources (uint32, or uint64 for node
+        numbers beyond 32 bits)
+    targets : np.ndarray
+        Edge targets (as nodes); empty for node features
+    values : np.ndarray | None
+        Integer values (int64), or for string features indices into
+        `strings` (uint32); None for edges without values
+    strings : list of str | None
+        The distinct string values, sorted; None for integer features
+    missing : np.ndarray | None
+        For edges with values: which edges have no value (bool)
+    """
+
+    metadata: dict[str, str] = field(default_factory=dict)
+    is_edge: bool = False
+    edge_values: bool = False
+    is_config: bool = False
+    nodes: NDArray[np.uint32] = field(default_factory=lambda: _empty(NODE_DTYPE))
+    targets: NDArray[np.uint32] = field(default_factory=lambda: _empty(NODE_DTYPE))
+    values: NDArray[Any] | None = None
+    strings: list[str] | None = None
+    missing: NDArray[np.bool_] | None = None
+
+    @property
+    def value_type(self) -> str:
+        return self.metadata.get('valueType', 'str')
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def to_dict(self) -> dict[int, Any]:
+        """
+        The data as `Compiler._parse_tf_file` gives it.
+
+        Returns
+        -------
+        dict
+            node -> value for node features; node -> set of nodes for
+            edges without values; node -> {node: value} for edges with
+            values
+        """
+        nodes = self.nodes.tolist()
+        values: list[Any] | None = None
+        if self.values is not None:
+            if self.strings is None:
+                values = self.values.tolist()
+            else:
+                strings = self.strings
+                values = [
+                    None if code == MISSING_STR_INDEX else strings[code]
+                    for code in self.values.tolist()
+                ]
+            if self.missing is not None:
+                values = [
+                    None if gone else v
+                    for (v, gone) in zip(values, self.missing.tolist())
+                ]
+
+        if not self.is_edge:
+            return dict(zip(nodes, values or []))
+
+        data: dict[int, Any] = {}
+        targets = self.targets.tolist()
+        if values is None:
+            for n, m in zip(nodes, targets):
+                data.setdefault(n, set()).add(m)
+        else:
+            for n, m, v in zip(nodes, targets, values):
+                data.setdefault(n, {})[m] = v
+        return data
+
+    @classmethod
+    def from_dict(
+        cls,
+        data: dict[int, Any],
+        metadata: dict[str, str] | None = None,
+        is_edge: bool = False,
+        edge_values: bool = False,
+    ) -> TfFeature:
+        """
+        Build from feature data in dict form (see `to_dict`).
+
+        Parameters
+        ----------
+        data : dict
+            The feature data
+        metadata : dict, optional
+            The feature metadata; its `valueType` decides between integer
+            and string values
+        is_edge : bool
+            Whether the feature is an edge feature
+        edge_values : bool
+            Whether the edges have values
+
+        Returns
+        -------
+        TfFeature
+        """
+        metadata = metadata or {}
+        is_num = metadata.get('valueType', 'str') == 'int'
+        builder = _Builder(is_num, is_edge, edge_values)
+        if not is_edge:
+            for n, v in data.items():
+                if v is not None:
+                    builder.add_node(n, v)
+        elif not edge_values:
+            for n, ms in data.items():
+                for m in ms:
+                    builder.add_edge(n, m)
+        else:
+            for n, row in data.items():
+                for m, v in row.items():
+                    builder.add_edge(n, m, v)
+        return builder.finish(metadata)
+
+
+class _Builder:
+    """Collects the entries of a feature in typed buffers."""
+
+    def __init__(self, is_num: bool, is_edge: bool, edge_values: bool) -> None:
+        self.is_num = is_num
+        self.is_edge = is_edge
+        self.edge_values = edge_values
+        self.has_values = not is_edge or edge_values
+        self.nodes = array.array('I')
+        self.targets = array.array('I')
+        self.values = array.array('q' if is_num else 'I')
+        self.missing = array.array('B')
+        self.strings: list[str] = []
+        self.codes: dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        """Index of an (interned) string value."""
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.strings)
+            self.codes[value] = code
+            self.strings.append(value)
+        return code
+
+    def value(self, value: Any) -> tuple[int, int]:
+        """Stored form of a value, and whether it is missing."""
+        if value is None:
+            return (0 if self.is_num else MISSING_STR_INDEX, 1)
+        return (value if self.is_num else self.code(value), 0)
+
+    def widen(self) -> None:
+        """Hold node numbers in 64 bits, once one does not fit in 32."""
+        self.nodes = array.array('Q', self.nodes)
+        self.targets = array.array('Q', self.targets)
+
+    def add_node(self, n: int, value: Any) -> None:
+        try:
+            self.nodes.append(n)
+        except OverflowError:
+            self.widen()
+            self.nodes.append(n)
+        self.values.append(value if self.is_num else self.code(value))
+
+    def add_edge(self, n: int, m: int, value: Any = None) -> None:
+        try:
+            self.nodes.append(n)
+            self.targets.append(m)
+        except OverflowError:
+            if len(self.nodes) > len(self.targets):
+                self.nodes.pop()
+            self.widen()
+            self.nodes.append(n)
+            self.targets.append(m)
+        if self.edge_values:
+            (stored, gone) = self.value(value)
+            self.values.append(stored)
+            self.missing.append(gone)
+
+    def finish(self, metadata: dict[str, str]) -> TfFeature:
+        """Turn the buffers into a TfFeature.
+
+        Entries are sorted; of entries for the same node (or the same
+        edge) the last one is kept.
+        """
+        node_dtype = np.dtype(f'u{self.nodes.itemsize}')
+        nodes = np.frombuffer(self.nodes, dtype=node_dtype)
+        targets = np.frombuffer(self.targets, dtype=node_dtype)
+        if self.is_edge:
+            order = np.lexsort((targets, nodes))
+            keys: tuple[NDArray[Any], ...] = (nodes[order], targets[order])
+        else:
+            order = np.argsort(nodes, kind='stable')
+            keys = (nodes[order],)
+        # An entry is the last for its key if the next entry differs in
+        # some part of the key
+        last = np.ones(len(order), dtype=bool)
+        if len(order) > 1:
+            last[:-1] = np.logical_or.reduce([key[1:] != key[:-1] for key in keys])
+        keep = order[last]
+
+        feature = TfFeature(
+            metadata=metadata,
+            is_edge=self.is_edge,
+            edge_values=self.edge_values,
+            nodes=nodes[keep],
+            targets=targets[keep] if self.is_edge else targets.copy(),
+        )
+        if not self.has_values:
+            return feature
+
+        dtype = np.int64 if self.is_num else np.uint32
+        values = np.frombuffer(self.values, dtype=dtype)[keep]
+        if self.edge_values:
+            feature.missing = np.frombuffer(self.missing, dtype=np.uint8)[keep] != 0
+        if self.is_num:
+            feature.values = values
+            return feature
+
+        # Only keep the strings in use, sorted, and renumber accordingly
+        present = values != MISSING_STR_INDEX
+        used, inverse = np.unique(values[present], return_inverse=True)
+        strings = [self.strings[i] for i in used.tolist()]
+        rank = sorted(range(len(strings)), key=strings.__getitem__)
+        renumber = np.empty(len(strings), dtype=np.uint32)
+        renumber[rank] = np.arange(len(strings), dtype=np.uint32)
+        codes = np.full(len(values), MISSING_STR_INDEX, dtype=np.uint32)
+        codes[present] = renumber[inverse]
+        feature.values = codes
+        feature.strings = [strings[i] for i in rank]
+        return feature
+
+
+def _nodes(spec: str) -> list[int]:
+    """The nodes of a node specification such as `7` or `1-3,7`."""
+    return [int(spec)] if spec.isdigit() else sorted(setFromSpec(spec))
+
+
+def read_tf_header(
+    fh: TextIO, name: str
+) -> tuple[dict[str, str], bool, bool, bool] | None:
+    """
+    Read the header of a .tf file: its kind and its metadata.
+
+    Parameters
+    ----------
+    fh : file
+        The opened file, positioned at the start
+    name : str
+        File name, for error messages
+
+    Returns
+    -------
+    tuple | None
+        (metadata, is_edge, edge_values, is_config), or None if the file
+        is empty or its first line is not @node, @edge or @config
+    """
+    first = fh.readline()
+    if not first:
+        return None
+    first = first.strip()
+    if first not in ('@node', '@edge', '@config'):
+        logger.error(f"{name}: Line 1: missing @node/@edge/@config")
+        return None
+
+    metadata: dict[str, str] = {}
+    edge_values = False
+    for line in fh:
+        # Keep trailing spaces: they matter in format strings
+        line = line.rstrip('\n')
+        if not line.strip():
+            break
+        if line == '@edgeValues':
+            edge_values = True
+        elif line.startswith('@') and '=' in line:
+            key, val = line[1:].split('=', 1)
+            metadata[key] = val
+    return (metadata, first == '@edge', edge_values, first == '@config')
+
+
+def read_tf(path: Path | str, chunk: int = READ_CHUNK) -> TfFeature:
+    """
+    Read a .tf feature file into flat arrays.
+
+    Parameters
+    ----------
+    path : Path or str
+        Location of the .tf file
+    chunk : int, optional
+        Approximate number of bytes of lines to read at a time
+
+    Returns
+    -------
+    TfFeature
+        Empty if the file does not exist or is invalid
+    """
+    path = Path(path)
+    if not fileExists(str(path)):
+        logger.error(f"Feature file not found: {path}")
+        return TfFeature()
+
+    with open(path, encoding='utf8') as fh:
+        header = read_tf_header(fh, path.name)
+        if header is None:
+            return TfFeature()
+        (metadata, is_edge, edge_values, is_config) = header
+        if is_config:
+            return TfFeature(metadata=metadata, is_config=True)
+
+        is_num = metadata.get('valueType', 'str') == 'int'
+        builder = _Builder(is_num, is_edge, edge_values)
+        # Raw value -> value, so every distinct value is unescaped once
+        decoded: dict[str, Any] = {}
+        implicit_node = 1
+
+        while lines := fh.readlines(chunk):
+            for line in lines:
+                # Blank lines are empty values of the implicit node
+                fields = line.rstrip('\n').split('\t')
+                lfields = len(fields)
+
+                if not is_edge:
+                    if lfields == 2:
+                        nodes = _nodes(fields[0])
+                        val_tf = fields[1]
+                    else:
+                        nodes = [implicit_node]
+                        val_tf = fields[0] if lfields == 1 else ''
+                    implicit_node = nodes[-1] + 1
+                    if is_num:
+                        if val_tf == '':
+                            continue
+                        value: Any = int(val_tf)
+                    else:
+                        value = decoded.get(val_tf)
+                        if value is None:
+                            value = valueFromTf(val_tf) if val_tf else ''
+                            decoded[val_tf] = value
+                    for n in nodes:
+                        builder.add_node(n, value)
+                    continue
+
+                norm_fields = 3 if edge_values else 2
+                val_tf = ''
+                if lfields == norm_fields:
+                    if fields[1] == '':
+                        continue
+                    nodes = _nodes(fields[0])
+                    nodes2 = _nodes(fields[1])
+                    if edge_values:
+                        val_tf = fields[2]
+                elif lfields == norm_fields - 1 or (edge_values and lfields == 1):
+                    if not edge_values and fields[0] == '':
+                        continue
+                    nodes = [implicit_node]
+                    nodes2 = _nodes(fields[0])
+                    if edge_values and lfields == 2:
+                        val_tf = fields[1]
+                else:
+                    continue
+                implicit_node = nodes[-1] + 1
+
+                value = None
+                if edge_values:
+                    if is_num:
+                        value = int(val_tf) if val_tf != '' else None
+                    else:
+                        value = decoded.get(val_tf)
+                        if value is None:
+                            value = valueFromTf(val_tf) if val_tf else ''
+                            decoded[val_tf] = value
+                for n in nodes:
+                    for m in nodes2:
+                        builder.add_edge(n, m, value)
+
+    return builder.finish(metadata)
@@ -99,16 +99,16 @@ class Locality:
 
         slotType = Fotype.slotType
         fOtype = Fotype.v
-        levUp = api.C.levUp.data
         Eoslots = api.E.oslots
 
         slots = Eoslots.s(n)
-        result: set[int] = set()
-        for slot in slots:
-            result |= {m for m in levUp[slot - 1] if fOtype(m) in otype}
-            if slotType in otype:
-                result.add(slot)
-        return sortNodes(result - {n})
+        # Embedders of all slots in one gather
+        (embedders, _, _) = api.C.levUp.gather(slots)
+        candidates = set(embedders.tolist())
+        if slotType in otype:
+            candidates.update(slots)
+        result = {m for m in candidates if m != n and fOtype(m) in otype}
+        return sortNodes(result)
 
     def u(self, n: int, otype: str | set[str] | frozenset[str] | None = None) -> tuple[int, ...]:
         """Produces an ordered tuple of *upward* nodes.
@@ -358,7 +358,7 @@ features to furnish a decent representation.
 from __future__ import annotations
 
 import logging
-from collections.abc import Callable, Iterable
+from collections.abc import Callable, Iterable, Mapping
 from typing import TYPE_CHECKING, Any
 
 import numpy as np
@@ -376,6 +376,23 @@ SEP = "-"
 TYPE_FMT_SEP = "#"
 
 
+class _SectionLookup:
+    """Dictionary-style lookup of section headings in a section feature.
+
+    Looks values up with `v()`, so that memory-mapped features do not have
+    to be turned into a dictionary.
+    """
+
+    __slots__ = ("_v",)
+
+    def __init__(self, feature: Any) -> None:
+        self._v = feature.v
+
+    def get(self, n: int, default: Any = None) -> Any:
+        value = self._v(n)
+        return default if value is None else value
+
+
 class Text:
     """Low level text representation, including section headings.
 
@@ -405,14 +422,14 @@ class Text:
         """A dictionary of the languages that are available for book names.
         """
 
-        self.nameFromNode: dict[str, dict[int, str]] = {}
-        self.nodeFromName: dict[str, dict[tuple[str, str], int]] = {}
+        self.nameFromNode: dict[str, Mapping[int, str]] = {}
+        self.nodeFromName: dict[str, Mapping[tuple[str, str], int]] = {}
         config = api.CF.features[OTEXT].metaData if OTEXT in api.CF.features else {}
         self.sectionTypes: tuple[str, ...] = CF.sectionTypes
         self.sectionTypeSet: set[str] = set(CF.sectionTypes)
         self.sectionFeats: tuple[str, ...] = CF.sectionFeats
         self.sectionFeatsWithLanguage: set[str] = getattr(CF, "sectionFeatsWithLanguage", set())
-        self.sectionFeatures: list[dict[int, str | int]] = []
+        self.sectionFeatures: list[_SectionLookup] = []
         self.sectionFeatureTypes: list[str] = []
         self.structureTypes: tuple[str, ...] = CF.structureTypes
         self.structureFeats: tuple[str, ...] = CF.structureFeats
@@ -441,28 +458,49 @@ class Text:
 
         good = True
         if len(self.sectionFeats) != 0 and len(self.sectionTypes) != 0:
-            for fName in self.sectionFeatsWithLanguage:
-                fData = Fs(fName)
-                if fData is None:
-                    good = False
-                    continue
-                # Get metadata from api.F feature (has loaded metadata from .cfm)
-                # or fall back to CF.features (for .tf loading)
-                fFeature = getattr(api.F, fName, None)
-                if fFeature is not None and hasattr(fFeature, 'meta'):
-                    meta = fFeature.meta
-                else:
-                    fObj = api.CF.features.get(fName)
-                    meta = fObj.metaData if fObj else {}
-                code = meta.get("languageCode", "")
-                self.languages[code] = {
-                    k: meta.get(k, "default") for k in ("language", "languageEnglish")
-                }
-                cData = fData.data
-                self.nameFromNode[code] = cData
-                self.nodeFromName[code] = dict(
-                    ((fOtype(node), name), node) for (node, name) in cData.items()
-                )
+            sections = getattr(C, "sections", None)
+            names = None if sections is None else sections.data.get("names", None)
+            if names is not None:
+                # Compiled corpora (.cfm) store the names of the top level
+                # sections, so the section features need not be read here
+                sec0 = self.sectionTypes[0]
+                for code, entry in names.items():
+                    self.languages[code] = {
+                        k: entry[k] for k in ("language", "languageEnglish")
+                    }
+                    if "nodes" in entry:
+                        # memory-mapped, see cfabric.storage.sections
+                        self.nameFromNode[code] = entry["names"]
+                        self.nodeFromName[code] = entry["nodes"]
+                        continue
+                    self.nameFromNode[code] = dict(entry["names"])
+                    self.nodeFromName[code] = {
+                        (sec0, name): node for (node, name) in entry["names"]
+                    }
+            else:
+                for fName in self.sectionFeatsWithLanguage:
+                    fData = Fs(fName)
+                    if fData is None:
+                        good = False
+                        continue
+                    # Get metadata from api.F feature (has loaded metadata from .cfm)
+                    # or fall back to CF.features (for .tf loading)
+                    fFeature = getattr(api.F, fName, None)
+                    if fFeature is not None and hasattr(fFeature, 'meta'):
+                        meta = fFeature.meta
+                    else:
+                        fObj = api.CF.features.get(fName)
+                        meta = fObj.metaData if fObj else {}
+                    code = meta.get("languageCode", "")
+                    self.languages[code] = {
+                        k: meta.get(k, "default")
+                        for k in ("language", "languageEnglish")
+                    }
+                    cData = fData.data
+                    self.nameFromNode[code] = cData
+                    self.nodeFromName[code] = dict(
+                        ((fOtype(node), name), node) for (node, name) in cData.items()
+                    )
             for fName in self.sectionFeats:
                 fData = api.Fs(fName)
                 if fData is None:
@@ -475,7 +513,7 @@ class Text:
                 else:
                     fObj = api.CF.features.get(fName)
                     dataType = fObj.dataType if fObj else 'str'
-                self.sectionFeatures.append(fData.data)
+                self.sectionFeatures.append(_SectionLookup(fData))
                 self.sectionFeatureTypes.append(dataType)
 
             if good:
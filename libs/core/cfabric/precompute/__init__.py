@@ -14,7 +14,11 @@ from cfabric.precompute.prepare import (
     characters,
     sections,
     sectionsFromApi,
+    sectionsFromJson,
+    sectionsToJson,
     structure,
+    structureFromJson,
+    structureToJson,
 )
 
 __all__ = [
@@ -27,5 +31,9 @@ __all__ = [
     "characters",
     "sections",
     "sectionsFromApi",
+    "sectionsFromJson",
+    "sectionsToJson",
     "structure",
+    "structureFromJson",
+    "structureToJson",
 ]
@@ -0,0 +1,278 @@
+"""
+# Canonical order on arrays.
+
+The canonical order (see `cfabric.nodes`) compares nodes by their slot sets:
+
+*   if one slot set is a proper superset of the other, its node comes first;
+*   otherwise the node whose smallest slot that is not in the other set is
+    smallest comes first;
+*   nodes with the same slots are ordered by the rank of their types, higher
+    level types first, and then by node number.
+
+Written out as sorted slot lists, this is the lexicographic order in which a
+list that ends is larger than any slot. Grouping the slots into runs of
+consecutive slots, it is the lexicographic order on the runs, where a run
+with a smaller start comes first, of runs with the same start the longer one
+comes first, and a list of runs that ends comes last.
+
+Most nodes consist of a single run, so comparing by runs takes one or a few
+rounds of sorting the whole node set with `numpy.lexsort`; in every next round
+only the nodes that are still tied take part.
+"""
+
+from __future__ import annotations
+
+from itertools import chain
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from cfabric.storage.csr import node_dtype
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+
+    from numpy.typing import NDArray
+
+_END = np.iinfo(np.int64).max
+"""Sort key of the position after the last run of a node."""
+
+
+def row_chunks(
+    indptr: NDArray[np.integer], size: int | None = None
+) -> Iterator[tuple[int, int]]:
+    """Cut the rows of a CSR array into ranges with a bounded number of entries.
+
+    Parameters
+    ----------
+    indptr: np.ndarray
+        Row pointers of the CSR array.
+    size: int, optional
+        The maximum number of entries in a range; a single row with more
+        entries gets a range of its own. By default all rows are in one range.
+
+    Yields
+    ------
+    tuple
+        `(first, end)`: the rows from `first` up to `end`.
+    """
+    n_rows = len(indptr) - 1
+    first = 0
+    while first < n_rows:
+        if size is None:
+            end = n_rows
+        else:
+            end = int(np.searchsorted(indptr, indptr[first] + size, side='right'))
+            end = min(max(end - 1, first + 1), n_rows)
+        yield first, end
+        first = end
+
+
+def _row_runs(
+    indptr: NDArray[np.int64], data: NDArray[np.integer]
+) -> tuple[NDArray[np.int64], NDArray[np.int64], NDArray[np.int64]]:
+    """The runs of the rows of a CSR array: per run its row, start and end."""
+    slots = np.asarray(data, dtype=np.int64)
+    n_rows = len(indptr) - 1
+    rows = np.repeat(np.arange(n_rows), np.diff(indptr))
+
+    # Slot sets are sets: sort and deduplicate the rows unless they are
+    # strictly increasing already
+    ascending = (rows[1:] != rows[:-1]) | (slots[1:] > slots[:-1])
+    if not ascending.all():
+        order = np.lexsort((slots, rows))
+        rows, slots = rows[order], slots[order]
+        distinct = np.ones(len(slots), dtype=bool)
+        distinct[1:] = (rows[1:] != rows[:-1]) | (slots[1:] != slots[:-1])
+        rows, slots = rows[distinct], slots[distinct]
+
+    starts = np.ones(len(slots), dtype=bool)
+    starts[1:] = (rows[1:] != rows[:-1]) | (slots[1:] != slots[:-1] + 1)
+    ends = np.ones(len(slots), dtype=bool)
+    ends[:-1] = starts[1:]
+    return rows[starts], slots[starts], slots[ends]
+
+
+def slot_runs(
+    indptr: NDArray[np.integer],
+    data: NDArray[np.integer],
+    chunk: int | None = None,
+) -> tuple[NDArray[np.int64], NDArray[np.int64], NDArray[np.int64]]:
+    """Group the slots of every row of a CSR array into runs.
+
+    Parameters
+    ----------
+    indptr: np.ndarray
+        Row pointers of the slots per node.
+    data: np.ndarray
+        The slots, concatenated.
+    chunk: int, optional
+        Read the slots in ranges of rows with about this many slots, see
+        `row_chunks`, so that `data` may be a memory map that does not fit in
+        memory. By default all slots are read at once.
+
+    Returns
+    -------
+    tuple
+        `(run_ptr, run_start, run_end)`: the runs of row `i` are
+        `run_ptr[i]` up to `run_ptr[i + 1]`; each run covers the slots
+        `run_start` up to and including `run_end`.
+    """
+    indptr = np.asarray(indptr, dtype=np.int64)
+    n_rows = len(indptr) - 1
+    counts = np.zeros(n_rows, dtype=np.int64)
+    starts: list[NDArray[np.int64]] = [np.zeros(0, dtype=np.int64)]
+    ends: list[NDArray[np.int64]] = [np.zeros(0, dtype=np.int64)]
+    for (first, end) in row_chunks(indptr, chunk):
+        (rows, run_start, run_end) = _row_runs(
+            indptr[first:end + 1] - indptr[first],
+            data[indptr[first]:indptr[end]],
+        )
+        counts[first:end] = np.bincount(rows, minlength=end - first)
+        starts.append(run_start)
+        ends.append(run_end)
+
+    run_ptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(counts, out=run_ptr[1:])
+    return run_ptr, np.concatenate(starts), np.concatenate(ends)
+
+
+def sequence_arrays(
+    sequences: Sequence[Sequence[int]],
+) -> tuple[NDArray[np.int64], NDArray[np.int64]]:
+    """Sequences of nodes, such as the slots of the non-slot nodes, as CSR arrays.
+
+    Parameters
+    ----------
+    sequences: tuple
+        Per row: its nodes.
+
+    Returns
+    -------
+    tuple
+        `(indptr, data)`
+    """
+    indptr = np.zeros(len(sequences) + 1, dtype=np.int64)
+    np.cumsum([len(row) for row in sequences], out=indptr[1:])
+    data = np.fromiter(
+        chain.from_iterable(sequences), dtype=np.int64, count=int(indptr[-1])
+    )
+    return indptr, data
+
+
+def type_ranks(
+    otype_data: tuple[str, ...], max_slot: int, slot_type: str, levels: Any
+) -> NDArray[np.int64]:
+    """The rank of the type of every node; higher level types rank higher.
+
+    Parameters
+    ----------
+    otype_data: tuple
+        The types of the non-slot nodes.
+    max_slot: int
+        The last slot.
+    slot_type: str
+        The type of the slots.
+    levels: tuple
+        The data of the `levels` pre-computation step.
+
+    Returns
+    -------
+    np.ndarray
+        The rank of node `n` at `n - 1`.
+    """
+    ranks = {x[0]: i for (i, x) in enumerate(reversed(levels))}
+    result = np.empty(max_slot + len(otype_data), dtype=np.int64)
+    result[:max_slot] = ranks[slot_type]
+    result[max_slot:] = [ranks[t] for t in otype_data]
+    return result
+
+
+def canonical_order(
+    max_slot: int,
+    indptr: NDArray[np.integer],
+    data: NDArray[np.integer],
+    ranks: NDArray[np.integer],
+    chunk: int | None = None,
+) -> tuple[NDArray[np.uint32], NDArray[np.uint32]]:
+    """Sort all nodes in canonical order.
+
+    Parameters
+    ----------
+    max_slot: int
+        The last slot; the nodes after it are the non-slot nodes.
+    indptr: np.ndarray
+        Row pointers of the oslots CSR array: one row per non-slot node.
+    data: np.ndarray
+        The slots of the oslots CSR array.
+    ranks: np.ndarray
+        The rank of the type of every node, see `type_ranks`.
+    chunk: int, optional
+        Read the slots in ranges of rows with about this many slots, see
+        `slot_runs`.
+
+    Returns
+    -------
+    tuple
+        `(order, rank)`: all nodes in canonical order, and the position of
+        node `n` in that order at `rank[n - 1]`.
+    """
+    (run_ptr, run_start, run_end) = slot_runs(indptr, data, chunk)
+
+    # Slots are runs of their own
+    slots = np.arange(1, max_slot + 1, dtype=np.int64)
+    run_ptr = np.concatenate((np.arange(max_slot), run_ptr + max_slot))
+    run_start = np.concatenate((slots, run_start))
+    run_end = np.concatenate((slots, run_end))
+
+    n_nodes = len(run_ptr) - 1
+    n_runs = np.diff(run_ptr)
+
+    # `nodes` is the order being built, as 0-based nodes. Nodes that are
+    # tied so far form contiguous groups in it; `group` labels every place
+    # with the first place of its group. Only the places in groups with
+    # more than one node, and with runs left to compare, are `active`.
+    nodes = np.arange(n_nodes, dtype=np.int64)
+    group = np.zeros(n_nodes, dtype=np.int64)
+    active = np.arange(n_nodes if n_nodes > 1 else 0, dtype=np.int64)
+    k = 0
+
+    while len(active):
+        members = nodes[active]
+        more = n_runs[members] > k
+        at = np.where(more, run_ptr[members] + k, 0)
+        start = np.where(more, run_start[at], _END)
+        end = np.where(more, -run_end[at], _END)
+        labels = group[active]
+
+        resort = np.lexsort((end, start, labels))
+        members, start, end, more = (
+            members[resort], start[resort], end[resort], more[resort]
+        )
+        nodes[active] = members
+
+        split = np.ones(len(active), dtype=bool)
+        split[1:] = (
+            (labels[1:] != labels[:-1])
+            | (start[1:] != start[:-1])
+            | (end[1:] != end[:-1])
+        )
+        labels = np.maximum.accumulate(np.where(split, active, 0))
+        group[active] = labels
+
+        # Tied nodes without runs left have the same slots
+        tied = np.zeros(len(active), dtype=bool)
+        same = labels[1:] == labels[:-1]
+        tied[1:] |= same
+        tied[:-1] |= same
+        active = active[tied & more]
+        k += 1
+
+    # Nodes with the same slots: higher ranking types first, then by node
+    nodes = nodes[np.lexsort((nodes, -np.asarray(ranks)[nodes], group))]
+
+    dtype = node_dtype(n_nodes)
+    order = (nodes + 1).astype(dtype)
+    rank = np.empty(n_nodes, dtype=dtype)
+    rank[nodes] = np.arange(n_nodes, dtype=dtype)
+    return order, rank
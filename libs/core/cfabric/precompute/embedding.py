@@ -0,0 +1,492 @@
+"""
+# Embedding and boundary data on arrays.
+
+The embedders of a node (`levUp`) are the other non-slot nodes whose slots
+include all of its slots; its embeddees (`levDown`) are the non-slot nodes it
+is an embedder of. The boundary data lists per slot the nodes that start and
+the nodes that end there.
+
+The functions here compute these as CSR arrays (see
+`cfabric.storage.csr.CSRArray`) from the oslots CSR arrays and the ranks of
+the nodes in canonical order, with numpy sorts and gathers instead of a
+Python loop per node:
+
+*   the embedders of a slot are the nodes that contain it: the inverse of
+    oslots, sorted by descending rank;
+*   the embedders of a non-slot node are among the embedders of its first
+    slot. Those candidates are kept if they end no earlier; that settles it
+    for candidates without gaps. For candidates with gaps, every run of
+    consecutive slots of the node is looked up among the runs of the
+    candidate with `numpy.searchsorted`.
+
+Non-slot nodes are taken in chunks, so that the candidates in flight stay
+bounded. When a path prefix is given, the result is written to
+`{prefix}_indptr.npy` and `{prefix}_data.npy` with
+`numpy.lib.format.open_memmap`, and returned memory-mapped.
+
+With a memory budget, the inputs are read in chunks that fit it, and the
+inversions (of oslots for the slots, of levUp for levDown) become external
+sorts: the entries are spilled to temporary files per range of rows, and the
+ranges are sorted one at a time. What remains in memory is proportional to
+the number of nodes, not to the number of slots or embedding entries.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import tempfile
+from typing import TYPE_CHECKING, Any, BinaryIO
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from cfabric.precompute.canonical import row_chunks, slot_runs
+from cfabric.storage.csr import index_dtype, node_dtype
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+    from numpy.typing import NDArray
+
+EMBED_CHUNK = 1 << 22
+"""Number of candidate embedders examined at a time."""
+
+ENTRY_BYTES = 96
+"""Memory per entry in flight in a sort or candidate stage, with temporaries."""
+
+COPY_CHUNK = 1 << 24
+"""Number of entries copied at a time into the output arrays."""
+
+_RECORD = np.dtype([('row', np.int64), ('value', np.int64), ('key', np.int64)])
+"""An entry of an external sort, as spilled to a temporary file."""
+
+CsrData = tuple["NDArray[np.uint32]", "NDArray[np.uint32]"]
+
+
+def _gather(
+    indptr: NDArray[np.int64], data: NDArray[np.integer], rows: NDArray[np.int64]
+) -> tuple[NDArray[np.int64], NDArray[np.int64]]:
+    """The entries of some rows of a CSR array, and per entry its row index."""
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    positions = np.arange(offsets[-1], dtype=np.int64)
+    positions += np.repeat(starts - offsets[:-1], lengths)
+    return np.asarray(data[positions], dtype=np.int64), np.repeat(
+        np.arange(len(rows), dtype=np.int64), lengths
+    )
+
+
+class _RowData:
+    """The data of CSR rows, appended in row order.
+
+    The data is kept in memory, or, if a spill file is given, written to it
+    and read back memory-mapped.
+    """
+
+    def __init__(self, dtype: str, spill: str | None = None) -> None:
+        self.dtype = dtype
+        self.size = 0
+        self._parts: list[NDArray[np.uint32]] = []
+        self._spill = spill
+        self._fh: BinaryIO | None = None if spill is None else open(spill, 'wb')
+
+    def append(self, values: NDArray[np.integer]) -> None:
+        values = np.asarray(values).astype(self.dtype, copy=False)
+        self.size += len(values)
+        if self._fh is None:
+            self._parts.append(values)
+        else:
+            values.tofile(self._fh)
+
+    def array(self) -> NDArray[np.uint32]:
+        """All data appended so far."""
+        if self._fh is None:
+            if len(self._parts) != 1:
+                self._parts = [np.concatenate(
+                    [np.zeros(0, dtype=self.dtype), *self._parts]
+                )]
+            return self._parts[0]
+        self._fh.flush()
+        if not self.size:
+            return np.zeros(0, dtype=self.dtype)
+        assert self._spill is not None
+        return np.memmap(self._spill, dtype=self.dtype, mode='r', shape=(self.size,))
+
+    def close(self) -> None:
+        self._parts = []
+        if self._fh is not None:
+            self._fh.close()
+
+
+def _spill_dir(
+    budget: int | None, path_prefix: str | None
+) -> contextlib.AbstractContextManager[str | None]:
+    """A temporary directory for spilled data, next to the output if possible."""
+    if budget is None:
+        return contextlib.nullcontext(None)
+    parent = None if path_prefix is None else os.path.dirname(path_prefix) or None
+    return tempfile.TemporaryDirectory(prefix='.spill.', dir=parent)
+
+
+def _spill_file(spill_dir: str | None, name: str) -> str | None:
+    return None if spill_dir is None else os.path.join(spill_dir, name)
+
+
+def _write_csr(
+    counts: NDArray[np.int64],
+    parts: list[_RowData],
+    path_prefix: str | None,
+) -> CsrData:
+    """Assemble CSR arrays from row lengths and the data of the rows in order.
+
+    The row pointers take 64 bits if the total number of entries needs it;
+    the data has the dtype of the parts.
+    """
+    total = int(counts.sum())
+    index = index_dtype(total)
+    dtype = parts[0].dtype
+    if path_prefix is None:
+        indptr = np.zeros(len(counts) + 1, dtype=index)
+        data = np.empty(total, dtype=dtype)
+    else:
+        indptr = open_memmap(
+            f'{path_prefix}_indptr.npy', mode='w+',
+            dtype=index, shape=(len(counts) + 1,),
+        )
+        data = open_memmap(
+            f'{path_prefix}_data.npy', mode='w+', dtype=dtype, shape=(total,)
+        )
+        indptr[0] = 0
+    np.cumsum(counts, out=indptr[1:])
+    offset = 0
+    while parts:
+        part = parts.pop(0)
+        values = part.array()
+        for at in range(0, len(values), COPY_CHUNK):
+            piece = values[at:at + COPY_CHUNK]
+            data[offset:offset + len(piece)] = piece
+            offset += len(piece)
+        del values
+        part.close()
+    if path_prefix is not None:
+        indptr.flush()
+        data.flush()
+    return indptr, data
+
+
+Entries = tuple["NDArray[np.int64]", "NDArray[np.int64]", "NDArray[np.int64]"]
+"""Entries to group by row: `(rows, values, keys)`."""
+
+
+def _group(
+    entries: Callable[[], Iterator[Entries]],
+    sizes: NDArray[np.int64],
+    budget: int | None,
+    spill_dir: str | None,
+    name: str,
+    dtype: str,
+) -> tuple[NDArray[np.int64], _RowData]:
+    """Group entries by row; within a row sorted by key, each value once.
+
+    Parameters
+    ----------
+    entries: function
+        Yields the entries in chunks.
+    sizes: np.ndarray
+        The number of entries per row.
+    budget: int, optional
+        If the entries do not fit in it, they are spilled to a file per
+        range of rows in `spill_dir` and each range is sorted on its own.
+    spill_dir: str, optional
+        Directory for spilled data.
+    name: str
+        Prefix of the spill files.
+    dtype: str
+        The dtype of the values in the result.
+
+    Returns
+    -------
+    tuple
+        The row lengths, and the values of the rows in order.
+    """
+    n_rows = len(sizes)
+    counts = np.zeros(n_rows, dtype=np.int64)
+    result = _RowData(dtype, _spill_file(spill_dir, f'{name}.data'))
+
+    def sort_into(rows: Any, values: Any, keys: Any) -> None:
+        order = np.lexsort((values, keys, rows))
+        rows, values = rows[order], values[order]
+        distinct = np.ones(len(rows), dtype=bool)
+        distinct[1:] = (rows[1:] != rows[:-1]) | (values[1:] != values[:-1])
+        rows, values = rows[distinct], values[distinct]
+        (present, lengths) = np.unique(rows, return_counts=True)
+        counts[present] = lengths
+        result.append(values)
+
+    capacity = None if budget is None else max(budget // ENTRY_BYTES, 1)
+    bucket = np.zeros(n_rows, dtype=np.int64)
+    if capacity is not None and n_rows:
+        bucket = (np.cumsum(sizes) - sizes) // capacity
+    n_buckets = int(bucket[-1]) + 1 if n_rows else 0
+
+    if n_buckets <= 1 or spill_dir is None:
+        chunks = list(entries())
+        sort_into(*(
+            np.concatenate([np.zeros(0, dtype=np.int64), *(c[i] for c in chunks)])
+            for i in range(3)
+        ))
+        return counts, result
+
+    paths = [os.path.join(spill_dir, f'{name}.{b}') for b in range(n_buckets)]
+    handles = [open(path, 'wb') for path in paths]
+    try:
+        for (rows, values, keys) in entries():
+            records = np.empty(len(rows), dtype=_RECORD)
+            records['row'] = rows
+            records['value'] = values
+            records['key'] = keys
+            at = bucket[rows]
+            order = np.argsort(at, kind='stable')
+            records, at = records[order], at[order]
+            cuts = np.flatnonzero(np.diff(at)) + 1
+            for piece in np.split(records, cuts):
+                if len(piece):
+                    piece.tofile(handles[bucket[piece['row'][0]]])
+    finally:
+        for handle in handles:
+            handle.close()
+    for path in paths:
+        records = np.fromfile(path, dtype=_RECORD)
+        os.unlink(path)
+        sort_into(records['row'], records['value'], records['key'])
+    return counts, result
+
+
+def embedders(
+    max_slot: int,
+    indptr: NDArray[np.integer],
+    data: NDArray[np.integer],
+    rank: NDArray[np.integer],
+    path_prefix: str | None = None,
+    chunk: int | None = None,
+    budget: int | None = None,
+) -> CsrData:
+    """The embedders of all nodes, in reverse canonical order.
+
+    Parameters
+    ----------
+    max_slot: int
+        The last slot.
+    indptr: np.ndarray
+        Row pointers of the oslots CSR array: one row per non-slot node.
+    data: np.ndarray
+        The slots of the oslots CSR array; may be memory-mapped.
+    rank: np.ndarray
+        The rank of node `n` in canonical order at `rank[n - 1]`.
+    path_prefix: str, optional
+        Write the result to `{path_prefix}_indptr.npy` and
+        `{path_prefix}_data.npy`.
+    chunk: int, optional
+        Number of candidate embedders examined at a time; by default
+        `EMBED_CHUNK`, or what fits in the budget.
+    budget: int, optional
+        Memory budget in bytes for the entries in flight; beyond it the
+        embedders of the slots are sorted externally.
+
+    Returns
+    -------
+    tuple
+        `(indptr, data)` of the levUp CSR array, with a row per node.
+    """
+    indptr = np.asarray(indptr, dtype=np.int64)
+    rank = np.asarray(rank, dtype=np.int64)
+    n_nonslot = len(indptr) - 1
+    dtype = node_dtype(max_slot + n_nonslot)
+    if chunk is None:
+        chunk = EMBED_CHUNK if budget is None else max(budget // ENTRY_BYTES, 1)
+    read = None if budget is None else chunk
+    (run_ptr, run_start, run_end) = slot_runs(indptr, data, read)
+    n_runs = np.diff(run_ptr)
+    last = np.where(n_runs > 0, run_end[np.maximum(run_ptr[1:] - 1, 0)], 0)
+
+    def slot_entries() -> Iterator[Entries]:
+        for (first, end) in row_chunks(indptr, read):
+            slots = np.asarray(data[indptr[first]:indptr[end]], dtype=np.int64)
+            nodes = np.repeat(
+                np.arange(first, end, dtype=np.int64), np.diff(indptr[first:end + 1])
+            )
+            nodes += max_slot + 1
+            yield slots - 1, nodes, -rank[nodes - 1]
+
+    slot_sizes = np.zeros(max_slot, dtype=np.int64)
+    if budget is not None:
+        for (slots, _, _) in slot_entries():
+            slot_sizes += np.bincount(slots, minlength=max_slot)
+
+    with _spill_dir(budget, path_prefix) as spill_dir:
+        # Embedders of slots: the inverse of oslots, by descending rank
+        (slot_counts, slot_rows) = _group(
+            slot_entries, slot_sizes, budget, spill_dir, 'slots', dtype
+        )
+        slot_ptr = np.zeros(max_slot + 1, dtype=np.int64)
+        np.cumsum(slot_counts, out=slot_ptr[1:])
+        nodes = slot_rows.array()
+
+        counts = np.zeros(max_slot + n_nonslot, dtype=np.int64)
+        counts[:max_slot] = slot_counts
+        up_rows = _RowData(dtype, _spill_file(spill_dir, 'nodes.data'))
+
+        # Lookup key of every run: runs are sorted by node and then by start
+        run_key = np.repeat(np.arange(n_nonslot, dtype=np.int64), n_runs)
+        run_key = run_key * (max_slot + 2) + run_start
+
+        # Embedders of non-slot nodes: candidates are the embedders of their
+        # first slot
+        has_slots = np.flatnonzero(n_runs > 0)
+        first = run_start[run_ptr[has_slots]]
+        n_candidates = slot_counts[first - 1]
+        at_chunk = (np.cumsum(n_candidates) - n_candidates) // max(chunk, 1)
+        del first, n_candidates
+        for part in np.split(has_slots, np.flatnonzero(np.diff(at_chunk)) + 1):
+            if not len(part):
+                continue
+            (cand, which) = _gather(slot_ptr, nodes, run_start[run_ptr[part]] - 1)
+            node = part[which]
+            row = cand - max_slot - 1
+            keep = (row != node) & (last[row] >= last[node])
+
+            # Candidates with gaps must contain every run of the node
+            gapped = np.flatnonzero(keep & (n_runs[row] > 1))
+            if len(gapped):
+                (runs, pair) = _gather(
+                    run_ptr, np.arange(len(run_start)), node[gapped]
+                )
+                host = row[gapped][pair]
+                at = np.searchsorted(
+                    run_key, host * (max_slot + 2) + run_start[runs], side='right'
+                ) - 1
+                inside = (at >= run_ptr[host]) & (run_end[at] >= run_end[runs])
+                misses = np.bincount(pair[~inside], minlength=len(gapped))
+                keep[gapped[misses > 0]] = False
+
+            counts[max_slot + part] = np.bincount(
+                np.searchsorted(part, node[keep]), minlength=len(part)
+            )
+            up_rows.append(cand[keep])
+
+        del nodes
+        return _write_csr(counts, [slot_rows, up_rows], path_prefix)
+
+
+def embeddees(
+    max_slot: int,
+    up_indptr: NDArray[np.integer],
+    up_data: NDArray[np.integer],
+    rank: NDArray[np.integer],
+    path_prefix: str | None = None,
+    budget: int | None = None,
+) -> CsrData:
+    """The embeddees of all non-slot nodes, in canonical order.
+
+    Parameters
+    ----------
+    max_slot: int
+        The last slot.
+    up_indptr: np.ndarray
+        Row pointers of the levUp CSR array, see `embedders`.
+    up_data: np.ndarray
+        The embedders of the levUp CSR array; may be memory-mapped.
+    rank: np.ndarray
+        The rank of node `n` in canonical order at `rank[n - 1]`.
+    path_prefix: str, optional
+        Write the result to `{path_prefix}_indptr.npy` and
+        `{path_prefix}_data.npy`.
+    budget: int, optional
+        Memory budget in bytes for the entries in flight, see `embedders`.
+
+    Returns
+    -------
+    tuple
+        `(indptr, data)` of the levDown CSR array, with a row per non-slot
+        node.
+    """
+    up_indptr = np.asarray(up_indptr, dtype=np.int64)
+    rank = np.asarray(rank, dtype=np.int64)
+    n_nodes = len(up_indptr) - 1
+    n_rows = max(n_nodes - max_slot, 0)
+    read = None if budget is None else max(budget // ENTRY_BYTES, 1)
+
+    # Only non-slot nodes are embeddees; their embedders are non-slot nodes
+    ptr = up_indptr[min(max_slot, n_nodes):]
+
+    def entries() -> Iterator[Entries]:
+        for (first, end) in row_chunks(ptr, read):
+            hosts = np.asarray(up_data[ptr[first]:ptr[end]], dtype=np.int64)
+            nodes = np.repeat(
+                np.arange(first, end, dtype=np.int64), np.diff(ptr[first:end + 1])
+            )
+            nodes += max_slot + 1
+            yield hosts - max_slot - 1, nodes, rank[nodes - 1]
+
+    sizes = np.zeros(n_rows, dtype=np.int64)
+    for (rows, _, _) in entries():
+        sizes += np.bincount(rows, minlength=n_rows)
+
+    with _spill_dir(budget, path_prefix) as spill_dir:
+        (counts, rows) = _group(
+            entries, sizes, budget, spill_dir, 'hosts', node_dtype(n_nodes)
+        )
+        return _write_csr(counts, [rows], path_prefix)
+
+
+def boundaries(
+    max_slot: int,
+    indptr: NDArray[np.integer],
+    data: NDArray[np.integer],
+    rank: NDArray[np.integer],
+    path_prefixes: tuple[str, str] | None = None,
+) -> tuple[CsrData, CsrData]:
+    """The nodes that start and that end at each slot.
+
+    Parameters
+    ----------
+    max_slot: int
+        The last slot.
+    indptr: np.ndarray
+        Row pointers of the oslots CSR array: one row per non-slot node.
+    data: np.ndarray
+        The slots of the oslots CSR array.
+    rank: np.ndarray
+        The rank of node `n` in canonical order at `rank[n - 1]`.
+    path_prefixes: tuple, optional
+        Write the results to these path prefixes, see `embedders`.
+
+    Returns
+    -------
+    tuple
+        `(first, last)`: the `(indptr, data)` of CSR arrays with a row per
+        slot; in `first` the nodes that start at the slot, in reversed
+        canonical order, in `last` the nodes that end at the slot, in
+        canonical order.
+    """
+    indptr = np.asarray(indptr, dtype=np.int64)
+    rank = np.asarray(rank, dtype=np.int64)
+    has_slots = np.flatnonzero(np.diff(indptr) > 0)
+    nodes = has_slots + max_slot + 1
+    node_rank = rank[nodes - 1]
+    result = []
+    for (i, (slot_at, sign)) in enumerate(
+        ((indptr[has_slots], -1), (indptr[has_slots + 1] - 1, 1))
+    ):
+        slots = np.asarray(data[slot_at], dtype=np.int64)
+        order = np.lexsort((sign * node_rank, slots))
+        counts = np.bincount(slots - 1, minlength=max_slot).astype(np.int64)
+        rows = _RowData(node_dtype(max_slot + len(indptr) - 1))
+        rows.append(nodes[order])
+        result.append(_write_csr(
+            counts, [rows], None if path_prefixes is None else path_prefixes[i]
+        ))
+    return (result[0], result[1])
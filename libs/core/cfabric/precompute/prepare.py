@@ -19,6 +19,10 @@ import array
 from collections.abc import Callable
 from typing import TYPE_CHECKING, Any
 
+import numpy as np
+
+from cfabric.precompute.canonical import canonical_order, sequence_arrays, type_ranks
+from cfabric.precompute.embedding import boundaries, embeddees, embedders
 from cfabric.utils.helpers import itemize
 
 if TYPE_CHECKING:
@@ -48,6 +52,13 @@ StructureResult = tuple[
 CharactersResult = dict[str, list[tuple[str, int]]]
 
 
+def _csrRows(indptr: Any, data: Any) -> list[tuple[int, ...]]:
+    """The rows of CSR arrays as tuples."""
+    bounds = indptr.tolist()
+    values = data.tolist()
+    return [tuple(values[b:e]) for (b, e) in zip(bounds, bounds[1:])]
+
+
 def levels(
     info: InfoFunc,
     error: ErrorFunc,
@@ -207,6 +218,30 @@ def order(
     cfabric.nodes: canonical ordering
     """
 
+    (otype_data, maxSlot, maxNode, slotType) = otype
+    info("assigning otype levels to nodes")
+    ranks = type_ranks(otype_data, maxSlot, slotType, levels)
+    info("sorting nodes")
+    (nodes, _) = canonical_order(maxSlot, *sequence_arrays(oslots[0]), ranks)
+    return tuple(nodes.tolist())
+
+
+def orderByComparison(
+    info: InfoFunc,
+    error: ErrorFunc,
+    otype: OtypeData,
+    oslots: OslotsData,
+    levels: LevelsData,
+) -> OrderData:
+    """Computes the canonical ordering by comparing nodes pairwise.
+
+    This is the defining implementation of the canonical ordering: a sort
+    with a comparison function on the slot sets of nodes. It takes
+    O(N log N) Python calls, so `order` computes the same ordering on
+    arrays (see `cfabric.precompute.canonical`). The parameters and the
+    result are those of `order`.
+    """
+
     (otype_data, maxSlot, maxNode, slotType) = otype
     oslots_data = oslots[0]
     info("assigning otype levels to nodes")
@@ -283,9 +318,9 @@ def rank(
 
     (otype_data, maxSlot, maxNode, slotType) = otype
     info("ranking nodes")
-    nodesRank: dict[int, int] = dict(((n, i) for (i, n) in enumerate(order)))
-    return array.array("I", (nodesRank[n] for n in range(1, maxNode + 1)))
-    # return tuple((nodesRank[n] for n in range(1, maxNode + 1)))
+    nodesRank = np.empty(maxNode, dtype=np.int64)
+    nodesRank[np.asarray(order, dtype=np.int64) - 1] = np.arange(len(order))
+    return array.array("I", nodesRank.tolist())
 
 
 def levUp(
@@ -337,51 +372,11 @@ def levUp(
     """
 
     (otype_data, maxSlot, maxNode, slotType) = otype
-    oslots_data = oslots[0]
-    info("making inverse of edge feature oslots")
-    oslotsInv: dict[int, set[int]] = {}
-    for k, mList in enumerate(oslots_data):
-        for m in mList:
-            oslotsInv.setdefault(m, set()).add(k + 1 + maxSlot)
     info("listing embedders of all nodes")
-    embedders: list[tuple[int, ...]] = []
-    for n in range(1, maxSlot + 1):
-        contentEmbedders = oslotsInv.get(n, tuple())
-        embedders.append(
-            tuple(
-                sorted(
-                    (m for m in contentEmbedders if m != n),
-                    key=lambda k: -rank[k - 1],
-                )
-            )
-        )
-    for n in range(maxSlot + 1, maxNode + 1):
-        mList = oslots_data[n - maxSlot - 1]
-        if len(mList) == 0:
-            embedders.append(tuple())
-        else:
-            contentEmbedders = functools.reduce(
-                lambda x, y: x & oslotsInv[y],
-                mList[1:],
-                oslotsInv[mList[0]],
-            )
-            embedders.append(
-                tuple(
-                    sorted(
-                        (m for m in contentEmbedders if m != n),
-                        key=lambda k: -rank[k - 1],
-                    )
-                )
-            )
+    (indptr, data) = embedders(maxSlot, *sequence_arrays(oslots[0]), np.asarray(rank))
     # reuse embedder tuples, because lots of nodes share embedders
     seen: dict[tuple[int, ...], tuple[int, ...]] = {}
-    embeddersx: list[tuple[int, ...]] = []
-    for t in embedders:
-        if t not in seen:
-            # seen[t] = array.array("I", t)
-            seen[t] = tuple(t)
-        embeddersx.append(seen[t])
-    return tuple(embeddersx)
+    return tuple(seen.setdefault(t, t) for t in _csrRows(indptr, data))
 
 
 def levDown(
@@ -432,18 +427,8 @@ def levDown(
 
     (otype_data, maxSlot, maxNode, slotType) = otype
     info("inverting embedders")
-    inverse: dict[int, set[int]] = {}
-    for n in range(maxSlot + 1, maxNode + 1):
-        for m in levUp[n - 1]:
-            inverse.setdefault(m, set()).add(n)
-    info("turning embeddees into list")
-    embeddees: list[array.array[int]] = []
-    for n in range(maxSlot + 1, maxNode + 1):
-        embeddees.append(
-            array.array("I", sorted(inverse.get(n, []), key=lambda m: rank[m - 1]))
-            # tuple(sorted(inverse.get(n, []), key=lambda m: rank[m - 1]))
-        )
-    return tuple(embeddees)
+    (indptr, data) = embeddees(maxSlot, *sequence_arrays(levUp), np.asarray(rank))
+    return tuple(array.array("I", row) for row in _csrRows(indptr, data))
 
 
 def characters(
@@ -554,28 +539,8 @@ def boundary(
     """
 
     (otype_data, maxSlot, maxNode, slotType) = otype
-    oslots_data = oslots[0]
-    firstSlotsD: dict[int, list[int]] = {}
-    lastSlotsD: dict[int, list[int]] = {}
-
-    for node, slots in enumerate(oslots_data):
-        realNode = node + 1 + maxSlot
-        firstSlotsD.setdefault(slots[0], []).append(realNode)
-        lastSlotsD.setdefault(slots[-1], []).append(realNode)
-
-    firstSlots: tuple[tuple[int, ...], ...] = tuple(
-        tuple(sorted(firstSlotsD.get(n, []), key=lambda node: -rank[node - 1]))
-        # array.array("I", sorted(firstSlotsD.get(n, []),
-        # key=lambda node: -rank[node - 1]))
-        for n in range(1, maxSlot + 1)
-    )
-    lastSlots: tuple[tuple[int, ...], ...] = tuple(
-        tuple(sorted(lastSlotsD.get(n, []), key=lambda node: rank[node - 1]))
-        # array.array("I", sorted(lastSlotsD.get(n, []),
-        # key=lambda node: rank[node - 1]))
-        for n in range(1, maxSlot + 1)
-    )
-    return (firstSlots, lastSlots)
+    (first, last) = boundaries(maxSlot, *sequence_arrays(oslots[0]), np.asarray(rank))
+    return (tuple(_csrRows(*first)), tuple(_csrRows(*last)))
 
 
 def sections(
@@ -986,3 +951,139 @@ def structure(
     down_final: dict[int, tuple[int, ...]] = {n: tuple(sorted(ms, key=lambda m: rank[m - 1])) for (n, ms) in down.items()}
 
     return (headingFromNode, nodeFromHeading, multiple_final, top, up, down_final)
+
+
+def sectionsToJson(data: SectionsResult) -> dict[str, Any]:
+    """Turns section data into something that can be stored as JSON.
+
+    Parameters
+    ----------
+    data: dict
+        The result of `sections`.
+
+    Returns
+    -------
+    dict
+        The mappings of `data` flattened to lists of rows:
+
+        *   `sec1`: rows `[n0, heading1, n1]`
+        *   `sec2`: rows `[n0, heading1, heading2, n2]`
+        *   `seq`: rows `[n, *sequenceNumbers]`
+
+    See Also
+    --------
+    sectionsFromJson
+    """
+    return dict(
+        sec1=[
+            [n0, h1, n1]
+            for (n0, heads) in data["sec1"].items()
+            for (h1, n1) in heads.items()
+        ],
+        sec2=[
+            [n0, h1, h2, n2]
+            for (n0, heads1) in data["sec2"].items()
+            for (h1, heads2) in heads1.items()
+            for (h2, n2) in heads2.items()
+        ],
+        seq=[[n, *seq] for (n, seq) in data["seqFromNode"].items()],
+    )
+
+
+def sectionsFromJson(data: dict[str, Any]) -> SectionsResult:
+    """Restores section data that has been stored by `sectionsToJson`.
+
+    Parameters
+    ----------
+    data: dict
+        The stored section data.
+
+    Returns
+    -------
+    dict
+        Same structure as `sections`: {sec1, sec2, seqFromNode, nodeFromSeq}.
+        If the stored data has section names (see
+        `cfabric.io.compiler.Compiler`), they are passed on as `names`.
+    """
+    sec1: dict[int, dict[Any, int]] = {}
+    sec2: dict[int, dict[Any, dict[Any, int]]] = {}
+    seqFromNode: dict[int, tuple[int, ...]] = {}
+    nodeFromSeq: dict[tuple[int, ...], int] = {}
+
+    for (n0, h1, n1) in data.get("sec1", ()):
+        sec1.setdefault(n0, {})[h1] = n1
+    for (n0, h1, h2, n2) in data.get("sec2", ()):
+        sec2.setdefault(n0, {}).setdefault(h1, {})[h2] = n2
+    for (n, *seq) in data.get("seq", ()):
+        seqFromNode[n] = tuple(seq)
+        nodeFromSeq[tuple(seq)] = n
+
+    result: SectionsResult = dict(
+        sec1=sec1, sec2=sec2, seqFromNode=seqFromNode, nodeFromSeq=nodeFromSeq
+    )
+    if "names" in data:
+        result["names"] = data["names"]
+    return result
+
+
+def structureToJson(data: StructureResult) -> dict[str, Any]:
+    """Turns structure data into something that can be stored as JSON.
+
+    Section keys, which are tuples of (type, heading) pairs, become lists
+    of lists; mappings become lists of rows.
+
+    Parameters
+    ----------
+    data: tuple
+        The result of `structure`.
+
+    Returns
+    -------
+    dict
+
+    See Also
+    --------
+    structureFromJson
+    """
+    (headingFromNode, nodeFromHeading, multiple, top, up, down) = data
+    return dict(
+        headings=[[n, [list(h) for h in key]] for (n, key) in headingFromNode.items()],
+        multiple=[[[list(h) for h in key], list(ns)] for (key, ns) in multiple.items()],
+        top=list(top),
+        up=[[n, u] for (n, u) in up.items()],
+        down=[[n, list(ms)] for (n, ms) in down.items()],
+    )
+
+
+def structureFromJson(data: dict[str, Any]) -> StructureResult:
+    """Restores structure data that has been stored by `structureToJson`.
+
+    Parameters
+    ----------
+    data: dict
+        The stored structure data.
+
+    Returns
+    -------
+    tuple
+        Same structure as `structure`.
+    """
+
+    def sectionKey(key: list[list[Any]]) -> tuple[tuple[str, Any], ...]:
+        return tuple((t, h) for (t, h) in key)
+
+    headingFromNode: dict[int, tuple[tuple[str, Any], ...]] = {}
+    nodeFromHeading: dict[tuple[tuple[str, Any], ...], int] = {}
+    for (n, key) in data["headings"]:
+        sKey = sectionKey(key)
+        headingFromNode[n] = sKey
+        nodeFromHeading[sKey] = n
+
+    return (
+        headingFromNode,
+        nodeFromHeading,
+        {sectionKey(key): tuple(ns) for (key, ns) in data["multiple"]},
+        tuple(data["top"]),
+        {n: u for (n, u) in data["up"]},
+        {n: tuple(ms) for (n, ms) in data["down"]},
+    )
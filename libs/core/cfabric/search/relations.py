@@ -19,6 +19,7 @@ from cfabric.core.config import OTYPE, OSLOTS, OMAP
 from cfabric.utils.helpers import makeIndex, safe_rank_key
 from cfabric.utils.logging import DEEP
 from cfabric.search.syntax import reTp
+from cfabric.storage.nodeset import NodeSet
 
 # LOW-LEVEL NODE RELATIONS SEMANTICS ###
 
@@ -69,11 +70,13 @@ def basicRelations(searchExe: SearchExe, api: Api) -> None:
     Crank = C.rank.data
     ClevDown = C.levDown.data
     ClevUp = C.levUp.data
+    ClevUpGather = C.levUp.gather
     (CfirstSlots, ClastSlots) = C.boundary.data
     Eoslots = E.oslots.data
     slotType = F.otype.slotType
     maxSlot = F.otype.maxSlot
     maxSlotP = maxSlot + 1
+    maxNode = F.otype.maxNode
     sets = searchExe.sets
     setInfo = searchExe.setInfo
     searchExe.featureValueIndex = {}
@@ -382,6 +385,21 @@ def basicRelations(searchExe: SearchExe, api: Api) -> None:
 
     # EMBEDDED IN
 
+    def embeddedInYarns(yE, yU):
+        # thin a yarn of embedded nodes and a yarn of embedders in one go,
+        # by gathering the embedders of the whole yarn at once
+        if not yE or not yU:
+            return (set(), set())
+        (embedders, offsets, nodes) = ClevUpGather(yE)
+        found = NodeSet.from_nodes(yU, maxNode).isin(embedders)
+        return (set(nodes[found].tolist()), set(embedders[found].tolist()))
+
+    def spinIn(fTp, tTp):
+        def doyarns(yF, yT):
+            return embeddedInYarns(yF, yT)
+
+        return doyarns
+
     def inR(fTp, tTp):
         isSlotF = isSlotType(fTp)
         isSlotT = isSlotType(tTp)
@@ -404,6 +422,13 @@ def basicRelations(searchExe: SearchExe, api: Api) -> None:
 
     # EMBEDS
 
+    def spinHas(fTp, tTp):
+        def doyarns(yF, yT):
+            (nyT, nyF) = embeddedInYarns(yT, yF)
+            return (nyF, nyT)
+
+        return doyarns
+
     def hasR(fTp, tTp):
         isSlotF = isSlotType(fTp)
         isSlotT = isSlotType(tTp)
@@ -1016,13 +1041,21 @@ def basicRelations(searchExe: SearchExe, api: Api) -> None:
 
     # SAME FEATURE VALUES
 
+    def valueIndex(f):
+        fObj = Fs(f)
+        if f != OTYPE and fObj._is_mmap:
+            index = fObj._data.value_index()
+            if index is not None:
+                return index
+        return makeIndex(fObj.data)
+
     def spinLeftFisRightG(f, g):
         def zz(fTp, tTp):
             if f not in Sindex:
-                Sindex[f] = makeIndex(Fs(f).data)
+                Sindex[f] = valueIndex(f)
             if f != g:
                 if g not in Sindex:
-                    Sindex[g] = makeIndex(Fs(g).data)
+                    Sindex[g] = valueIndex(g)
             indF = Sindex[f]
             indG = Sindex[g]
             commonValues = set(indF) if f == g else set(indF) & set(indG)
@@ -1109,7 +1142,7 @@ def basicRelations(searchExe: SearchExe, api: Api) -> None:
 
             if fR not in Sindex:
                 if f not in Sindex:
-                    Sindex[f] = makeIndex(Fs(f).data)
+                    Sindex[f] = valueIndex(f)
                 indFR = {}
                 for v, ns in Sindex[f].items():
                     vR = rRe.sub("", v)
@@ -1118,7 +1151,7 @@ def basicRelations(searchExe: SearchExe, api: Api) -> None:
                 Sindex[fR] = indFR
             if gR not in Sindex:
                 if g not in Sindex:
-                    Sindex[g] = makeIndex(Fs(g).data)
+                    Sindex[g] = valueIndex(g)
                 indGR = {}
                 for v, ns in Sindex[g].items():
                     vR = rRe.sub("", v)
@@ -1488,8 +1521,8 @@ def basicRelations(searchExe: SearchExe, api: Api) -> None:
             ("||", 0.900, disjointSlotsR, None),
         ),
         (
-            ("[[", True, hasR, "left embeds right"),
-            ("]]", True, inR, "left embedded in right"),
+            ("[[", spinHas, hasR, "left embeds right"),
+            ("]]", spinIn, inR, "left embedded in right"),
         ),
         (
             ("<<", 0.490, slotBeforeR, "left completely before right"),
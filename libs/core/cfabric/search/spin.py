@@ -8,6 +8,7 @@ import logging
 import types
 from random import randrange
 from inspect import signature
+from collections.abc import Iterable
 from typing import TYPE_CHECKING, Any
 
 import numpy as np
@@ -26,6 +27,7 @@ from cfabric.search.syntax import (
     QEND,
 )
 from cfabric.utils.helpers import project
+from cfabric.storage.nodeset import NodeSet
 from cfabric.storage.string_pool import StringPool, IntFeatureArray
 
 logger = logging.getLogger(__name__)
@@ -47,22 +49,22 @@ def _spinAtom(searchExe: SearchExe, q: int) -> None:
     sets = searchExe.sets
 
     (otype, features, src, quantifiers) = qnodes[q]
-    featureList = sorted(features.items())
-
-    # Get initial node set based on type
-    nodeSet = (
-        range(1, maxNode + 1)
-        if otype == "."
-        else sets[otype]
-        if sets is not None and otype in sets
-        else F.otype.s(otype)
+    # Most selective constraints first, so that the yarn shrinks early
+    featureList = sorted(
+        features.items(),
+        key=lambda item: (_estimateConstraint(Fs(item[0]), otype, item[1]), item[0]),
     )
 
-    # Convert to set for fast operations
-    if isinstance(nodeSet, range):
-        yarn = set(nodeSet)
+    # Get initial node set based on type, as a bitmap over the node range
+    if otype == ".":
+        yarnBits = NodeSet.from_range(1, maxNode, maxNode)
     else:
-        yarn = set(nodeSet)
+        nodeSet = (
+            sets[otype]
+            if sets is not None and otype in sets
+            else F.otype.s(otype)
+        )
+        yarnBits = NodeSet.from_nodes(nodeSet, maxNode)
 
     # Apply feature constraints
     for ft, val in featureList:
@@ -72,21 +74,46 @@ def _spinAtom(searchExe: SearchExe, q: int) -> None:
 
         if is_mmap and _can_vectorize_constraint(val):
             # Use vectorized filtering for mmap-backed features
-            yarn = _vectorized_filter(yarn, feature_data, val)
+            yarnBits = _vectorized_filter(yarnBits, feature_data, val)
         else:
             # Fall back to per-node lookup for complex constraints
-            yarn = _scalar_filter(yarn, feature, val)
+            yarnBits = NodeSet.from_nodes(
+                _scalar_filter(yarnBits, feature, val), maxNode
+            )
 
         # Early exit if no candidates remain
-        if not yarn:
+        if not yarnBits:
             break
 
+    # The rest of the search engine works with Python sets
+    yarn = yarnBits.to_set()
+
     if quantifiers:
         for quantifier in quantifiers:
             yarn = _doQuantifier(searchExe, yarn, src, quantifier)
     searchExe.yarns[q] = yarn
 
 
+def _estimateConstraint(feature: Any, otype: str, val: Any) -> float:
+    """Estimate how many nodes of a type pass a feature constraint.
+
+    Reads the precompiled feature statistics, so it costs no pass over
+    the feature. Constraints that cannot be estimated that way (no
+    statistics, missing values, functions, regular expressions) get
+    infinity.
+    """
+    if not getattr(feature, 'hasStats', False):
+        return float('inf')
+    stats = feature.stats
+    covered = stats.count if otype == "." else stats.types.get(otype, 0)
+    if val is True or val == (None, True):
+        return covered
+    if isinstance(val, tuple) and len(val) == 2 and val[0] is True:
+        if isinstance(val[1], (set, frozenset)):
+            return min(covered, sum(stats.frequency(v) for v in val[1]))
+    return float('inf')
+
+
 def _can_vectorize_constraint(val: Any) -> bool:
     """Check if a constraint can be handled with vectorized operations.
 
@@ -117,17 +144,18 @@ def _can_vectorize_constraint(val: Any) -> bool:
 
 
 def _vectorized_filter(
-    yarn: set[int],
+    yarn: NodeSet,
     feature_data: StringPool | IntFeatureArray,
     val: Any
-) -> set[int]:
+) -> NodeSet:
     """Apply constraint using vectorized numpy operations.
 
-    Returns filtered yarn as a set.
+    Returns filtered yarn as a NodeSet.
     """
-    nodes = list(yarn)
-    if not nodes:
-        return set()
+    maxNode = yarn.max_node
+    nodes = yarn.to_array()
+    if not len(nodes):
+        return yarn
 
     if val is None:
         # Feature must be missing
@@ -142,6 +170,10 @@ def _vectorized_filter(
             result = feature_data.filter_has_value(nodes)
         elif ident is True:
             # Value must be in set
+            candidates = feature_data.nodes_with_values(inner_val)
+            if candidates is not None and len(candidates) <= len(nodes):
+                # Postings slice is smaller than the yarn: intersect with it
+                return yarn & NodeSet.from_nodes(candidates, maxNode)
             if len(inner_val) == 1:
                 # Single value - use filter_by_value
                 single_val = next(iter(inner_val))
@@ -151,22 +183,24 @@ def _vectorized_filter(
         elif ident is False:
             # Value must NOT be in set (exclusion)
             # Get nodes that have the excluded values, then subtract
-            if len(inner_val) == 1:
-                single_val = next(iter(inner_val))
-                excluded = set(feature_data.filter_by_value(nodes, single_val))
-            else:
-                excluded = set(feature_data.filter_by_values(nodes, inner_val))
-            return yarn - excluded
+            candidates = feature_data.nodes_with_values(inner_val)
+            if candidates is None or len(candidates) > len(nodes):
+                if len(inner_val) == 1:
+                    single_val = next(iter(inner_val))
+                    candidates = feature_data.filter_by_value(nodes, single_val)
+                else:
+                    candidates = feature_data.filter_by_values(nodes, inner_val)
+            return yarn - NodeSet.from_nodes(candidates, maxNode)
         else:
             # Fallback - shouldn't reach here if _can_vectorize_constraint is correct
             return yarn
     else:
         return yarn
 
-    return set(result)
+    return NodeSet.from_nodes(result, maxNode)
 
 
-def _scalar_filter(yarn: set[int], feature: Any, val: Any) -> set[int]:
+def _scalar_filter(yarn: Iterable[int], feature: Any, val: Any) -> set[int]:
     """Apply constraint using per-node lookup (fallback for complex constraints)."""
     result = set()
     for n in yarn:
@@ -5,13 +5,19 @@ efficient feature data access.
 """
 
 from cfabric.storage.mmap_manager import MmapManager
-from cfabric.storage.csr import CSRArray, CSRArrayWithValues
-from cfabric.storage.string_pool import StringPool, IntFeatureArray
+from cfabric.storage.csr import CSRArray, CSRArrayWithValues, CompressedCSRArray
+from cfabric.storage.nodeset import NodeSet
+from cfabric.storage.postings import PostingsIndex
+from cfabric.storage.string_pool import StringPool, StringTable, IntFeatureArray
 
 __all__ = [
     "MmapManager",
     "CSRArray",
     "CSRArrayWithValues",
+    "CompressedCSRArray",
+    "NodeSet",
+    "PostingsIndex",
     "StringPool",
+    "StringTable",
     "IntFeatureArray",
 ]
@@ -0,0 +1,183 @@
+"""
+Access-pattern hints and prefetching for memory-mapped arrays.
+
+A memory-mapped array is read from disk page by page as it is touched.
+The kernel guesses how to read ahead; the guess is wrong for arrays that
+are probed at random positions (rank, otype) and too timid for arrays
+that are scanned. `advise()` passes an explicit policy to the kernel
+with madvise(2), and `prefetch()` pulls an array into the page cache
+ahead of the first query.
+
+Both are best effort: on platforms without madvise, and for arrays that
+are not memory-mapped, they do nothing.
+
+Set CF_MMAP_ADVICE=off to disable the default policies applied by
+MmapManager.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import threading
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+import numpy as np
+
+ADVICE: dict[str, int] = {
+    name: getattr(mmap, f'MADV_{name.upper()}')
+    for name in ('normal', 'random', 'sequential', 'willneed', 'dontneed')
+    if hasattr(mmap, f'MADV_{name.upper()}')
+}
+"""Supported advice policies by name."""
+
+WARM_THREADS = 4
+"""Default number of background threads used by `warm()`."""
+
+_ADVICE_MODE = os.environ.get('CF_MMAP_ADVICE', 'on').lower()
+
+
+def _mapping(arr: np.ndarray[Any, Any]) -> tuple[mmap.mmap, int] | None:
+    """The mmap object behind an array and the array's offset into it."""
+    base: Any = arr
+    while isinstance(base, np.ndarray):
+        base = base.base
+    if not isinstance(base, mmap.mmap):
+        return None
+    start = np.frombuffer(base, dtype=np.uint8).__array_interface__['data'][0]
+    return base, arr.__array_interface__['data'][0] - start
+
+
+def advise(arr: np.ndarray[Any, Any], policy: str) -> bool:
+    """
+    Give the kernel an access-pattern hint for a memory-mapped array.
+
+    Parameters
+    ----------
+    arr : np.ndarray
+        Array backed by a memory map; only its own byte range is advised,
+        which matters for views into a larger mapping (packed corpora)
+    policy : str
+        One of the keys of ADVICE: 'normal', 'random', 'sequential',
+        'willneed' or 'dontneed'
+
+    Returns
+    -------
+    bool
+        True if the hint was given
+
+    Raises
+    ------
+    ValueError
+        If the policy is unknown
+    """
+    if policy not in ('normal', 'random', 'sequential', 'willneed', 'dontneed'):
+        raise ValueError(f"unknown advice policy: {policy!r}")
+    if policy not in ADVICE or arr.nbytes == 0:
+        return False
+    found = _mapping(arr)
+    if found is None:
+        return False
+    mm, offset = found
+    aligned = offset - offset % mmap.PAGESIZE
+    length = min(arr.nbytes + offset - aligned, len(mm) - aligned)
+    try:
+        mm.madvise(ADVICE[policy], aligned, length)
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+def prefetch(arr: np.ndarray[Any, Any]) -> None:
+    """
+    Pull a memory-mapped array into the page cache.
+
+    Advises WILLNEED and then touches one byte per page, so the array is
+    resident even where the kernel ignores the hint.
+
+    Parameters
+    ----------
+    arr : np.ndarray
+        Array to prefetch; arrays that are not memory-mapped are skipped
+    """
+    if _mapping(arr) is None or arr.nbytes == 0:
+        return
+    advise(arr, 'willneed')
+    flat = np.ascontiguousarray(arr).reshape(-1).view(np.uint8)
+    int(flat[::mmap.PAGESIZE].sum())
+
+
+def storage_arrays(obj: Any) -> Iterator[np.ndarray[Any, Any]]:
+    """
+    Find the memory-mapped arrays held by a storage object.
+
+    Walks ndarrays, tuples, lists and the attributes of objects from
+    `cfabric.storage` (CSRArray, StringPool, StringTable, PostingsIndex,
+    ...).
+
+    Parameters
+    ----------
+    obj : Any
+        A storage object, an array, or a container of them
+
+    Yields
+    ------
+    np.ndarray
+        Each memory-mapped array once
+    """
+    seen: set[int] = set()
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        if isinstance(item, np.ndarray):
+            if _mapping(item) is not None:
+                yield item
+        elif isinstance(item, (tuple, list)):
+            stack.extend(item)
+        elif type(item).__module__.startswith('cfabric.storage'):
+            attrs = getattr(item, '__dict__', None) or {
+                name: getattr(item, name, None)
+                for name in getattr(type(item), '__slots__', ())
+            }
+            stack.extend(attrs.values())
+
+
+def warm(
+    arrays: Iterable[np.ndarray[Any, Any]], threads: int = WARM_THREADS
+) -> list[threading.Thread]:
+    """
+    Prefetch arrays in background threads.
+
+    Parameters
+    ----------
+    arrays : iterable of np.ndarray
+        Arrays to prefetch
+    threads : int
+        Maximum number of threads; the arrays are spread over them
+
+    Returns
+    -------
+    list[threading.Thread]
+        The started (daemon) threads; join them to wait for the warmup
+    """
+    batches: list[list[np.ndarray[Any, Any]]] = [[] for _ in range(max(threads, 1))]
+    for i, arr in enumerate(sorted(arrays, key=lambda a: -a.nbytes)):
+        batches[i % len(batches)].append(arr)
+
+    def run(batch: list[np.ndarray[Any, Any]]) -> None:
+        for arr in batch:
+            prefetch(arr)
+
+    started = []
+    for batch in batches:
+        if batch:
+            thread = threading.Thread(
+                target=run, args=(batch,), name='cfabric-warm', daemon=True
+            )
+            thread.start()
+            started.append(thread)
+    return started
@@ -5,10 +5,15 @@ Compressed Sparse Row (CSR) utilities for variable-length data.
 from __future__ import annotations
 
 import os
+from functools import lru_cache
+from itertools import chain
 from typing import TYPE_CHECKING, Any
 
 import numpy as np
 
+from cfabric.storage.pack import CfmPack, load_npy, npy_exists
+from cfabric.storage.string_pool import MISSING_STR_INDEX, StringTable
+
 if TYPE_CHECKING:
     from collections.abc import Sequence
 
@@ -17,10 +22,28 @@ if TYPE_CHECKING:
 # Node indexing dtypes
 NODE_DTYPE = 'uint32'
 INDEX_DTYPE = 'uint32'
+WIDE_DTYPE = 'uint64'
+"""Dtype for node references and row pointers that do not fit in 32 bits."""
+
+
+def node_dtype(max_node: int) -> str:
+    """The dtype of node references up to `max_node`: 64 bits only if needed."""
+    return NODE_DTYPE if max_node <= np.iinfo(NODE_DTYPE).max else WIDE_DTYPE
+
+
+def index_dtype(total: int) -> str:
+    """The dtype of row pointers to `total` entries: 64 bits only if needed."""
+    return INDEX_DTYPE if total <= np.iinfo(INDEX_DTYPE).max else WIDE_DTYPE
+
+
+def _max_value(values: NDArray[np.integer]) -> int:
+    return int(values.max()) if len(values) else 0
 
 # Environment variable to control embedding cache behavior
-# Values: "on" (default), "off"
+# Values: "on" (default), "off", "shared"
 # Set CF_EMBEDDING_CACHE=off to disable automatic preloading
+# Set CF_EMBEDDING_CACHE=shared to preload into shared memory, so that
+# worker processes on the same machine share one copy
 _EMBEDDING_CACHE_MODE = os.environ.get('CF_EMBEDDING_CACHE', 'on').lower()
 
 
@@ -44,6 +67,7 @@ class CSRArray:
         self._data = data
         self._ram_indptr: NDArray[np.uint32] | None = None
         self._ram_data: NDArray[np.uint32] | None = None
+        self._shm: Any = None
 
     @property
     def indptr(self) -> NDArray[np.uint32]:
@@ -72,10 +96,70 @@ class CSRArray:
             self._ram_indptr = np.array(self._indptr)
             self._ram_data = np.array(self._data)
 
+    def preload_to_shared(self, name: str) -> bool:
+        """Load CSR data into a shared-memory segment.
+
+        The first process to preload under `name` copies the data into
+        the segment; other processes attach to it without copying, so
+        worker processes share one RAM copy. Falls back to a private
+        `preload_to_ram()` if the segment cannot be used.
+
+        Parameters
+        ----------
+        name : str
+            Segment name, see `cfabric.storage.shared_cache.segment_name`
+
+        Returns
+        -------
+        bool
+            True if the data lives in shared memory
+        """
+        from cfabric.storage.shared_cache import share_arrays
+
+        if self._shm is not None:
+            return True
+        indptr = self._indptr
+        specs = {
+            'indptr': (indptr.dtype, len(indptr)),
+            'data': (self._data_dtype(), int(indptr[-1]) if len(indptr) else 0),
+        }
+
+        def fill(arrays: dict[str, NDArray[Any]]) -> None:
+            arrays['indptr'][:] = indptr
+            self._fill_data(arrays['data'])
+
+        shared = share_arrays(name, specs, fill)
+        if shared is None:
+            self.preload_to_ram()
+            return False
+        arrays, self._shm = shared
+        self._ram_indptr = arrays['indptr']
+        self._ram_data = arrays['data']
+        return True
+
+    def _data_dtype(self) -> np.dtype[Any]:
+        """The dtype of the data in RAM."""
+        return self._data.dtype
+
+    def _fill_data(self, out: NDArray[Any]) -> None:
+        """Copy the data into out (a shared-memory array)."""
+        out[:] = self._data[:len(out)]
+
+    @property
+    def is_shared(self) -> bool:
+        """Return True if the RAM cache lives in shared memory."""
+        return self._shm is not None
+
     def release_cache(self) -> None:
-        """Release RAM cache, returning to mmap-only access."""
+        """Release RAM cache, returning to mmap-only access.
+
+        A shared-memory cache is detached, not removed.
+        """
         self._ram_indptr = None
         self._ram_data = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
 
     def memory_usage_bytes(self) -> int:
         """Return memory used by RAM cache, or 0 if not cached."""
@@ -85,7 +169,7 @@ class CSRArray:
 
     def __getitem__(self, i: int) -> tuple[int, ...]:
         """Get data for row i as tuple."""
-        return tuple(self.data[self.indptr[i]:self.indptr[i + 1]])
+        return tuple(self.data[self.indptr[i]:self.indptr[i + 1]].tolist())
 
     def get_as_tuple(self, i: int) -> tuple[int, ...]:
         """Get data for row i as tuple (alias for __getitem__)."""
@@ -94,6 +178,40 @@ class CSRArray:
     def __len__(self) -> int:
         return len(self.indptr) - 1
 
+    def gather(
+        self, rows: NDArray[np.integer] | Sequence[int]
+    ) -> tuple[NDArray[np.uint32], NDArray[np.int64], NDArray[np.int64]]:
+        """Gather the data of many rows in one vectorized operation.
+
+        Instead of slicing row by row, the positions of all requested
+        elements are computed at once from `indptr` with `np.repeat` and
+        a cumulative sum, and fetched with a single fancy-index.
+
+        Parameters
+        ----------
+        rows : array-like of int
+            Row indices (0-indexed). All rows must be in range
+            `0 <= row < len(self)`; callers filter out-of-range rows.
+
+        Returns
+        -------
+        tuple
+            `(data, offsets, row_ids)` where:
+
+            - `data` is the concatenated data of all requested rows,
+              in the order in which the rows were requested
+            - `offsets` has length `len(rows) + 1`; the data of the
+              k-th requested row is `data[offsets[k]:offsets[k + 1]]`
+            - `row_ids` has the same length as `data` and gives the row
+              each element came from
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        indptr = self.indptr
+
+        starts = indptr[rows].astype(np.int64)
+        lengths = indptr[rows + 1].astype(np.int64) - starts
+        return _take_segments(self.data, starts, lengths, rows)
+
     @classmethod
     def from_sequences(cls, sequences: Sequence[Sequence[int]]) -> CSRArray:
         """
@@ -108,9 +226,10 @@ class CSRArray:
         -------
         CSRArray
         """
-        indptr = np.zeros(len(sequences) + 1, dtype=INDEX_DTYPE)
         total = sum(len(s) for s in sequences)
-        data = np.zeros(total, dtype=NODE_DTYPE)
+        max_node = max((max(s) for s in sequences if len(s)), default=0)
+        indptr = np.zeros(len(sequences) + 1, dtype=index_dtype(total))
+        data = np.zeros(total, dtype=node_dtype(max_node))
 
         offset = 0
         for i, seq in enumerate(sequences):
@@ -122,16 +241,48 @@ class CSRArray:
 
         return cls(indptr, data)
 
+    @classmethod
+    def from_pairs(
+        cls,
+        rows: NDArray[np.integer],
+        cols: NDArray[np.integer],
+        num_rows: int,
+    ) -> CSRArray:
+        """
+        Build CSR from parallel arrays of (row, column) pairs.
+
+        Rows come out with their columns in ascending order. Pairs must be
+        distinct; pairs with a row outside `0 .. num_rows - 1` are dropped.
+
+        Parameters
+        ----------
+        rows : np.ndarray
+            Row index of each pair
+        cols : np.ndarray
+            Column value of each pair
+        num_rows : int
+            Total number of rows
+
+        Returns
+        -------
+        CSRArray
+        """
+        order, indptr = _pair_order(rows, cols, num_rows)
+        cols = np.asarray(cols)[order]
+        return cls(indptr, cols.astype(node_dtype(_max_value(cols))))
+
     def save(self, path_prefix: str) -> None:
         """Save to {path_prefix}_indptr.npy and {path_prefix}_data.npy"""
         np.save(f"{path_prefix}_indptr.npy", self.indptr)
         np.save(f"{path_prefix}_data.npy", self.data)
 
     @classmethod
-    def load(cls, path_prefix: str, mmap_mode: str = 'r') -> CSRArray:
-        """Load from files."""
-        indptr = np.load(f"{path_prefix}_indptr.npy", mmap_mode=mmap_mode)
-        data = np.load(f"{path_prefix}_data.npy", mmap_mode=mmap_mode)
+    def load(
+        cls, path_prefix: str, mmap_mode: str = 'r', pack: CfmPack | None = None
+    ) -> CSRArray:
+        """Load from files, or from `pack` if given."""
+        indptr = load_npy(f"{path_prefix}_indptr.npy", mmap_mode, pack)
+        data = load_npy(f"{path_prefix}_data.npy", mmap_mode, pack)
         return cls(indptr, data)
 
     def get_all_targets(self, sources: set[int]) -> set[int]:
@@ -150,25 +301,12 @@ class CSRArray:
         if not sources:
             return set()
 
-        # Convert to 0-indexed array indices
-        source_arr = np.array(list(sources), dtype=np.int64) - 1
-        valid_mask = (source_arr >= 0) & (source_arr < len(self))
-        valid_sources = source_arr[valid_mask]
-
-        if len(valid_sources) == 0:
+        valid_rows = self._valid_rows(sources)
+        if len(valid_rows) == 0:
             return set()
 
-        # Collect all targets using vectorized slicing
-        all_targets = []
-        for idx in valid_sources:
-            start, end = self.indptr[idx], self.indptr[idx + 1]
-            if start < end:
-                all_targets.append(self.data[start:end])
-
-        if not all_targets:
-            return set()
-
-        return set(np.concatenate(all_targets).tolist())
+        data, _, _ = self.gather(valid_rows)
+        return set(np.unique(data).tolist())
 
     def filter_sources_with_targets_in(
         self, sources: set[int], target_set: set[int]
@@ -193,52 +331,177 @@ class CSRArray:
         if not sources or not target_set:
             return set(), set()
 
-        matched_sources = set()
-        matched_targets = set()
-        csr_len = len(self)
+        valid_rows = self._valid_rows(sources)
+        if len(valid_rows) == 0:
+            return set(), set()
 
-        # Direct iteration with cached indptr/data references
-        indptr = self.indptr
-        data = self.data
+        data, _, row_ids = self.gather(valid_rows)
+        targets = np.fromiter(target_set, dtype=np.int64, count=len(target_set))
+        match_mask = np.isin(data, targets)
 
-        for src in sources:
-            idx = src - 1
-            if idx < 0 or idx >= csr_len:
-                continue
+        matched_sources = set((row_ids[match_mask] + 1).tolist())
+        matched_targets = set(data[match_mask].tolist())
+        return matched_sources, matched_targets
 
-            start = indptr[idx]
-            end = indptr[idx + 1]
-            if start >= end:
-                continue
+    def _valid_rows(self, nodes: set[int]) -> NDArray[np.int64]:
+        """Convert 1-indexed nodes to in-range 0-indexed row indices."""
+        rows = np.fromiter(nodes, dtype=np.int64, count=len(nodes)) - 1
+        return rows[(rows >= 0) & (rows < len(self))]
 
-            # Get targets for this source
-            targets = data[start:end]
 
-            # Check which targets are in the target set
-            for t in targets:
-                if t in target_set:
-                    matched_sources.add(src)
-                    matched_targets.add(int(t))
+def _take_segments(
+    source: NDArray[Any],
+    starts: NDArray[np.int64],
+    lengths: NDArray[np.int64],
+    rows: NDArray[np.int64],
+) -> tuple[NDArray[Any], NDArray[np.int64], NDArray[np.int64]]:
+    """Concatenate source[starts[k]:starts[k] + lengths[k]] for all k.
+
+    Returns `(data, offsets, row_ids)` as described in `CSRArray.gather`.
+    """
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    # Position of element j of row k is starts[k] + j,
+    # i.e. arange(total) shifted per row by starts[k] - offsets[k]
+    positions = np.arange(offsets[-1], dtype=np.int64)
+    positions += np.repeat(starts - offsets[:-1], lengths)
+
+    data = source[positions]
+    row_ids = np.repeat(rows, lengths)
+    return data, offsets, row_ids
+
+
+def gather_rows(
+    data: CSRArray | Sequence[Sequence[int]],
+    rows: NDArray[np.integer],
+) -> tuple[NDArray[np.int64], NDArray[np.int64], NDArray[np.int64]]:
+    """Gather many rows of CSR or tuple-of-tuples data at once.
+
+    Like `CSRArray.gather`, but tolerant of out-of-range rows, which
+    count as empty rows. This lets callers map node numbers to rows
+    with a plain subtraction (e.g. slots have no levDown row).
+
+    Also accepts the tuple-of-tuples data that `.tf` loading produces,
+    so the computed and warp feature classes work for both backends.
+
+    Parameters
+    ----------
+    data : CSRArray | sequence of sequences
+        Row-oriented data
+    rows : np.ndarray
+        Row indices (0-indexed), possibly out of range
+
+    Returns
+    -------
+    tuple
+        `(data, offsets, row_ids)`, see `CSRArray.gather`.
+        `offsets` has one entry per requested row plus one.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    valid = (rows >= 0) & (rows < len(data))
+    valid_rows = rows[valid]
+
+    if isinstance(data, CSRArray):
+        values, valid_offsets, row_ids = data.gather(valid_rows)
+        values = values.astype(np.int64)
+        valid_lengths = np.diff(valid_offsets)
+    else:
+        seqs = [data[r] for r in valid_rows.tolist()]
+        valid_lengths = np.fromiter(
+            (len(seq) for seq in seqs), dtype=np.int64, count=len(seqs)
+        )
+        values = np.fromiter(
+            chain.from_iterable(seqs), dtype=np.int64, count=int(valid_lengths.sum())
+        )
+        row_ids = np.repeat(valid_rows, valid_lengths)
+
+    lengths = np.zeros(len(rows), dtype=np.int64)
+    lengths[valid] = valid_lengths
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return values, offsets, row_ids
+
+
+def _pair_order(
+    rows: NDArray[np.integer], cols: NDArray[np.integer], num_rows: int
+) -> tuple[NDArray[np.int64], NDArray[np.uint32]]:
+    """Order of (row, column) pairs in CSR layout, and the row pointers.
+
+    Pairs with a row outside `0 .. num_rows - 1` are left out of the order.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    inside = np.flatnonzero((rows >= 0) & (rows < num_rows))
+    rows = rows[inside]
+    order = inside[np.lexsort((np.asarray(cols)[inside], rows))]
+    indptr = np.zeros(num_rows + 1, dtype=index_dtype(len(order)))
+    np.cumsum(np.bincount(rows, minlength=num_rows), out=indptr[1:])
+    return order, indptr
 
-        return matched_sources, matched_targets
 
 class CSRArrayWithValues(CSRArray):
-    """CSR with associated values (for edge features with values)."""
+    """
+    CSR with associated values (for edge features with values).
+
+    Integer values are stored as a plain numpy array. String values are
+    stored as uint32 ids into a StringTable (MISSING_STR_INDEX for None),
+    so both can be memory-mapped and strings are only decoded when a row
+    is accessed.
+    """
 
     def __init__(
         self,
         indptr: NDArray[np.uint32],
         indices: NDArray[np.uint32],
         values: NDArray[Any],
+        value_table: StringTable | None = None,
     ) -> None:
+        """
+        Parameters
+        ----------
+        indptr : np.ndarray
+            Row pointers
+        indices : np.ndarray
+            Column indices
+        values : np.ndarray
+            Values per entry, or string ids when value_table is given
+        value_table : StringTable, optional
+            Table that string ids in values refer to
+        """
         super().__init__(indptr, indices)
         self.indices = indices  # alias for clarity
         self.values = values
+        self.value_table = value_table
+
+    def decode_values(self, values: NDArray[Any]) -> tuple[Any, ...]:
+        """
+        Convert stored values to Python values.
+
+        Parameters
+        ----------
+        values : np.ndarray
+            Slice of the stored values array
+
+        Returns
+        -------
+        tuple
+            Python values (string ids are decoded, None for missing)
+        """
+        table = self.value_table
+        if table is None:
+            return tuple(values.tolist())
+        return tuple(
+            None if code == MISSING_STR_INDEX else table[code]
+            for code in values.tolist()
+        )
 
     def __getitem__(self, i: int) -> tuple[tuple[int, ...], tuple[Any, ...]]:
         """Get (indices, values) for row i as tuples."""
         start, end = self.indptr[i], self.indptr[i + 1]
-        return tuple(self.indices[start:end]), tuple(self.values[start:end])
+        return (
+            tuple(self.indices[start:end].tolist()),
+            self.decode_values(self.values[start:end]),
+        )
 
     def get_as_dict(self, i: int) -> dict[int, Any]:
         """Get as {index: value} dict for row i."""
@@ -246,43 +509,56 @@ class CSRArrayWithValues(CSRArray):
         return dict(zip(indices, values))
 
     def save(self, path_prefix: str) -> None:
-        """Save to files including values (with string encoding if needed)."""
-        import json
-        from pathlib import Path
+        """
+        Save to files.
 
+        String values are written as {path_prefix}_values.npy (uint32 ids)
+        plus a string table {path_prefix}_values_blob.npy and
+        {path_prefix}_values_offsets.npy; other values go to
+        {path_prefix}_values.npy directly.
+        """
         np.save(f"{path_prefix}_indptr.npy", self.indptr)
         np.save(f"{path_prefix}_indices.npy", self.indices)
 
-        if self.values.dtype == np.object_:
-            # Encode strings as integer indices (object arrays can't be mmap'd)
-            unique_values = list(dict.fromkeys(self.values))  # preserve order, dedupe
+        if self.value_table is not None:
+            np.save(f"{path_prefix}_values.npy", self.values)
+            self.value_table.save(f"{path_prefix}_values")
+        elif self.values.dtype == np.object_:
+            # Encode strings as ids into a string table (object arrays can't be mmap'd)
+            unique_values = sorted({v for v in self.values if v is not None})
             value_to_idx = {v: i for i, v in enumerate(unique_values)}
-            encoded = np.array([value_to_idx[v] for v in self.values], dtype=np.uint32)
+            value_to_idx[None] = MISSING_STR_INDEX
+            encoded = np.array(
+                [value_to_idx[v] for v in self.values], dtype=NODE_DTYPE
+            )
             np.save(f"{path_prefix}_values.npy", encoded)
-
-            with open(f"{path_prefix}_values_lookup.json", 'w') as f:
-                json.dump(unique_values, f)
+            StringTable.from_strings(unique_values).save(f"{path_prefix}_values")
         else:
             np.save(f"{path_prefix}_values.npy", self.values)
 
     @classmethod
-    def load(cls, path_prefix: str, mmap_mode: str = 'r') -> CSRArrayWithValues:
-        """Load from files (with string decoding if needed)."""
+    def load(
+        cls, path_prefix: str, mmap_mode: str = 'r', pack: CfmPack | None = None
+    ) -> CSRArrayWithValues:
+        """Load from files, or from `pack` if given; string values stay
+        encoded until accessed."""
         import json
         from pathlib import Path
 
-        indptr = np.load(f"{path_prefix}_indptr.npy", mmap_mode=mmap_mode)
-        indices = np.load(f"{path_prefix}_indices.npy", mmap_mode=mmap_mode)
+        indptr = load_npy(f"{path_prefix}_indptr.npy", mmap_mode, pack)
+        indices = load_npy(f"{path_prefix}_indices.npy", mmap_mode, pack)
+        values = load_npy(f"{path_prefix}_values.npy", mmap_mode, pack)
+
+        if npy_exists(f"{path_prefix}_values_blob.npy", pack):
+            value_table = StringTable.load(f"{path_prefix}_values", mmap_mode, pack)
+            return cls(indptr, indices, values, value_table)
 
         lookup_path = Path(f"{path_prefix}_values_lookup.json")
         if lookup_path.exists():
-            # String values: load lookup and decode
-            encoded = np.load(f"{path_prefix}_values.npy", mmap_mode=mmap_mode)
+            # Older .cfm directories: JSON lookup, decoded eagerly
             with open(lookup_path) as f:
                 lookup = json.load(f)
-            values = np.array([lookup[i] for i in encoded], dtype=object)
-        else:
-            values = np.load(f"{path_prefix}_values.npy", mmap_mode=mmap_mode)
+            values = np.array([lookup[i] for i in values], dtype=object)
 
         return cls(indptr, indices, values)
 
@@ -311,9 +587,10 @@ class CSRArrayWithValues(CSRArray):
         """
         # Count total entries
         total = sum(len(d) for d in data.values())
+        max_node = max((max(d) for d in data.values() if d), default=0)
 
-        indptr = np.zeros(num_rows + 1, dtype=INDEX_DTYPE)
-        indices = np.zeros(total, dtype=NODE_DTYPE)
+        indptr = np.zeros(num_rows + 1, dtype=index_dtype(total))
+        indices = np.zeros(total, dtype=node_dtype(max_node))
         values = np.zeros(total, dtype=value_dtype)
 
         offset = 0
@@ -328,3 +605,359 @@ class CSRArrayWithValues(CSRArray):
         indptr[-1] = offset
 
         return cls(indptr, indices, values)
+
+    @classmethod
+    def from_pairs(  # type: ignore[override]
+        cls,
+        rows: NDArray[np.integer],
+        cols: NDArray[np.integer],
+        values: NDArray[Any],
+        num_rows: int,
+        value_table: StringTable | None = None,
+    ) -> CSRArrayWithValues:
+        """
+        Build from parallel arrays of (row, column, value) triples.
+
+        Rows come out with their columns in ascending order. (row, column)
+        pairs must be distinct; triples with a row outside
+        `0 .. num_rows - 1` are dropped.
+
+        Parameters
+        ----------
+        rows : np.ndarray
+            Row index of each entry
+        cols : np.ndarray
+            Column value of each entry
+        values : np.ndarray
+            Value of each entry, or string ids when value_table is given
+        num_rows : int
+            Total number of rows
+        value_table : StringTable, optional
+            Table that string ids in values refer to
+
+        Returns
+        -------
+        CSRArrayWithValues
+        """
+        order, indptr = _pair_order(rows, cols, num_rows)
+        cols = np.asarray(cols)[order]
+        return cls(
+            indptr,
+            cols.astype(node_dtype(_max_value(cols))),
+            np.asarray(values)[order],
+            value_table,
+        )
+
+
+ZBLOCK_ROWS = 256
+"""Number of rows per independently decodable block of a CompressedCSRArray."""
+
+ZBLOCK_CACHE_SIZE = 64
+"""Number of decoded blocks each CompressedCSRArray keeps per process."""
+
+
+def _zigzag(values: NDArray[np.int64]) -> NDArray[np.uint64]:
+    """Map signed integers to unsigned ones, small magnitudes first."""
+    return ((values << 1) ^ (values >> 63)).astype(np.uint64)
+
+
+def _unzigzag(values: NDArray[np.uint64]) -> NDArray[np.int64]:
+    """Inverse of _zigzag."""
+    values = values.astype(np.int64)
+    return (values >> 1) ^ -(values & 1)
+
+
+def _bitpack(symbols: NDArray[np.uint64], width: int) -> bytes:
+    """Pack symbols into `width` bits each, least significant bit first."""
+    if width == 0 or len(symbols) == 0:
+        return b''
+    shifts = np.arange(width, dtype=np.uint64)
+    bits = ((symbols[:, None] >> shifts) & np.uint64(1)).astype(np.uint8)
+    return np.packbits(bits.ravel(), bitorder='little').tobytes()
+
+
+def _bitunpack(packed: NDArray[np.uint8], width: int, count: int) -> NDArray[np.uint64]:
+    """Inverse of _bitpack."""
+    if width == 0 or count == 0:
+        return np.zeros(count, dtype=np.uint64)
+    bits = np.unpackbits(packed, count=count * width, bitorder='little')
+    bits = bits.reshape(count, width).astype(np.uint64)
+    return (bits << np.arange(width, dtype=np.uint64)).sum(axis=1, dtype=np.uint64)
+
+
+def _segmented_cumsum(
+    deltas: NDArray[np.int64], is_start: NDArray[np.bool_]
+) -> NDArray[np.int64]:
+    """Cumulative sum that restarts at every position where is_start is set."""
+    total = np.cumsum(deltas)
+    idx = np.arange(len(deltas))
+    seg = np.maximum.accumulate(np.where(is_start, idx, 0))
+    return total - total[seg] + deltas[seg]
+
+
+class CompressedCSRArray(CSRArray):
+    """
+    Compressed CSR for the warp and computed arrays (oslots, levUp,
+    levDown, boundary).
+
+    `indptr` is kept as is; the row data is encoded in blocks of
+    ZBLOCK_ROWS rows that can be decoded independently:
+
+    - in *delta* mode every element is stored as the zigzag-encoded
+      difference to its predecessor in the row; the first element of a
+      row is stored relative to the smallest value of the block;
+    - in *runs* mode every row is first split into runs of consecutive
+      values (slot intervals), and each run is stored as its start
+      (delta-coded as above) and its length minus one.
+
+    The symbols of a block are bit-packed with the smallest width that
+    fits them all. Row access decodes one block (kept in a small cache);
+    `preload_to_ram()` and `data` decode everything into a plain array,
+    after which the array behaves like a CSRArray.
+
+    Attributes
+    ----------
+    zdata : np.ndarray
+        Bit-packed symbols of all blocks (dtype=uint8)
+    zblocks : np.ndarray
+        Per block: byte offset in zdata, bit width, base value and largest
+        value (dtype=int64, shape (n_blocks, 4); older compilations lack
+        the largest value)
+    runptr : np.ndarray | None
+        Runs mode only: row i has runs runptr[i]:runptr[i+1]
+    """
+
+    def __init__(
+        self,
+        indptr: NDArray[np.uint32],
+        zdata: NDArray[np.uint8],
+        zblocks: NDArray[np.int64],
+        runptr: NDArray[np.uint32] | None = None,
+    ) -> None:
+        super().__init__(indptr, np.empty(0, dtype=NODE_DTYPE))
+        self.zdata = zdata
+        self.zblocks = zblocks
+        self.runptr = runptr
+        self._block = lru_cache(maxsize=ZBLOCK_CACHE_SIZE)(self._decode_block)
+
+    @property
+    def data(self) -> NDArray[np.uint32]:
+        """Return decoded data (decodes the whole array into RAM once)."""
+        self.preload_to_ram()
+        return self._ram_data
+
+    def preload_to_ram(self) -> None:
+        """Decode all blocks into RAM for fast repeated access."""
+        if self._ram_indptr is None:
+            n_blocks = len(self.zblocks)
+            decoded = [self._decode_block(b) for b in range(n_blocks)]
+            data = np.concatenate(decoded) if decoded else np.empty(0, np.int64)
+            self._ram_data = data.astype(node_dtype(_max_value(data)))
+            self._ram_indptr = np.array(self._indptr)
+
+    def _data_dtype(self) -> np.dtype[Any]:
+        """The dtype of the decoded data, from the block maxima if recorded."""
+        if self.zblocks.shape[1] < 4:
+            return self.data.dtype
+        return np.dtype(node_dtype(_max_value(self.zblocks[:, 3])))
+
+    def _fill_data(self, out: NDArray[Any]) -> None:
+        """Decode the data into out block by block."""
+        if self._ram_data is not None:
+            out[:] = self._ram_data
+            return
+        start = 0
+        for b in range(len(self.zblocks)):
+            block = self._decode_block(b)
+            out[start:start + len(block)] = block
+            start += len(block)
+
+    @classmethod
+    def from_csr(cls, csr: CSRArray, mode: str | None = None) -> CompressedCSRArray:
+        """
+        Compress a CSRArray.
+
+        Parameters
+        ----------
+        csr : CSRArray
+            Array to compress
+        mode : str, optional
+            'runs' or 'delta'. By default the mode that needs fewer
+            symbols is chosen.
+
+        Returns
+        -------
+        CompressedCSRArray
+        """
+        indptr = np.asarray(csr.indptr)
+        data = np.asarray(csr.data).astype(np.int64)
+        n_rows = len(indptr) - 1
+        lengths = np.diff(indptr.astype(np.int64))
+        row_of = np.repeat(np.arange(n_rows, dtype=np.int64), lengths)
+
+        row_start = np.zeros(len(data), dtype=bool)
+        row_start[indptr[:-1][lengths > 0].astype(np.int64)] = True
+
+        # Split rows into runs of consecutive values
+        run_break = row_start.copy()
+        if len(data) > 1:
+            run_break[1:] |= data[1:] != data[:-1] + 1
+        run_pos = np.flatnonzero(run_break)
+        if mode is None:
+            mode = 'runs' if 2 * len(run_pos) < len(data) else 'delta'
+
+        if mode == 'runs':
+            values = data[run_pos]
+            run_lens = np.diff(np.append(run_pos, len(data)))
+            runptr = np.zeros(n_rows + 1, dtype=index_dtype(len(run_pos)))
+            np.cumsum(
+                np.bincount(row_of[run_pos], minlength=n_rows), out=runptr[1:]
+            )
+            ptr = runptr.astype(np.int64)
+            is_start = row_start[run_pos]
+        else:
+            values = data
+            run_lens = None
+            runptr = None
+            ptr = indptr.astype(np.int64)
+            is_start = row_start
+
+        chunks: list[bytes] = []
+        blocks: list[tuple[int, int, int, int]] = []
+        nbytes = 0
+        for r0 in range(0, n_rows, ZBLOCK_ROWS):
+            r1 = min(r0 + ZBLOCK_ROWS, n_rows)
+            v = values[ptr[r0]:ptr[r1]]
+            starts = is_start[ptr[r0]:ptr[r1]]
+            base = int(v.min()) if len(v) else 0
+            deltas = np.empty(len(v), dtype=np.int64)
+            if len(v):
+                deltas[0] = 0
+                deltas[1:] = v[1:] - v[:-1]
+            symbols = _zigzag(deltas)
+            symbols[starts] = (v[starts] - base).astype(np.uint64)
+            if run_lens is not None:
+                pairs = np.empty(2 * len(v), dtype=np.uint64)
+                pairs[0::2] = symbols
+                pairs[1::2] = run_lens[ptr[r0]:ptr[r1]] - 1
+                symbols = pairs
+            width = int(symbols.max()).bit_length() if len(symbols) else 0
+            chunk = _bitpack(symbols, width)
+            top = _max_value(
+                v if run_lens is None else v + run_lens[ptr[r0]:ptr[r1]] - 1
+            )
+            blocks.append((nbytes, width, base, top))
+            chunks.append(chunk)
+            nbytes += len(chunk)
+
+        zdata = np.frombuffer(b''.join(chunks), dtype=np.uint8)
+        zblocks = np.array(blocks, dtype=np.int64).reshape(-1, 4)
+        total = int(indptr[-1]) if len(indptr) else 0
+        return cls(indptr.astype(index_dtype(total)), zdata, zblocks, runptr)
+
+    def _decode_block(self, b: int) -> NDArray[np.int64]:
+        """Decode the data of all rows in block b."""
+        n_rows = len(self)
+        r0 = b * ZBLOCK_ROWS
+        r1 = min(r0 + ZBLOCK_ROWS, n_rows)
+        ptr = self._indptr if self.runptr is None else self.runptr
+        first = int(ptr[r0])
+        count = int(ptr[r1]) - first
+        if count == 0:
+            return np.empty(0, dtype=np.int64)
+
+        byte_start, width, base = (int(x) for x in self.zblocks[b][:3])
+        byte_end = (
+            int(self.zblocks[b + 1][0]) if b + 1 < len(self.zblocks) else len(self.zdata)
+        )
+        n_symbols = count if self.runptr is None else 2 * count
+        symbols = _bitunpack(
+            np.asarray(self.zdata[byte_start:byte_end]), width, n_symbols
+        )
+        if self.runptr is not None:
+            run_lens = symbols[1::2].astype(np.int64) + 1
+            symbols = symbols[0::2]
+
+        row_ptr = np.asarray(ptr[r0:r1 + 1], dtype=np.int64) - first
+        is_start = np.zeros(count, dtype=bool)
+        nonempty = row_ptr[:-1] < row_ptr[1:]
+        is_start[row_ptr[:-1][nonempty]] = True
+
+        deltas = _unzigzag(symbols)
+        deltas[is_start] = symbols[is_start].astype(np.int64) + base
+        values = _segmented_cumsum(deltas, is_start)
+
+        if self.runptr is None:
+            return values
+        # Expand runs into consecutive values
+        run_offsets = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(run_lens, out=run_offsets[1:])
+        steps = np.arange(run_offsets[-1], dtype=np.int64)
+        steps -= np.repeat(run_offsets[:-1], run_lens)
+        return np.repeat(values, run_lens) + steps
+
+    def __getitem__(self, i: int) -> tuple[int, ...]:
+        """Get data for row i as tuple, decoding its block if needed."""
+        if self._ram_data is not None:
+            return super().__getitem__(i)
+        n_rows = len(self)
+        if i < 0:
+            i += n_rows
+        if not 0 <= i < n_rows:
+            raise IndexError(f"row {i} out of range")
+        b = i // ZBLOCK_ROWS
+        first = int(self._indptr[b * ZBLOCK_ROWS])
+        start = int(self._indptr[i]) - first
+        end = int(self._indptr[i + 1]) - first
+        return tuple(self._block(b)[start:end].tolist())
+
+    def gather(
+        self, rows: NDArray[np.integer] | Sequence[int]
+    ) -> tuple[NDArray[np.int64], NDArray[np.int64], NDArray[np.int64]]:
+        """Gather many rows, decoding each block involved once.
+
+        See `CSRArray.gather`.
+        """
+        if self._ram_data is not None:
+            return super().gather(rows)
+        rows = np.asarray(rows, dtype=np.int64)
+        indptr = self._indptr
+        blocks, inverse = np.unique(rows // ZBLOCK_ROWS, return_inverse=True)
+        decoded = [self._block(int(b)) for b in blocks.tolist()]
+        block_offsets = np.zeros(len(decoded) + 1, dtype=np.int64)
+        np.cumsum([len(d) for d in decoded], out=block_offsets[1:])
+        pool = np.concatenate(decoded) if decoded else np.empty(0, dtype=np.int64)
+
+        row_starts = indptr[rows].astype(np.int64)
+        lengths = indptr[rows + 1].astype(np.int64) - row_starts
+        block_first = indptr[blocks * ZBLOCK_ROWS].astype(np.int64)
+        starts = block_offsets[:-1][inverse] + row_starts - block_first[inverse]
+        return _take_segments(pool, starts, lengths, rows)
+
+    def save(self, path_prefix: str) -> None:
+        """Save to {path_prefix}_indptr.npy, _zdata.npy, _zblocks.npy
+        and, in runs mode, _zruns.npy."""
+        np.save(f"{path_prefix}_indptr.npy", self._indptr)
+        np.save(f"{path_prefix}_zdata.npy", self.zdata)
+        np.save(f"{path_prefix}_zblocks.npy", self.zblocks)
+        if self.runptr is not None:
+            np.save(f"{path_prefix}_zruns.npy", self.runptr)
+
+    @classmethod
+    def exists(cls, path_prefix: str, pack: CfmPack | None = None) -> bool:
+        """Check whether a compressed array is stored at path_prefix."""
+        return npy_exists(f"{path_prefix}_zdata.npy", pack)
+
+    @classmethod
+    def load(
+        cls, path_prefix: str, mmap_mode: str = 'r', pack: CfmPack | None = None
+    ) -> CompressedCSRArray:
+        """Load from files, or from `pack` if given."""
+        indptr = load_npy(f"{path_prefix}_indptr.npy", mmap_mode, pack)
+        zdata = load_npy(f"{path_prefix}_zdata.npy", mmap_mode, pack)
+        zblocks = load_npy(f"{path_prefix}_zblocks.npy", None, pack)
+        runptr = (
+            load_npy(f"{path_prefix}_zruns.npy", mmap_mode, pack)
+            if npy_exists(f"{path_prefix}_zruns.npy", pack) else None
+        )
+        return cls(indptr, zdata, zblocks, runptr)
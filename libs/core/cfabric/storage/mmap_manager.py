@@ -5,16 +5,34 @@ Memory-mapped array management for Context Fabric.
 from __future__ import annotations
 
 import json
+import threading
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
-import numpy as np
-
 if TYPE_CHECKING:
     from numpy.typing import NDArray
 
-from cfabric.storage.csr import CSRArray
-from cfabric.storage.string_pool import StringPool
+from cfabric.storage import advice
+from cfabric.storage.csr import CSRArray, CSRArrayWithValues, CompressedCSRArray
+from cfabric.storage.pack import PACK_SUFFIX, CfmPack, load_npy
+from cfabric.storage.postings import PostingsIndex
+from cfabric.storage.sections import load_sections, load_structure
+from cfabric.storage.string_pool import IntFeatureArray, StringPool
+
+DEFAULT_ADVICE: dict[str, str] = {
+    'warp/otype': 'random',
+    'warp/oslots': 'random',
+    'computed/rank': 'random',
+    'computed/order': 'sequential',
+    'computed/levup': 'willneed',
+    'computed/levdown': 'willneed',
+}
+"""Access-pattern advice per array, keyed by path relative to the corpus.
+
+otype, oslots and rank are probed at random nodes; order is scanned;
+the embedding arrays are hot for every `[[`/`]]` query. Feature arrays
+are keyed as 'features/<name>' and 'edges/<name>'.
+"""
 
 
 class MmapManager:
@@ -23,22 +41,41 @@ class MmapManager:
 
     Provides lazy loading and shared access to corpus data.
 
+    The corpus is either a .cfm/{version}/ directory or a single packed
+    .cfm/{version}.cfmpack file (see `cfabric.storage.pack`); in the
+    latter case every array is a view into one mapping of the pack.
+
+    Every array is given the access-pattern advice of its key in
+    `advice` (see `cfabric.storage.advice`) when it is first loaded.
+
     Parameters
     ----------
     cfm_path : Path
-        Path to .cfm/{version}/ directory
+        Path to .cfm/{version}/ directory or .cfm/{version}.cfmpack file
+    advice : dict, optional
+        Advice policy per array key; defaults to DEFAULT_ADVICE
     """
 
-    def __init__(self, cfm_path: Path | str) -> None:
+    def __init__(
+        self, cfm_path: Path | str, advice: dict[str, str] | None = None
+    ) -> None:
         """
         Initialize manager for a .cfm directory.
 
         Parameters
         ----------
         cfm_path : Path
-            Path to .cfm/{version}/ directory
+            Path to .cfm/{version}/ directory or .cfm/{version}.cfmpack file
+        advice : dict, optional
+            Advice policy per array key; defaults to DEFAULT_ADVICE
         """
-        self.cfm_path = Path(cfm_path)
+        self.advice = dict(DEFAULT_ADVICE if advice is None else advice)
+        cfm_path = Path(cfm_path)
+        self.pack: CfmPack | None = None
+        if cfm_path.suffix == PACK_SUFFIX:
+            self.pack = CfmPack(cfm_path)
+            cfm_path = self.pack.root
+        self.cfm_path = cfm_path
         self._arrays: dict[str, NDArray[Any]] = {}
         self._meta: dict[str, Any] | None = None
 
@@ -46,8 +83,7 @@ class MmapManager:
     def meta(self) -> dict[str, Any]:
         """Load and cache corpus metadata."""
         if self._meta is None:
-            with open(self.cfm_path / 'meta.json') as f:
-                self._meta = json.load(f)
+            self._meta = self.get_json('meta')
         return self._meta
 
     @property
@@ -84,32 +120,157 @@ class MmapManager:
         key = '/'.join(path_parts)
         if key not in self._arrays:
             file_path = self.cfm_path.joinpath(*path_parts[:-1]) / f"{path_parts[-1]}.npy"
-            self._arrays[key] = np.load(file_path, mmap_mode='r')
+            self._arrays[key] = self._advise(key, load_npy(file_path, 'r', self.pack))
         return self._arrays[key]
 
+    def _advise(self, key: str, obj: Any) -> Any:
+        """Apply the advice policy of `key` to the arrays of `obj`."""
+        policy = self.advice.get(key)
+        if policy is not None and advice._ADVICE_MODE != 'off':
+            for arr in advice.storage_arrays(obj):
+                advice.advise(arr, policy)
+        return obj
+
     def get_json(self, *path_parts: str) -> Any:
         """Load a JSON metadata file."""
+        if self.pack is not None:
+            return self.pack.get_json('/'.join(path_parts))
         file_path = self.cfm_path.joinpath(*path_parts[:-1]) / f"{path_parts[-1]}.json"
         with open(file_path) as f:
             return json.load(f)
 
-    def get_string_pool(self, feature_name: str) -> StringPool:
+    def get_string_pool(self, feature_name: str, offset: int = 0) -> StringPool:
         """Get string pool for a string-valued feature."""
-        return StringPool.load(
+        return self._advise(f'features/{feature_name}', StringPool.load(
             str(self.cfm_path / 'features' / feature_name),
-            mmap_mode='r'
+            mmap_mode='r',
+            offset=offset,
+            pack=self.pack,
+        ))
+
+    def get_int_array(
+        self,
+        feature_name: str,
+        missing: int = IntFeatureArray.MISSING,
+        offset: int = 0,
+    ) -> IntFeatureArray:
+        """Get the value array of an integer-valued feature."""
+        return self._advise(f'features/{feature_name}', IntFeatureArray.load(
+            str(self.cfm_path / 'features' / f'{feature_name}.npy'),
+            mmap_mode='r',
+            missing=missing,
+            offset=offset,
+            pack=self.pack,
+        ))
+
+    def get_postings(self, feature_name: str) -> PostingsIndex:
+        """Get the inverted postings index of a node feature."""
+        return PostingsIndex.load(
+            str(self.cfm_path / 'features' / f'{feature_name}_postings'),
+            mmap_mode='r',
+            pack=self.pack,
         )
 
+    def get_sections(self) -> dict[str, Any]:
+        """Get the section indexes (see `cfabric.storage.sections`)."""
+        return load_sections(str(self.cfm_path / 'computed' / 'sections'), self.pack)
+
+    def get_structure(self) -> tuple[Any, ...]:
+        """Get the structure indexes (see `cfabric.storage.sections`)."""
+        return load_structure(str(self.cfm_path / 'computed' / 'structure'), self.pack)
+
     def get_csr(self, *path_parts: str) -> CSRArray:
-        """Get CSR array pair."""
+        """Get CSR array pair (compressed variant if that is what is stored)."""
         base_path = self.cfm_path.joinpath(*path_parts[:-1]) / path_parts[-1]
-        return CSRArray.load(str(base_path), mmap_mode='r')
+        if CompressedCSRArray.exists(str(base_path), self.pack):
+            csr = CompressedCSRArray.load(str(base_path), 'r', self.pack)
+        else:
+            csr = CSRArray.load(str(base_path), 'r', self.pack)
+        return self._advise('/'.join(path_parts), csr)
+
+    def get_edge_csr(
+        self, feature_name: str, inverse: bool = False, values: bool = False
+    ) -> CSRArray | CSRArrayWithValues:
+        """
+        Get the CSR arrays of an edge feature.
+
+        Parameters
+        ----------
+        feature_name : str
+            Edge feature name
+        inverse : bool
+            Get the inverse edges (target -> sources)
+        values : bool
+            The edges carry values (CSRArrayWithValues)
+        """
+        name = f'{feature_name}_inv' if inverse else feature_name
+        path = str(self.cfm_path / 'edges' / name)
+        csr_class = CSRArrayWithValues if values else CSRArray
+        return self._advise(
+            f'edges/{feature_name}', csr_class.load(path, 'r', self.pack)
+        )
+
+    def warm(
+        self, arrays: Any, threads: int = advice.WARM_THREADS
+    ) -> list[threading.Thread]:
+        """
+        Prefetch the memory-mapped arrays of storage objects in background
+        threads.
+
+        Parameters
+        ----------
+        arrays : Any
+            Arrays, storage objects (CSRArray, StringPool, ...) or
+            containers of them
+        threads : int
+            Maximum number of threads
+
+        Returns
+        -------
+        list[threading.Thread]
+            The started threads; join them to wait for the warmup
+        """
+        return advice.warm(advice.storage_arrays(arrays), threads=threads)
+
+    def shared_name(self, *path_parts: str) -> str:
+        """
+        Shared-memory segment name for an array of this corpus.
+
+        The name is keyed by the corpus location, the .cfm version and the
+        modification time of meta.json (or of the pack), so a recompiled
+        corpus never attaches to stale segments.
+
+        Parameters
+        ----------
+        path_parts : str
+            Path components of the array relative to cfm_path
+
+        Returns
+        -------
+        str
+        """
+        from cfabric.storage.shared_cache import segment_name
+
+        stamp_path = (
+            self.pack.path if self.pack is not None else self.cfm_path / 'meta.json'
+        )
+        meta_mtime = stamp_path.stat().st_mtime_ns
+        return segment_name(
+            self.cfm_path.resolve(),
+            self.meta.get('cfm_version', self.cfm_path.name),
+            meta_mtime,
+            *path_parts,
+        )
 
     def exists(self) -> bool:
         """Check if the .cfm directory exists and has metadata."""
+        if self.pack is not None:
+            return self.pack.path.exists()
         return (self.cfm_path / 'meta.json').exists()
 
     def close(self) -> None:
         """Release all memory mappings."""
         self._arrays.clear()
         self._meta = None
+        if self.pack is not None:
+            self.pack.close()
@@ -0,0 +1,250 @@
+"""
+Compact node sets backed by a bitmap.
+
+Search yarns and other node collections can hold hundreds of thousands of
+nodes. As Python sets they cost tens of bytes per node plus hashing; as a
+bitmap over the node range they cost one bit per node, and union,
+intersection, difference and membership tests become vectorized numpy
+operations.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.int64)
+"""Number of set bits for every byte value."""
+
+
+class NodeSet:
+    """
+    Set of nodes in the range 1..max_node, stored as a packed bitmap.
+
+    Bit n of the bitmap is set when node n is a member. The set operators
+    `|`, `&`, `-` and `^` work between node sets of the same range and
+    return new node sets; iteration yields nodes in ascending order.
+
+    Attributes
+    ----------
+    max_node : int
+        Largest node that can be stored
+    bits : np.ndarray
+        Packed bitmap, least significant bit first (dtype=uint8)
+    """
+
+    __slots__ = ('max_node', 'bits')
+
+    def __init__(self, max_node: int, bits: NDArray[np.uint8] | None = None) -> None:
+        """
+        Initialize a NodeSet.
+
+        Parameters
+        ----------
+        max_node : int
+            Largest node that can be stored
+        bits : np.ndarray, optional
+            Packed bitmap of (max_node + 1) bits; an empty set if omitted
+        """
+        self.max_node = max_node
+        self.bits = (
+            np.zeros((max_node + 8) // 8, dtype=np.uint8) if bits is None else bits
+        )
+
+    @classmethod
+    def from_nodes(
+        cls, nodes: Iterable[int] | NDArray[np.integer], max_node: int
+    ) -> NodeSet:
+        """
+        Build a node set from nodes.
+
+        Parameters
+        ----------
+        nodes : iterable of int or np.ndarray
+            Members; nodes outside 1..max_node are ignored
+        max_node : int
+            Largest node that can be stored
+
+        Returns
+        -------
+        NodeSet
+        """
+        arr = as_node_array(nodes)
+        arr = arr[(arr >= 1) & (arr <= max_node)]
+        mask = np.zeros(max_node + 1, dtype=bool)
+        mask[arr] = True
+        return cls(max_node, np.packbits(mask, bitorder='little'))
+
+    @classmethod
+    def from_range(cls, start: int, end: int, max_node: int) -> NodeSet:
+        """
+        Build a node set of the nodes start..end (inclusive).
+
+        Parameters
+        ----------
+        start : int
+            First node
+        end : int
+            Last node
+        max_node : int
+            Largest node that can be stored
+
+        Returns
+        -------
+        NodeSet
+        """
+        mask = np.zeros(max_node + 1, dtype=bool)
+        mask[max(start, 1):min(end, max_node) + 1] = True
+        return cls(max_node, np.packbits(mask, bitorder='little'))
+
+    def _mask(self) -> NDArray[np.bool_]:
+        """Unpacked membership mask, indexed by node."""
+        return np.unpackbits(
+            self.bits, count=self.max_node + 1, bitorder='little'
+        ).view(bool)
+
+    def to_array(self) -> NDArray[np.int64]:
+        """
+        Members in ascending order.
+
+        Returns
+        -------
+        NDArray[np.int64]
+        """
+        return np.flatnonzero(self._mask()).astype(np.int64)
+
+    def to_set(self) -> set[int]:
+        """
+        Members as a Python set, for use at API boundaries.
+
+        Returns
+        -------
+        set[int]
+        """
+        return set(self.to_array().tolist())
+
+    def canonical(self, rank: NDArray[Any]) -> NDArray[np.int64]:
+        """
+        Members in canonical order.
+
+        Parameters
+        ----------
+        rank : array-like
+            Canonical rank per node (index 0 is node 1)
+
+        Returns
+        -------
+        NDArray[np.int64]
+        """
+        nodes = self.to_array()
+        return nodes[np.argsort(np.asarray(rank)[nodes - 1], kind='stable')]
+
+    def isin(self, nodes: NDArray[np.integer] | Iterable[int]) -> NDArray[np.bool_]:
+        """
+        Vectorized membership test.
+
+        Parameters
+        ----------
+        nodes : array-like of int
+            Nodes to test
+
+        Returns
+        -------
+        NDArray[np.bool_]
+            True where the node is a member
+        """
+        arr = as_node_array(nodes)
+        result = np.zeros(len(arr), dtype=bool)
+        valid = (arr >= 0) & (arr <= self.max_node)
+        idx = arr[valid]
+        result[valid] = (self.bits[idx >> 3] >> (idx & 7).astype(np.uint8)) & 1 == 1
+        return result
+
+    def filter(self, nodes: NDArray[np.integer] | Iterable[int]) -> NDArray[np.int64]:
+        """
+        Keep the nodes that are members, preserving their order.
+
+        Parameters
+        ----------
+        nodes : array-like of int
+            Nodes to filter
+
+        Returns
+        -------
+        NDArray[np.int64]
+        """
+        arr = as_node_array(nodes)
+        return arr[self.isin(arr)]
+
+    def _check(self, other: NodeSet) -> None:
+        if not isinstance(other, NodeSet):
+            raise TypeError(f"expected NodeSet, got {type(other).__name__}")
+        if other.max_node != self.max_node:
+            raise ValueError(
+                f"node sets have different ranges: {self.max_node} and {other.max_node}"
+            )
+
+    def __or__(self, other: NodeSet) -> NodeSet:
+        self._check(other)
+        return NodeSet(self.max_node, self.bits | other.bits)
+
+    def __and__(self, other: NodeSet) -> NodeSet:
+        self._check(other)
+        return NodeSet(self.max_node, self.bits & other.bits)
+
+    def __sub__(self, other: NodeSet) -> NodeSet:
+        self._check(other)
+        return NodeSet(self.max_node, self.bits & ~other.bits)
+
+    def __xor__(self, other: NodeSet) -> NodeSet:
+        self._check(other)
+        return NodeSet(self.max_node, self.bits ^ other.bits)
+
+    union = __or__
+    intersection = __and__
+    difference = __sub__
+    symmetric_difference = __xor__
+
+    def __contains__(self, node: object) -> bool:
+        if not isinstance(node, (int, np.integer)) or not 0 <= node <= self.max_node:
+            return False
+        return bool((self.bits[node >> 3] >> (node & 7)) & 1)
+
+    def __len__(self) -> int:
+        return int(_POPCOUNT[self.bits].sum())
+
+    def __bool__(self) -> bool:
+        return bool(self.bits.any())
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.to_array().tolist())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, NodeSet):
+            return self.max_node == other.max_node and np.array_equal(
+                self.bits, other.bits
+            )
+        if isinstance(other, (set, frozenset)):
+            return self.to_set() == other
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"NodeSet(max_node={self.max_node}, len={len(self)})"
+
+
+def as_node_array(nodes: Iterable[int] | NDArray[np.integer]) -> NDArray[np.int64]:
+    """Convert ranges, sets, lists and arrays of nodes to an int64 array."""
+    if isinstance(nodes, np.ndarray):
+        return nodes.astype(np.int64, copy=False)
+    if isinstance(nodes, range):
+        return np.arange(nodes.start, nodes.stop, nodes.step, dtype=np.int64)
+    if isinstance(nodes, (set, frozenset)):
+        return np.fromiter(nodes, dtype=np.int64, count=len(nodes))
+    return np.asarray(list(nodes), dtype=np.int64)
@@ -0,0 +1,318 @@
+"""
+Single-file packed container for compiled corpora.
+
+A compiled corpus is a directory of many small .npy and .json files.
+Opening each one costs syscalls, JSON parsing and an mmap of its own,
+which dominates startup on network and overlay filesystems. A pack holds
+the same files in one container:
+
+    header   magic, format version, offset and length of the index
+    arrays   the raw bytes of every array, each aligned to PACK_ALIGN
+    index    JSON: array directory (offset, dtype, shape per array)
+             and the contents of all JSON files
+
+The whole file is memory-mapped once and every array is a view into
+that mapping.
+
+A pack stands in for the directory it was made from. The storage
+classes take the paths under that directory as usual, plus the pack to
+read them from: `load_npy()` and `npy_exists()` serve such paths from
+the pack when one is given, and from disk otherwise. Every reader
+(usually an `MmapManager`) holds its own `CfmPack`, so closing one
+reader never affects another reader of the same file.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+PACK_SUFFIX = '.cfmpack'
+"""File suffix of packed corpora; `.cfm/1` is packed into `.cfm/1.cfmpack`."""
+
+PACK_MAGIC = b'CFMPACK\x00'
+PACK_FORMAT = 1
+PACK_ALIGN = 64
+
+_HEADER = struct.Struct('<8sIIQQ')
+"""magic, format version, reserved, index offset, index length."""
+
+
+class CfmPack:
+    """
+    Read access to a packed corpus.
+
+    Attributes
+    ----------
+    path : Path
+        Location of the pack file
+    root : Path
+        Directory the pack stands in for (the path without its suffix)
+    arrays : dict
+        Relative path (without .npy) -> (offset, dtype, shape)
+    json : dict
+        Relative path (without .json) -> parsed contents
+    """
+
+    def __init__(self, path: Path | str) -> None:
+        """
+        Open a pack and read its index.
+
+        Parameters
+        ----------
+        path : Path or str
+            Location of the pack file
+
+        Raises
+        ------
+        ValueError
+            If the file is not a pack or has an unsupported format version
+        """
+        self.path = Path(path)
+        self.root = self.path.with_suffix('')
+        self._prefix = str(self.root) + os.sep
+        with open(self.path, 'rb') as f:
+            magic, fmt, _, index_offset, index_length = _HEADER.unpack(
+                f.read(_HEADER.size)
+            )
+            if magic != PACK_MAGIC:
+                raise ValueError(f"{self.path} is not a .cfm pack")
+            if fmt != PACK_FORMAT:
+                raise ValueError(f"{self.path}: unsupported pack format {fmt}")
+            f.seek(index_offset)
+            index = json.loads(f.read(index_length).decode('utf-8'))
+
+        self.arrays: dict[str, tuple[int, np.dtype[Any], tuple[int, ...]]] = {
+            name: (entry['offset'], np.dtype(entry['dtype']), tuple(entry['shape']))
+            for name, entry in index['arrays'].items()
+        }
+        self.json: dict[str, Any] = index['json']
+        self._mmap: np.memmap[Any, np.dtype[np.uint8]] | None = None
+
+    def _buffer(self) -> np.memmap[Any, np.dtype[np.uint8]]:
+        """The single mapping of the whole file, created on first use."""
+        if self._mmap is None:
+            self._mmap = np.memmap(self.path, dtype=np.uint8, mode='r')
+        return self._mmap
+
+    def array(self, name: str) -> NDArray[Any]:
+        """
+        Get an array as a read-only view into the pack.
+
+        Parameters
+        ----------
+        name : str
+            Path of the array relative to the root, without .npy
+
+        Returns
+        -------
+        np.ndarray
+
+        Raises
+        ------
+        FileNotFoundError
+            If the pack has no such array
+        """
+        try:
+            offset, dtype, shape = self.arrays[name]
+        except KeyError:
+            raise FileNotFoundError(f"{name}.npy not in {self.path}") from None
+        count = int(np.prod(shape, dtype=np.int64))
+        buf = self._buffer()[offset:offset + count * dtype.itemsize]
+        return buf.view(dtype).reshape(shape)
+
+    def get_json(self, name: str) -> Any:
+        """
+        Get the contents of a packed JSON file.
+
+        Parameters
+        ----------
+        name : str
+            Path of the file relative to the root, without .json
+
+        Raises
+        ------
+        FileNotFoundError
+            If the pack has no such file
+        """
+        try:
+            return self.json[name]
+        except KeyError:
+            raise FileNotFoundError(f"{name}.json not in {self.path}") from None
+
+    def name(self, path: str | Path, suffix: str) -> str | None:
+        """
+        Name inside the pack of a file under `root`.
+
+        Parameters
+        ----------
+        path : str or Path
+            Location of the file as if the pack were unpacked at `root`
+        suffix : str
+            File suffix that is not part of the name
+
+        Returns
+        -------
+        str or None
+            None if the path is not under `root`
+        """
+        full = str(path)
+        if not full.startswith(self._prefix):
+            return None
+        name = full[len(self._prefix):]
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+        return name.replace(os.sep, '/')
+
+    def files(self) -> list[str]:
+        """Paths relative to the root of all files in the pack."""
+        return sorted(
+            [f'{name}.npy' for name in self.arrays]
+            + [f'{name}.json' for name in self.json]
+        )
+
+    def extract(self, rel_path: str, target: Path | str) -> None:
+        """
+        Write a file of the pack to disk.
+
+        Parameters
+        ----------
+        rel_path : str
+            Path of the file relative to the root, with its suffix
+        target : Path or str
+            Location to write the file to
+
+        Raises
+        ------
+        FileNotFoundError
+            If the pack has no such file
+        """
+        name, suffix = os.path.splitext(rel_path)
+        if suffix == '.json':
+            with open(target, 'w') as f:
+                json.dump(self.get_json(name), f, ensure_ascii=False)
+        else:
+            np.save(target, self.array(name))
+
+    def close(self) -> None:
+        """Drop the mapping; views handed out earlier keep it alive."""
+        self._mmap = None
+
+
+def load_npy(
+    path: str | Path, mmap_mode: str | None = 'r', pack: CfmPack | None = None
+) -> NDArray[Any]:
+    """
+    `np.load` for .npy files that may live in a pack.
+
+    Parameters
+    ----------
+    path : str or Path
+        Location of the .npy file
+    mmap_mode : str, optional
+        Memory-map mode for files on disk (packed arrays are always
+        read-only views)
+    pack : CfmPack, optional
+        Pack to read paths under its root from
+
+    Returns
+    -------
+    np.ndarray
+    """
+    name = pack.name(path, '.npy') if pack is not None else None
+    if pack is not None and name is not None:
+        arr = pack.array(name)
+        return arr if mmap_mode is not None else np.array(arr)
+    return np.load(path, mmap_mode=mmap_mode)
+
+
+def npy_exists(path: str | Path, pack: CfmPack | None = None) -> bool:
+    """
+    `Path.exists` for .npy files that may live in a pack.
+
+    Parameters
+    ----------
+    path : str or Path
+        Location of the .npy file
+    pack : CfmPack, optional
+        Pack to read paths under its root from
+
+    Returns
+    -------
+    bool
+    """
+    name = pack.name(path, '.npy') if pack is not None else None
+    if pack is not None and name is not None:
+        return name in pack.arrays
+    return Path(path).exists()
+
+
+def write_pack(cfm_dir: Path | str, output: Path | str | None = None) -> Path:
+    """
+    Pack a compiled corpus directory into a single file.
+
+    Parameters
+    ----------
+    cfm_dir : Path or str
+        The .cfm/{version}/ directory
+    output : Path or str, optional
+        Pack location. Defaults to the directory path plus PACK_SUFFIX.
+
+    Returns
+    -------
+    Path
+        Location of the pack
+
+    Raises
+    ------
+    ValueError
+        If the directory contains object arrays, which cannot be mapped
+    """
+    cfm_dir = Path(cfm_dir)
+    output = Path(output) if output is not None else cfm_dir.with_suffix(PACK_SUFFIX)
+    tmp = output.with_name(output.name + '.tmp')
+
+    arrays: dict[str, Any] = {}
+    json_files: dict[str, Any] = {}
+    files = sorted(p for p in cfm_dir.rglob('*') if p.is_file())
+
+    with open(tmp, 'wb') as f:
+        f.write(b'\x00' * _HEADER.size)
+        for file in files:
+            name = file.relative_to(cfm_dir).as_posix()
+            if file.suffix == '.json':
+                with open(file) as jf:
+                    json_files[name[:-len('.json')]] = json.load(jf)
+            elif file.suffix == '.npy':
+                arr = np.load(file, mmap_mode='r')
+                if arr.dtype.hasobject:
+                    raise ValueError(
+                        f"{file} holds Python objects; recompile the corpus "
+                        "before packing it"
+                    )
+                f.write(b'\x00' * (-f.tell() % PACK_ALIGN))
+                arrays[name[:-len('.npy')]] = {
+                    'offset': f.tell(),
+                    'dtype': arr.dtype.str,
+                    'shape': list(arr.shape),
+                }
+                np.ascontiguousarray(arr).tofile(f)
+
+        index = json.dumps(
+            {'arrays': arrays, 'json': json_files}, ensure_ascii=False
+        ).encode('utf-8')
+        index_offset = f.tell()
+        f.write(index)
+        f.seek(0)
+        f.write(_HEADER.pack(PACK_MAGIC, PACK_FORMAT, 0, index_offset, len(index)))
+
+    os.replace(tmp, output)
+    return output
@@ -0,0 +1,181 @@
+"""
+Inverted postings index for node features.
+
+A postings index maps each value of a feature to the nodes that carry it,
+with the nodes of every value stored in canonical (rank) order. It is a
+CSR structure keyed by value id: for string features the id is the index
+into the feature's string table, for integer features it is the value
+itself.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from cfabric.storage.csr import CSRArray, index_dtype, node_dtype
+from cfabric.storage.pack import CfmPack, load_npy
+
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+
+class PostingsIndex:
+    """
+    Value id -> nodes mapping, nodes in canonical order.
+
+    Attributes
+    ----------
+    keys : np.ndarray
+        Sorted value ids that occur in the feature
+    csr : CSRArray
+        Row k holds the nodes (1-indexed) whose value id is keys[k]
+    """
+
+    def __init__(self, keys: NDArray[Any], csr: CSRArray) -> None:
+        """
+        Initialize a PostingsIndex.
+
+        Parameters
+        ----------
+        keys : np.ndarray
+            Sorted value ids
+        csr : CSRArray
+            Nodes per value id, one row per key
+        """
+        self.keys = keys
+        self.csr = csr
+
+    @classmethod
+    def build(
+        cls,
+        codes: NDArray[Any],
+        missing: int,
+        rank: NDArray[Any] | list[int],
+    ) -> PostingsIndex:
+        """
+        Build the index from the per-node value ids of a feature.
+
+        Parameters
+        ----------
+        codes : np.ndarray
+            Value id per node (index 0 is node 1)
+        missing : int
+            Value id that marks nodes without a value
+        rank : array-like
+            Canonical rank per node (index 0 is node 1)
+
+        Returns
+        -------
+        PostingsIndex
+            New PostingsIndex instance
+        """
+        codes = np.asarray(codes)
+        rank_arr = np.asarray(rank)[: len(codes)]
+        nodes = np.flatnonzero(codes != missing)
+        node_codes = codes[nodes]
+        # Group by value id, canonical order within each group
+        order = np.lexsort((rank_arr[nodes], node_codes))
+        nodes = nodes[order]
+        node_codes = node_codes[order]
+
+        keys, starts = np.unique(node_codes, return_index=True)
+        indptr = np.empty(len(keys) + 1, dtype=index_dtype(len(nodes)))
+        indptr[:-1] = starts
+        indptr[-1] = len(nodes)
+        data = (nodes + 1).astype(node_dtype(len(codes)))
+        return cls(keys, CSRArray(indptr, data))
+
+    def __len__(self) -> int:
+        """Number of distinct values."""
+        return len(self.keys)
+
+    def _rows(self, codes: NDArray[Any]) -> NDArray[np.int64]:
+        """Rows of the given value ids; ids that do not occur are dropped."""
+        codes = np.asarray(codes)
+        if len(codes) == 0 or len(self.keys) == 0:
+            return np.array([], dtype=np.int64)
+        pos = np.searchsorted(self.keys, codes)
+        in_range = pos < len(self.keys)
+        pos = pos[in_range]
+        hit = pos[self.keys[pos] == codes[in_range]]
+        return np.unique(hit).astype(np.int64)
+
+    def lookup(self, codes: NDArray[Any]) -> NDArray[np.int64]:
+        """
+        Get the nodes having any of the given value ids.
+
+        Parameters
+        ----------
+        codes : np.ndarray
+            Value ids to look up
+
+        Returns
+        -------
+        NDArray[np.int64]
+            Nodes (1-indexed). For a single value id they are in
+            canonical order; for several ids the per-value runs are
+            concatenated in key order.
+        """
+        rows = self._rows(codes)
+        if len(rows) == 1:
+            start, end = self.csr.indptr[rows[0]], self.csr.indptr[rows[0] + 1]
+            return self.csr.data[start:end].astype(np.int64)
+        data, _, _ = self.csr.gather(rows)
+        return data.astype(np.int64)
+
+    def items(self) -> Iterator[tuple[Any, NDArray[Any]]]:
+        """
+        Iterate over (value id, nodes) pairs.
+
+        Yields
+        ------
+        tuple
+            Value id and the slice of nodes (canonical order) that have it
+        """
+        indptr = self.csr.indptr
+        data = self.csr.data
+        for k, key in enumerate(self.keys.tolist()):
+            yield (key, data[indptr[k]:indptr[k + 1]])
+
+    def save(self, path_prefix: str) -> None:
+        """
+        Save to {path_prefix}_keys.npy, {path_prefix}_indptr.npy and
+        {path_prefix}_data.npy.
+
+        Parameters
+        ----------
+        path_prefix : str
+            Path prefix for output files
+        """
+        np.save(f"{path_prefix}_keys.npy", self.keys)
+        self.csr.save(path_prefix)
+
+    @classmethod
+    def load(
+        cls,
+        path_prefix: str,
+        mmap_mode: str | None = 'r',
+        pack: CfmPack | None = None,
+    ) -> PostingsIndex:
+        """
+        Load from files.
+
+        Parameters
+        ----------
+        path_prefix : str
+            Path prefix for input files
+        mmap_mode : str, optional
+            Memory-map mode (default: 'r')
+        pack : CfmPack, optional
+            Pack to read the files from (see `cfabric.storage.pack`)
+
+        Returns
+        -------
+        PostingsIndex
+            Loaded PostingsIndex instance
+        """
+        keys = load_npy(f"{path_prefix}_keys.npy", mmap_mode, pack)
+        return cls(keys, CSRArray.load(path_prefix, mmap_mode, pack))
@@ -0,0 +1,469 @@
+"""
+Memory-mapped section and structure indexes.
+
+The T-API looks up sections and structural elements through the mappings
+computed by `cfabric.precompute.prepare.sections` and
+`cfabric.precompute.prepare.structure`. A compiled corpus stores them as
+sorted arrays, with the headings in StringTables, so that loading maps the
+files instead of parsing them into dicts. The mappings returned here
+bisect the sorted columns and decode only the rows a lookup hits.
+
+Headings are feature values: strings, integers or missing. They are
+stored JSON encoded, which keeps their type and gives a byte string that
+sorts and compares without decoding.
+"""
+
+from __future__ import annotations
+
+import json
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from cfabric.storage.csr import node_dtype
+from cfabric.storage.pack import CfmPack, load_npy, npy_exists
+from cfabric.storage.string_pool import StringTable
+
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+LANGUAGE_FIELDS = ('code', 'language', 'languageEnglish', 'type')
+"""Strings stored per language of section names, in this order."""
+
+
+def heading_key(value: Any) -> bytes:
+    """Encoded form of a heading (or a tuple of headings) as stored."""
+    return json.dumps(value, ensure_ascii=False, default=int).encode('utf-8')
+
+
+def _heading(encoded: bytes) -> Any:
+    return json.loads(encoded)
+
+
+def _section_key(encoded: bytes) -> tuple[tuple[str, Any], ...]:
+    return tuple((t, h) for (t, h) in json.loads(encoded))
+
+
+def _node(key: Any) -> int:
+    if not isinstance(key, (int, np.integer)) or isinstance(key, bool):
+        raise TypeError(key)
+    return int(key)
+
+
+class _Column(Sequence[Any]):
+    """Sequence of computed entries, for use with bisect."""
+
+    def __init__(self, entry: Callable[[int], Any], size: int) -> None:
+        self._entry = entry
+        self._size = size
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, k):
+        return self._entry(k)
+
+
+def _sorted_column(
+    table: StringTable, sorter: NDArray[np.unsignedinteger]
+) -> _Column:
+    """The encoded strings of a table in sorter order."""
+    return _Column(lambda k: table.encoded(int(sorter[k])), len(sorter))
+
+
+class RowMapping(Mapping[Any, Any]):
+    """
+    Read-only mapping over a sorted key column.
+
+    Rows with equal keys form one item; its value is computed from the row
+    range of the key when it is looked up, so nothing is decoded up front.
+
+    Parameters
+    ----------
+    keys : Sequence or np.ndarray
+        Sorted key column: a node array, or a `_Column` of encoded keys
+    value : callable
+        Maps the row range `(start, end)` of a key to its value
+    encode : callable, optional
+        Turns a key into its form in the column (default: nodes)
+    decode : callable, optional
+        Turns an entry of the column back into a key (default: nodes)
+    lo, hi : int, optional
+        Rows of the column that belong to the mapping (default: all)
+    """
+
+    def __init__(
+        self,
+        keys: Sequence[Any] | NDArray[Any],
+        value: Callable[[int, int], Any],
+        encode: Callable[[Any], Any] = _node,
+        decode: Callable[[Any], Any] = int,
+        lo: int = 0,
+        hi: int | None = None,
+    ) -> None:
+        self._keys = keys
+        self._value = value
+        self._encode = encode
+        self._decode = decode
+        self._lo = lo
+        self._hi = len(keys) if hi is None else hi
+        self._len: int | None = None
+
+    def _range(self, key: Any) -> tuple[int, int] | None:
+        """Row range of a key, None if the key is absent."""
+        try:
+            target = self._encode(key)
+        except (TypeError, ValueError):
+            return None
+        keys = self._keys
+        start = bisect_left(keys, target, self._lo, self._hi)
+        if start == self._hi or keys[start] != target:
+            return None
+        return (start, bisect_right(keys, target, start + 1, self._hi))
+
+    def _starts(self) -> Iterator[int]:
+        """First row of every key."""
+        keys = self._keys
+        i = self._lo
+        while i < self._hi:
+            yield i
+            i = bisect_right(keys, keys[i], i + 1, self._hi)
+
+    def __getitem__(self, key: Any) -> Any:
+        span = self._range(key)
+        if span is None:
+            raise KeyError(key)
+        return self._value(*span)
+
+    def __contains__(self, key: object) -> bool:
+        return self._range(key) is not None
+
+    def __iter__(self) -> Iterator[Any]:
+        for i in self._starts():
+            yield self._decode(self._keys[i])
+
+    def __len__(self) -> int:
+        if self._len is None:
+            self._len = sum(1 for _ in self._starts())
+        return self._len
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({len(self)} keys)"
+
+
+def _save_table(path: str, strings: Iterable[str]) -> None:
+    StringTable.from_strings(strings).save(path)
+
+
+def _node_array(values: Any) -> NDArray[np.unsignedinteger]:
+    """Nodes (or rows of nodes) in the narrowest node dtype that holds them."""
+    arr = np.asarray(values, dtype=np.uint64)
+    return arr.astype(node_dtype(int(arr.max()) if arr.size else 0))
+
+
+def _heading_sorter(encoded: Sequence[bytes]) -> NDArray[np.unsignedinteger]:
+    """Permutation that sorts encoded headings, keeping equal ones in order."""
+    return _node_array(sorted(range(len(encoded)), key=encoded.__getitem__))
+
+
+def _rows(rows: list[list[int]], width: int) -> NDArray[np.unsignedinteger]:
+    return _node_array(rows).reshape(len(rows), width)
+
+
+def save_sections(
+    data: dict[str, Any],
+    path_prefix: str,
+    names: dict[str, dict[str, Any]] | None = None,
+) -> None:
+    """
+    Save section indexes to {path_prefix}_*.npy.
+
+    Parameters
+    ----------
+    data : dict
+        The result of `cfabric.precompute.prepare.sections`
+    path_prefix : str
+        Path prefix for output files
+    names : dict, optional
+        Names of the top level sections per language code, each entry with
+        `language`, `languageEnglish`, the node `type` and the `names` as
+        pairs `(node, name)`
+    """
+    sec1 = sorted(
+        (n0, heading_key(h1), n1)
+        for (n0, heads) in data['sec1'].items()
+        for (h1, n1) in heads.items()
+    )
+    np.save(f'{path_prefix}_sec1.npy', _rows([[n0, n1] for (n0, _, n1) in sec1], 2))
+    _save_table(f'{path_prefix}_sec1_heads', (h.decode('utf-8') for (_, h, _) in sec1))
+
+    sec2 = sorted(
+        (n0, heading_key(h1), heading_key(h2), n2)
+        for (n0, heads1) in data['sec2'].items()
+        for (h1, heads2) in heads1.items()
+        for (h2, n2) in heads2.items()
+    )
+    np.save(
+        f'{path_prefix}_sec2.npy', _rows([[n0, n2] for (n0, _, _, n2) in sec2], 2)
+    )
+    for level in (1, 2):
+        _save_table(
+            f'{path_prefix}_sec2_heads{level}',
+            (row[level].decode('utf-8') for row in sec2),
+        )
+
+    # Rows [n, *sequenceNumbers] padded with 0, sorted by sequence numbers
+    seq = sorted(
+        ([n, *s, *(0,) * (3 - len(s))] for (n, s) in data['seqFromNode'].items()),
+        key=lambda row: row[1:],
+    )
+    seq_arr = _rows(seq, 4)
+    np.save(f'{path_prefix}_seq.npy', seq_arr)
+    np.save(
+        f'{path_prefix}_seq_sorter.npy',
+        _node_array(np.argsort(seq_arr[:, 0], kind='stable')),
+    )
+
+    languages: list[str] = []
+    for i, (code, entry) in enumerate((names or {}).items()):
+        languages.extend(
+            code if field == 'code' else entry[field] for field in LANGUAGE_FIELDS
+        )
+        pairs = sorted(entry['names'], key=lambda pair: pair[0])
+        np.save(
+            f'{path_prefix}_names{i}.npy',
+            _node_array([n for (n, _) in pairs]),
+        )
+        encoded = [heading_key(name) for (_, name) in pairs]
+        _save_table(f'{path_prefix}_names{i}', (e.decode('utf-8') for e in encoded))
+        np.save(f'{path_prefix}_names{i}_sorter.npy', _heading_sorter(encoded))
+    if names is not None:
+        _save_table(f'{path_prefix}_languages', languages)
+
+
+def sections_exist(path_prefix: str, pack: CfmPack | None = None) -> bool:
+    """Whether section indexes have been saved at path_prefix."""
+    return npy_exists(f'{path_prefix}_sec1.npy', pack)
+
+
+def load_sections(path_prefix: str, pack: CfmPack | None = None) -> dict[str, Any]:
+    """
+    Load section indexes as memory-mapped mappings.
+
+    Parameters
+    ----------
+    path_prefix : str
+        Path prefix of the files written by `save_sections`
+    pack : CfmPack, optional
+        Pack to read the files from (see `cfabric.storage.pack`)
+
+    Returns
+    -------
+    dict
+        Same structure as `cfabric.precompute.prepare.sections`, with
+        `RowMapping`s instead of dicts. If names have been saved, `names`
+        maps language codes to their `language`, `languageEnglish`,
+        `names` (node to name) and `nodes` ((type, name) to node).
+
+    Raises
+    ------
+    FileNotFoundError
+        If there are no section indexes at path_prefix
+    """
+    if not sections_exist(path_prefix, pack):
+        raise FileNotFoundError(f'{path_prefix}_sec1.npy')
+
+    def array(name: str) -> NDArray[Any]:
+        return load_npy(f'{path_prefix}_{name}.npy', 'r', pack)
+
+    def table(name: str) -> StringTable:
+        return StringTable.load(f'{path_prefix}_{name}', 'r', pack)
+
+    sec1 = array('sec1')
+    sec1_heads = table('sec1_heads')
+    sec1_keys = _Column(sec1_heads.encoded, len(sec1_heads))
+
+    def chapters(start: int, end: int) -> RowMapping:
+        return RowMapping(
+            sec1_keys,
+            lambda s, e: int(sec1[s, 1]),
+            heading_key,
+            _heading,
+            start,
+            end,
+        )
+
+    sec2 = array('sec2')
+    sec2_heads = [table(f'sec2_heads{level}') for level in (1, 2)]
+    sec2_keys = [_Column(t.encoded, len(t)) for t in sec2_heads]
+
+    def verses(start: int, end: int) -> RowMapping:
+        return RowMapping(
+            sec2_keys[1],
+            lambda s, e: int(sec2[s, 1]),
+            heading_key,
+            _heading,
+            start,
+            end,
+        )
+
+    def chaptersWithVerses(start: int, end: int) -> RowMapping:
+        return RowMapping(sec2_keys[0], verses, heading_key, _heading, start, end)
+
+    seq = array('seq')
+    seq_sorter = array('seq_sorter')
+
+    def sequence(i: int) -> tuple[int, ...]:
+        return tuple(int(c) for c in seq[i, 1:] if c)
+
+    data: dict[str, Any] = dict(
+        sec1=RowMapping(sec1[:, 0], chapters),
+        sec2=RowMapping(sec2[:, 0], chaptersWithVerses),
+        seqFromNode=RowMapping(
+            _Column(lambda k: int(seq[seq_sorter[k], 0]), len(seq_sorter)),
+            lambda s, e: sequence(int(seq_sorter[s])),
+        ),
+        nodeFromSeq=RowMapping(
+            _Column(sequence, len(seq)),
+            lambda s, e: int(seq[e - 1, 0]),
+            tuple,
+            tuple,
+        ),
+    )
+
+    if npy_exists(f'{path_prefix}_languages_offsets.npy', pack):
+        fields = list(table('languages'))
+        width = len(LANGUAGE_FIELDS)
+        data['names'] = {}
+        for i in range(len(fields) // width):
+            info = dict(zip(LANGUAGE_FIELDS, fields[i * width:(i + 1) * width]))
+            data['names'][info['code']] = _names(
+                array(f'names{i}'), table(f'names{i}'), array(f'names{i}_sorter'), info
+            )
+    return data
+
+
+def _names(
+    nodes: NDArray[np.unsignedinteger],
+    names: StringTable,
+    sorter: NDArray[np.unsignedinteger],
+    info: dict[str, str],
+) -> dict[str, Any]:
+    """The mappings between the top level sections and their names."""
+    node_type = info['type']
+
+    def encode(key: Any) -> bytes:
+        (t, name) = key
+        if t != node_type:
+            raise ValueError(key)
+        return heading_key(name)
+
+    return dict(
+        language=info['language'],
+        languageEnglish=info['languageEnglish'],
+        names=RowMapping(nodes, lambda s, e: _heading(names.encoded(s))),
+        nodes=RowMapping(
+            _sorted_column(names, sorter),
+            lambda s, e: int(nodes[sorter[e - 1]]),
+            encode,
+            lambda encoded: (node_type, _heading(encoded)),
+        ),
+    )
+
+
+def save_structure(data: tuple[Any, ...], path_prefix: str) -> None:
+    """
+    Save structure indexes to {path_prefix}_*.npy.
+
+    Parameters
+    ----------
+    data : tuple
+        The result of `cfabric.precompute.prepare.structure`
+    path_prefix : str
+        Path prefix for output files
+    """
+    (headingFromNode, nodeFromHeading, multiple, top, up, down) = data
+
+    nodes = sorted(headingFromNode)
+    encoded = [heading_key(headingFromNode[n]) for n in nodes]
+    np.save(f'{path_prefix}_nodes.npy', _node_array(nodes))
+    _save_table(f'{path_prefix}_heads', (e.decode('utf-8') for e in encoded))
+    np.save(f'{path_prefix}_sorter.npy', _heading_sorter(encoded))
+
+    np.save(
+        f'{path_prefix}_multiple.npy',
+        _node_array(
+            [m for key in sorted(multiple, key=heading_key) for m in multiple[key]]
+        ),
+    )
+    np.save(f'{path_prefix}_top.npy', _node_array(top))
+    np.save(f'{path_prefix}_up.npy', _rows(sorted(map(list, up.items())), 2))
+    np.save(
+        f'{path_prefix}_down.npy',
+        _rows([[n, m] for n in sorted(down) for m in down[n]], 2),
+    )
+
+
+def structure_exists(path_prefix: str, pack: CfmPack | None = None) -> bool:
+    """Whether structure indexes have been saved at path_prefix."""
+    return npy_exists(f'{path_prefix}_nodes.npy', pack)
+
+
+def load_structure(path_prefix: str, pack: CfmPack | None = None) -> tuple[Any, ...]:
+    """
+    Load structure indexes as memory-mapped mappings.
+
+    Parameters
+    ----------
+    path_prefix : str
+        Path prefix of the files written by `save_structure`
+    pack : CfmPack, optional
+        Pack to read the files from (see `cfabric.storage.pack`)
+
+    Returns
+    -------
+    tuple
+        Same structure as `cfabric.precompute.prepare.structure`, with
+        `RowMapping`s instead of dicts
+
+    Raises
+    ------
+    FileNotFoundError
+        If there are no structure indexes at path_prefix
+    """
+    if not structure_exists(path_prefix, pack):
+        raise FileNotFoundError(f'{path_prefix}_nodes.npy')
+
+    def array(name: str) -> NDArray[Any]:
+        return load_npy(f'{path_prefix}_{name}.npy', 'r', pack)
+
+    nodes = array('nodes')
+    heads = StringTable.load(f'{path_prefix}_heads', 'r', pack)
+    sorter = array('sorter')
+    multiple = array('multiple')
+    up = array('up')
+    down = array('down')
+
+    def heading_of(n: int) -> bytes:
+        return heads.encoded(int(np.searchsorted(nodes, n)))
+
+    return (
+        RowMapping(nodes, lambda s, e: _section_key(heads.encoded(s))),
+        RowMapping(
+            _sorted_column(heads, sorter),
+            lambda s, e: int(nodes[sorter[e - 1]]),
+            heading_key,
+            _section_key,
+        ),
+        RowMapping(
+            _Column(lambda k: heading_of(multiple[k]), len(multiple)),
+            lambda s, e: tuple(multiple[s:e].tolist()),
+            heading_key,
+            _section_key,
+        ),
+        tuple(array('top').tolist()),
+        RowMapping(up[:, 0], lambda s, e: int(up[s, 1])),
+        RowMapping(down[:, 0], lambda s, e: tuple(down[s:e, 1].tolist())),
+    )
@@ -0,0 +1,254 @@
+"""
+Shared-memory cache for preloaded arrays.
+
+Preloading the embedding structures (levUp, levDown) into RAM speeds up
+embedding queries, but every worker process of a server pays for its own
+copy of the same bytes. With a shared cache the first process that
+preloads an array writes it into a named `multiprocessing.shared_memory`
+segment; every other process on the machine attaches to that segment
+zero-copy.
+
+Segment names are derived from the corpus location, the .cfm version and
+the modification time of its meta.json, so recompiling a corpus yields
+new segments. Segments outlive the processes that use them (that is what
+lets a restarted worker attach again); call `unlink_shared()` to remove
+them explicitly.
+
+The creator records its pid and the time it started filling in the
+segment header. A segment whose creator died before marking it ready, or
+that is not ready within `SHARED_WAIT_TIMEOUT` of that start, is stale:
+the next process to find it removes it and creates it afresh.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+import sys
+import time
+from collections.abc import Callable
+from multiprocessing import shared_memory
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+SHARED_PREFIX = 'cf_'
+"""Prefix of all shared-memory segment names created by Context-Fabric."""
+
+SHARED_WAIT_TIMEOUT = 30.0
+"""Seconds to wait for another process to finish filling a segment."""
+
+_HEADER_SIZE = 64
+_READY = b'CFSHM001'
+_ALIGN = 64
+
+_CREATOR = struct.Struct('<Qd')
+"""Creator pid and fill start time (`time.time()`), after the ready mark."""
+
+
+def segment_name(*key_parts: Any) -> str:
+    """
+    Short, platform-safe segment name for a cache key.
+
+    Parameters
+    ----------
+    key_parts : Any
+        Components of the key, e.g. corpus path, .cfm version and array name
+
+    Returns
+    -------
+    str
+        Segment name (at most 30 characters)
+    """
+    key = '\x00'.join(str(p) for p in key_parts)
+    return SHARED_PREFIX + hashlib.sha1(key.encode('utf-8')).hexdigest()[:24]
+
+
+def _layout(
+    specs: dict[str, tuple[np.dtype[Any], int]]
+) -> tuple[dict[str, int], int]:
+    """Byte offset of every array in the segment, and the segment size."""
+    offsets: dict[str, int] = {}
+    pos = _HEADER_SIZE
+    for name, (dtype, length) in specs.items():
+        offsets[name] = pos
+        pos += -(-(dtype.itemsize * length) // _ALIGN) * _ALIGN
+    return offsets, max(pos, _HEADER_SIZE)
+
+
+def _open(name: str, create: bool, size: int = 0) -> shared_memory.SharedMemory:
+    """Open a segment without registering it with the resource tracker.
+
+    The resource tracker unlinks tracked segments when the process that
+    opened them exits, which would pull the cache away from the other
+    workers.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(
+            name=name, create=create, size=size, track=False
+        )
+    shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+    try:
+        from multiprocessing import resource_tracker
+
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    except Exception:
+        pass
+    return shm
+
+
+def _alive(pid: int) -> bool:
+    """Whether a process with this pid exists."""
+    if sys.platform == 'win32':
+        # Segments vanish with their last handle there, so none go stale
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def _wait_ready(shm: shared_memory.SharedMemory, timeout: float) -> bool:
+    """Wait until another process has filled a segment.
+
+    Returns
+    -------
+    bool
+        False if the segment is stale: its creator is gone, or it has been
+        filling for longer than `timeout`
+    """
+    deadline = time.monotonic() + timeout
+    while bytes(shm.buf[:len(_READY)]) != _READY:
+        pid, started = _CREATOR.unpack_from(shm.buf, len(_READY))
+        if pid and not _alive(pid):
+            return False
+        if started and time.time() > started + timeout:
+            return False
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def _discard(shm: shared_memory.SharedMemory) -> None:
+    """Close and remove a segment, if no other process removed it already."""
+    shm.close()
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def share_arrays(
+    name: str,
+    specs: dict[str, tuple[Any, int]],
+    fill: Callable[[dict[str, NDArray[Any]]], None],
+    timeout: float = SHARED_WAIT_TIMEOUT,
+) -> tuple[dict[str, NDArray[Any]], shared_memory.SharedMemory] | None:
+    """
+    Create or attach to a shared segment holding a set of 1-d arrays.
+
+    The process that creates the segment calls `fill` to write the
+    arrays and then marks the segment as ready; other processes wait
+    until it is ready and attach without copying. A stale segment (see
+    above) is removed and created again.
+
+    Parameters
+    ----------
+    name : str
+        Segment name, see `segment_name()`
+    specs : dict
+        Array name -> (dtype, length)
+    fill : callable
+        Called with writable views of the arrays when the segment is new
+    timeout : float
+        Seconds to wait for a segment another process is still filling
+
+    Returns
+    -------
+    tuple or None
+        `(arrays, segment)`: read-only views into the segment and the
+        segment itself, which must be kept alive as long as the views are
+        used. None if shared memory is unavailable or the segment is not
+        usable (in which case the caller keeps a private copy).
+    """
+    specs = {k: (np.dtype(dt), int(n)) for k, (dt, n) in specs.items()}
+    offsets, size = _layout(specs)
+
+    # A stale segment is recreated once; if that one turns out stale as
+    # well, the caller keeps a private copy
+    for attempt in range(2):
+        try:
+            shm = _open(name, create=True, size=size)
+            created = True
+        except FileExistsError:
+            try:
+                shm = _open(name, create=False)
+            except (FileNotFoundError, OSError):
+                return None
+            created = False
+        except OSError:
+            return None
+
+        if created or _wait_ready(shm, timeout):
+            break
+        if attempt:
+            shm.close()
+            return None
+        _discard(shm)
+
+    def views() -> dict[str, NDArray[Any]]:
+        return {
+            k: np.ndarray((n,), dtype=dt, buffer=shm.buf, offset=offsets[k])
+            for k, (dt, n) in specs.items()
+        }
+
+    if created:
+        _CREATOR.pack_into(shm.buf, len(_READY), os.getpid(), time.time())
+        try:
+            fill(views())
+        except BaseException:
+            _discard(shm)
+            raise
+        shm.buf[:len(_READY)] = _READY
+    elif shm.size < size:
+        shm.close()
+        return None
+
+    arrays = views()
+    for arr in arrays.values():
+        arr.flags.writeable = False
+    return arrays, shm
+
+
+def unlink_shared(name: str) -> bool:
+    """
+    Remove a shared segment.
+
+    Processes that are attached keep their mapping; new processes will
+    create the segment afresh.
+
+    Parameters
+    ----------
+    name : str
+        Segment name
+
+    Returns
+    -------
+    bool
+        True if the segment existed
+    """
+    try:
+        shm = _open(name, create=False)
+    except FileNotFoundError:
+        return False
+    shm.close()
+    shm.unlink()
+    return True
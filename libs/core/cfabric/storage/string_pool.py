@@ -8,51 +8,590 @@ usage when many nodes share the same string values.
 
 from __future__ import annotations
 
-from collections.abc import Iterator
-from typing import TYPE_CHECKING
+import hashlib
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
 
 import numpy as np
 
+from cfabric.storage.pack import CfmPack, load_npy, npy_exists
+
 if TYPE_CHECKING:
     from numpy.typing import NDArray
 
+    from cfabric.storage.postings import PostingsIndex
+
 # Sentinel for missing string index
 MISSING_STR_INDEX = 0xFFFFFFFF
 NODE_DTYPE = 'uint32'
+OFFSET_DTYPE = 'uint64'
+
+DECODE_CACHE_SIZE = 4096
+"""Number of decoded strings each StringTable keeps per process."""
+
+
+def narrow_int_dtype(low: int, high: int) -> tuple[np.dtype[Any], int]:
+    """
+    Choose the narrowest integer dtype, and a missing sentinel, for values
+    in the range low..high.
+
+    Unsigned dtypes use their maximum as sentinel, signed dtypes their
+    minimum; int32 keeps the traditional -1 where the range allows it.
+    An empty range (low > high) gives uint8.
+
+    Parameters
+    ----------
+    low : int
+        Smallest value that must be stored
+    high : int
+        Largest value that must be stored
+
+    Returns
+    -------
+    tuple
+        (dtype, missing sentinel), the sentinel lying outside low..high
+    """
+    if low > high:
+        return np.dtype('uint8'), int(np.iinfo('uint8').max)
+    for name in ('uint8', 'int8', 'uint16', 'int16', 'int32', 'int64'):
+        info = np.iinfo(name)
+        if info.min == 0:
+            if low >= 0 and high < info.max:
+                return np.dtype(name), int(info.max)
+        elif name == 'int32' and low >= 0 and high <= info.max:
+            return np.dtype(name), -1
+        elif info.min < low and high <= info.max:
+            return np.dtype(name), int(info.min)
+    raise ValueError(f"values {low}..{high} do not fit in 64 bits")
+
+
+def index_dtype(n_strings: int) -> np.dtype[Any]:
+    """
+    Narrowest unsigned dtype for indices into a table of n_strings strings,
+    keeping the dtype maximum free as missing sentinel.
+
+    Parameters
+    ----------
+    n_strings : int
+        Number of distinct strings
+
+    Returns
+    -------
+    np.dtype
+    """
+    for name in ('uint8', 'uint16'):
+        if n_strings < np.iinfo(name).max:
+            return np.dtype(name)
+    return np.dtype(NODE_DTYPE)
+
+
+def _locate(
+    node_arr: NDArray[np.int64],
+    length: int,
+    offset: int,
+    nodes: NDArray[np.uint32] | None,
+) -> tuple[NDArray[np.bool_], NDArray[np.int64]]:
+    """
+    Array positions of nodes in a per-node value array.
+
+    Parameters
+    ----------
+    node_arr : np.ndarray
+        Node numbers (1-indexed)
+    length : int
+        Length of the value array
+    offset : int
+        Number of leading nodes not stored (range layout)
+    nodes : np.ndarray or None
+        Sorted stored nodes (sparse layout)
+
+    Returns
+    -------
+    tuple
+        (found, positions): which nodes are stored, and their positions
+        (positions of nodes that are not stored are meaningless)
+    """
+    if nodes is None:
+        positions = node_arr - 1 - offset
+        found = (positions >= 0) & (positions < length)
+        return found, np.where(found, positions, 0)
+    if len(nodes) == 0:
+        return np.zeros(len(node_arr), dtype=bool), np.zeros(len(node_arr), dtype=np.int64)
+    positions = np.minimum(np.searchsorted(nodes, node_arr), len(nodes) - 1)
+    return nodes[positions] == node_arr, positions
+
+
+def _stored_getter(
+    values: NDArray[Any], offset: int, nodes: NDArray[np.uint32] | None, missing: int
+) -> Callable[[int], int]:
+    """
+    Function from a node to its stored value, `missing` if it is not stored.
+
+    The function is specialised for the layout once, when a feature is set
+    up, so that single node lookups of dense features pay nothing for the
+    range and sparse layouts.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Per-node value array
+    offset : int
+        Number of leading nodes not stored (range layout)
+    nodes : np.ndarray or None
+        Sorted stored nodes (sparse layout)
+    missing : int
+        Value returned for nodes that are not stored
+
+    Returns
+    -------
+    callable
+    """
+    item = values.item
+    length = len(values)
+    if nodes is not None:
+        search = nodes.searchsorted
+        node_item = nodes.item
+        count = len(nodes)
+
+        def stored(node: int) -> int:
+            pos = int(search(node))
+            return item(pos) if pos < count and node_item(pos) == node else missing
+
+    elif offset:
+
+        def stored(node: int) -> int:
+            pos = node - 1 - offset
+            return item(pos) if 0 <= pos < length else missing
+
+    else:
+
+        def stored(node: int) -> int:
+            return item(node - 1) if 0 < node <= length else missing
+
+    return stored
+
+
+def compact_layout(
+    data: NDArray[Any], missing: int
+) -> tuple[NDArray[Any], int, NDArray[np.uint32] | None]:
+    """
+    Choose the smallest layout for a dense per-node value array.
+
+    Most features are defined on nodes of a single type, and nodes of a
+    type are numbered consecutively, so the values of a feature usually
+    fill one stretch of the node range. Such a feature is stored over
+    that stretch only (range layout). If even the stretch is mostly
+    empty, the present nodes are stored next to their values (sparse
+    layout).
+
+    Parameters
+    ----------
+    data : np.ndarray
+        Values of nodes 1..len(data)
+    missing : int
+        Sentinel for nodes without a value
+
+    Returns
+    -------
+    tuple
+        (values, offset, nodes): for the range layout `nodes` is None and
+        values[i] belongs to node offset + i + 1; for the sparse layout
+        values[i] belongs to nodes[i]
+    """
+    data = np.asarray(data)
+    present = np.flatnonzero(data != missing)
+    if len(present) == 0:
+        return data[:0].copy(), 0, None
+    first, last = int(present[0]), int(present[-1])
+    itemsize = data.dtype.itemsize
+    # Node numbers beyond 32 bits take 64
+    node_dtype = np.dtype(
+        NODE_DTYPE if len(data) <= np.iinfo(NODE_DTYPE).max else OFFSET_DTYPE
+    )
+    if 2 * len(present) * (itemsize + node_dtype.itemsize) < (
+        last - first + 1
+    ) * itemsize:
+        return data[present].copy(), 0, (present + 1).astype(node_dtype)
+    return data[first:last + 1].copy(), first, None
+
+
+def _nodes_path(path: str) -> str:
+    """Location of the node array of a sparse feature stored at path."""
+    stem = path[:-len('.npy')] if path.endswith('.npy') else path
+    return f"{stem}_nodes.npy"
+
+
+def value_hash(encoded: bytes) -> int:
+    """Stable 64-bit hash of an encoded string, the key of the hash index."""
+    return int.from_bytes(hashlib.blake2b(encoded, digest_size=8).digest(), 'little')
+
+
+def layout_name(offset: int, nodes: NDArray[np.uint32] | None) -> str:
+    """Name of a storage layout as recorded in feature metadata."""
+    if nodes is not None:
+        return 'sparse'
+    return 'range' if offset else 'dense'
+
+
+class _EncodedView(Sequence[bytes]):
+    """Sequence of encoded strings in sorter order, for use with bisect."""
+
+    def __init__(self, table: StringTable, sorter: NDArray[np.uint32]) -> None:
+        self._table = table
+        self._sorter = sorter
+
+    def __len__(self) -> int:
+        return len(self._sorter)
+
+    def __getitem__(self, k):  # type: ignore[override]
+        return self._table.encoded(int(self._sorter[k]))
+
+
+class StringTable:
+    """
+    Memory-mappable table of strings.
+
+    All strings are stored UTF-8 encoded in one byte blob, with an offsets
+    array marking where each string starts. Both arrays can be memory-mapped,
+    so processes share the pages instead of unpickling private copies.
+    Strings are decoded on access and kept in a small per-process cache.
+
+    Attributes
+    ----------
+    blob : np.ndarray
+        Concatenated UTF-8 bytes of all strings (dtype=uint8)
+    offsets : np.ndarray
+        Start offset of each string in blob, plus the end offset of the
+        last string (dtype=uint64, length len(table) + 1)
+    """
+
+    def __init__(
+        self,
+        blob: NDArray[np.uint8],
+        offsets: NDArray[np.uint64],
+        cache_size: int = DECODE_CACHE_SIZE,
+    ) -> None:
+        """
+        Initialize a StringTable.
+
+        Parameters
+        ----------
+        blob : np.ndarray
+            Concatenated UTF-8 bytes of all strings (dtype=uint8)
+        offsets : np.ndarray
+            String boundaries in blob (dtype=uint64)
+        cache_size : int, optional
+            Maximum number of decoded strings to cache (default: 4096)
+        """
+        self.blob = blob
+        self.offsets = offsets
+        self._view = memoryview(blob)
+        self._offset = offsets.item
+        self._decode = lru_cache(maxsize=cache_size)(self.decode)
+
+    @classmethod
+    def from_strings(cls, strings: Iterable[str]) -> StringTable:
+        """
+        Build a table from Python strings.
+
+        Parameters
+        ----------
+        strings : Iterable[str]
+            Strings in table order
+
+        Returns
+        -------
+        StringTable
+            New StringTable instance
+        """
+        encoded = [s.encode('utf-8') for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=OFFSET_DTYPE)
+        if encoded:
+            np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return cls(blob, offsets)
+
+    def __len__(self) -> int:
+        """Number of strings in the table."""
+        return len(self.offsets) - 1
+
+    def encoded(self, i: int) -> bytes:
+        """
+        Get the raw UTF-8 bytes of string i without decoding.
+
+        Parameters
+        ----------
+        i : int
+            String index
+
+        Returns
+        -------
+        bytes
+            Encoded string
+        """
+        offset = self._offset
+        return self._view[offset(i):offset(i + 1)].tobytes()
+
+    def decode(self, i: int) -> str:
+        """
+        Decode string i, without caching and without checking i.
+
+        Parameters
+        ----------
+        i : int
+            String index, 0 <= i < len(self)
+
+        Returns
+        -------
+        str
+            Decoded string
+        """
+        offset = self._offset
+        return str(self._view[offset(i):offset(i + 1)], 'utf-8')
+
+    def __getitem__(self, key: int | NDArray[np.integer]) -> Any:
+        """
+        Get string(s) by index.
+
+        Parameters
+        ----------
+        key : int | np.ndarray
+            A single index, or an array of indices
+
+        Returns
+        -------
+        str | np.ndarray
+            The decoded string, or an object array of decoded strings
+        """
+        if isinstance(key, (int, np.integer)):
+            i = int(key)
+            if i < 0:
+                i += len(self)
+            if not 0 <= i < len(self):
+                raise IndexError(f"string index {key} out of range")
+            return self._decode(i)
+        return np.array([self[int(i)] for i in np.asarray(key).ravel()], dtype=object)
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over all strings in table order."""
+        for i in range(len(self)):
+            yield self._decode(i)
+
+    def argsort(self) -> NDArray[np.uint32]:
+        """
+        Permutation that sorts the table.
+
+        UTF-8 byte order equals code point order, so the encoded strings
+        are compared directly without decoding.
+
+        Returns
+        -------
+        np.ndarray
+            Sorting permutation (dtype=uint32)
+        """
+        order = sorted(range(len(self)), key=self.encoded)
+        return np.array(order, dtype=NODE_DTYPE)
+
+    def hash_index(self) -> tuple[NDArray[np.uint64], NDArray[np.uint32]]:
+        """
+        Sorted hashes of all strings, with the string index of each.
+
+        Values are resolved against the hashes with `np.searchsorted`, so
+        many values are looked up in one call, without decoding the table.
+
+        Returns
+        -------
+        tuple
+            `(hashes, order)`: the `value_hash` of every string in
+            ascending order (dtype=uint64), and the index in the table of
+            the string each hash belongs to (dtype=uint32)
+        """
+        hashes = np.fromiter(
+            (value_hash(self.encoded(i)) for i in range(len(self))),
+            dtype=np.uint64,
+            count=len(self),
+        )
+        order = np.argsort(hashes, kind='stable').astype(NODE_DTYPE)
+        return hashes[order], order
+
+    def index(self, value: str, sorter: NDArray[np.uint32]) -> int | None:
+        """
+        Find a string by binary search.
+
+        Parameters
+        ----------
+        value : str
+            String to look up
+        sorter : np.ndarray
+            Permutation that sorts the table (see argsort)
+
+        Returns
+        -------
+        int | None
+            Index of value in the table, or None if absent
+        """
+        target = value.encode('utf-8')
+        view = _EncodedView(self, sorter)
+        pos = bisect_left(view, target)
+        if pos < len(view) and view[pos] == target:
+            return int(sorter[pos])
+        return None
+
+    def save(self, path_prefix: str) -> None:
+        """
+        Save to {path_prefix}_blob.npy and {path_prefix}_offsets.npy.
+
+        Parameters
+        ----------
+        path_prefix : str
+            Path prefix for output files
+        """
+        np.save(f"{path_prefix}_blob.npy", self.blob)
+        np.save(f"{path_prefix}_offsets.npy", self.offsets)
+
+    @classmethod
+    def load(
+        cls,
+        path_prefix: str,
+        mmap_mode: str | None = 'r',
+        pack: CfmPack | None = None,
+    ) -> StringTable:
+        """
+        Load from files.
+
+        Parameters
+        ----------
+        path_prefix : str
+            Path prefix for input files
+        mmap_mode : str, optional
+            Memory-map mode (default: 'r')
+        pack : CfmPack, optional
+            Pack to read the files from (see `cfabric.storage.pack`)
+
+        Returns
+        -------
+        StringTable
+            Loaded StringTable instance
+        """
+        blob = load_npy(f"{path_prefix}_blob.npy", mmap_mode, pack)
+        offsets = load_npy(f"{path_prefix}_offsets.npy", mmap_mode, pack)
+        return cls(blob, offsets)
 
 
 class StringPool:
     """
     Efficient string storage with integer indices.
 
-    Uses numpy object arrays which support copy-on-write sharing.
+    The unique strings live in a StringTable, whose byte blob is
+    memory-mapped when loaded from disk and therefore shared between
+    processes.
 
     Attributes
     ----------
-    strings : np.ndarray
-        Array of unique strings (dtype=object)
+    strings : StringTable
+        Table of unique strings
     indices : np.ndarray
-        Per-node index into strings array (dtype=uint32)
-        MISSING_STR_INDEX indicates no value
+        Per-node index into strings array (dtype=uint32, or uint8/uint16
+        when narrowed)
+    missing : int
+        Index that indicates no value: the maximum of the indices dtype
+        (MISSING_STR_INDEX for uint32)
+    sorter : np.ndarray
+        Permutation that sorts the strings array (dtype=uint32), used for
+        O(log n) value-to-index lookups. Built lazily if not supplied.
+    hash_index : tuple
+        Sorted string hashes and their string indices, used to resolve
+        many values in one vectorized lookup. Built lazily if not supplied.
+    postings : PostingsIndex | None
+        Optional string id -> nodes index, attached when the compiled
+        corpus contains one
+    offset : int
+        Number of leading nodes not stored: indices[i] belongs to node
+        offset + i + 1 (range layout, see `compact_layout`)
+    nodes : np.ndarray | None
+        Sorted nodes that indices belong to (sparse layout), else None
     """
 
     def __init__(
         self,
-        strings: NDArray[np.object_],
+        strings: StringTable | Iterable[str],
         indices: NDArray[np.uint32],
+        sorter: NDArray[np.uint32] | None = None,
+        offset: int = 0,
+        nodes: NDArray[np.uint32] | None = None,
+        hash_index: tuple[NDArray[np.uint64], NDArray[np.uint32]] | None = None,
     ) -> None:
         """
         Initialize a StringPool.
 
         Parameters
         ----------
-        strings : np.ndarray
-            Array of unique strings (dtype=object)
+        strings : StringTable | Iterable[str]
+            Table of unique strings; other iterables are converted
         indices : np.ndarray
-            Per-node index into strings array (dtype=uint32)
+            Per-node index into strings array (unsigned integer dtype)
+        sorter : np.ndarray, optional
+            Permutation that sorts the strings array. Computed on first
+            value lookup when omitted.
+        offset : int, optional
+            Number of leading nodes not stored (default: 0)
+        nodes : np.ndarray, optional
+            Sorted nodes that the indices belong to (sparse layout)
+        hash_index : tuple, optional
+            Hash index of the strings (see `StringTable.hash_index`).
+            Computed on first multi-value lookup when omitted.
         """
+        if not isinstance(strings, StringTable):
+            strings = StringTable.from_strings(strings)
         self.strings = strings
         self.indices = indices
+        self.missing = int(np.iinfo(indices.dtype).max)
+        self._sorter = sorter
+        self._hash_index = hash_index
+        self.postings: PostingsIndex | None = None
+        self.offset = offset
+        self.nodes = nodes
+        self._stored = _stored_getter(indices, offset, nodes, self.missing)
+        # Strings decoded by get, at most one entry per string of the pool
+        self._decoded: dict[int, str] = {}
+
+    @property
+    def layout(self) -> str:
+        """Storage layout: 'dense', 'range' or 'sparse'."""
+        return layout_name(self.offset, self.nodes)
+
+    def _locate(
+        self, node_arr: NDArray[np.int64]
+    ) -> tuple[NDArray[np.bool_], NDArray[np.int64]]:
+        """Which nodes are stored, and their positions in indices."""
+        return _locate(node_arr, len(self.indices), self.offset, self.nodes)
+
+    @property
+    def sorter(self) -> NDArray[np.uint32]:
+        """Permutation that sorts the strings table (built once per pool)."""
+        if self._sorter is None:
+            self._sorter = self.strings.argsort()
+        return self._sorter
+
+    @property
+    def hash_index(self) -> tuple[NDArray[np.uint64], NDArray[np.uint32]]:
+        """Hash index of the strings table (built once per pool)."""
+        if self._hash_index is None:
+            self._hash_index = self.strings.hash_index()
+        return self._hash_index
+
+    def decode_all(self) -> None:
+        """
+        Decode all strings of the pool up front.
+
+        `get` decodes a string the first time it is asked for and keeps it.
+        Callers that will look up most nodes of a feature with many
+        distinct values can pay for the decoding at once instead.
+        """
+        decode = self.strings.decode
+        self._decoded = {i: decode(i) for i in range(len(self.strings))}
 
     def get(self, node: int) -> str | None:
         """
@@ -68,14 +607,13 @@ class StringPool:
         str | None
             String value or None if missing
         """
-        # Bounds check: return None for out-of-range nodes
-        arr_idx = node - 1
-        if arr_idx < 0 or arr_idx >= len(self.indices):
-            return None
-        idx = self.indices[arr_idx]
-        if idx == MISSING_STR_INDEX:
+        idx = self._stored(node)
+        if idx == self.missing:
             return None
-        return self.strings[idx]
+        value = self._decoded.get(idx)
+        if value is None:
+            value = self._decoded[idx] = self.strings.decode(idx)
+        return value
 
     def __getitem__(self, node: int) -> str | None:
         """
@@ -100,9 +638,25 @@ class StringPool:
         Returns
         -------
         int
-            Length of indices array
+            Highest node that is stored
+        """
+        if self.nodes is not None:
+            return int(self.nodes[-1]) if len(self.nodes) else 0
+        return self.offset + len(self.indices)
+
+    def covered(self) -> range | NDArray[np.uint32]:
+        """
+        Nodes that are stored, i.e. all nodes that may have a value.
+
+        Returns
+        -------
+        range | np.ndarray
+            A range for the dense and range layouts, the sorted node
+            array for the sparse layout
         """
-        return len(self.indices)
+        if self.nodes is not None:
+            return self.nodes
+        return range(self.offset + 1, self.offset + len(self.indices) + 1)
 
     def items(self) -> Iterator[tuple[int, str]]:
         """
@@ -116,11 +670,12 @@ class StringPool:
             (node, string_value) pairs
         """
         # Use numpy to find all nodes with values (vectorized, fast)
-        mask = self.indices != MISSING_STR_INDEX
+        mask = self.indices != self.missing
         valid_indices = np.where(mask)[0]
 
         for idx in valid_indices:
-            node = idx + 1  # Convert 0-indexed to 1-indexed
+            # Convert array position to 1-indexed node
+            node = int(self.nodes[idx]) if self.nodes is not None else idx + 1 + self.offset
             string_idx = self.indices[idx]
             yield (node, self.strings[string_idx])
 
@@ -161,23 +716,132 @@ class StringPool:
         for node, value in data.items():
             indices[node - 1] = string_to_idx[value]
 
-        strings = np.array(unique_strings, dtype=object)
-        return cls(strings, indices)
+        # Strings are already sorted, so the sorter is the identity
+        sorter = np.arange(len(unique_strings), dtype=NODE_DTYPE)
+        return cls(StringTable.from_strings(unique_strings), indices, sorter)
+
+    @classmethod
+    def from_codes(
+        cls,
+        nodes: NDArray[np.integer],
+        codes: NDArray[np.integer],
+        strings: list[str],
+        max_node: int,
+    ) -> StringPool:
+        """
+        Build string pool from parallel arrays of nodes and string indices.
+
+        Parameters
+        ----------
+        nodes : np.ndarray
+            Nodes with a value
+        codes : np.ndarray
+            Per node: index of its value in `strings`
+        strings : list[str]
+            The distinct values, sorted
+        max_node : int
+            Maximum node number in corpus
+
+        Returns
+        -------
+        StringPool
+            New StringPool instance
+        """
+        indices = np.full(max_node, MISSING_STR_INDEX, dtype=NODE_DTYPE)
+        indices[np.asarray(nodes, dtype=np.int64) - 1] = codes
+        sorter = np.arange(len(strings), dtype=NODE_DTYPE)
+        return cls(StringTable.from_strings(strings), indices, sorter)
+
+    def narrow(self) -> StringPool:
+        """
+        Copy with the narrowest index dtype for the number of strings.
+
+        Features with fewer than 255 distinct values get uint8 indices,
+        fewer than 65535 uint16; the dtype maximum becomes the missing
+        sentinel.
+
+        Returns
+        -------
+        StringPool
+            New StringPool sharing the string table and sorter
+        """
+        dtype = index_dtype(len(self.strings))
+        missing = np.iinfo(dtype).max
+        indices = np.asarray(self.indices)
+        narrowed = np.where(indices == self.missing, missing, indices).astype(dtype)
+        return type(self)(
+            self.strings, narrowed, self._sorter, self.offset, self.nodes,
+            self._hash_index,
+        )
+
+    def compact(self) -> StringPool:
+        """
+        Copy stored in the smallest layout, see `compact_layout`.
+
+        Returns
+        -------
+        StringPool
+            New StringPool sharing the string table and sorter; its
+            `offset` must be stored alongside the indices
+        """
+        pool = self
+        if self.layout != 'dense':
+            pool = type(self)(
+                self.strings, self.to_dense(), self._sorter, hash_index=self._hash_index
+            )
+        indices, offset, nodes = compact_layout(pool.indices, self.missing)
+        return type(self)(
+            self.strings, indices, self._sorter, offset, nodes, self._hash_index
+        )
+
+    def to_dense(self) -> NDArray[np.uint32]:
+        """
+        Indices of nodes 1..len(self), missing ones set to `missing`.
+
+        Returns
+        -------
+        np.ndarray
+            Dense copy of the indices
+        """
+        dense = np.full(len(self), self.missing, dtype=self.indices.dtype)
+        if self.nodes is not None:
+            dense[np.asarray(self.nodes, dtype=np.int64) - 1] = self.indices
+        else:
+            dense[self.offset:] = self.indices
+        return dense
 
     def save(self, path_prefix: str) -> None:
         """
-        Save to {path_prefix}_strings.npy and {path_prefix}_idx.npy.
+        Save to {path_prefix}_blob.npy, {path_prefix}_offsets.npy,
+        {path_prefix}_idx.npy, {path_prefix}_sorter.npy and the hash index
+        in {path_prefix}_hashes.npy and {path_prefix}_hash_order.npy, plus
+        {path_prefix}_nodes.npy for the sparse layout.
+
+        The offset of the range layout is not saved; record it in the
+        feature metadata.
 
         Parameters
         ----------
         path_prefix : str
             Path prefix for output files
         """
-        np.save(f"{path_prefix}_strings.npy", self.strings, allow_pickle=True)
+        self.strings.save(path_prefix)
         np.save(f"{path_prefix}_idx.npy", self.indices)
+        np.save(f"{path_prefix}_sorter.npy", self.sorter)
+        (hashes, order) = self.hash_index
+        np.save(f"{path_prefix}_hashes.npy", hashes)
+        np.save(f"{path_prefix}_hash_order.npy", order)
+        if self.nodes is not None:
+            np.save(f"{path_prefix}_nodes.npy", self.nodes)
 
     @classmethod
-    def load(cls, path_prefix: str, mmap_mode: str = 'r') -> StringPool:
+    def load(
+        cls,
+        path_prefix: str,
+        mmap_mode: str = 'r',
+        offset: int = 0,
+        pack: CfmPack | None = None,
+    ) -> StringPool:
         """
         Load from files.
 
@@ -186,17 +850,46 @@ class StringPool:
         path_prefix : str
             Path prefix for input files
         mmap_mode : str, optional
-            Memory-map mode for indices array (default: 'r')
+            Memory-map mode for the string table and indices (default: 'r')
+        offset : int, optional
+            Offset of the range layout, as recorded at compile time
+        pack : CfmPack, optional
+            Pack to read the files from (see `cfabric.storage.pack`)
 
         Returns
         -------
         StringPool
             Loaded StringPool instance
         """
-        # Note: object arrays can't be mmap'd, but they're typically small
-        strings = np.load(f"{path_prefix}_strings.npy", allow_pickle=True)
-        indices = np.load(f"{path_prefix}_idx.npy", mmap_mode=mmap_mode)
-        return cls(strings, indices)
+        if npy_exists(f"{path_prefix}_blob.npy", pack):
+            strings: StringTable | Iterable[str] = StringTable.load(
+                path_prefix, mmap_mode, pack
+            )
+        else:
+            # Older .cfm directories store a pickled object array
+            strings = np.load(f"{path_prefix}_strings.npy", allow_pickle=True)
+        indices = load_npy(f"{path_prefix}_idx.npy", mmap_mode, pack)
+        # Older .cfm directories have no sorter; it is then built lazily
+        sorter_path = f"{path_prefix}_sorter.npy"
+        sorter = (
+            load_npy(sorter_path, mmap_mode, pack)
+            if npy_exists(sorter_path, pack) else None
+        )
+        nodes_path = f"{path_prefix}_nodes.npy"
+        nodes = (
+            load_npy(nodes_path, mmap_mode, pack)
+            if npy_exists(nodes_path, pack) else None
+        )
+        # ... nor a hash index
+        hashes_path = f"{path_prefix}_hashes.npy"
+        hash_index = (
+            (
+                load_npy(hashes_path, mmap_mode, pack),
+                load_npy(f"{path_prefix}_hash_order.npy", mmap_mode, pack),
+            )
+            if npy_exists(hashes_path, pack) else None
+        )
+        return cls(strings, indices, sorter, offset, nodes, hash_index)
 
     def get_value_index(self, value: str) -> int | None:
         """
@@ -214,14 +907,85 @@ class StringPool:
         int | None
             Internal index, or None if value doesn't exist
         """
-        # Linear search through strings array (typically small)
-        for i, s in enumerate(self.strings):
-            if s == value:
-                return i
-        return None
+        if not isinstance(value, str):
+            return None
+        return self.strings.index(value, self.sorter)
+
+    def get_value_indices(self, values: Iterable[str]) -> NDArray[np.int64]:
+        """
+        Get the internal indices for several string values at once.
+
+        All values are resolved in one `np.searchsorted` call over the
+        hash index; only the strings found are compared with the values,
+        without decoding. Values that do not occur in the pool are dropped.
+
+        Parameters
+        ----------
+        values : Iterable[str]
+            String values to look up
+
+        Returns
+        -------
+        NDArray[np.int64]
+            Internal indices of the values that exist
+        """
+        targets = [v.encode('utf-8') for v in values if isinstance(v, str)]
+        if not targets:
+            return np.array([], dtype=np.int64)
+        (hashes, order) = self.hash_index
+        keys = np.fromiter(
+            (value_hash(t) for t in targets), dtype=np.uint64, count=len(targets)
+        )
+        positions = np.searchsorted(hashes, keys).tolist()
+        found = []
+        for (target, key, pos) in zip(targets, keys.tolist(), positions):
+            # Hashes of different strings may collide: check every string
+            # with the hash of the value
+            while pos < len(hashes) and int(hashes[pos]) == key:
+                idx = int(order[pos])
+                if self.strings.encoded(idx) == target:
+                    found.append(idx)
+                    break
+                pos += 1
+        return np.array(found, dtype=np.int64)
+
+    def nodes_with_values(self, values: Iterable[str]) -> NDArray[np.int64] | None:
+        """
+        Get all nodes having one of the values, from the postings index.
+
+        Parameters
+        ----------
+        values : Iterable[str]
+            Values to match
+
+        Returns
+        -------
+        NDArray[np.int64] | None
+            Matching nodes (1-indexed), in canonical order for a single
+            value; None if the pool has no postings index
+        """
+        if self.postings is None:
+            return None
+        return self.postings.lookup(self.get_value_indices(values))
+
+    def value_index(self) -> dict[str, list[int]] | None:
+        """
+        Map every value to its nodes, from the postings index.
+
+        Returns
+        -------
+        dict[str, list[int]] | None
+            Value -> nodes in canonical order; None if the pool has no
+            postings index
+        """
+        if self.postings is None:
+            return None
+        return {
+            self.strings[key]: nodes.tolist() for key, nodes in self.postings.items()
+        }
 
     def filter_by_value(
-        self, nodes: list[int] | range, value: str
+        self, nodes: list[int] | range | NDArray[np.int64], value: str
     ) -> NDArray[np.int64]:
         """
         Vectorized filter: return nodes where feature equals value.
@@ -231,7 +995,7 @@ class StringPool:
 
         Parameters
         ----------
-        nodes : list[int] | range
+        nodes : list[int] | range | np.ndarray
             Nodes to filter (1-indexed)
         value : str
             Value to match
@@ -241,7 +1005,7 @@ class StringPool:
         NDArray[np.int64]
             Array of matching nodes (1-indexed)
         """
-        if not nodes:
+        if len(nodes) == 0:
             return np.array([], dtype=np.int64)
 
         # Find the index for this value
@@ -249,12 +1013,9 @@ class StringPool:
         if value_idx is None:
             return np.array([], dtype=np.int64)
 
-        # Convert nodes to 0-indexed array indices
+        # Find the array positions of the nodes
         node_arr = np.asarray(nodes, dtype=np.int64)
-        arr_indices = node_arr - 1
-
-        # Bounds check: only keep valid indices
-        valid_mask = (arr_indices >= 0) & (arr_indices < len(self.indices))
+        valid_mask, arr_indices = self._locate(node_arr)
         valid_arr_indices = arr_indices[valid_mask]
         valid_nodes = node_arr[valid_mask]
 
@@ -265,14 +1026,14 @@ class StringPool:
         return valid_nodes[match_mask]
 
     def filter_by_values(
-        self, nodes: list[int] | range, values: set[str]
+        self, nodes: list[int] | range | NDArray[np.int64], values: set[str]
     ) -> NDArray[np.int64]:
         """
         Vectorized filter: return nodes where feature is in values set.
 
         Parameters
         ----------
-        nodes : list[int] | range
+        nodes : list[int] | range | np.ndarray
             Nodes to filter (1-indexed)
         values : set[str]
             Set of values to match
@@ -282,25 +1043,18 @@ class StringPool:
         NDArray[np.int64]
             Array of matching nodes (1-indexed)
         """
-        if not nodes or not values:
+        if len(nodes) == 0 or not values:
             return np.array([], dtype=np.int64)
 
-        # Find indices for all values
-        value_indices = set()
-        for v in values:
-            idx = self.get_value_index(v)
-            if idx is not None:
-                value_indices.add(idx)
+        # Resolve all values in one vectorized lookup
+        value_indices = self.get_value_indices(values)
 
-        if not value_indices:
+        if len(value_indices) == 0:
             return np.array([], dtype=np.int64)
 
-        # Convert nodes to 0-indexed array indices
+        # Find the array positions of the nodes
         node_arr = np.asarray(nodes, dtype=np.int64)
-        arr_indices = node_arr - 1
-
-        # Bounds check
-        valid_mask = (arr_indices >= 0) & (arr_indices < len(self.indices))
+        valid_mask, arr_indices = self._locate(node_arr)
         valid_arr_indices = arr_indices[valid_mask]
         valid_nodes = node_arr[valid_mask]
 
@@ -308,17 +1062,19 @@ class StringPool:
         values_at_nodes = self.indices[valid_arr_indices]
 
         # Check if each value is in the target set
-        match_mask = np.isin(values_at_nodes, list(value_indices))
+        match_mask = np.isin(values_at_nodes, value_indices)
 
         return valid_nodes[match_mask]
 
-    def filter_has_value(self, nodes: list[int] | range) -> NDArray[np.int64]:
+    def filter_has_value(
+        self, nodes: list[int] | range | NDArray[np.int64]
+    ) -> NDArray[np.int64]:
         """
         Vectorized filter: return nodes that have any value.
 
         Parameters
         ----------
-        nodes : list[int] | range
+        nodes : list[int] | range | np.ndarray
             Nodes to filter (1-indexed)
 
         Returns
@@ -326,28 +1082,28 @@ class StringPool:
         NDArray[np.int64]
             Array of nodes with values (1-indexed)
         """
-        if not nodes:
+        if len(nodes) == 0:
             return np.array([], dtype=np.int64)
 
         node_arr = np.asarray(nodes, dtype=np.int64)
-        arr_indices = node_arr - 1
-
-        valid_mask = (arr_indices >= 0) & (arr_indices < len(self.indices))
+        valid_mask, arr_indices = self._locate(node_arr)
         valid_arr_indices = arr_indices[valid_mask]
         valid_nodes = node_arr[valid_mask]
 
         values_at_nodes = self.indices[valid_arr_indices]
-        has_value_mask = values_at_nodes != MISSING_STR_INDEX
+        has_value_mask = values_at_nodes != self.missing
 
         return valid_nodes[has_value_mask]
 
-    def filter_missing_value(self, nodes: list[int] | range) -> NDArray[np.int64]:
+    def filter_missing_value(
+        self, nodes: list[int] | range | NDArray[np.int64]
+    ) -> NDArray[np.int64]:
         """
         Vectorized filter: return nodes that have no value.
 
         Parameters
         ----------
-        nodes : list[int] | range
+        nodes : list[int] | range | np.ndarray
             Nodes to filter (1-indexed)
 
         Returns
@@ -355,20 +1111,16 @@ class StringPool:
         NDArray[np.int64]
             Array of nodes without values (1-indexed)
         """
-        if not nodes:
+        if len(nodes) == 0:
             return np.array([], dtype=np.int64)
 
         node_arr = np.asarray(nodes, dtype=np.int64)
-        arr_indices = node_arr - 1
+        valid_mask, arr_indices = self._locate(node_arr)
+        values_at_nodes = self.indices[arr_indices[valid_mask]]
+        missing_mask = ~valid_mask & (node_arr >= 1)
+        missing_mask[valid_mask] = values_at_nodes == self.missing
 
-        valid_mask = (arr_indices >= 0) & (arr_indices < len(self.indices))
-        valid_arr_indices = arr_indices[valid_mask]
-        valid_nodes = node_arr[valid_mask]
-
-        values_at_nodes = self.indices[valid_arr_indices]
-        missing_mask = values_at_nodes == MISSING_STR_INDEX
-
-        return valid_nodes[missing_mask]
+        return node_arr[missing_mask]
 
     def get_frequency_counts(self) -> dict[str, int]:
         """
@@ -379,7 +1131,7 @@ class StringPool:
         dict[str, int]
             Mapping from string value to count
         """
-        valid_mask = self.indices != MISSING_STR_INDEX
+        valid_mask = self.indices != self.missing
         valid_indices = self.indices[valid_mask]
         unique_idx, counts = np.unique(valid_indices, return_counts=True)
         return {self.strings[idx]: int(count) for idx, count in zip(unique_idx, counts)}
@@ -389,27 +1141,65 @@ class IntFeatureArray:
     """
     Integer feature storage.
 
-    Dense array with sentinel for missing values.
+    Per-node array with sentinel for missing values, over all nodes, a
+    range of nodes, or an explicit set of nodes (see `compact_layout`).
 
     Attributes
     ----------
     values : np.ndarray
-        Array of integer values (dtype=int32)
-        MISSING (-1) indicates no value
+        Array of integer values (dtype=int32, or narrower when narrowed)
+    missing : int
+        Value that indicates no value (MISSING for int32 arrays)
+    postings : PostingsIndex | None
+        Optional value -> nodes index, attached when the compiled corpus
+        contains one
+    offset : int
+        Number of leading nodes not stored: values[i] belongs to node
+        offset + i + 1 (range layout)
+    nodes : np.ndarray | None
+        Sorted nodes that values belong to (sparse layout), else None
     """
 
     MISSING = -1
 
-    def __init__(self, values: NDArray[np.int32]) -> None:
+    def __init__(
+        self,
+        values: NDArray[np.integer],
+        missing: int = MISSING,
+        offset: int = 0,
+        nodes: NDArray[np.uint32] | None = None,
+    ) -> None:
         """
         Initialize an IntFeatureArray.
 
         Parameters
         ----------
         values : np.ndarray
-            Array of integer values (dtype=int32)
+            Array of integer values
+        missing : int, optional
+            Sentinel for nodes without a value (default: MISSING)
+        offset : int, optional
+            Number of leading nodes not stored (default: 0)
+        nodes : np.ndarray, optional
+            Sorted nodes that the values belong to (sparse layout)
         """
         self.values = values
+        self.missing = missing
+        self.postings: PostingsIndex | None = None
+        self.offset = offset
+        self.nodes = nodes
+        self._stored = _stored_getter(values, offset, nodes, missing)
+
+    @property
+    def layout(self) -> str:
+        """Storage layout: 'dense', 'range' or 'sparse'."""
+        return layout_name(self.offset, self.nodes)
+
+    def _locate(
+        self, node_arr: NDArray[np.int64]
+    ) -> tuple[NDArray[np.bool_], NDArray[np.int64]]:
+        """Which nodes are stored, and their positions in values."""
+        return _locate(node_arr, len(self.values), self.offset, self.nodes)
 
     def get(self, node: int) -> int | None:
         """
@@ -425,14 +1215,10 @@ class IntFeatureArray:
         int | None
             Integer value or None if missing
         """
-        # Bounds check: return None for out-of-range nodes
-        arr_idx = node - 1
-        if arr_idx < 0 or arr_idx >= len(self.values):
+        val = self._stored(node)
+        if val == self.missing:
             return None
-        val = self.values[arr_idx]
-        if val == self.MISSING:
-            return None
-        return int(val)
+        return val
 
     def __getitem__(self, node: int) -> int | None:
         """
@@ -457,9 +1243,25 @@ class IntFeatureArray:
         Returns
         -------
         int
-            Length of values array
+            Highest node that is stored
+        """
+        if self.nodes is not None:
+            return int(self.nodes[-1]) if len(self.nodes) else 0
+        return self.offset + len(self.values)
+
+    def covered(self) -> range | NDArray[np.uint32]:
+        """
+        Nodes that are stored, i.e. all nodes that may have a value.
+
+        Returns
+        -------
+        range | np.ndarray
+            A range for the dense and range layouts, the sorted node
+            array for the sparse layout
         """
-        return len(self.values)
+        if self.nodes is not None:
+            return self.nodes
+        return range(self.offset + 1, self.offset + len(self.values) + 1)
 
     def items(self) -> Iterator[tuple[int, int]]:
         """
@@ -473,11 +1275,12 @@ class IntFeatureArray:
             (node, int_value) pairs
         """
         # Use numpy to find all nodes with values (vectorized, fast)
-        mask = self.values != self.MISSING
+        mask = self.values != self.missing
         valid_indices = np.where(mask)[0]
 
         for idx in valid_indices:
-            node = idx + 1  # Convert 0-indexed to 1-indexed
+            # Convert array position to 1-indexed node
+            node = int(self.nodes[idx]) if self.nodes is not None else idx + 1 + self.offset
             yield (node, int(self.values[idx]))
 
     def to_dict(self) -> dict[int, int]:
@@ -492,7 +1295,9 @@ class IntFeatureArray:
         return dict(self.items())
 
     @classmethod
-    def from_dict(cls, data: dict[int, int | None], max_node: int) -> IntFeatureArray:
+    def from_dict(
+        cls, data: dict[int, int | None], max_node: int, narrow: bool = False
+    ) -> IntFeatureArray:
         """
         Build from node->int dict.
 
@@ -502,22 +1307,125 @@ class IntFeatureArray:
             Mapping from node (int) to integer value (or None for missing)
         max_node : int
             Maximum node number in corpus
+        narrow : bool, optional
+            Use the narrowest dtype for the values, see `narrow()`
+            (default: int32 with MISSING as sentinel)
 
         Returns
         -------
         IntFeatureArray
             New IntFeatureArray instance
         """
-        values = np.full(max_node, cls.MISSING, dtype='int32')
+        dtype, missing = np.dtype('int32'), cls.MISSING
+        if narrow:
+            present = [v for v in data.values() if v is not None]
+            dtype, missing = narrow_int_dtype(
+                min(present, default=1), max(present, default=0)
+            )
+        values = np.full(max_node, missing, dtype=dtype)
         for node, value in data.items():
-            # None values stay as MISSING sentinel
+            # None values stay as missing sentinel
             if value is not None:
                 values[node - 1] = value
-        return cls(values)
+        return cls(values, missing)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        nodes: NDArray[np.integer],
+        values: NDArray[np.integer],
+        max_node: int,
+        narrow: bool = False,
+    ) -> IntFeatureArray:
+        """
+        Build from parallel arrays of nodes and their values.
+
+        Parameters
+        ----------
+        nodes : np.ndarray
+            Nodes with a value
+        values : np.ndarray
+            Per node: its value
+        max_node : int
+            Maximum node number in corpus
+        narrow : bool, optional
+            Use the narrowest dtype for the values, see `narrow()`
+            (default: int32 with MISSING as sentinel)
+
+        Returns
+        -------
+        IntFeatureArray
+            New IntFeatureArray instance
+        """
+        dtype, missing = np.dtype('int32'), cls.MISSING
+        if narrow:
+            low, high = 1, 0
+            if len(values):
+                low, high = int(values.min()), int(values.max())
+            dtype, missing = narrow_int_dtype(low, high)
+        result = np.full(max_node, missing, dtype=dtype)
+        result[np.asarray(nodes, dtype=np.int64) - 1] = values
+        return cls(result, missing)
+
+    def narrow(self) -> IntFeatureArray:
+        """
+        Copy with the narrowest dtype for the range of values present.
+
+        The missing sentinel is chosen per dtype (see `narrow_int_dtype`),
+        so a feature with values 0..200 is stored as uint8 with 255 as
+        sentinel.
+
+        Returns
+        -------
+        IntFeatureArray
+            New IntFeatureArray; its `missing` must be stored alongside
+            the values
+        """
+        values = np.asarray(self.values)
+        present = values != self.missing
+        low, high = 1, 0
+        if present.any():
+            low, high = int(values[present].min()), int(values[present].max())
+        dtype, missing = narrow_int_dtype(low, high)
+        narrowed = np.full(len(values), missing, dtype=dtype)
+        narrowed[present] = values[present]
+        return type(self)(narrowed, missing, self.offset, self.nodes)
+
+    def compact(self) -> IntFeatureArray:
+        """
+        Copy stored in the smallest layout, see `compact_layout`.
+
+        Returns
+        -------
+        IntFeatureArray
+            New IntFeatureArray; its `offset` must be stored alongside
+            the values
+        """
+        values, offset, nodes = compact_layout(self.to_dense(), self.missing)
+        return type(self)(values, self.missing, offset, nodes)
+
+    def to_dense(self) -> NDArray[np.integer]:
+        """
+        Values of nodes 1..len(self), missing ones set to `missing`.
+
+        Returns
+        -------
+        np.ndarray
+            Dense copy of the values
+        """
+        dense = np.full(len(self), self.missing, dtype=self.values.dtype)
+        if self.nodes is not None:
+            dense[np.asarray(self.nodes, dtype=np.int64) - 1] = self.values
+        else:
+            dense[self.offset:] = self.values
+        return dense
 
     def save(self, path: str) -> None:
         """
-        Save to .npy file.
+        Save to .npy file, plus {stem}_nodes.npy for the sparse layout.
+
+        The offset of the range layout is not saved; record it in the
+        feature metadata.
 
         Parameters
         ----------
@@ -525,9 +1433,18 @@ class IntFeatureArray:
             Output file path
         """
         np.save(path, self.values)
+        if self.nodes is not None:
+            np.save(_nodes_path(path), self.nodes)
 
     @classmethod
-    def load(cls, path: str, mmap_mode: str = 'r') -> IntFeatureArray:
+    def load(
+        cls,
+        path: str,
+        mmap_mode: str = 'r',
+        missing: int = MISSING,
+        offset: int = 0,
+        pack: CfmPack | None = None,
+    ) -> IntFeatureArray:
         """
         Load from .npy file.
 
@@ -537,24 +1454,72 @@ class IntFeatureArray:
             Input file path
         mmap_mode : str, optional
             Memory-map mode (default: 'r')
+        missing : int, optional
+            Sentinel for nodes without a value, as recorded at compile
+            time (default: MISSING)
+        offset : int, optional
+            Offset of the range layout, as recorded at compile time
+        pack : CfmPack, optional
+            Pack to read the files from (see `cfabric.storage.pack`)
 
         Returns
         -------
         IntFeatureArray
             Loaded IntFeatureArray instance
         """
-        values = np.load(path, mmap_mode=mmap_mode)
-        return cls(values)
+        values = load_npy(path, mmap_mode, pack)
+        nodes_path = _nodes_path(path)
+        nodes = (
+            load_npy(nodes_path, mmap_mode, pack)
+            if npy_exists(nodes_path, pack) else None
+        )
+        return cls(values, missing, offset, nodes)
+
+    def nodes_with_values(self, values: Iterable[int]) -> NDArray[np.int64] | None:
+        """
+        Get all nodes having one of the values, from the postings index.
+
+        Parameters
+        ----------
+        values : Iterable[int]
+            Values to match
+
+        Returns
+        -------
+        NDArray[np.int64] | None
+            Matching nodes (1-indexed), in canonical order for a single
+            value; None if the array has no postings index
+        """
+        if self.postings is None:
+            return None
+        codes = np.array(
+            [v for v in values if isinstance(v, (int, np.integer))], dtype=np.int64
+        )
+        return self.postings.lookup(codes)
+
+    def value_index(self) -> dict[int, list[int]] | None:
+        """
+        Map every value to its nodes, from the postings index.
+
+        Returns
+        -------
+        dict[int, list[int]] | None
+            Value -> nodes in canonical order; None if the array has no
+            postings index
+        """
+        if self.postings is None:
+            return None
+        return {key: nodes.tolist() for key, nodes in self.postings.items()}
 
     def filter_by_value(
-        self, nodes: list[int] | range, value: int
+        self, nodes: list[int] | range | NDArray[np.int64], value: int
     ) -> NDArray[np.int64]:
         """
         Vectorized filter: return nodes where feature equals value.
 
         Parameters
         ----------
-        nodes : list[int] | range
+        nodes : list[int] | range | np.ndarray
             Nodes to filter (1-indexed)
         value : int
             Value to match
@@ -564,13 +1529,11 @@ class IntFeatureArray:
         NDArray[np.int64]
             Array of matching nodes (1-indexed)
         """
-        if not nodes:
+        if len(nodes) == 0:
             return np.array([], dtype=np.int64)
 
         node_arr = np.asarray(nodes, dtype=np.int64)
-        arr_indices = node_arr - 1
-
-        valid_mask = (arr_indices >= 0) & (arr_indices < len(self.values))
+        valid_mask, arr_indices = self._locate(node_arr)
         valid_arr_indices = arr_indices[valid_mask]
         valid_nodes = node_arr[valid_mask]
 
@@ -580,14 +1543,14 @@ class IntFeatureArray:
         return valid_nodes[match_mask]
 
     def filter_by_values(
-        self, nodes: list[int] | range, values: set[int]
+        self, nodes: list[int] | range | NDArray[np.int64], values: set[int]
     ) -> NDArray[np.int64]:
         """
         Vectorized filter: return nodes where feature is in values set.
 
         Parameters
         ----------
-        nodes : list[int] | range
+        nodes : list[int] | range | np.ndarray
             Nodes to filter (1-indexed)
         values : set[int]
             Set of values to match
@@ -597,13 +1560,11 @@ class IntFeatureArray:
         NDArray[np.int64]
             Array of matching nodes (1-indexed)
         """
-        if not nodes or not values:
+        if len(nodes) == 0 or not values:
             return np.array([], dtype=np.int64)
 
         node_arr = np.asarray(nodes, dtype=np.int64)
-        arr_indices = node_arr - 1
-
-        valid_mask = (arr_indices >= 0) & (arr_indices < len(self.values))
+        valid_mask, arr_indices = self._locate(node_arr)
         valid_arr_indices = arr_indices[valid_mask]
         valid_nodes = node_arr[valid_mask]
 
@@ -613,14 +1574,14 @@ class IntFeatureArray:
         return valid_nodes[match_mask]
 
     def filter_less_than(
-        self, nodes: list[int] | range, threshold: int
+        self, nodes: list[int] | range | NDArray[np.int64], threshold: int
     ) -> NDArray[np.int64]:
         """
         Vectorized filter: return nodes where value < threshold.
 
         Parameters
         ----------
-        nodes : list[int] | range
+        nodes : list[int] | range | np.ndarray
             Nodes to filter (1-indexed)
         threshold : int
             Threshold value
@@ -630,31 +1591,29 @@ class IntFeatureArray:
         NDArray[np.int64]
             Array of matching nodes (1-indexed)
         """
-        if not nodes:
+        if len(nodes) == 0:
             return np.array([], dtype=np.int64)
 
         node_arr = np.asarray(nodes, dtype=np.int64)
-        arr_indices = node_arr - 1
-
-        valid_mask = (arr_indices >= 0) & (arr_indices < len(self.values))
+        valid_mask, arr_indices = self._locate(node_arr)
         valid_arr_indices = arr_indices[valid_mask]
         valid_nodes = node_arr[valid_mask]
 
         values_at_nodes = self.values[valid_arr_indices]
         # Must have a value AND be less than threshold
-        match_mask = (values_at_nodes != self.MISSING) & (values_at_nodes < threshold)
+        match_mask = (values_at_nodes != self.missing) & (values_at_nodes < threshold)
 
         return valid_nodes[match_mask]
 
     def filter_greater_than(
-        self, nodes: list[int] | range, threshold: int
+        self, nodes: list[int] | range | NDArray[np.int64], threshold: int
     ) -> NDArray[np.int64]:
         """
         Vectorized filter: return nodes where value > threshold.
 
         Parameters
         ----------
-        nodes : list[int] | range
+        nodes : list[int] | range | np.ndarray
             Nodes to filter (1-indexed)
         threshold : int
             Threshold value
@@ -664,29 +1623,29 @@ class IntFeatureArray:
         NDArray[np.int64]
             Array of matching nodes (1-indexed)
         """
-        if not nodes:
+        if len(nodes) == 0:
             return np.array([], dtype=np.int64)
 
         node_arr = np.asarray(nodes, dtype=np.int64)
-        arr_indices = node_arr - 1
-
-        valid_mask = (arr_indices >= 0) & (arr_indices < len(self.values))
+        valid_mask, arr_indices = self._locate(node_arr)
         valid_arr_indices = arr_indices[valid_mask]
         valid_nodes = node_arr[valid_mask]
 
         values_at_nodes = self.values[valid_arr_indices]
         # Must have a value AND be greater than threshold
-        match_mask = (values_at_nodes != self.MISSING) & (values_at_nodes > threshold)
+        match_mask = (values_at_nodes != self.missing) & (values_at_nodes > threshold)
 
         return valid_nodes[match_mask]
 
-    def filter_has_value(self, nodes: list[int] | range) -> NDArray[np.int64]:
+    def filter_has_value(
+        self, nodes: list[int] | range | NDArray[np.int64]
+    ) -> NDArray[np.int64]:
         """
         Vectorized filter: return nodes that have any value.
 
         Parameters
         ----------
-        nodes : list[int] | range
+        nodes : list[int] | range | np.ndarray
             Nodes to filter (1-indexed)
 
         Returns
@@ -694,28 +1653,28 @@ class IntFeatureArray:
         NDArray[np.int64]
             Array of nodes with values (1-indexed)
         """
-        if not nodes:
+        if len(nodes) == 0:
             return np.array([], dtype=np.int64)
 
         node_arr = np.asarray(nodes, dtype=np.int64)
-        arr_indices = node_arr - 1
-
-        valid_mask = (arr_indices >= 0) & (arr_indices < len(self.values))
+        valid_mask, arr_indices = self._locate(node_arr)
         valid_arr_indices = arr_indices[valid_mask]
         valid_nodes = node_arr[valid_mask]
 
         values_at_nodes = self.values[valid_arr_indices]
-        has_value_mask = values_at_nodes != self.MISSING
+        has_value_mask = values_at_nodes != self.missing
 
         return valid_nodes[has_value_mask]
 
-    def filter_missing_value(self, nodes: list[int] | range) -> NDArray[np.int64]:
+    def filter_missing_value(
+        self, nodes: list[int] | range | NDArray[np.int64]
+    ) -> NDArray[np.int64]:
         """
         Vectorized filter: return nodes that have no value.
 
         Parameters
         ----------
-        nodes : list[int] | range
+        nodes : list[int] | range | np.ndarray
             Nodes to filter (1-indexed)
 
         Returns
@@ -723,20 +1682,16 @@ class IntFeatureArray:
         NDArray[np.int64]
             Array of nodes without values (1-indexed)
         """
-        if not nodes:
+        if len(nodes) == 0:
             return np.array([], dtype=np.int64)
 
         node_arr = np.asarray(nodes, dtype=np.int64)
-        arr_indices = node_arr - 1
-
-        valid_mask = (arr_indices >= 0) & (arr_indices < len(self.values))
-        valid_arr_indices = arr_indices[valid_mask]
-        valid_nodes = node_arr[valid_mask]
-
-        values_at_nodes = self.values[valid_arr_indices]
-        missing_mask = values_at_nodes == self.MISSING
+        valid_mask, arr_indices = self._locate(node_arr)
+        values_at_nodes = self.values[arr_indices[valid_mask]]
+        missing_mask = ~valid_mask & (node_arr >= 1)
+        missing_mask[valid_mask] = values_at_nodes == self.missing
 
-        return valid_nodes[missing_mask]
+        return node_arr[missing_mask]
 
     def get_frequency_counts(self) -> dict[int, int]:
         """
@@ -747,7 +1702,7 @@ class IntFeatureArray:
         dict[int, int]
             Mapping from integer value to count
         """
-        valid_mask = self.values != self.MISSING
+        valid_mask = self.values != self.missing
         valid_values = self.values[valid_mask]
         unique_vals, counts = np.unique(valid_values, return_counts=True)
         return {int(val): int(count) for val, count in zip(unique_vals, counts)}
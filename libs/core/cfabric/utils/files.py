@@ -2,12 +2,16 @@ from __future__ import annotations
 
 import os
 import json
-import yaml
+from functools import cache
 from typing import TYPE_CHECKING, Any, TextIO, BinaryIO
 
 from shutil import rmtree, copytree, copy
 
 if TYPE_CHECKING:
+    from types import ModuleType
+
+    import yaml
+
     from cfabric.utils.attrs import AttrDict
 
 from cfabric.core.config import (
@@ -37,8 +41,17 @@ def str_presenter(dumper: yaml.Dumper, data: str) -> yaml.ScalarNode:
     return dumper.represent_scalar("tag:yaml.org,2002:str", data)
 
 
-yaml.add_representer(str, str_presenter)
-yaml.representer.SafeRepresenter.add_representer(str, str_presenter)
+@cache
+def _yaml() -> ModuleType:
+    """Import `yaml` on first use and register the multiline string presenter.
+
+    YAML is only needed for config files, so `import cfabric` does not pay for it.
+    """
+    import yaml
+
+    yaml.add_representer(str, str_presenter)
+    yaml.representer.SafeRepresenter.add_representer(str, str_presenter)
+    return yaml
 
 
 def fileOpen(*args: Any, **kwargs: Any) -> TextIO | BinaryIO:
@@ -865,6 +878,7 @@ def readYaml(
     object
         The resulting data structure.
     """
+    yaml = _yaml()
     kwargs: dict[str, Any] = dict(Loader=yaml.FullLoader)
 
     if asFile is None:
@@ -902,6 +916,7 @@ def writeYaml(data: Any, asFile: str | TextIO | None = None, sorted: bool = Fals
         If asFile is not None, the function returns None and the result is written
         to a file. Otherwise, the result string is returned.
     """
+    yaml = _yaml()
     kwargs: dict[str, Any] = dict(allow_unicode=True, sort_keys=sorted)
 
     if type(asFile) is str:
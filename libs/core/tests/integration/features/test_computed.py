@@ -111,6 +111,35 @@ class TestComputedBoundary:
         assert hasattr(C.boundary, "data")
 
 
+class TestComputedGather:
+    """Tests for bulk embedder / embeddee lookups."""
+
+    def test_levup_gather_matches_getitem(self, loaded_api):
+        """C.levUp.gather yields the same embedders as C.levUp[n]."""
+        C = loaded_api.C
+        nodes = list(range(1, loaded_api.F.otype.maxNode + 1))
+
+        embedders, offsets, node_ids = C.levUp.gather(nodes)
+
+        for k, n in enumerate(nodes):
+            assert tuple(embedders[offsets[k]:offsets[k + 1]].tolist()) == tuple(
+                C.levUp[n]
+            )
+            assert set(node_ids[offsets[k]:offsets[k + 1]].tolist()) <= {n}
+
+    def test_levdown_gather_matches_getitem(self, loaded_api):
+        """C.levDown.gather yields the same embeddees as C.levDown[n]."""
+        C = loaded_api.C
+        nodes = list(range(1, loaded_api.F.otype.maxNode + 1))
+
+        embeddees, offsets, _ = C.levDown.gather(nodes)
+
+        for k, n in enumerate(nodes):
+            assert tuple(embeddees[offsets[k]:offsets[k + 1]].tolist()) == tuple(
+                C.levDown[n]
+            )
+
+
 class TestComputedConsistency:
     """Tests for consistency between computed data."""
 
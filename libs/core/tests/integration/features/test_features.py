@@ -115,6 +115,30 @@ class TestNodeFeatureFreqList:
         assert len(sentences) == 1
 
 
+class TestNodeFeatureStats:
+    """Tests for precompiled feature statistics."""
+
+    def test_stats_are_precompiled(self, loaded_api):
+        """Features loaded from .cfm read their statistics from disk."""
+        assert loaded_api.Fs("pos").hasStats
+
+    def test_histogram_matches_freqlist(self, loaded_api):
+        for fname in ("pos", "number", "phrase_id", "sentence_id"):
+            fobj = loaded_api.Fs(fname)
+            assert tuple(fobj.stats.histogram) == fobj.freqList()
+            assert fobj.stats.distinct == len(fobj.freqList())
+
+    def test_type_coverage(self, loaded_api):
+        assert loaded_api.Fs("pos").stats.types == {"word": 5}
+        assert loaded_api.Fs("phrase_id").stats.types == {"phrase": 2}
+
+    def test_int_range(self, loaded_api):
+        stats = loaded_api.Fs("number").stats
+        assert (stats.min, stats.max) == (1, 3)
+        assert stats.count == 5
+        assert loaded_api.Fs("pos").stats.min is None
+
+
 class TestEdgeFeatureAccess:
     """Tests for accessing edge feature values."""
 
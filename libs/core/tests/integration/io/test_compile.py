@@ -1,5 +1,6 @@
 """Integration tests for .tf to .cfm compilation."""
 
+import numpy as np
 import pytest
 import tempfile
 import shutil
@@ -57,6 +58,587 @@ class TestCompiler:
         assert (computed_dir / 'levup_indptr.npy').exists()
         assert (computed_dir / 'levdown_indptr.npy').exists()
 
+    def test_meta_records_dtypes(self, mini_corpus_copy):
+        """meta.json records the widths of node ids and row pointers."""
+        import json
+
+        Compiler(str(mini_corpus_copy)).compile()
+
+        with open(mini_corpus_copy / '.cfm' / '1' / 'meta.json') as f:
+            meta = json.load(f)
+        assert meta['dtypes'] == {'node': 'uint32', 'index': 'uint32'}
+
+    def test_output_mode(self, mini_corpus_copy):
+        """The output directory is not private to the compiling user."""
+        import os
+        import stat
+
+        mask = os.umask(0o022)
+        try:
+            # a second compile replaces the first one
+            for _ in range(2):
+                assert Compiler(str(mini_corpus_copy)).compile()
+                mode = (mini_corpus_copy / '.cfm' / '1').stat().st_mode
+                assert stat.S_IMODE(mode) == 0o755
+        finally:
+            os.umask(mask)
+
+
+class TestCompilePostings:
+    """Test the optional inverted postings index."""
+
+    @pytest.fixture
+    def postings_corpus(self):
+        """Compile a copy of mini_corpus with postings and load it."""
+        mini_corpus = Path(__file__).parent.parent.parent / 'fixtures' / 'mini_corpus'
+        with tempfile.TemporaryDirectory() as tmpdir:
+            test_dir = Path(tmpdir) / 'mini_corpus'
+            shutil.copytree(mini_corpus, test_dir)
+            cfm_dir = test_dir / '.cfm'
+            if cfm_dir.exists():
+                shutil.rmtree(cfm_dir)
+            assert compile_corpus(str(test_dir), postings=True)
+
+            TF = Fabric(
+                locations=[str(test_dir.parent)],
+                modules=['mini_corpus'],
+                silent='deep'
+            )
+            yield test_dir, TF.loadAll()
+
+    def test_postings_files_written(self, postings_corpus):
+        test_dir, _ = postings_corpus
+        features_dir = test_dir / '.cfm' / '1' / 'features'
+
+        assert (features_dir / 'pos_postings_keys.npy').exists()
+        assert (features_dir / 'number_postings_data.npy').exists()
+
+    def test_postings_not_written_by_default(self, tmp_path):
+        mini_corpus = Path(__file__).parent.parent.parent / 'fixtures' / 'mini_corpus'
+        test_dir = tmp_path / 'mini_corpus'
+        shutil.copytree(mini_corpus, test_dir)
+
+        assert Compiler(str(test_dir)).compile(str(tmp_path / 'out'))
+        assert not (tmp_path / 'out' / 'features' / 'pos_postings_keys.npy').exists()
+
+    def test_s_uses_postings(self, postings_corpus):
+        _, api = postings_corpus
+
+        assert api.F.pos._data.postings is not None
+        assert api.F.pos.s('adjective') == (2, 4)
+        assert api.F.pos.s('noun') == (3, 5)
+        assert api.F.pos.s('missing') == ()
+        assert api.F.number.s(2) == (2, 5)
+
+    def test_search_uses_postings(self, postings_corpus):
+        _, api = postings_corpus
+
+        results = api.S.search("word pos=noun|interjection")
+        assert sorted(r[0] for r in results) == [1, 3, 5]
+        results = api.S.search("word pos#noun")
+        assert sorted(r[0] for r in results) == [1, 2, 4]
+        results = api.S.search("""
+w1:word
+w2:word
+w1 .pos=pos. w2
+w1 < w2
+""")
+        assert sorted(results) == [(2, 4), (3, 5)]
+
+
+class TestCompileCompressed:
+    """Test compiling warp and computed arrays in compressed CSR form."""
+
+    def test_compressed_load_matches_plain(self, tmp_path):
+        mini_corpus = Path(__file__).parent.parent.parent / 'fixtures' / 'mini_corpus'
+        plain_dir = tmp_path / 'plain' / 'mini_corpus'
+        packed_dir = tmp_path / 'packed' / 'mini_corpus'
+        for test_dir in (plain_dir, packed_dir):
+            shutil.copytree(mini_corpus, test_dir)
+            cfm_dir = test_dir / '.cfm'
+            if cfm_dir.exists():
+                shutil.rmtree(cfm_dir)
+        assert compile_corpus(str(plain_dir))
+        assert compile_corpus(str(packed_dir), compress=True)
+
+        assert (packed_dir / '.cfm' / '1' / 'warp' / 'oslots_zdata.npy').exists()
+        assert (packed_dir / '.cfm' / '1' / 'computed' / 'levup_zdata.npy').exists()
+
+        apis = [
+            Fabric(
+                locations=[str(d.parent)], modules=['mini_corpus'], silent='deep'
+            ).loadAll()
+            for d in (plain_dir, packed_dir)
+        ]
+        plain, packed = apis
+        for n in range(1, plain.F.otype.maxNode + 1):
+            assert packed.E.oslots.s(n) == plain.E.oslots.s(n)
+            assert packed.L.u(n) == plain.L.u(n)
+            assert packed.L.d(n) == plain.L.d(n)
+        query = """
+phrase
+  word pos=noun
+"""
+        assert sorted(packed.S.search(query)) == sorted(plain.S.search(query))
+
+
+class TestCompileNarrowing:
+    """Test that feature arrays are stored in narrowed dtypes."""
+
+    def test_feature_dtypes_recorded(self, tmp_path):
+        import json
+
+        mini_corpus = Path(__file__).parent.parent.parent / 'fixtures' / 'mini_corpus'
+        corpus = tmp_path / 'mini_corpus'
+        shutil.copytree(mini_corpus, corpus, ignore=shutil.ignore_patterns('.cfm'))
+        assert compile_corpus(str(corpus))
+
+        features = corpus / '.cfm' / '1' / 'features'
+        with open(features / 'pos_meta.json') as f:
+            pos_meta = json.load(f)
+        with open(features / 'number_meta.json') as f:
+            number_meta = json.load(f)
+        assert (pos_meta['dtype'], pos_meta['missing']) == ('uint8', 255)
+        assert (number_meta['dtype'], number_meta['missing']) == ('uint8', 255)
+
+        api = Fabric(locations=str(corpus), silent='deep').loadAll()
+        assert api.F.pos.v(1) == 'interjection'
+        assert api.F.number.v(1) is not None
+        assert [n for n in range(1, 9) if api.F.number.v(n) is None] == [6, 7, 8]
+
+
+class TestCompileLayout:
+    """Test that single-type features are stored over their node range."""
+
+    def test_layout_recorded(self, tmp_path):
+        import json
+
+        mini_corpus = Path(__file__).parent.parent.parent / 'fixtures' / 'mini_corpus'
+        corpus = tmp_path / 'mini_corpus'
+        shutil.copytree(mini_corpus, corpus, ignore=shutil.ignore_patterns('.cfm'))
+        assert compile_corpus(str(corpus), postings=True)
+
+        features = corpus / '.cfm' / '1' / 'features'
+        with open(features / 'phrase_id_meta.json') as f:
+            phrase_meta = json.load(f)
+        assert (phrase_meta['layout'], phrase_meta['offset']) == ('range', 5)
+        assert len(np.load(features / 'phrase_id.npy')) == 2
+
+        api = Fabric(locations=str(corpus), silent='deep').loadAll()
+        F = api.F
+        assert [F.phrase_id.v(n) for n in range(1, 9)] == [None] * 5 + [1, 2, None]
+        assert F.phrase_id.s(2) == (7,)
+        assert F.phrase_id.freqList() == ((1, 1), (2, 1))
+        assert F.phrase_id.freqList({'phrase'}) == ((1, 1), (2, 1))
+        assert F.sentence_id.v(8) is not None
+        assert F.sentence_id.v(7) is None
+
+
+class TestCompileTypeRanges:
+    """Test that per-type node ranges are recorded at compile time."""
+
+    def test_type_ranges(self, tmp_path):
+        import json
+
+        mini_corpus = Path(__file__).parent.parent.parent / 'fixtures' / 'mini_corpus'
+        corpus = tmp_path / 'mini_corpus'
+        shutil.copytree(mini_corpus, corpus, ignore=shutil.ignore_patterns('.cfm'))
+        assert compile_corpus(str(corpus))
+
+        meta_path = corpus / '.cfm' / '1' / 'meta.json'
+        with open(meta_path) as f:
+            meta = json.load(f)
+        assert meta['type_ranges'] == {
+            'word': [1, 5], 'phrase': [6, 7], 'sentence': [8, 8],
+        }
+
+        # Corpora compiled without the ranges fall back to scanning otype
+        expected = Fabric(locations=str(corpus), silent='deep').loadAll()
+        del meta['type_ranges']
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f)
+        api = Fabric(locations=str(corpus), silent='deep').loadAll()
+        assert api.F.otype.support == expected.F.otype.support
+        assert api.F.otype.s('phrase') == (6, 7)
+
+
+class TestCompileSections:
+    """Test that section and structure indexes are compiled into .cfm."""
+
+    @pytest.fixture
+    def corpus(self, tmp_path):
+        mini_corpus = Path(__file__).parent.parent.parent / 'fixtures' / 'mini_corpus'
+        corpus = tmp_path / 'mini_corpus'
+        shutil.copytree(mini_corpus, corpus, ignore=shutil.ignore_patterns('.cfm'))
+        otext = corpus / 'otext.tf'
+        otext.write_text(
+            otext.read_text()
+            .replace('@structureFeatures=', '@structureFeatures=sentence_id,phrase_id')
+            .replace('@structureTypes=', '@structureTypes=sentence,phrase')
+        )
+        return corpus
+
+    def test_section_arrays(self, corpus):
+        from cfabric.storage.sections import load_sections, load_structure
+
+        assert compile_corpus(str(corpus))
+        computed = corpus / '.cfm' / '1' / 'computed'
+        assert not (computed / 'sections.json').exists()
+        sections = load_sections(str(computed / 'sections'))
+        assert sections['sec1'] == {8: {1: 6, 2: 7}}
+        assert sections['names'][''] == {
+            'language': 'default',
+            'languageEnglish': 'default',
+            'names': {8: 'S1'},
+            'nodes': {('sentence', 'S1'): 8},
+        }
+        assert load_structure(str(computed / 'structure'))[3] == (8,)
+
+    def test_same_as_tf(self, corpus):
+        from cfabric.precompute import sectionsFromApi
+
+        api_tf = Fabric(locations=str(corpus), silent='deep').loadAll()
+        CF = Fabric(locations=str(corpus), silent='deep')
+        api = CF.loadAll()
+
+        sections = dict(api.C.sections.data)
+        assert sections.pop('names')
+        assert sections == sectionsFromApi(api, CF.sectionTypes, CF.sectionFeats)
+        assert api.C.structure.data == api_tf.C.structure.data
+
+        T = api.T
+        assert T.sectionFromNode(4) == ('S1', 2)
+        assert T.nodeFromSection(('S1', 2)) == 7
+        assert T.sentenceName(3) == 'S1'
+        assert T.sentenceNode('S1') == 8
+        assert T.structure(8) == api_tf.T.structure(8)
+
+    def test_without_section_arrays(self, corpus):
+        """Corpora compiled without the indexes compute them on load."""
+        assert compile_corpus(str(corpus))
+        for path in (corpus / '.cfm' / '1' / 'computed').glob('sections_*'):
+            path.unlink()
+
+        api = Fabric(locations=str(corpus), silent='deep').loadAll()
+        assert 'names' not in api.C.sections.data
+        assert api.C.sections.data['sec1'] == {8: {1: 6, 2: 7}}
+        assert api.T.sentenceNode('S1') == 8
+
+    def test_sections_json(self, corpus):
+        """Older compilations store the indexes as JSON."""
+        import json
+
+        from cfabric.precompute import sectionsFromApi, sectionsToJson
+        from cfabric.precompute.prepare import structureToJson
+
+        api_tf = Fabric(locations=str(corpus), silent='deep').loadAll()
+        CF = api_tf.CF
+        computed = corpus / '.cfm' / '1' / 'computed'
+        for pattern in ('sections_*', 'structure_*'):
+            for path in computed.glob(pattern):
+                path.unlink()
+        sections_json = sectionsToJson(
+            sectionsFromApi(api_tf, CF.sectionTypes, CF.sectionFeats)
+        )
+        sections_json['names'] = {
+            '': {
+                'language': 'default',
+                'languageEnglish': 'default',
+                'names': [[8, 'S1']],
+            }
+        }
+        with open(computed / 'sections.json', 'w') as f:
+            json.dump(sections_json, f)
+        with open(computed / 'structure.json', 'w') as f:
+            json.dump(structureToJson(api_tf.C.structure.data), f)
+
+        api = Fabric(locations=str(corpus), silent='deep').loadAll()
+        assert api.C.sections.data['sec1'] == {8: {1: 6, 2: 7}}
+        assert api.C.structure.data == api_tf.C.structure.data
+        assert api.T.sentenceNode('S1') == 8
+        assert api.T.sentenceName(3) == 'S1'
+
+
+class TestIncrementalCompile:
+    """Test that recompilation only redoes what changed."""
+
+    @pytest.fixture
+    def corpus(self, tmp_path):
+        mini_corpus = Path(__file__).parent.parent.parent / 'fixtures' / 'mini_corpus'
+        corpus = tmp_path / 'mini_corpus'
+        shutil.copytree(mini_corpus, corpus, ignore=shutil.ignore_patterns('.cfm'))
+        assert compile_corpus(str(corpus))
+        return corpus
+
+    @staticmethod
+    def inode(corpus, rel_path):
+        return (corpus / '.cfm' / '1' / rel_path).stat().st_ino
+
+    def test_sources_recorded(self, corpus):
+        import json
+
+        with open(corpus / '.cfm' / '1' / 'meta.json') as f:
+            meta = json.load(f)
+        assert set(meta['sources']) == {p.stem for p in corpus.glob('*.tf')}
+        pos_files = meta['sources']['pos']['files']
+        assert 'features/pos_meta.json' in pos_files
+        assert all(f.startswith('features/pos') for f in pos_files)
+        assert 'files' not in meta['sources']['otype']
+
+    def test_changed_feature_only(self, corpus):
+        import json
+
+        meta_path = corpus / '.cfm' / '1' / 'meta.json'
+        with open(meta_path) as f:
+            features = json.load(f)['features']
+        word = self.inode(corpus, 'features/word_meta.json')
+        parent = self.inode(corpus, 'edges/parent_meta.json')
+        rank = self.inode(corpus, 'computed/rank.npy')
+        pos = self.inode(corpus, 'features/pos_meta.json')
+
+        pos_tf = corpus / 'pos.tf'
+        pos_tf.write_text(pos_tf.read_text().replace('interjection', 'particle'))
+        assert compile_corpus(str(corpus))
+
+        assert self.inode(corpus, 'features/word_meta.json') == word
+        assert self.inode(corpus, 'edges/parent_meta.json') == parent
+        assert self.inode(corpus, 'computed/rank.npy') == rank
+        assert self.inode(corpus, 'features/pos_meta.json') != pos
+
+        with open(meta_path) as f:
+            new_features = json.load(f)['features']
+        assert {k: sorted(v) for k, v in new_features.items()} == {
+            k: sorted(v) for k, v in features.items()
+        }
+        api = Fabric(locations=str(corpus), silent='deep').loadAll()
+        assert api.F.pos.v(1) == 'particle'
+        assert api.F.pos.v(2) == 'adjective'
+        assert api.E.parent.f(1) == (6,)
+
+    def test_changed_warp(self, corpus):
+        rank = self.inode(corpus, 'computed/rank.npy')
+        word = self.inode(corpus, 'features/word_meta.json')
+
+        otext = corpus / 'otext.tf'
+        otext.write_text(otext.read_text() + '@fmt:text-plain={word} \n')
+        assert compile_corpus(str(corpus))
+
+        assert self.inode(corpus, 'computed/rank.npy') != rank
+        assert self.inode(corpus, 'features/word_meta.json') != word
+
+    def test_changed_section_feature(self, corpus):
+        phrase_id = corpus / 'phrase_id.tf'
+        phrase_id.write_text(phrase_id.read_text().replace('7\t2', '7\t3'))
+        assert compile_corpus(str(corpus))
+
+        api = Fabric(locations=str(corpus), silent='deep').loadAll()
+        assert api.C.sections.data['sec1'] == {8: {1: 6, 3: 7}}
+
+    def test_removed_feature(self, corpus):
+        (corpus / 'score.tf').unlink()
+        assert compile_corpus(str(corpus))
+
+        features = corpus / '.cfm' / '1' / 'features'
+        assert not list(features.glob('score*'))
+        api = Fabric(locations=str(corpus), silent='deep').loadAll()
+        assert 'score' not in api.Fall()
+
+    def test_not_incremental(self, corpus):
+        word = self.inode(corpus, 'features/word_meta.json')
+        assert compile_corpus(str(corpus), incremental=False)
+        assert self.inode(corpus, 'features/word_meta.json') != word
+
+    def test_no_leftovers(self, corpus):
+        assert compile_corpus(str(corpus))
+        assert sorted(p.name for p in (corpus / '.cfm').iterdir()) == ['1']
+
+    def test_packed(self, corpus):
+        """A packed compilation is reused like a directory."""
+        from cfabric.io.compiler import Compiler
+
+        assert compile_corpus(str(corpus), pack=True)
+        pos_tf = corpus / 'pos.tf'
+        pos_tf.write_text(pos_tf.read_text().replace('interjection', 'particle'))
+
+        compiler = Compiler(str(corpus), pack=True)
+        assert compiler.compile()
+        assert compiler._previous is not None
+        assert sorted(p.name for p in (corpus / '.cfm').iterdir()) == ['1.cfmpack']
+
+        api = Fabric(locations=str(corpus), silent='deep').loadAll()
+        assert api.F.pos.v(1) == 'particle'
+        assert api.F.word.v(1) is not None
+        assert api.E.parent.f(1) == (6,)
+        assert api.C.sections.data['sec1'] == {8: {1: 6, 2: 7}}
+
+    def test_packed_not_reused(self, corpus, monkeypatch):
+        """A packed compilation that cannot be reused is closed."""
+        from cfabric.io.compiler import Compiler
+        from cfabric.storage.pack import CfmPack
+
+        assert compile_corpus(str(corpus), pack=True)
+        closed = []
+        close = CfmPack.close
+        monkeypatch.setattr(CfmPack, 'close', lambda self: closed.append(self))
+
+        compiler = Compiler(str(corpus), pack=True, postings=True)
+        compiler._hash_sources(corpus / '.cfm' / '1')
+        assert compiler._previous is None
+        assert compiler._previous_pack is None
+        assert len(closed) == 1
+        close(closed[0])
+
+
+class TestParallelCompile:
+    """Test compiling features in worker processes."""
+
+    def test_same_output(self, tmp_path):
+        import json
+
+        mini_corpus = Path(__file__).parent.parent.parent / 'fixtures' / 'mini_corpus'
+        outputs = {}
+        for workers in (1, 3):
+            corpus = tmp_path / str(workers) / 'mini_corpus'
+            shutil.copytree(mini_corpus, corpus, ignore=shutil.ignore_patterns('.cfm'))
+            assert compile_corpus(str(corpus), postings=True, workers=workers)
+            outputs[workers] = corpus / '.cfm' / '1'
+
+        files = sorted(
+            p.relative_to(outputs[1]) for p in outputs[1].rglob('*') if p.is_file()
+        )
+        assert files == sorted(
+            p.relative_to(outputs[3]) for p in outputs[3].rglob('*') if p.is_file()
+        )
+        for rel_path in files:
+            if rel_path.name != 'meta.json':
+                assert (outputs[1] / rel_path).read_bytes() == (
+                    outputs[3] / rel_path
+                ).read_bytes(), rel_path
+
+        metas = []
+        for output in outputs.values():
+            with open(output / 'meta.json') as f:
+                meta = json.load(f)
+            del meta['created']
+            for record in meta['sources'].values():
+                del record['mtime']
+            metas.append(meta)
+        assert metas[0] == metas[1]
+
+    def test_incremental(self, tmp_path):
+        mini_corpus = Path(__file__).parent.parent.parent / 'fixtures' / 'mini_corpus'
+        corpus = tmp_path / 'mini_corpus'
+        shutil.copytree(mini_corpus, corpus, ignore=shutil.ignore_patterns('.cfm'))
+        assert compile_corpus(str(corpus), workers=2)
+
+        phrase_id = corpus / 'phrase_id.tf'
+        phrase_id.write_text(phrase_id.read_text().replace('7\t2', '7\t3'))
+        assert compile_corpus(str(corpus), workers=2)
+
+        api = Fabric(locations=str(corpus), silent='deep').loadAll()
+        assert api.F.phrase_id.v(7) == 3
+        assert api.C.sections.data['sec1'] == {8: {1: 6, 3: 7}}
+        assert api.F.pos.v(1) == 'interjection'
+
+
+class TestBudgetCompile:
+    """Test compiling under a memory budget."""
+
+    @pytest.mark.parametrize('compress', [False, True])
+    def test_same_output(self, tmp_path, compress):
+        mini_corpus = Path(__file__).parent.parent.parent / 'fixtures' / 'mini_corpus'
+        outputs = {}
+        for budget in (None, 1):
+            corpus = tmp_path / str(budget) / 'mini_corpus'
+            shutil.copytree(mini_corpus, corpus, ignore=shutil.ignore_patterns('.cfm'))
+            assert compile_corpus(
+                str(corpus), postings=True, compress=compress, memory_budget=budget
+            )
+            outputs[budget] = corpus / '.cfm' / '1'
+
+        files = sorted(
+            p.relative_to(outputs[None]) for p in outputs[None].rglob('*')
+        )
+        assert files == sorted(p.relative_to(outputs[1]) for p in outputs[1].rglob('*'))
+        for rel_path in files:
+            if rel_path.name != 'meta.json' and (outputs[None] / rel_path).is_file():
+                assert (outputs[None] / rel_path).read_bytes() == (
+                    outputs[1] / rel_path
+                ).read_bytes(), rel_path
+
+    @pytest.mark.parametrize('compress', [False, True])
+    def test_slots_mapped(self, tmp_path, monkeypatch, compress):
+        """The order is computed from memory-mapped slots, read in ranges."""
+        import cfabric.io.compiler as compiler
+        from cfabric.precompute.embedding import ENTRY_BYTES
+
+        seen = {}
+        canonical_order = compiler.canonical_order
+
+        def spy(max_slot, indptr, data, ranks, chunk=None):
+            seen.update(mapped=isinstance(data, np.memmap), chunk=chunk)
+            return canonical_order(max_slot, indptr, data, ranks, chunk)
+
+        monkeypatch.setattr(compiler, 'canonical_order', spy)
+        mini_corpus = Path(__file__).parent.parent.parent / 'fixtures' / 'mini_corpus'
+        corpus = tmp_path / 'mini_corpus'
+        shutil.copytree(mini_corpus, corpus, ignore=shutil.ignore_patterns('.cfm'))
+        assert compile_corpus(str(corpus), compress=compress, memory_budget=1000)
+
+        assert seen == {'mapped': True, 'chunk': 1000 // ENTRY_BYTES}
+        assert not list((corpus / '.cfm' / '1' / 'warp').glob('*.raw*'))
+
+    def test_loads(self, tmp_path):
+        mini_corpus = Path(__file__).parent.parent.parent / 'fixtures' / 'mini_corpus'
+        corpus = tmp_path / 'mini_corpus'
+        shutil.copytree(mini_corpus, corpus, ignore=shutil.ignore_patterns('.cfm'))
+        assert compile_corpus(str(corpus), memory_budget=1)
+
+        api = Fabric(locations=str(corpus), silent='deep').loadAll()
+        assert api.L.u(1, otype='sentence') == (8,)
+        assert api.L.d(8, otype='phrase') == (6, 7)
+        assert api.C.sections.data['sec1'] == {8: {1: 6, 2: 7}}
+
+
+class TestCompilePack:
+    """Test compiling into a single packed .cfmpack file."""
+
+    def test_pack_load_matches_directory(self, tmp_path):
+        mini_corpus = Path(__file__).parent.parent.parent / 'fixtures' / 'mini_corpus'
+        dir_corpus = tmp_path / 'dir' / 'mini_corpus'
+        pack_corpus = tmp_path / 'pack' / 'mini_corpus'
+        for test_dir in (dir_corpus, pack_corpus):
+            shutil.copytree(mini_corpus, test_dir)
+            cfm_dir = test_dir / '.cfm'
+            if cfm_dir.exists():
+                shutil.rmtree(cfm_dir)
+        assert compile_corpus(str(dir_corpus), postings=True, compress=True)
+        assert compile_corpus(
+            str(pack_corpus), postings=True, compress=True, pack=True
+        )
+
+        assert (pack_corpus / '.cfm' / '1.cfmpack').is_file()
+        assert not (pack_corpus / '.cfm' / '1').exists()
+
+        plain, packed = (
+            Fabric(
+                locations=[str(d.parent)], modules=['mini_corpus'], silent='deep'
+            ).loadAll()
+            for d in (dir_corpus, pack_corpus)
+        )
+        assert packed.F.otype.maxNode == plain.F.otype.maxNode
+        for n in range(1, plain.F.otype.maxNode + 1):
+            assert packed.F.pos.v(n) == plain.F.pos.v(n)
+            assert packed.F.number.v(n) == plain.F.number.v(n)
+            assert packed.E.relation.f(n) == plain.E.relation.f(n)
+            assert packed.L.u(n) == plain.L.u(n)
+        assert packed.F.pos.s('noun') == plain.F.pos.s('noun')
+        query = """
+phrase
+  word pos=noun
+"""
+        assert sorted(packed.S.search(query)) == sorted(plain.S.search(query))
+
 
 class TestCompileCorpus:
     """Test the compile_corpus convenience function."""
@@ -96,6 +96,58 @@ class TestFabricLoadSpecific:
         assert hasattr(api.F, "pos")
 
 
+class TestFabricLoadAddFromCfm:
+    """Tests for adding features to a corpus loaded from .cfm format."""
+
+    @pytest.fixture
+    def cfm_fabric(self, tmp_path, mini_corpus_path):
+        import shutil
+        from cfabric.core.fabric import Fabric
+        from cfabric.io.compiler import compile_corpus
+
+        corpus = tmp_path / "mini_corpus"
+        shutil.copytree(mini_corpus_path, corpus, ignore=shutil.ignore_patterns(".cfm"))
+        assert compile_corpus(str(corpus))
+        return Fabric(locations=str(corpus), silent="deep")
+
+    def test_add_maps_features(self, cfm_fabric):
+        """load(add=True) memory-maps the features instead of parsing .tf."""
+        from cfabric.features.edge import EdgeFeature
+        from cfabric.features.node import NodeFeature
+
+        api = cfm_fabric.load("word", silent="deep")
+        assert "pos" not in api.F.__dict__
+
+        assert cfm_fabric.load("pos parent", add=True, silent="deep") is True
+        assert isinstance(api.F.__dict__["pos"], NodeFeature)
+        assert isinstance(api.E.__dict__["parent"], EdgeFeature)
+        assert api.F.pos.v(3) == "noun"
+        assert api.E.parent.f(1) == (6,)
+        assert cfm_fabric.features["pos"].path == "<cfm>/pos"
+
+    def test_add_keeps_loaded_features(self, cfm_fabric):
+        api = cfm_fabric.load("word", silent="deep")
+        word = api.F.word
+
+        assert cfm_fabric.load("word otype", add=True, silent="deep") is True
+        assert api.F.word is word
+
+    def test_add_unknown_feature(self, cfm_fabric):
+        cfm_fabric.load("word", silent="deep")
+
+        assert cfm_fabric.load("nonexistent", add=True, silent="deep") is False
+
+    def test_ensure_loaded(self, cfm_fabric):
+        from cfabric.features.node import NodeFeature
+
+        api = cfm_fabric.load("word", silent="deep")
+
+        assert api.ensureLoaded("number pos") == {"number", "pos"}
+        assert isinstance(api.F.__dict__["number"], NodeFeature)
+        assert cfm_fabric.features["number"].path == "<cfm>/number"
+        assert api.F.pos.v(3) == "noun"
+
+
 class TestFabricErrors:
     """Tests for error handling during loading."""
 
@@ -123,3 +175,88 @@ class TestFabricErrors:
 
         # Should return False when no features found
         assert api is False or (api is not None and not hasattr(api.F, "otype"))
+
+
+class TestFabricWarm:
+    """Tests for prefetching memory-mapped data with Fabric.warm()."""
+
+    @pytest.fixture
+    def cfm_fabric(self, tmp_path, mini_corpus_path):
+        import shutil
+        from cfabric.core.fabric import Fabric
+        from cfabric.io.compiler import compile_corpus
+
+        corpus = tmp_path / "mini_corpus"
+        shutil.copytree(mini_corpus_path, corpus, ignore=shutil.ignore_patterns(".cfm"))
+        assert compile_corpus(str(corpus))
+        TF = Fabric(locations=str(corpus), silent="deep")
+        TF.loadAll(silent="deep")
+        return TF
+
+    def test_warm_all(self, cfm_fabric):
+        threads = cfm_fabric.warm(wait=True)
+
+        assert threads
+        assert not any(t.is_alive() for t in threads)
+        assert cfm_fabric.api.F.pos.v(3) == "noun"
+
+    def test_warm_selection(self, cfm_fabric):
+        threads = cfm_fabric.warm(features="pos", computed=False, wait=True)
+        assert len(threads) >= 1
+
+        assert cfm_fabric.warm(features=False, computed=False) == []
+
+    def test_warm_keeps_features_lazy(self, cfm_fabric):
+        from cfabric.features.lazy import LazyFeature
+        from cfabric.features.node import NodeFeature
+
+        api = cfm_fabric.api
+        cfm_fabric.warm(wait=True)
+        assert isinstance(api.F.__dict__["pos"], LazyFeature)
+        assert isinstance(api.E.__dict__["parent"], LazyFeature)
+
+        cfm_fabric.warm(features="pos", computed=False, wait=True)
+        assert isinstance(api.F.__dict__["pos"], NodeFeature)
+        assert isinstance(api.F.__dict__["number"], LazyFeature)
+
+    def test_warm_without_cfm(self, tmp_path):
+        from cfabric.core.fabric import Fabric
+
+        TF = Fabric(locations=str(tmp_path), silent="deep")
+        assert TF.warm() == []
+
+
+class TestFabricLazyFeatures:
+    """Tests for features of compiled corpora that load on first use."""
+
+    @pytest.fixture
+    def cfm_api(self, tmp_path, mini_corpus_path):
+        import shutil
+        from cfabric.core.fabric import Fabric
+        from cfabric.io.compiler import compile_corpus
+
+        corpus = tmp_path / "mini_corpus"
+        shutil.copytree(mini_corpus_path, corpus, ignore=shutil.ignore_patterns(".cfm"))
+        assert compile_corpus(str(corpus))
+        TF = Fabric(locations=str(corpus), silent="deep")
+        return TF.loadAll(silent="deep")
+
+    def test_features_not_loaded_upfront(self, cfm_api):
+        from cfabric.features.lazy import LazyFeature
+
+        assert isinstance(cfm_api.F.__dict__["pos"], LazyFeature)
+        assert isinstance(cfm_api.E.__dict__["parent"], LazyFeature)
+        assert "pos" in cfm_api.Fall()
+        assert "parent" in cfm_api.Eall()
+        assert cfm_api.isLoaded("pos", pretty=False)["pos"]["kind"] == "node"
+        assert cfm_api.ensureLoaded("pos") == {"pos"}
+
+    def test_loaded_on_first_use(self, cfm_api):
+        from cfabric.features.node import NodeFeature
+
+        assert cfm_api.F.pos.v(3) == "noun"
+        assert isinstance(cfm_api.F.__dict__["pos"], NodeFeature)
+        assert cfm_api.Fs("pos") is cfm_api.F.pos
+
+        assert cfm_api.Es("parent").f(1) == (6,)
+        assert not isinstance(cfm_api.F.__dict__["number"], NodeFeature)
@@ -109,6 +109,26 @@ class TestLocalityDown:
         assert result == ()
 
 
+class TestLocalityIntersect:
+    """Tests for intersecting navigation L.i()."""
+
+    def test_i_phrase_returns_intersectors(self, loaded_api):
+        """L.i(phrase) gives its slots and the other nodes sharing them."""
+        L = loaded_api.L
+
+        assert list(L.i(6)) == [8, 1, 2, 3]
+        assert list(L.i(7)) == [8, 4, 5]
+
+    def test_i_filter_by_type(self, loaded_api):
+        L = loaded_api.L
+
+        assert list(L.i(6, otype='word')) == [1, 2, 3]
+        assert list(L.i(6, otype='sentence')) == [8]
+
+    def test_i_slot_returns_empty(self, loaded_api):
+        assert list(loaded_api.L.i(1)) == []
+
+
 class TestLocalityNext:
     """Tests for next navigation L.n()."""
 
@@ -147,6 +147,11 @@ class TestDescribeFeature:
             result = describe_feature(corpus_api, feature_name, sample_limit=5)
             assert len(result.sample_values) <= 5
 
+    def test_int_feature_value_range(self, corpus_api):
+        result = describe_feature(corpus_api, "number")
+        assert result.to_dict()["value_range"] == [1, 3]
+        assert result.node_types == ["word"]
+
 
 class TestDescribeFeatures:
     """Tests for describe_features function (batch)."""
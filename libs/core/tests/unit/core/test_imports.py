@@ -0,0 +1,89 @@
+"""Tests for the lazy imports of the cfabric package."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+import cfabric
+import cfabric.core
+import cfabric.io
+
+HEAVY = (
+    'numpy',
+    'yaml',
+    'cfabric.core.fabric',
+    'cfabric.core.api',
+    'cfabric.io.compiler',
+    'cfabric.search.search',
+    'cfabric.search.relations',
+    'cfabric.downloader',
+    'cfabric.results',
+)
+
+
+def import_times(statement):
+    """Cumulative import times per module, as reported by `-X importtime`."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        (_, cumulative, name) = line.split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestLazyImports:
+    def test_import_is_light(self):
+        times = import_times('import cfabric')
+        assert not [name for name in HEAVY if name in times]
+
+    @pytest.mark.skipif(
+        'CFABRIC_IMPORT_BUDGET' not in os.environ,
+        reason='set CFABRIC_IMPORT_BUDGET to a time in microseconds',
+    )
+    def test_import_time(self):
+        """Opt-in, as wall-clock time varies too much between machines."""
+        budget = int(os.environ['CFABRIC_IMPORT_BUDGET'])
+        assert import_times('import cfabric')['cfabric'] < budget
+
+    def test_heavy_modules_on_access(self):
+        """Accessing `Fabric` loads the engine, but not search or the compiler."""
+        result = subprocess.run(
+            [
+                sys.executable, '-c',
+                'import sys, cfabric; cfabric.Fabric; print(*sorted(sys.modules))',
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        modules = set(result.stdout.split())
+        assert 'cfabric.core.fabric' in modules
+        assert 'cfabric.search.search' not in modules
+        assert 'cfabric.io.compiler' not in modules
+
+    @pytest.mark.parametrize('module, names', [
+        (cfabric, ('Fabric', 'download', 'list_corpora', 'NodeList', 'CorpusInfo')),
+        (cfabric.core, ('Fabric', 'Api')),
+        (cfabric.io, ('Compiler', 'compile_corpus')),
+    ])
+    def test_public_names(self, module, names):
+        for name in names:
+            assert getattr(module, name).__name__ == name
+            assert name in dir(module)
+        assert set(module.__all__) <= set(dir(module))
+
+    def test_unknown_name(self):
+        with pytest.raises(AttributeError, match='no_such_name'):
+            cfabric.no_such_name
+
+    def test_version(self):
+        assert cfabric.__version__ == cfabric.VERSION
@@ -177,6 +177,47 @@ class TestEdgeFeatureB:
         assert result_dict[2] == "out"
 
 
+class TestEdgeFeatureMmap:
+    """Tests for EdgeFeature on the CSR (mmap) backend."""
+
+    @pytest.fixture
+    def rank_api(self, mock_api):
+        mock_api.C = MagicMock()
+        mock_api.C.rank = MagicMock()
+        mock_api.C.rank.data = list(range(20))
+        return mock_api
+
+    def test_b_without_values(self, rank_api):
+        """b() combines both directions on the CSR backend."""
+        from cfabric.storage.csr import CSRArray
+
+        # Edges 2->3 and 3->6
+        data = CSRArray.from_sequences([[], [3], [6], [], [], []])
+        dataInv = CSRArray.from_sequences([[], [], [2], [], [], [3]])
+        ef = EdgeFeature(rank_api, {}, data, doValues=False, dataInv=dataInv)
+
+        assert set(ef.b(3)) == {2, 6}
+        assert ef.data == {2: {3}, 3: {6}}
+        assert ef.dataInv == {3: {2}, 6: {3}}
+
+    def test_string_values(self, rank_api):
+        """String edge values are decoded for f, t, b and data."""
+        from cfabric.storage.csr import CSRArrayWithValues
+
+        data = CSRArrayWithValues.from_dict_of_dicts(
+            {0: {2: 'out'}, 1: {1: 'in'}}, num_rows=2, value_dtype=object
+        )
+        dataInv = CSRArrayWithValues.from_dict_of_dicts(
+            {1: {1: 'out'}, 0: {2: 'in'}}, num_rows=2, value_dtype=object
+        )
+        ef = EdgeFeature(rank_api, {}, data, doValues=True, dataInv=dataInv)
+
+        assert ef.f(1) == ((2, 'out'),)
+        assert ef.t(1) == ((2, 'in'),)
+        assert dict(ef.b(1)) == {2: 'out'}
+        assert ef.data == {1: {2: 'out'}, 2: {1: 'in'}}
+
+
 class TestEdgeFeatureItems:
     """Tests for EdgeFeature.items() method."""
 
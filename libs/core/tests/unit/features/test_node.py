@@ -177,6 +177,46 @@ class TestNodeFeatureFreqList:
         assert result == ()
 
 
+class TestNodeFeatureStats:
+    """Tests for NodeFeature.stats."""
+
+    def test_computed_from_data(self, mock_api):
+        """stats should be computed from the data when not precompiled."""
+        data = {1: 3, 2: 1, 3: 3, 6: 7}
+        nf = NodeFeature(mock_api, {"valueType": "int"}, data)
+
+        assert not nf.hasStats
+        stats = nf.stats
+        assert nf.hasStats
+        assert stats.count == 4
+        assert stats.distinct == 3
+        assert stats.histogram == [(3, 2), (1, 1), (7, 1)]
+        assert stats.types == {"word": 3, "phrase": 1}
+        assert (stats.min, stats.max) == (1, 7)
+        assert stats.frequency(3) == 2
+        assert stats.frequency(4) == 0
+
+    def test_matches_freqlist(self, mock_api):
+        """The histogram should be ordered like freqList()."""
+        data = {1: "b", 2: "a", 3: "b", 4: "c", 5: "a"}
+        nf = NodeFeature(mock_api, {}, data)
+
+        assert tuple(nf.stats.histogram) == nf.freqList()
+        assert nf.stats.min is None
+
+    def test_uses_loader(self, mock_api):
+        """Precompiled stats should be read through the loader, once."""
+        from cfabric.features.stats import FeatureStats
+
+        loader = MagicMock(return_value=FeatureStats(count=1, distinct=1))
+        nf = NodeFeature(mock_api, {}, {1: "a"}, loader)
+
+        assert nf.hasStats
+        assert nf.stats.count == 1
+        assert nf.stats.count == 1
+        loader.assert_called_once()
+
+
 class TestNodeFeatureMetadata:
     """Tests for NodeFeature metadata access."""
 
@@ -204,6 +204,56 @@ class TestOslotsItems:
         assert result[2] == (8, (1, 2, 3, 4, 5))
 
 
+class TestOslotsGather:
+    """Tests for gather() method - slots of many nodes at once."""
+
+    def test_gather_mixed_nodes(self):
+        """gather handles slot, non-slot and out-of-range nodes like s()."""
+        from cfabric.features.warp.oslots import OslotsFeature
+
+        mock_api = MagicMock()
+        data = ([(1, 2), (2, 3), (1, 2, 3)], 3, 6)
+        oslots = OslotsFeature(mock_api, {}, data)
+
+        nodes = [5, 2, 0, 6, 9, 4]
+        slots, offsets, node_ids = oslots.gather(nodes)
+
+        for k, n in enumerate(nodes):
+            assert tuple(slots[offsets[k]:offsets[k + 1]].tolist()) == oslots.s(n)
+        assert node_ids.tolist() == [5, 5, 2, 6, 6, 6, 4, 4]
+
+    def test_gather_csr_backend(self):
+        """gather gives the same result on the CSR backend."""
+        from cfabric.features.warp.oslots import OslotsFeature
+        from cfabric.storage.csr import CSRArray
+
+        mock_api = MagicMock()
+        slot_data = [(1, 2), (2, 3), (1, 2, 3)]
+        tuple_oslots = OslotsFeature(mock_api, {}, (slot_data, 3, 6))
+        csr_oslots = OslotsFeature(
+            mock_api, {}, CSRArray.from_sequences(slot_data), maxSlot=3, maxNode=6
+        )
+
+        nodes = [1, 4, 5, 6, 3]
+        for expected, actual in zip(
+            tuple_oslots.gather(nodes), csr_oslots.gather(nodes)
+        ):
+            assert expected.tolist() == actual.tolist()
+
+    def test_items_csr_backend(self):
+        """items on the CSR backend yields the same pairs as the tuple backend."""
+        from cfabric.features.warp.oslots import OslotsFeature
+        from cfabric.storage.csr import CSRArray
+
+        mock_api = MagicMock()
+        slot_data = [(1, 2), (3,), (1, 2, 3)]
+        csr_oslots = OslotsFeature(
+            mock_api, {}, CSRArray.from_sequences(slot_data), maxSlot=3, maxNode=6
+        )
+
+        assert list(csr_oslots.items()) == [(4, (1, 2)), (5, (3,)), (6, (1, 2, 3))]
+
+
 class TestOslotsMetadata:
     """Tests for metadata access."""
 
@@ -345,3 +345,30 @@ class TestOtypeMetadata:
         otype = OtypeFeature(mock_api, {}, data)
 
         assert otype.maxNode == 150
+
+
+class TestOtypeSupport:
+    """Tests for the vectorized per-type node ranges."""
+
+    def test_ranges(self):
+        import numpy as np
+        from cfabric.features.warp.otype import otype_support
+
+        # Nodes 6-7 phrases, 8 sentence, 9-10 clauses
+        otype_arr = np.array([1, 1, 2, 0, 0], dtype=np.uint8)
+        support = otype_support(otype_arr, ["clause", "phrase", "sentence"], "word", 5)
+
+        assert support == {
+            "word": (1, 5),
+            "phrase": (6, 7),
+            "sentence": (8, 8),
+            "clause": (9, 10),
+        }
+
+    def test_slots_only(self):
+        import numpy as np
+        from cfabric.features.warp.otype import otype_support
+
+        assert otype_support(np.array([], dtype=np.uint8), [], "word", 3) == {
+            "word": (1, 3)
+        }
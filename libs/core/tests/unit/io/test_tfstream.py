@@ -0,0 +1,98 @@
+"""Unit tests for the streaming .tf reader."""
+
+import numpy as np
+import pytest
+
+from cfabric.io.compiler import Compiler
+from cfabric.io.tfstream import TfFeature, read_tf
+
+
+def parse_dict(path):
+    """The feature as the dict based parser of the compiler reads it."""
+    return Compiler(path.parent)._parse_tf_file(path)
+
+
+class TestReadTf:
+    """read_tf() gives the same data as the dict based parser."""
+
+    @pytest.mark.parametrize('chunk', [16, 1 << 22])
+    def test_fixtures(self, fixtures_dir, chunk):
+        """All fixture files read the same, in small and large chunks."""
+        for path in sorted(fixtures_dir.rglob('*.tf')):
+            metadata, data, is_edge, edge_values, is_config = parse_dict(path)
+            feature = read_tf(path, chunk=chunk)
+
+            assert feature.metadata == metadata, path
+            assert (feature.is_edge, feature.edge_values, feature.is_config) == (
+                is_edge, edge_values, is_config
+            ), path
+            assert feature.to_dict() == data, path
+
+    @pytest.mark.parametrize(
+        'content',
+        [
+            '@node\n@valueType=str\n\nx\n\ny\n3\tz\n1-2\tq\n5\t\n\\tab\n',
+            '@node\n@valueType=int\n\n5\n\n7\n2\t9\n1\t-4\n',
+            '@edge\n\n2\n3,4\n1\t2\n',
+            '@edge\n@edgeValues\n@valueType=int\n\n1\t2\t5\n1\t2\t7\n3\n4\t\n'
+            '1-2\t3-4\t\n',
+            '@edge\n@valueType=str\n@edgeValues\n\n1\t2\tb\n1\t2\ta\n3\t\n2\n',
+        ],
+    )
+    def test_implicit_nodes_ranges_and_overrides(self, tmp_path, content):
+        """Implicit nodes, ranges, empty values and repeated nodes."""
+        path = tmp_path / 'feature.tf'
+        path.write_text(content)
+
+        assert read_tf(path, chunk=8).to_dict() == parse_dict(path)[1]
+
+    def test_strings_sorted_and_interned(self, tmp_path):
+        """String values are stored once, sorted, and unused ones dropped."""
+        path = tmp_path / 'feature.tf'
+        path.write_text('@node\n@valueType=str\n\nb\na\nc\nb\n3\tb\n')
+
+        feature = read_tf(path)
+
+        assert feature.strings == ['a', 'b']
+        assert feature.nodes.tolist() == [1, 2, 3, 4]
+        assert feature.values.tolist() == [1, 0, 1, 1]
+
+    def test_wide_nodes(self, tmp_path):
+        """Node numbers beyond 32 bits switch the nodes to 64 bits."""
+        big = 2**32 + 1
+        path = tmp_path / 'feature.tf'
+        path.write_text(f'@edge\n\n1\t2\n{big}\t1,{big + 1}\n2\t{big}\n')
+
+        feature = read_tf(path)
+
+        assert feature.nodes.dtype == np.uint64
+        assert feature.to_dict() == {1: {2}, 2: {big}, big: {1, big + 1}}
+
+    def test_missing_file(self, tmp_path):
+        """A missing file gives an empty feature."""
+        feature = read_tf(tmp_path / 'absent.tf')
+
+        assert len(feature) == 0
+        assert feature.to_dict() == {}
+
+
+class TestFromDict:
+    """TfFeature.from_dict() is the inverse of to_dict()."""
+
+    def test_roundtrip(self, mini_corpus_path):
+        for path in sorted(mini_corpus_path.glob('*.tf')):
+            metadata, data, is_edge, edge_values, is_config = parse_dict(path)
+            if is_config:
+                continue
+            feature = TfFeature.from_dict(data, metadata, is_edge, edge_values)
+            assert feature.to_dict() == data, path
+
+    def test_missing_edge_values(self):
+        """Edges without a value keep None."""
+        data = {1: {2: None, 3: 'x'}}
+        feature = TfFeature.from_dict(data, {'valueType': 'str'}, True, True)
+
+        assert feature.missing.tolist() == [True, False]
+        assert feature.strings == ['x']
+        assert feature.to_dict() == data
+        assert np.array_equal(feature.targets, [2, 3])
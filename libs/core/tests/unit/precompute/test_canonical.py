@@ -0,0 +1,162 @@
+"""Tests for the canonical order on arrays.
+
+The order computed on arrays must be exactly the order defined by the
+comparison function in `prepare.orderByComparison`.
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from cfabric.precompute.canonical import (
+    canonical_order,
+    sequence_arrays,
+    slot_runs,
+    type_ranks,
+)
+from cfabric.precompute.prepare import order, orderByComparison, rank
+
+TYPES = ('word', 'phrase', 'clause', 'sentence', 'chapter')
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+def make_corpus(max_slot, nodes):
+    """otype, oslots and levels data for slots and (type, slots) nodes.
+
+    Types are ranked by the order in which they are listed in `TYPES`.
+    """
+    otype = (tuple(t for (t, _) in nodes), max_slot, max_slot + len(nodes), 'word')
+    oslots = (tuple(tuple(s) for (_, s) in nodes), max_slot, max_slot + len(nodes))
+    levels = tuple((t, 0.0, 0, 0) for t in reversed(TYPES))
+    return otype, oslots, levels
+
+
+
+def assert_same_order(otype, oslots, levels):
+    expected = orderByComparison(quiet, quiet, otype, oslots, levels)
+    assert order(quiet, quiet, otype, oslots, levels) == expected
+
+    (otype_data, max_slot, max_node, slot_type) = otype
+    ranks = type_ranks(otype_data, max_slot, slot_type, levels)
+    nodes, ranked = canonical_order(max_slot, *sequence_arrays(oslots[0]), ranks)
+    assert nodes.tolist() == list(expected)
+    assert ranked.tolist() == list(rank(quiet, quiet, otype, expected))
+
+
+class TestSlotRuns:
+    def test_runs(self):
+        indptr, data = sequence_arrays(((1, 2, 3), (2, 4, 5, 7), ()))
+        run_ptr, run_start, run_end = slot_runs(indptr, data)
+
+        assert run_ptr.tolist() == [0, 1, 4, 4]
+        assert run_start.tolist() == [1, 2, 4, 7]
+        assert run_end.tolist() == [3, 2, 5, 7]
+
+    def test_unsorted_and_repeated_slots(self):
+        """Slot lists are treated as sets."""
+        indptr, data = sequence_arrays(((3, 1, 2, 2), (5, 4)))
+        run_ptr, run_start, run_end = slot_runs(indptr, data)
+
+        assert run_ptr.tolist() == [0, 1, 2]
+        assert run_start.tolist() == [1, 4]
+        assert run_end.tolist() == [3, 5]
+
+    @pytest.mark.parametrize('chunk', [1, 2, 5])
+    def test_chunks(self, chunk):
+        """Reading the rows in ranges gives the same runs."""
+        indptr, data = sequence_arrays(((1, 2, 3), (), (2, 4, 5, 7), (6,), (9, 8)))
+        expected = slot_runs(indptr, data)
+        for got, want in zip(slot_runs(indptr, data, chunk), expected):
+            assert got.tolist() == want.tolist()
+
+
+class TestCanonicalOrder:
+    def test_mini_corpus(self):
+        assert_same_order(*make_corpus(5, [
+            ('phrase', (1, 2, 3)),
+            ('phrase', (4, 5)),
+            ('sentence', (1, 2, 3, 4, 5)),
+        ]))
+
+    def test_embedding_comes_first(self):
+        """Supersets come before subsets, also when they share a prefix."""
+        assert_same_order(*make_corpus(6, [
+            ('phrase', (1, 2)),
+            ('clause', (1, 2, 3)),
+            ('sentence', (1, 2, 3, 5)),
+            ('chapter', (2, 3, 4, 5, 6)),
+        ]))
+
+    def test_same_slots(self):
+        """Same slots: higher level types first, then by node."""
+        assert_same_order(*make_corpus(3, [
+            ('phrase', (1, 2)),
+            ('clause', (1, 2)),
+            ('phrase', (1, 2)),
+            ('clause', (1, 2)),
+            ('phrase', (3,)),
+        ]))
+
+    def test_gapped(self):
+        """Gapped nodes compare by their first slot not in the other."""
+        assert_same_order(*make_corpus(8, [
+            ('phrase', (1, 5)),
+            ('phrase', (1, 2, 3)),
+            ('clause', (1, 2, 4)),
+            ('clause', (1, 2, 3, 6)),
+            ('sentence', (1, 2, 3, 6, 8)),
+            ('sentence', (1, 2, 3, 6, 7)),
+            ('phrase', (2, 4, 6)),
+            ('phrase', (2, 4, 6)),
+            ('clause', (2, 4, 6, 8)),
+            ('clause', (2, 5)),
+        ]))
+
+    def test_empty(self):
+        assert_same_order(*make_corpus(0, []))
+        assert_same_order(*make_corpus(1, []))
+
+    @pytest.mark.parametrize('seed', range(20))
+    def test_random(self, seed):
+        """Random, heavily overlapping and gapped nodes."""
+        rng = random.Random(seed)
+        max_slot = rng.randint(1, 12)
+        nodes = []
+        for _ in range(rng.randint(0, 60)):
+            first = rng.randint(1, max_slot)
+            last = rng.randint(first, min(max_slot, first + 6))
+            slots = [s for s in range(first, last + 1) if rng.random() < 0.7]
+            nodes.append((rng.choice(TYPES[1:]), tuple(slots or [first])))
+        # Copies of nodes, with the same and with other types
+        for (_, slots) in rng.sample(nodes, len(nodes) // 4):
+            nodes.append((rng.choice(TYPES[1:]), slots))
+        rng.shuffle(nodes)
+
+        assert_same_order(*make_corpus(max_slot, nodes))
+
+    @pytest.mark.parametrize('chunk', [1, 4])
+    def test_chunks(self, chunk):
+        """Reading the slots in ranges of rows gives the same order."""
+        otype, oslots, levels = make_corpus(6, [
+            ('phrase', (1, 2)),
+            ('clause', (1, 2, 3)),
+            ('sentence', (1, 2, 3, 5)),
+            ('chapter', (2, 3, 4, 5, 6)),
+        ])
+        ranks = type_ranks(otype[0], 6, 'word', levels)
+        arrays = sequence_arrays(oslots[0])
+        expected = canonical_order(6, *arrays, ranks)
+        for got, want in zip(canonical_order(6, *arrays, ranks, chunk), expected):
+            assert got.tolist() == want.tolist()
+
+    def test_dtypes(self):
+        otype, oslots, levels = make_corpus(2, [('phrase', (1, 2))])
+        ranks = type_ranks(otype[0], 2, 'word', levels)
+        nodes, ranked = canonical_order(2, *sequence_arrays(oslots[0]), ranks)
+
+        assert nodes.dtype == np.uint32
+        assert ranked.dtype == np.uint32
@@ -0,0 +1,189 @@
+"""Tests for the embedding and boundary data on arrays.
+
+The results must be exactly those of the set based definitions below,
+which are the per-node loops that `prepare.levUp`, `prepare.levDown` and
+`prepare.boundary` used to run.
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from cfabric.precompute.canonical import sequence_arrays
+from cfabric.precompute.embedding import boundaries, embeddees, embedders
+from cfabric.precompute.prepare import boundary, levDown, levUp, order, rank
+
+TYPES = ('word', 'phrase', 'clause', 'sentence', 'chapter')
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+def make_corpus(max_slot, nodes):
+    """otype, oslots and rank data for slots and (type, slots) nodes."""
+    otype = (tuple(t for (t, _) in nodes), max_slot, max_slot + len(nodes), 'word')
+    oslots = (tuple(tuple(s) for (_, s) in nodes), max_slot, max_slot + len(nodes))
+    levels = tuple((t, 0.0, 0, 0) for t in reversed(TYPES))
+    ranks = rank(quiet, quiet, otype, order(quiet, quiet, otype, oslots, levels))
+    return otype, oslots, ranks
+
+
+def reference_up(otype, oslots, ranks):
+    (_, max_slot, max_node, _) = otype
+    slot_sets = [{n} for n in range(1, max_slot + 1)] + [set(s) for s in oslots[0]]
+    result = []
+    for n in range(1, max_node + 1):
+        mine = slot_sets[n - 1]
+        ups = [
+            m for m in range(max_slot + 1, max_node + 1)
+            if m != n and mine and mine <= slot_sets[m - 1]
+        ]
+        result.append(tuple(sorted(ups, key=lambda m: -ranks[m - 1])))
+    return tuple(result)
+
+
+def reference_down(otype, ups, ranks):
+    (_, max_slot, max_node, _) = otype
+    inverse = {}
+    for n in range(max_slot + 1, max_node + 1):
+        for m in ups[n - 1]:
+            inverse.setdefault(m, set()).add(n)
+    return tuple(
+        tuple(sorted(inverse.get(n, []), key=lambda m: ranks[m - 1]))
+        for n in range(max_slot + 1, max_node + 1)
+    )
+
+
+def reference_boundary(otype, oslots, ranks):
+    (_, max_slot, _, _) = otype
+    first, last = {}, {}
+    for i, slots in enumerate(oslots[0]):
+        first.setdefault(slots[0], []).append(i + 1 + max_slot)
+        last.setdefault(slots[-1], []).append(i + 1 + max_slot)
+    return (
+        tuple(
+            tuple(sorted(first.get(n, []), key=lambda m: -ranks[m - 1]))
+            for n in range(1, max_slot + 1)
+        ),
+        tuple(
+            tuple(sorted(last.get(n, []), key=lambda m: ranks[m - 1]))
+            for n in range(1, max_slot + 1)
+        ),
+    )
+
+
+def rows(indptr, data):
+    bounds = indptr.tolist()
+    return tuple(
+        tuple(data[b:e].tolist()) for (b, e) in zip(bounds, bounds[1:])
+    )
+
+
+def assert_same(otype, oslots, ranks, chunk=1 << 22):
+    ups = reference_up(otype, oslots, ranks)
+    assert levUp(quiet, quiet, otype, oslots, ranks) == ups
+    downs = reference_down(otype, ups, ranks)
+    assert tuple(map(tuple, levDown(quiet, quiet, otype, ups, ranks))) == downs
+    bounds = reference_boundary(otype, oslots, ranks)
+    assert boundary(quiet, quiet, otype, oslots, ranks) == bounds
+
+    max_slot = otype[1]
+    up = embedders(
+        max_slot, *sequence_arrays(oslots[0]), np.asarray(ranks), chunk=chunk
+    )
+    assert rows(*up) == ups
+
+
+def random_corpus(seed):
+    rng = random.Random(seed)
+    max_slot = rng.randint(1, 15)
+    nodes = []
+    for _ in range(rng.randint(1, 50)):
+        first = rng.randint(1, max_slot)
+        last = rng.randint(first, min(max_slot, first + 8))
+        slots = [s for s in range(first, last + 1) if rng.random() < 0.75]
+        nodes.append((rng.choice(TYPES[1:]), tuple(slots or [first])))
+    for (_, slots) in rng.sample(nodes, len(nodes) // 4):
+        nodes.append((rng.choice(TYPES[1:]), slots))
+    rng.shuffle(nodes)
+    return make_corpus(max_slot, nodes)
+
+
+class TestEmbedding:
+    def test_mini_corpus(self):
+        assert_same(*make_corpus(5, [
+            ('phrase', (1, 2, 3)),
+            ('phrase', (4, 5)),
+            ('sentence', (1, 2, 3, 4, 5)),
+        ]))
+
+    def test_gapped(self):
+        """Gapped embedders only embed nodes within their runs."""
+        assert_same(*make_corpus(8, [
+            ('clause', (1, 2, 5, 6)),
+            ('phrase', (1, 2)),
+            ('phrase', (2, 5)),
+            ('phrase', (2, 3)),
+            ('phrase', (5, 6)),
+            ('phrase', (1, 2, 5, 6)),
+            ('sentence', (1, 2, 3, 5, 6, 8)),
+            ('phrase', (7,)),
+        ]))
+
+    @pytest.mark.parametrize('seed', range(20))
+    def test_random(self, seed):
+        assert_same(*random_corpus(seed))
+
+    @pytest.mark.parametrize('chunk', [1, 3, 7])
+    def test_chunks(self, chunk):
+        """The result does not depend on the chunk size."""
+        assert_same(*random_corpus(99), chunk=chunk)
+
+    def test_written_to_npy(self, tmp_path):
+        otype, oslots, ranks = random_corpus(7)
+        max_slot = otype[1]
+        arrays = sequence_arrays(oslots[0])
+        rank_arr = np.asarray(ranks)
+
+        up = embedders(max_slot, *arrays, rank_arr, str(tmp_path / 'levup'))
+        down = embeddees(max_slot, *up, rank_arr, str(tmp_path / 'levdown'))
+        (first, last) = boundaries(
+            max_slot, *arrays, rank_arr,
+            (str(tmp_path / 'first'), str(tmp_path / 'last')),
+        )
+
+        for (name, (indptr, data)) in (
+            ('levup', up), ('levdown', down), ('first', first), ('last', last)
+        ):
+            assert isinstance(data, np.memmap)
+            assert np.array_equal(np.load(tmp_path / f'{name}_indptr.npy'), indptr)
+            assert np.array_equal(np.load(tmp_path / f'{name}_data.npy'), data)
+            assert indptr.dtype == np.uint32 and data.dtype == np.uint32
+        assert rows(*down) == reference_down(
+            otype, reference_up(otype, oslots, ranks), ranks
+        )
+
+    @pytest.mark.parametrize('budget', [1, 500, 5000])
+    @pytest.mark.parametrize('seed', [3, 99])
+    def test_budget(self, tmp_path, seed, budget):
+        """Under a memory budget the sorts are spilled; the result is the same."""
+        otype, oslots, ranks = random_corpus(seed)
+        max_slot = otype[1]
+        arrays = sequence_arrays(oslots[0])
+        rank_arr = np.asarray(ranks)
+        ups = reference_up(otype, oslots, ranks)
+
+        up = embedders(
+            max_slot, *arrays, rank_arr, str(tmp_path / 'levup'), budget=budget
+        )
+        assert rows(*up) == ups
+        down = embeddees(
+            max_slot, *up, rank_arr, str(tmp_path / 'levdown'), budget=budget
+        )
+        assert rows(*down) == reference_down(otype, ups, ranks)
+        assert sorted(p.name for p in tmp_path.iterdir()) == [
+            'levdown_data.npy', 'levdown_indptr.npy',
+            'levup_data.npy', 'levup_indptr.npy',
+        ]
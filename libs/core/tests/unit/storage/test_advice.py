@@ -0,0 +1,52 @@
+"""Tests for memory-map advice and prefetching."""
+
+import numpy as np
+import pytest
+
+from cfabric.storage import advice
+from cfabric.storage.csr import CSRArray
+
+
+@pytest.fixture
+def mapped(tmp_path):
+    np.save(tmp_path / 'arr.npy', np.arange(100_000, dtype=np.int64))
+    return np.load(tmp_path / 'arr.npy', mmap_mode='r')
+
+
+class TestAdvise:
+    @pytest.mark.skipif(not advice.ADVICE, reason="no madvise on this platform")
+    def test_advise_mapped(self, mapped):
+        assert advice.advise(mapped, 'random')
+        assert advice.advise(mapped[1000:2000], 'willneed')
+
+    def test_advise_plain_array_is_noop(self):
+        assert not advice.advise(np.arange(10), 'random')
+
+    def test_unknown_policy(self, mapped):
+        with pytest.raises(ValueError):
+            advice.advise(mapped, 'fast')
+
+    def test_prefetch_keeps_data(self, mapped):
+        advice.prefetch(mapped)
+        advice.prefetch(np.arange(3))
+
+        assert int(mapped[99_999]) == 99_999
+
+
+class TestStorageArrays:
+    def test_finds_mapped_csr_arrays(self, tmp_path):
+        CSRArray.from_sequences([[1, 2], [3]]).save(str(tmp_path / 'x'))
+        csr = CSRArray.load(str(tmp_path / 'x'))
+
+        found = list(advice.storage_arrays([csr, None, np.arange(3)]))
+
+        assert len(found) == 2
+        assert {a.nbytes for a in found} == {csr.indptr.nbytes, csr.data.nbytes}
+
+    def test_warm_threads(self, mapped):
+        threads = advice.warm([mapped, mapped[:10]], threads=2)
+        for thread in threads:
+            thread.join()
+
+        assert len(threads) == 2
+        assert all(t.daemon for t in threads)
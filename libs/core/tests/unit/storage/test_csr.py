@@ -4,7 +4,16 @@ import pytest
 import tempfile
 import numpy as np
 from pathlib import Path
-from cfabric.storage.csr import CSRArray, CSRArrayWithValues
+from cfabric.storage.csr import (
+    CSRArray,
+    CSRArrayWithValues,
+    CompressedCSRArray,
+    ZBLOCK_ROWS,
+    gather_rows,
+    index_dtype,
+    node_dtype,
+)
+from cfabric.storage.shared_cache import segment_name, unlink_shared
 
 
 class TestCSRArray:
@@ -20,6 +29,36 @@ class TestCSRArray:
         assert list(csr[1]) == [4, 5]
         assert list(csr[2]) == [6]
 
+    def test_from_pairs(self):
+        """CSRArray can be built from unordered (row, column) pairs."""
+        rows = np.array([2, 0, 0, 2, 5])
+        cols = np.array([6, 3, 1, 4, 9])
+        csr = CSRArray.from_pairs(rows, cols, num_rows=3)
+
+        expected = CSRArray.from_sequences([[1, 3], [], [4, 6]])
+        assert np.array_equal(csr.indptr, expected.indptr)
+        assert np.array_equal(csr.data, expected.data)
+        assert csr.indptr.dtype == expected.indptr.dtype
+        assert csr.data.dtype == expected.data.dtype
+
+    def test_wide_node_ids(self):
+        """Node ids beyond 32 bits are stored in 64 bits, others in 32."""
+        big = 2**32 + 5
+        csr = CSRArray.from_pairs(np.array([0, 1]), np.array([3, big]), num_rows=2)
+        assert csr.data.dtype == np.uint64
+        assert csr.indptr.dtype == np.uint32
+        assert csr[1] == (big,)
+
+        assert CSRArray.from_sequences([[1], [big]]).data.dtype == np.uint64
+        assert CSRArray.from_sequences([[1], [2**32 - 1]]).data.dtype == np.uint32
+
+    def test_dtype_choice(self):
+        """Row pointers and node ids take 64 bits only past 32 bits."""
+        assert index_dtype(2**32 - 1) == 'uint32'
+        assert index_dtype(2**32) == 'uint64'
+        assert node_dtype(2**32 - 1) == 'uint32'
+        assert node_dtype(2**32) == 'uint64'
+
     def test_empty_rows(self):
         """CSRArray handles empty rows correctly."""
         sequences = [[1], [], [2, 3], []]
@@ -77,6 +116,19 @@ class TestCSRArrayWithValues:
         assert list(indices) == [30]
         assert list(values) == [300]
 
+    def test_from_pairs(self):
+        """CSRArrayWithValues can be built from unordered triples."""
+        rows = np.array([2, 0, 0])
+        cols = np.array([30, 20, 10])
+        values = np.array([300, 200, 100], dtype='int32')
+        csr = CSRArrayWithValues.from_pairs(rows, cols, values, num_rows=3)
+
+        expected = CSRArrayWithValues.from_dict_of_dicts(
+            {0: {10: 100, 20: 200}, 2: {30: 300}}, num_rows=3
+        )
+        for name in ('indptr', 'indices', 'values'):
+            assert np.array_equal(getattr(csr, name), getattr(expected, name))
+
     def test_get_as_dict(self):
         """get_as_dict returns dict for API compatibility."""
         data = {0: {10: 100, 20: 200}}
@@ -116,6 +168,40 @@ class TestCSRArrayWithValues:
             assert loaded.get_as_dict(2) == {30: 'B0'}
 
 
+    def test_string_values_stay_encoded(self):
+        """Loaded string values are mmapped ids decoded only on access."""
+        data = {0: {10: 'A0', 20: None}, 1: {30: 'B0'}}
+        csr = CSRArrayWithValues.from_dict_of_dicts(data, num_rows=2, value_dtype=object)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / 'test'
+            csr.save(str(path))
+            loaded = CSRArrayWithValues.load(str(path), mmap_mode='r')
+
+            assert isinstance(loaded.values, np.memmap)
+            assert loaded.values.dtype == np.uint32
+            assert loaded.value_table is not None
+            assert loaded.get_as_dict(0) == {10: 'A0', 20: None}
+            assert loaded[1] == ((30,), ('B0',))
+            del loaded
+
+    def test_load_legacy_json_lookup(self):
+        """Older .cfm directories with a JSON value lookup still load."""
+        import json
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / 'test'
+            np.save(f"{path}_indptr.npy", np.array([0, 2, 3], dtype=np.uint32))
+            np.save(f"{path}_indices.npy", np.array([10, 20, 30], dtype=np.uint32))
+            np.save(f"{path}_values.npy", np.array([1, 0, 1], dtype=np.uint32))
+            with open(f"{path}_values_lookup.json", 'w') as f:
+                json.dump(['x', 'y'], f)
+
+            loaded = CSRArrayWithValues.load(str(path))
+            assert loaded.get_as_dict(0) == {10: 'y', 20: 'x'}
+            assert loaded.get_as_dict(1) == {30: 'y'}
+
+
 class TestCSRArrayBatchOperations:
     """Tests for batch/vectorized CSRArray operations."""
 
@@ -194,6 +280,63 @@ class TestCSRArrayBatchOperations:
         assert targets == set()
 
 
+class TestCSRArrayGather:
+    """Tests for vectorized row gathering."""
+
+    def test_gather_rows_in_request_order(self):
+        """gather concatenates rows in the order they were requested."""
+        sequences = [[10, 20], [30], [], [40, 50, 60]]
+        csr = CSRArray.from_sequences(sequences)
+
+        data, offsets, row_ids = csr.gather(np.array([3, 0, 2, 1]))
+
+        assert data.tolist() == [40, 50, 60, 10, 20, 30]
+        assert offsets.tolist() == [0, 3, 5, 5, 6]
+        assert row_ids.tolist() == [3, 3, 3, 0, 0, 1]
+
+    def test_gather_matches_getitem(self):
+        """Each gathered segment equals the row obtained by indexing."""
+        sequences = [[1, 2, 3], [], [4], [5, 6]]
+        csr = CSRArray.from_sequences(sequences)
+
+        rows = [0, 1, 2, 3, 0]
+        data, offsets, _ = csr.gather(rows)
+        for k, row in enumerate(rows):
+            assert tuple(data[offsets[k]:offsets[k + 1]].tolist()) == csr[row]
+
+    def test_gather_empty(self):
+        """gather of no rows yields empty arrays."""
+        csr = CSRArray.from_sequences([[1, 2]])
+
+        data, offsets, row_ids = csr.gather(np.array([], dtype=np.int64))
+
+        assert len(data) == 0
+        assert offsets.tolist() == [0]
+        assert len(row_ids) == 0
+
+    def test_gather_rows_out_of_range_are_empty(self):
+        """gather_rows treats out-of-range rows as empty rows."""
+        csr = CSRArray.from_sequences([[10, 20], [30]])
+
+        data, offsets, row_ids = gather_rows(csr, np.array([-1, 1, 5, 0]))
+
+        assert data.tolist() == [30, 10, 20]
+        assert offsets.tolist() == [0, 0, 1, 1, 3]
+        assert row_ids.tolist() == [1, 0, 0]
+
+    def test_gather_rows_tuple_backend(self):
+        """gather_rows gives the same result for tuple-of-tuples data."""
+        sequences = ((10, 20), (30,), ())
+        csr = CSRArray.from_sequences(sequences)
+        rows = np.array([2, 0, 7, 1])
+
+        for data in (csr, sequences):
+            values, offsets, row_ids = gather_rows(data, rows)
+            assert values.tolist() == [10, 20, 30]
+            assert offsets.tolist() == [0, 0, 2, 2, 3]
+            assert row_ids.tolist() == [0, 0, 1]
+
+
 class TestCSRArrayPreload:
     """Tests for CSRArray RAM preloading functionality."""
 
@@ -256,3 +399,196 @@ class TestCSRArrayPreload:
         assert sources1 == sources2
         assert targets1 == targets2
 
+
+class TestCSRArraySharedPreload:
+    """Tests for preloading into shared memory."""
+
+    @pytest.fixture
+    def name(self, request):
+        name = segment_name('test_csr', request.node.name, id(request))
+        yield name
+        unlink_shared(name)
+
+    def test_second_instance_attaches(self, name):
+        """Instances preloading under one name see the same segment."""
+        sequences = [[1, 2, 3], [], [4, 5]]
+        first = CSRArray.from_sequences(sequences)
+        second = CSRArray.from_sequences(sequences)
+        # Data the second instance would copy if it did not attach
+        second._data = np.zeros_like(second._data)
+
+        assert first.preload_to_shared(name)
+        assert second.preload_to_shared(name)
+
+        assert first.is_shared and second.is_shared
+        assert [list(second[i]) for i in range(3)] == [[1, 2, 3], [], [4, 5]]
+        assert not second.data.flags.writeable
+
+    def test_release_detaches(self, name):
+        csr = CSRArray.from_sequences([[1, 2], [3]])
+        csr.preload_to_shared(name)
+        csr.release_cache()
+
+        assert not csr.is_shared
+        assert not csr.is_cached
+        assert list(csr[1]) == [3]
+        assert unlink_shared(name)
+
+    def test_compressed(self, name):
+        sequences = [list(range(i, i + 3)) for i in range(1, 600)]
+        csr = CompressedCSRArray.from_csr(CSRArray.from_sequences(sequences))
+
+        assert csr.preload_to_shared(name)
+        assert list(csr[598]) == [599, 600, 601]
+        data, _, _ = csr.gather([0, 1])
+        assert data.tolist() == [1, 2, 3, 2, 3, 4]
+
+    def test_compressed_two_processes(self, name, tmp_path, monkeypatch):
+        """Only the process that makes the segment decodes the blocks."""
+        import subprocess
+        import sys
+
+        sequences = [[i, 2**32 + i] for i in range(1, 2 * ZBLOCK_ROWS)]
+        prefix = str(tmp_path / 'edges')
+        CompressedCSRArray.from_csr(CSRArray.from_sequences(sequences)).save(prefix)
+        subprocess.run(
+            [
+                sys.executable, '-c',
+                'from cfabric.storage.csr import CompressedCSRArray\n'
+                f'assert CompressedCSRArray.load({prefix!r})'
+                f'.preload_to_shared({name!r})',
+            ],
+            check=True,
+        )
+
+        def decode(self, b):
+            raise AssertionError('decoded in the attaching process')
+
+        monkeypatch.setattr(CompressedCSRArray, '_decode_block', decode)
+        csr = CompressedCSRArray.load(prefix)
+        assert csr.preload_to_shared(name)
+        assert csr.is_shared
+        assert csr.data.dtype == np.uint64
+        assert list(csr[0]) == [1, 2**32 + 1]
+        assert list(csr[len(sequences) - 1]) == sequences[-1]
+
+    def test_creator_died(self, name):
+        """A segment left half-made by a killed creator is made afresh."""
+        import subprocess
+        import sys
+        import time
+
+        subprocess.run(
+            [
+                sys.executable, '-c',
+                'import os\n'
+                'from cfabric.storage.shared_cache import share_arrays\n'
+                f'share_arrays({name!r}, {{"data": ("uint32", 5)}}, '
+                'lambda arrays: os._exit(1))',
+            ],
+            check=False,
+        )
+        csr = CSRArray.from_sequences([[1, 2], [3]])
+        start = time.monotonic()
+        assert csr.preload_to_shared(name)
+        assert time.monotonic() - start < 5
+        assert csr.is_shared
+        assert list(csr[1]) == [3]
+
+    def test_fill_timed_out(self, name):
+        """A segment that is not ready in time is made afresh."""
+        from cfabric.storage.shared_cache import share_arrays
+
+        specs = {'data': ('uint32', 3)}
+        stuck = share_arrays(name, specs, lambda arrays: None)
+        assert stuck is not None
+        stuck[1].buf[:8] = bytes(8)  # not ready, the creator (we) still alive
+
+        shared = share_arrays(
+            name, specs, lambda arrays: arrays['data'].fill(7), timeout=0.05
+        )
+        assert shared is not None
+        assert shared[0]['data'].tolist() == [7, 7, 7]
+        stuck[1].close()
+
+    def test_segment_names(self):
+        assert segment_name('a', 1) == segment_name('a', 1)
+        assert segment_name('a', 1) != segment_name('a', 2)
+        assert len(segment_name('x' * 500)) <= 30
+
+
+
+class TestCompressedCSRArray:
+    """Tests for the compressed CSR variant."""
+
+    @staticmethod
+    def _sequences():
+        rng = np.random.default_rng(7)
+        sequences = []
+        for i in range(3 * ZBLOCK_ROWS + 5):
+            k = int(rng.integers(0, 6))
+            if i % 3 == 0:
+                start = int(rng.integers(1, 10**6))
+                sequences.append(list(range(start, start + k)))
+            else:
+                sequences.append(rng.integers(1, 2**32 - 1, size=k).tolist())
+        return sequences
+
+    @pytest.mark.parametrize("mode", [None, 'runs', 'delta'])
+    def test_rows_roundtrip(self, mode):
+        """Every row decodes to the original data."""
+        csr = CSRArray.from_sequences(self._sequences())
+        zcsr = CompressedCSRArray.from_csr(csr, mode)
+
+        assert len(zcsr) == len(csr)
+        for i in range(len(csr)):
+            assert zcsr[i] == csr[i]
+        assert zcsr[-1] == csr[len(csr) - 1]
+        with pytest.raises(IndexError):
+            zcsr[len(csr)]
+
+    @pytest.mark.parametrize("mode", ['runs', 'delta'])
+    def test_gather_matches_plain(self, mode):
+        """gather gives the same result as on the plain array."""
+        csr = CSRArray.from_sequences(self._sequences())
+        zcsr = CompressedCSRArray.from_csr(csr, mode)
+        rows = np.array([700, 3, 3, 0, 256, 255, len(csr) - 1])
+
+        for expected, actual in zip(csr.gather(rows), zcsr.gather(rows)):
+            assert expected.tolist() == actual.tolist()
+        assert zcsr.get_all_targets({1, 4, 257}) == csr.get_all_targets({1, 4, 257})
+
+    def test_runs_chosen_for_slot_intervals(self):
+        """Contiguous slot rows are stored as runs and shrink a lot."""
+        sequences = [list(range(10 * i + 1, 10 * i + 11)) for i in range(1000)]
+        csr = CSRArray.from_sequences(sequences)
+        zcsr = CompressedCSRArray.from_csr(csr)
+
+        assert zcsr.runptr is not None
+        assert zcsr.zdata.nbytes < csr.data.nbytes / 10
+
+    def test_preload_decodes_everything(self):
+        csr = CSRArray.from_sequences([[5, 6, 7], [], [2]])
+        zcsr = CompressedCSRArray.from_csr(csr)
+
+        assert not zcsr.is_cached
+        zcsr.preload_to_ram()
+        assert zcsr.is_cached
+        assert zcsr.data.tolist() == [5, 6, 7, 2]
+        assert zcsr[2] == (2,)
+
+    def test_save_load_roundtrip(self):
+        """Saved arrays load back compressed; exists() detects them."""
+        csr = CSRArray.from_sequences(self._sequences())
+        zcsr = CompressedCSRArray.from_csr(csr, 'runs')
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = str(Path(tmpdir) / 'test')
+            assert not CompressedCSRArray.exists(path)
+            zcsr.save(path)
+            assert CompressedCSRArray.exists(path)
+
+            loaded = CompressedCSRArray.load(path)
+            for i in range(len(csr)):
+                assert loaded[i] == csr[i]
+            del loaded
@@ -2,6 +2,7 @@
 
 import pytest
 import json
+import shutil
 import tempfile
 import numpy as np
 from pathlib import Path
@@ -78,3 +79,33 @@ class TestMmapManager:
         assert len(mgr._arrays) > 0
         mgr.close()
         assert len(mgr._arrays) == 0
+
+    def test_packed(self, cfm_dir):
+        """A packed corpus is served like the directory it was made from."""
+        from cfabric.storage.pack import write_pack
+
+        pack_path = write_pack(cfm_dir)
+        shutil.rmtree(cfm_dir)
+        mgr = MmapManager(pack_path)
+        try:
+            assert mgr.exists()
+            assert mgr.cfm_path == cfm_dir
+            assert mgr.max_node == 8
+            assert list(mgr.get_array('warp', 'otype')) == [0, 0, 1]
+        finally:
+            mgr.close()
+
+    def test_packed_managers_are_independent(self, cfm_dir):
+        """Closing one manager of a pack leaves other managers working."""
+        from cfabric.storage.pack import write_pack
+
+        pack_path = write_pack(cfm_dir)
+        shutil.rmtree(cfm_dir)
+        first = MmapManager(pack_path)
+        second = MmapManager(pack_path)
+        second.get_array('warp', 'otype')
+        second.close()
+        try:
+            assert list(first.get_array('warp', 'otype')) == [0, 0, 1]
+        finally:
+            first.close()
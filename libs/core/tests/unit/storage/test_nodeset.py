@@ -0,0 +1,98 @@
+"""Tests for the bitmap node set."""
+
+import numpy as np
+import pytest
+
+from cfabric.storage.nodeset import NodeSet
+
+
+class TestNodeSetConstruction:
+    """Test building node sets."""
+
+    def test_from_nodes(self):
+        ns = NodeSet.from_nodes({3, 1, 17}, max_node=20)
+
+        assert len(ns) == 3
+        assert ns.to_array().tolist() == [1, 3, 17]
+        assert list(ns) == [1, 3, 17]
+        assert ns.to_set() == {1, 3, 17}
+
+    def test_from_nodes_ignores_out_of_range(self):
+        ns = NodeSet.from_nodes([0, 5, 21, -2], max_node=20)
+
+        assert ns.to_set() == {5}
+
+    def test_from_nodes_accepts_range_and_array(self):
+        assert NodeSet.from_nodes(range(2, 5), 10).to_set() == {2, 3, 4}
+        assert NodeSet.from_nodes(np.array([9, 9, 1]), 10).to_set() == {1, 9}
+
+    def test_from_range(self):
+        ns = NodeSet.from_range(4, 8, max_node=10)
+
+        assert ns.to_set() == {4, 5, 6, 7, 8}
+
+    def test_empty(self):
+        ns = NodeSet(10)
+
+        assert len(ns) == 0
+        assert not ns
+        assert list(ns) == []
+
+
+class TestNodeSetAlgebra:
+    """Test set operations and membership."""
+
+    @pytest.fixture
+    def pair(self):
+        return (
+            NodeSet.from_nodes({1, 2, 3, 9}, max_node=12),
+            NodeSet.from_nodes({3, 4, 9, 12}, max_node=12),
+        )
+
+    def test_union(self, pair):
+        a, b = pair
+        assert (a | b).to_set() == {1, 2, 3, 4, 9, 12}
+        assert a.union(b) == a | b
+
+    def test_intersection(self, pair):
+        a, b = pair
+        assert (a & b).to_set() == {3, 9}
+
+    def test_difference(self, pair):
+        a, b = pair
+        assert (a - b).to_set() == {1, 2}
+        assert (b - a).to_set() == {4, 12}
+
+    def test_symmetric_difference(self, pair):
+        a, b = pair
+        assert (a ^ b).to_set() == {1, 2, 4, 12}
+
+    def test_mismatched_ranges_rejected(self):
+        with pytest.raises(ValueError):
+            NodeSet(5) | NodeSet(6)
+
+    def test_contains(self, pair):
+        a, _ = pair
+        assert 9 in a
+        assert np.uint32(2) in a
+        assert 4 not in a
+        assert 100 not in a
+        assert 'x' not in a
+
+    def test_isin_and_filter(self, pair):
+        a, _ = pair
+        nodes = np.array([9, 4, 1, 13, 0])
+
+        assert a.isin(nodes).tolist() == [True, False, True, False, False]
+        assert a.filter(nodes).tolist() == [9, 1]
+
+    def test_equality_with_python_set(self, pair):
+        a, _ = pair
+        assert a == {1, 2, 3, 9}
+        assert a != {1}
+
+    def test_canonical_order(self):
+        ns = NodeSet.from_nodes({1, 2, 4}, max_node=4)
+        rank = np.array([3, 0, 2, 1])
+
+        assert ns.canonical(rank).tolist() == [2, 4, 1]
@@ -0,0 +1,97 @@
+"""Tests for the packed .cfm container."""
+
+import json
+
+import numpy as np
+import pytest
+
+from cfabric.storage.csr import CSRArray
+from cfabric.storage.pack import (
+    PACK_ALIGN,
+    CfmPack,
+    load_npy,
+    npy_exists,
+    write_pack,
+)
+from cfabric.storage.string_pool import StringPool
+
+
+@pytest.fixture
+def cfm_dir(tmp_path):
+    """A small .cfm directory with arrays and JSON files."""
+    cfm_path = tmp_path / '.cfm' / '1'
+    (cfm_path / 'warp').mkdir(parents=True)
+    (cfm_path / 'features').mkdir()
+    with open(cfm_path / 'meta.json', 'w') as f:
+        json.dump({'max_slot': 3, 'max_node': 4}, f)
+    with open(cfm_path / 'features' / 'pos_meta.json', 'w') as f:
+        json.dump({'value_type': 'str'}, f)
+    np.save(cfm_path / 'warp' / 'otype.npy', np.array([0, 0, 0, 1], dtype='uint8'))
+    CSRArray.from_sequences([[1, 2], [3]]).save(str(cfm_path / 'warp' / 'oslots'))
+    StringPool.from_dict({1: 'a', 3: 'b'}, max_node=4).save(
+        str(cfm_path / 'features' / 'pos')
+    )
+    return cfm_path
+
+
+class TestCfmPack:
+    def test_round_trip(self, cfm_dir):
+        path = write_pack(cfm_dir)
+        pack = CfmPack(path)
+
+        assert path.name == '1.cfmpack'
+        assert pack.root == cfm_dir
+        assert pack.get_json('meta') == {'max_slot': 3, 'max_node': 4}
+        assert pack.get_json('features/pos_meta') == {'value_type': 'str'}
+        otype = pack.array('warp/otype')
+        assert otype.tolist() == [0, 0, 0, 1]
+        assert otype.dtype == np.uint8
+        assert all(offset % PACK_ALIGN == 0 for offset, _, _ in pack.arrays.values())
+
+    def test_missing_entries(self, cfm_dir):
+        pack = CfmPack(write_pack(cfm_dir))
+
+        with pytest.raises(FileNotFoundError):
+            pack.array('warp/nothing')
+        with pytest.raises(FileNotFoundError):
+            pack.get_json('nothing')
+
+    def test_not_a_pack(self, tmp_path):
+        path = tmp_path / 'x.cfmpack'
+        path.write_bytes(b'\x00' * 64)
+
+        with pytest.raises(ValueError):
+            CfmPack(path)
+
+    def test_object_arrays_rejected(self, cfm_dir):
+        np.save(
+            cfm_dir / 'features' / 'old_strings.npy',
+            np.array(['a', None], dtype=object),
+            allow_pickle=True,
+        )
+
+        with pytest.raises(ValueError):
+            write_pack(cfm_dir, cfm_dir.parent / 'out.cfmpack')
+        assert not (cfm_dir.parent / 'out.cfmpack').exists()
+
+
+class TestPackReads:
+    def test_pack_serves_storage_loads(self, cfm_dir):
+        import shutil
+
+        pack = CfmPack(write_pack(cfm_dir))
+        shutil.rmtree(cfm_dir)
+        assert npy_exists(cfm_dir / 'warp' / 'otype.npy', pack)
+        assert not npy_exists(cfm_dir / 'warp' / 'nothing.npy', pack)
+        assert load_npy(cfm_dir / 'warp' / 'otype.npy', 'r', pack).tolist() == [
+            0, 0, 0, 1
+        ]
+
+        oslots = CSRArray.load(str(cfm_dir / 'warp' / 'oslots'), pack=pack)
+        assert oslots[0] == (1, 2)
+        pool = StringPool.load(str(cfm_dir / 'features' / 'pos'), pack=pack)
+        assert pool.get(1) == 'a'
+        assert pool.get(2) is None
+
+        # Without the pack the paths point to the removed directory
+        assert not npy_exists(cfm_dir / 'warp' / 'otype.npy')
@@ -0,0 +1,78 @@
+"""Tests for the inverted postings index."""
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from cfabric.storage.postings import PostingsIndex
+from cfabric.storage.string_pool import StringPool, IntFeatureArray, MISSING_STR_INDEX
+
+
+class TestPostingsIndex:
+    """Test PostingsIndex construction and lookup."""
+
+    def test_build_groups_nodes_in_rank_order(self):
+        """Nodes of each value are stored in canonical order."""
+        codes = np.array([1, 0, 1, -1, 1, 0], dtype=np.int32)
+        # Canonical order: 6, 5, 4, 3, 2, 1
+        rank = [5, 4, 3, 2, 1, 0]
+        postings = PostingsIndex.build(codes, -1, rank)
+
+        assert postings.keys.tolist() == [0, 1]
+        assert postings.lookup(np.array([0])).tolist() == [6, 2]
+        assert postings.lookup(np.array([1])).tolist() == [5, 3, 1]
+
+    def test_lookup_several_and_unknown(self):
+        """Several ids are concatenated; unknown ids are ignored."""
+        codes = np.array([3, 7, 3, 9])
+        postings = PostingsIndex.build(codes, -1, [0, 1, 2, 3])
+
+        assert postings.lookup(np.array([9, 3, 5, 100])).tolist() == [1, 3, 4]
+        assert postings.lookup(np.array([5])).tolist() == []
+        assert postings.lookup(np.array([], dtype=np.int64)).tolist() == []
+
+    def test_items(self):
+        codes = np.array([2, 2, 5])
+        postings = PostingsIndex.build(codes, -1, [0, 1, 2])
+
+        assert [(k, v.tolist()) for k, v in postings.items()] == [(2, [1, 2]), (5, [3])]
+
+    def test_save_load_roundtrip(self):
+        codes = np.array([1, MISSING_STR_INDEX, 0], dtype=np.uint32)
+        postings = PostingsIndex.build(codes, MISSING_STR_INDEX, [0, 1, 2])
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / 'test_postings'
+            postings.save(str(path))
+            loaded = PostingsIndex.load(str(path))
+
+            assert loaded.keys.tolist() == [0, 1]
+            assert loaded.lookup(np.array([1])).tolist() == [1]
+            del loaded
+
+
+class TestFeaturePostings:
+    """Test postings lookups through StringPool and IntFeatureArray."""
+
+    def test_string_pool_without_postings(self):
+        pool = StringPool.from_dict({1: 'a'}, max_node=1)
+
+        assert pool.nodes_with_values(['a']) is None
+        assert pool.value_index() is None
+
+    def test_string_pool_with_postings(self):
+        pool = StringPool.from_dict({1: 'b', 2: 'a', 3: 'b'}, max_node=4)
+        pool.postings = PostingsIndex.build(pool.indices, MISSING_STR_INDEX, [0, 1, 2, 3])
+
+        assert pool.nodes_with_values(['b']).tolist() == [1, 3]
+        assert sorted(pool.nodes_with_values(['a', 'b', 'z']).tolist()) == [1, 2, 3]
+        assert pool.value_index() == {'a': [2], 'b': [1, 3]}
+
+    def test_int_array_with_postings(self):
+        arr = IntFeatureArray.from_dict({1: 4, 2: 0, 3: 4}, max_node=3)
+        arr.postings = PostingsIndex.build(arr.values, IntFeatureArray.MISSING, [2, 1, 0])
+
+        assert arr.nodes_with_values([4]).tolist() == [3, 1]
+        assert arr.nodes_with_values(['4']).tolist() == []
+        assert arr.value_index() == {0: [2], 4: [3, 1]}
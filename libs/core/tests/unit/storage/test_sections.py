@@ -0,0 +1,155 @@
+"""Tests for the memory-mapped section and structure indexes."""
+
+import numpy as np
+import pytest
+
+from cfabric.storage.sections import (
+    RowMapping,
+    load_sections,
+    load_structure,
+    save_sections,
+    save_structure,
+)
+
+
+SECTIONS = dict(
+    sec1={10: {1: 12, 2: 13}, 11: {1: 14}},
+    sec2={10: {1: {1: 1, 2: 2}, 2: {1: 3}}, 11: {1: {'a': 4, None: 5}}},
+    seqFromNode={
+        10: (1,), 12: (1, 1), 1: (1, 1, 1), 2: (1, 1, 2), 13: (1, 2), 3: (1, 2, 1),
+        11: (2,), 14: (2, 1), 4: (2, 1, 1), 5: (2, 1, 2),
+    },
+)
+SECTIONS['nodeFromSeq'] = {s: n for (n, s) in SECTIONS['seqFromNode'].items()}
+
+NAMES = {
+    '': dict(
+        language='default',
+        languageEnglish='default',
+        type='book',
+        names=[[11, 'Exodus'], [10, 'Genesis']],
+    ),
+    'nl': dict(
+        language='Nederlands',
+        languageEnglish='Dutch',
+        type='book',
+        names=[[10, 'Genesis'], [11, 'Genesis']],
+    ),
+}
+
+H = {
+    4: (('part', 1),),
+    5: (('part', 1), ('chapter', 'one')),
+    6: (('part', 1), ('chapter', 'two')),
+    7: (('part', 1), ('chapter', 'two')),
+    8: (('part', 2),),
+}
+STRUCTURE = (
+    H,
+    {key: n for (n, key) in H.items()},
+    {H[6]: (7, 6)},
+    (4, 8),
+    {5: 4, 6: 4, 7: 4},
+    {4: (5, 7, 6)},
+)
+
+
+class TestRowMapping:
+    def test_groups(self):
+        keys = np.array([1, 1, 3, 5, 5, 5], dtype=np.uint32)
+        mapping = RowMapping(keys, lambda s, e: (s, e))
+
+        assert mapping[1] == (0, 2)
+        assert mapping[5] == (3, 6)
+        assert list(mapping) == [1, 3, 5]
+        assert len(mapping) == 3
+        assert 2 not in mapping
+        assert mapping.get(7) is None
+        assert mapping.get('1') is None
+
+    def test_range(self):
+        keys = np.array([1, 2, 3, 4], dtype=np.uint32)
+        mapping = RowMapping(keys, lambda s, e: s, lo=1, hi=3)
+
+        assert dict(mapping) == {2: 1, 3: 2}
+        assert 1 not in mapping and 4 not in mapping
+
+
+class TestSections:
+    @pytest.fixture
+    def sections(self, tmp_path):
+        save_sections(SECTIONS, str(tmp_path / 'sections'), NAMES)
+        return load_sections(str(tmp_path / 'sections'))
+
+    def test_same_as_dicts(self, sections):
+        names = sections.pop('names')
+        assert sections == SECTIONS
+        assert isinstance(names[''].pop('names'), RowMapping)
+
+    def test_headings(self, sections):
+        """Headings keep their type, and missing headings can be looked up."""
+        assert sections['sec1'][10][2] == 13
+        assert sections['sec1'][10].get('2') is None
+        assert sections['sec2'][11][1]['a'] == 4
+        assert sections['sec2'][11][1][None] == 5
+        assert sections['sec2'].get(12, {}).get(1) is None
+
+    def test_sequence(self, sections):
+        assert sections['seqFromNode'][13] == (1, 2)
+        assert sections['nodeFromSeq'][(2, 1, 2)] == 5
+        assert (3,) not in sections['nodeFromSeq']
+
+    def test_names(self, sections):
+        names = sections['names']
+        assert names['nl']['languageEnglish'] == 'Dutch'
+        assert dict(names['']['names']) == {10: 'Genesis', 11: 'Exodus'}
+        assert names['']['nodes'][('book', 'Exodus')] == 11
+        assert names['']['nodes'].get(('chapter', 'Exodus')) is None
+        # like a dict built from the names, the last node of a name wins
+        assert dict(names['nl']['nodes']) == {('book', 'Genesis'): 11}
+
+    def test_without_names(self, tmp_path):
+        save_sections(SECTIONS, str(tmp_path / 'sections'))
+        assert 'names' not in load_sections(str(tmp_path / 'sections'))
+
+    def test_missing(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            load_sections(str(tmp_path / 'sections'))
+
+
+class TestStructure:
+    @pytest.fixture
+    def structure(self, tmp_path):
+        save_structure(STRUCTURE, str(tmp_path / 'structure'))
+        return load_structure(str(tmp_path / 'structure'))
+
+    def test_same_as_dicts(self, structure):
+        assert structure == STRUCTURE
+
+    def test_lookups(self, structure):
+        (headingFromNode, nodeFromHeading, multiple, top, up, down) = structure
+        assert headingFromNode[5] == (('part', 1), ('chapter', 'one'))
+        assert nodeFromHeading[(('part', 1), ('chapter', 'two'))] == 7
+        assert nodeFromHeading.get((('part', '1'),)) is None
+        assert multiple[H[7]] == (7, 6)
+        assert top == (4, 8)
+        assert up.get(8) is None
+        assert down[4] == (5, 7, 6)
+
+    def test_wide_nodes(self, tmp_path):
+        """Nodes beyond 32 bits are stored in 64 bits, others in 32."""
+        wide = 2**32 + 8
+        heads = {**H, wide: (('part', 3),)}
+        structure = (
+            heads,
+            {key: n for (n, key) in heads.items()},
+            {},
+            (4, 8, wide),
+            {},
+            {},
+        )
+        save_structure(structure, str(tmp_path / 'structure'))
+
+        assert load_structure(str(tmp_path / 'structure')) == structure
+        assert np.load(tmp_path / 'structure_top.npy').dtype == np.uint64
+        assert np.load(tmp_path / 'structure_sorter.npy').dtype == np.uint32
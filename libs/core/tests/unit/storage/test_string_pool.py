@@ -1,9 +1,17 @@
 """Tests for string pool management."""
 
+import numpy as np
 import pytest
 import tempfile
 from pathlib import Path
-from cfabric.storage.string_pool import StringPool, IntFeatureArray, MISSING_STR_INDEX
+from cfabric.storage.string_pool import (
+    StringPool,
+    StringTable,
+    IntFeatureArray,
+    MISSING_STR_INDEX,
+    compact_layout,
+    narrow_int_dtype,
+)
 
 
 class TestStringPool:
@@ -19,6 +27,30 @@ class TestStringPool:
         assert pool.get(3) == 'world'
         assert pool.get(5) == 'hello'  # deduped
 
+    def test_get_decodes_once(self, tmp_path):
+        """get keeps the strings it decoded, one per string of the pool."""
+        data = {1: 'λόγος', 2: 'word', 3: 'λόγος', 4: ''}
+        StringPool.from_dict(data, max_node=4).save(str(tmp_path / 'f'))
+        pool = StringPool.load(str(tmp_path / 'f'))
+
+        assert [pool.get(n) for n in (1, 3, 4, 1)] == ['λόγος', 'λόγος', '', 'λόγος']
+        assert sorted(pool._decoded.values()) == ['', 'λόγος']
+
+        pool.decode_all()
+        assert len(pool._decoded) == 3
+        assert pool.to_dict() == data
+        assert [pool.get(n) for n in range(5)] == [None, 'λόγος', 'word', 'λόγος', '']
+
+    def test_from_codes(self):
+        """StringPool can be built from nodes and indices into sorted strings."""
+        nodes = np.array([1, 3, 5], dtype=np.uint32)
+        codes = np.array([0, 1, 0], dtype=np.uint32)
+        pool = StringPool.from_codes(nodes, codes, ['hello', 'world'], max_node=6)
+
+        expected = StringPool.from_dict({1: 'hello', 3: 'world', 5: 'hello'}, 6)
+        assert np.array_equal(pool.indices, expected.indices)
+        assert pool.to_dict() == expected.to_dict()
+
     def test_deduplication(self):
         """StringPool deduplicates string values."""
         data = {1: 'same', 2: 'same', 3: 'same'}
@@ -59,6 +91,76 @@ class TestStringPool:
         assert pool.get(1000000) is None
 
 
+    def test_load_legacy_pickled_strings(self):
+        """StringPool still loads the older pickled _strings.npy layout."""
+        import numpy as np
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / 'test'
+            strings = np.array(['hello', 'world'], dtype=object)
+            np.save(f"{path}_strings.npy", strings, allow_pickle=True)
+            np.save(f"{path}_idx.npy", np.array([1, MISSING_STR_INDEX, 0], dtype='uint32'))
+
+            loaded = StringPool.load(str(path))
+            assert loaded.get(1) == 'world'
+            assert loaded.get(2) is None
+            assert loaded.get_value_index('hello') == 0
+
+
+class TestStringTable:
+    """Test StringTable blob storage."""
+
+    def test_from_strings_roundtrip(self):
+        """Strings come back unchanged, including non-ASCII text."""
+        strings = ['בְּרֵאשִׁית', '', 'λόγος', 'word']
+        table = StringTable.from_strings(strings)
+
+        assert len(table) == 4
+        assert list(table) == strings
+        assert table[0] == 'בְּרֵאשִׁית'
+        assert table[-1] == 'word'
+
+    def test_array_indexing(self):
+        """Indexing with an array returns an object array of strings."""
+        import numpy as np
+
+        table = StringTable.from_strings(['a', 'b', 'c'])
+
+        assert list(table[np.array([2, 0])]) == ['c', 'a']
+
+    def test_index_out_of_range(self):
+        table = StringTable.from_strings(['a'])
+
+        with pytest.raises(IndexError):
+            table[1]
+
+    def test_index_lookup_with_sorter(self):
+        """index() finds strings by binary search over the sorter."""
+        table = StringTable.from_strings(['zeta', 'ἀρχή', 'alpha', ''])
+        sorter = table.argsort()
+
+        assert [table[int(i)] for i in sorter] == sorted(table)
+        for i, value in enumerate(table):
+            assert table.index(value, sorter) == i
+        assert table.index('beta', sorter) is None
+
+    def test_save_load_is_memory_mapped(self):
+        """Loaded tables keep the blob and offsets memory-mapped."""
+        import numpy as np
+
+        table = StringTable.from_strings(['hello', 'world'])
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / 'test'
+            table.save(str(path))
+
+            loaded = StringTable.load(str(path))
+            assert isinstance(loaded.blob, np.memmap)
+            assert isinstance(loaded.offsets, np.memmap)
+            assert list(loaded) == ['hello', 'world']
+            del loaded
+
+
 class TestIntFeatureArray:
     """Test IntFeatureArray for integer features."""
 
@@ -72,6 +174,19 @@ class TestIntFeatureArray:
         assert arr.get(3) == 30
         assert arr.get(5) == 50
 
+    def test_from_arrays(self):
+        """IntFeatureArray can be built from arrays of nodes and values."""
+        nodes = np.array([1, 3, 5], dtype=np.uint32)
+        values = np.array([10, -30, 50], dtype=np.int64)
+        data = {1: 10, 3: -30, 5: 50}
+
+        for narrow in (False, True):
+            arr = IntFeatureArray.from_arrays(nodes, values, 6, narrow=narrow)
+            expected = IntFeatureArray.from_dict(data, 6, narrow=narrow)
+            assert arr.values.dtype == expected.values.dtype
+            assert arr.missing == expected.missing
+            assert np.array_equal(arr.values, expected.values)
+
     def test_out_of_bounds_returns_none(self):
         """IntFeatureArray returns None for out-of-bounds nodes."""
         data = {1: 10, 2: 20}
@@ -196,6 +311,65 @@ class TestStringPoolVectorized:
 
         assert result is None
 
+    def test_get_value_index_unsorted_strings(self):
+        """get_value_index works for pools whose strings are not sorted."""
+        import numpy as np
+
+        strings = np.array(['zeta', 'alpha', 'mu'], dtype=object)
+        indices = np.array([0, 1, 2, MISSING_STR_INDEX], dtype='uint32')
+        pool = StringPool(strings, indices)
+
+        assert pool.get_value_index('zeta') == 0
+        assert pool.get_value_index('alpha') == 1
+        assert pool.get_value_index('mu') == 2
+        assert pool.get_value_index('beta') is None
+        assert pool.get_value_index('zzz') is None
+
+    def test_get_value_indices_drops_unknown(self):
+        """get_value_indices resolves known values and drops the rest."""
+        data = {1: 'verb', 2: 'noun', 3: 'adj'}
+        pool = StringPool.from_dict(data, max_node=3)
+
+        result = pool.get_value_indices(['noun', 'missing', 'verb', 5])
+
+        assert sorted(pool.strings[i] for i in result) == ['noun', 'verb']
+
+    def test_get_value_indices_hash_collisions(self, monkeypatch):
+        """Strings with the same hash are told apart by their bytes."""
+        import cfabric.storage.string_pool as string_pool
+
+        monkeypatch.setattr(string_pool, 'value_hash', lambda encoded: len(encoded))
+        pool = StringPool.from_dict({1: 'ab', 2: 'cd', 3: 'xyz'}, max_node=3)
+
+        result = pool.get_value_indices(['cd', 'ef', 'xyz', 'ab'])
+
+        assert [pool.strings[i] for i in result] == ['cd', 'xyz', 'ab']
+
+    def test_hash_index_persisted(self, tmp_path):
+        """The hash index is saved alongside the pool and reused on load."""
+        pool = StringPool.from_dict({1: 'b', 2: 'a', 3: 'c'}, max_node=3)
+        pool.save(str(tmp_path / 'test'))
+
+        assert (tmp_path / 'test_hashes.npy').exists()
+        loaded = StringPool.load(str(tmp_path / 'test'))
+        assert loaded._hash_index is not None
+        assert loaded.get_value_indices(['c', 'a']).tolist() == [2, 0]
+
+    def test_sorter_persisted(self):
+        """The value sorter is saved alongside the pool and reused on load."""
+        strings_data = {1: 'b', 2: 'a', 3: 'c'}
+        pool = StringPool.from_dict(strings_data, max_node=3)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / 'test'
+            pool.save(str(path))
+
+            assert (Path(tmpdir) / 'test_sorter.npy').exists()
+            loaded = StringPool.load(str(path))
+            assert loaded._sorter is not None
+            assert loaded.get_value_index('c') == pool.get_value_index('c')
+            assert set(loaded.filter_by_values([1, 2, 3], {'a', 'c'})) == {2, 3}
+
 
 class TestIntFeatureArrayVectorized:
     """Tests for vectorized filtering operations on IntFeatureArray."""
@@ -276,3 +450,165 @@ class TestIntFeatureArrayVectorized:
         result = arr.filter_missing_value([1, 2, 3, 4, 5, 6])
 
         assert set(result) == {2, 4, 6}
+
+
+class TestDtypeNarrowing:
+    """Tests for narrowed value and index arrays."""
+
+    @pytest.mark.parametrize("low,high,dtype,missing", [
+        (0, 200, 'uint8', 255),
+        (-5, 100, 'int8', -128),
+        (0, 300, 'uint16', 65535),
+        (-1, 1000, 'int16', -32768),
+        (0, 100_000, 'int32', -1),
+        (-1, 100_000, 'int32', -2**31),
+        (0, 2**40, 'int64', -2**63),
+        (1, 0, 'uint8', 255),
+    ])
+    def test_narrow_int_dtype(self, low, high, dtype, missing):
+        assert narrow_int_dtype(low, high) == (np.dtype(dtype), missing)
+
+    def test_int_from_dict_narrow(self):
+        arr = IntFeatureArray.from_dict({1: 0, 2: 200, 4: 7}, max_node=5, narrow=True)
+
+        assert arr.values.dtype == np.uint8
+        assert arr.missing == 255
+        assert [arr.get(n) for n in range(1, 6)] == [0, 200, None, 7, None]
+        assert arr.get_frequency_counts() == {0: 1, 7: 1, 200: 1}
+        assert list(arr.filter_less_than(range(1, 6), 10)) == [1, 4]
+        assert list(arr.filter_greater_than(range(1, 6), -1)) == [1, 2, 4]
+        assert list(arr.filter_by_value(range(1, 6), 300)) == []
+        assert list(arr.filter_missing_value(range(1, 6))) == [3, 5]
+
+    def test_int_narrow_keeps_minus_one(self):
+        """-1 is a regular value once the sentinel moves out of the way."""
+        arr = IntFeatureArray.from_dict({1: -1, 2: 3}, max_node=3, narrow=True)
+
+        assert arr.values.dtype == np.int8
+        assert [arr.get(n) for n in (1, 2, 3)] == [-1, 3, None]
+        assert list(arr.filter_has_value([1, 2, 3])) == [1, 2]
+
+    def test_int_load_with_missing(self, tmp_path):
+        arr = IntFeatureArray.from_dict({2: 9}, max_node=3, narrow=True)
+        arr.save(str(tmp_path / 'f.npy'))
+
+        loaded = IntFeatureArray.load(str(tmp_path / 'f.npy'), missing=arr.missing)
+        assert loaded.to_dict() == {2: 9}
+
+    def test_string_pool_narrow(self, tmp_path):
+        pool = StringPool.from_dict({1: 'b', 2: 'a', 4: 'b'}, max_node=5).narrow()
+
+        assert pool.indices.dtype == np.uint8
+        assert pool.missing == 255
+        assert [pool.get(n) for n in range(1, 6)] == ['b', 'a', None, 'b', None]
+        assert list(pool.filter_by_values(range(1, 6), {'b'})) == [1, 4]
+        assert list(pool.filter_missing_value(range(1, 6))) == [3, 5]
+        assert pool.get_frequency_counts() == {'a': 1, 'b': 2}
+
+        pool.save(str(tmp_path / 'pos'))
+        loaded = StringPool.load(str(tmp_path / 'pos'))
+        assert loaded.missing == 255
+        assert loaded.to_dict() == {1: 'b', 2: 'a', 4: 'b'}
+
+    def test_string_pool_wide_tables_stay_uint16(self):
+        data = {n: f'v{n}' for n in range(1, 301)}
+        pool = StringPool.from_dict(data, max_node=300).narrow()
+
+        assert pool.indices.dtype == np.uint16
+        assert pool.get(300) == 'v300'
+
+
+class TestCompactLayout:
+    """Tests for range and sparse storage of features."""
+
+    def test_compact_layout_range(self):
+        data = np.array([255, 255, 3, 255, 4, 255], dtype=np.uint8)
+        values, offset, nodes = compact_layout(data, 255)
+
+        assert (values.tolist(), offset, nodes) == ([3, 255, 4], 2, None)
+
+    def test_compact_layout_sparse(self):
+        data = np.full(1000, -1, dtype=np.int32)
+        data[[10, 500, 990]] = [1, 2, 3]
+        values, offset, nodes = compact_layout(data, -1)
+
+        assert values.tolist() == [1, 2, 3]
+        assert nodes.tolist() == [11, 501, 991]
+
+    def test_compact_layout_empty(self):
+        values, offset, nodes = compact_layout(np.full(4, -1, dtype=np.int32), -1)
+        assert (len(values), offset, nodes) == (0, 0, None)
+
+    def test_int_range_layout(self, tmp_path):
+        arr = IntFeatureArray.from_dict({6: 1, 7: 2}, max_node=8, narrow=True).compact()
+
+        assert (arr.layout, arr.offset, len(arr.values)) == ('range', 5, 2)
+        assert len(arr) == 7
+        assert list(arr.covered()) == [6, 7]
+        assert [arr.get(n) for n in range(0, 10)] == [None] * 6 + [1, 2, None, None]
+        assert arr.to_dict() == {6: 1, 7: 2}
+        assert list(arr.filter_by_value(range(1, 9), 2)) == [7]
+        assert list(arr.filter_greater_than([1, 6, 7, 8], 0)) == [6, 7]
+        assert list(arr.filter_missing_value(range(1, 9))) == [1, 2, 3, 4, 5, 8]
+
+        arr.save(str(tmp_path / 'f.npy'))
+        loaded = IntFeatureArray.load(
+            str(tmp_path / 'f.npy'), missing=arr.missing, offset=arr.offset
+        )
+        assert loaded.to_dict() == {6: 1, 7: 2}
+
+    def test_int_sparse_layout(self, tmp_path):
+        data = {3: 10, 400: 20, 900: 10}
+        arr = IntFeatureArray.from_dict(data, max_node=1000, narrow=True).compact()
+
+        assert arr.layout == 'sparse'
+        assert list(arr.covered()) == [3, 400, 900]
+        assert [arr.get(n) for n in (2, 3, 400, 401, 900, 1000)] == [
+            None, 10, 20, None, 10, None,
+        ]
+        assert list(arr.filter_by_values(range(1, 1001), {10})) == [3, 900]
+        assert list(arr.filter_has_value([1, 3, 400, 899])) == [3, 400]
+        assert len(arr.filter_missing_value(range(1, 1001))) == 997
+        assert arr.get_frequency_counts() == {10: 2, 20: 1}
+
+        arr.save(str(tmp_path / 'f.npy'))
+        assert (tmp_path / 'f_nodes.npy').exists()
+        loaded = IntFeatureArray.load(str(tmp_path / 'f.npy'), missing=arr.missing)
+        assert loaded.layout == 'sparse'
+        assert loaded.to_dict() == data
+
+    @pytest.mark.parametrize('data, layout', [
+        ({1: 5, 2: 6, 3: 7}, 'dense'),
+        ({6: 5, 7: 6, 8: 7}, 'range'),
+        ({6: 5, 400: 6, 900: 7}, 'sparse'),
+    ])
+    def test_get_per_layout(self, data, layout):
+        arr = IntFeatureArray.from_dict(data, max_node=1000, narrow=True)
+        arr = arr if layout == 'dense' else arr.compact()
+        pool = StringPool.from_dict(
+            {n: str(v) for (n, v) in data.items()}, max_node=1000
+        )
+        pool = pool if layout == 'dense' else pool.compact()
+
+        assert (arr.layout, pool.layout) == (layout, layout)
+        for n in (0, -1, 1001, 5, 899):
+            assert arr.get(n) is None and pool.get(n) is None
+        for n, v in data.items():
+            assert type(arr.get(np.int64(n))) is int
+            assert (arr.get(n), pool.get(np.uint32(n))) == (v, str(v))
+
+    def test_string_pool_layouts(self, tmp_path):
+        ranged = StringPool.from_dict({8: 'a', 9: 'b'}, max_node=10).narrow().compact()
+        assert (ranged.layout, ranged.offset) == ('range', 7)
+        assert list(ranged.filter_by_value(range(1, 11), 'b')) == [9]
+
+        data = {5: 'x', 700: 'y'}
+        sparse = StringPool.from_dict(data, max_node=1000).narrow().compact()
+        assert sparse.layout == 'sparse'
+        assert sparse.get(700) == 'y' and sparse.get(6) is None
+        assert list(sparse.filter_missing_value([5, 6, 700])) == [6]
+
+        sparse.save(str(tmp_path / 'f'))
+        loaded = StringPool.load(str(tmp_path / 'f'))
+        assert loaded.to_dict() == data
+        assert np.array_equal(loaded.to_dense(), sparse.narrow().to_dense())